@@ -83,6 +83,7 @@ from bims.models import (
     NonBiodiversityLayer,
     UserBoundary,
     SearchProcess,
+    SearchView,
     ReferenceLink,
     Endemism,
     Taxonomy,
@@ -1182,6 +1183,22 @@ class SearchProcessAdmin(admin.ModelAdmin):
             super().delete_queryset(request, queryset)
 
 
+class SearchViewAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'created_at',
+        'last_used_at',
+        'hit_count')
+    ordering = ('-last_used_at',)
+
+    def delete_model(self, request, obj):
+        obj.drop()
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.drop()
+
+
 class PageviewAdmin(admin.ModelAdmin):
     date_hierarchy = 'view_time'
 
@@ -2983,6 +3000,7 @@ admin.site.register(Permission, PermissionAdmin)
 
 admin.site.register(UserBoundary, UserBoundaryAdmin)
 admin.site.register(SearchProcess, SearchProcessAdmin)
+admin.site.register(SearchView, SearchViewAdmin)
 admin.site.register(DataSource, DataSourceAdmin)
 
 admin.site.register(ReferenceLink, ReferenceLinkAdmin)
@@ -157,6 +157,8 @@ class SiteSettingAdmin(PreferencesAdmin):
                 "enable_download_request_approval",
                 "max_download_records",
                 "download_request_expiry_months",
+                "max_search_views",
+                "search_view_expiry_days",
                 "show_module_summary_on_dashboard",
                 "show_general_summary_on_landing",
                 "enable_remove_all_occurrences_tool",
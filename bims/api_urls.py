@@ -50,7 +50,11 @@ from bims.api_views.reference_category import ReferenceCategoryList
 from bims.api_views.category_filter import CategoryList
 from bims.api_views.reference_list import ReferenceList, ReferenceEntryList
 from bims.api_views.search import CollectionSearchAPIView
-from bims.api_views.thermal_data import ThermalDataApiView, WaterTemperatureThresholdApiView
+from bims.api_views.thermal_data import (
+    ThermalDataApiView,
+    WaterTemperatureIndicatorBatchApiView,
+    WaterTemperatureThresholdApiView
+)
 from bims.api_views.validate_object import (
     ValidateSite,
     ValidateTaxon
@@ -378,6 +382,9 @@ urlpatterns = [
     re_path(r'^thermal-data/$',
         ThermalDataApiView.as_view(),
         ),
+    re_path(r'^thermal-indicators/$',
+        WaterTemperatureIndicatorBatchApiView.as_view(),
+        name='thermal-indicators'),
     re_path(r'^water-temperature-threshold/$',
         WaterTemperatureThresholdApiView.as_view(),
         ),
@@ -4,6 +4,7 @@ from django.http.response import HttpResponse, Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from bims.models.boundary import Boundary
+from bims.models.boundary_geometry import with_display_geometry
 from bims.serializers.boundary_serializer import (
     BoundaryGeojsonSerializer
 )
@@ -48,5 +49,13 @@ class BoundaryGeojson(APIView):
         ids = request.GET.get('ids', [])
         ids = json.loads(ids)
         boundaries = Boundary.objects.filter(id__in=ids)
+        # Geometries simplified for the zoom level the map is at
+        zoom = request.GET.get('zoom', '')
+        if zoom:
+            try:
+                boundaries = with_display_geometry(
+                    boundaries, int(float(zoom)))
+            except ValueError:
+                pass
         return Response(
             BoundaryGeojsonSerializer(boundaries, many=True).data)
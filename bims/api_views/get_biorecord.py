@@ -137,7 +137,7 @@ class BioCollectionSummary(APIView):
             list(records_over_time.values_list('count', flat=True))
         )
         response_data['records_per_area'] = list(records_per_area)
-        response_data['sites_raw_query'] = search_process.process_id
+        response_data['sites_raw_query'] = search_process.view_name
         response_data['process_id'] = search_process.process_id
         response_data['extent'] = search.extent()
         response_data['origin_choices_list'] = (
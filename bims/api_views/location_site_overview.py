@@ -27,6 +27,7 @@ from bims.utils.api_view import BimsApiView
 from bims.utils.search_process import get_or_create_search_process
 from sass.models.site_visit_taxon import SiteVisitTaxon
 from bims.models.location_site import LocationSite
+from bims.models.occurrence_rollup import occurrence_count
 from bims.serializers.location_site_detail_serializer import (
     LocationSiteDetailSerializer,
 )
@@ -60,7 +61,9 @@ class LocationSiteOverviewData(object):
 
         search = CollectionSearch(
             self.search_filters)
-        collection_results = search.process_search()
+        rollups = search.rollup_records()
+        if rollups is None:
+            collection_results = search.process_search()
 
         biodiversity_data = OrderedDict()
 
@@ -80,7 +83,11 @@ class LocationSiteOverviewData(object):
             group_data[self.MODULE] = group.id
             biodiversity_data[group.name] = group_data
 
-            group_records = collection_results.filter(module_group=group)
+            if rollups is not None:
+                group_records = rollups.filter(module_group=group)
+            else:
+                group_records = collection_results.filter(
+                    module_group=group)
             group_records = group_records.annotate(
                 endemism_name=Case(
                     When(taxonomy__endemism__isnull=False, then=F('taxonomy__endemism__name')),
@@ -101,11 +108,18 @@ class LocationSiteOverviewData(object):
                     output_field=CharField()
                 )
             )
-            group_records_count = group_records.count()
+            if rollups is not None:
+                group_records_count = group_records.total_occurrences()
+            else:
+                group_records_count = group_records.count()
 
             if group_records_count > 0 and not self.is_sass_exist:
                 try:
-                    if isinstance(
+                    if rollups is not None:
+                        self.is_sass_exist = group_records.filter(
+                            sass_occurrences__gt=0
+                        ).exists()
+                    elif isinstance(
                             collection_results.first(),
                             SiteVisitTaxon):
                         self.is_sass_exist = group_records.filter(
@@ -130,13 +144,13 @@ class LocationSiteOverviewData(object):
 
             # Endemism counts
             endemism_counts = group_records.values('endemism_name').annotate(
-                count=Count('endemism_name')
+                count=occurrence_count(group_records, 'endemism_name')
             ).order_by('endemism_name')
             group_data[self.GROUP_ENDEMISM] = list(endemism_counts)
 
             # Origin counts
             group_origins = group_records.values('origin_name').annotate(
-                count=Count('origin_name')
+                count=occurrence_count(group_records, 'origin_name')
             ).order_by('origin_name')
             if group_origins:
                 for group_origin in group_origins:
@@ -148,7 +162,7 @@ class LocationSiteOverviewData(object):
                 taxonomy__iucn_status__national=False
             ).values('iucn_category').annotate(
                 colour=F('taxonomy__iucn_status__colour'),
-                count=Count('iucn_category')
+                count=occurrence_count(group_records, 'iucn_category')
             ).order_by('iucn_category')
             if all_cons_status:
                 category = dict(IUCNStatus.CATEGORY_CHOICES)
@@ -6,6 +6,10 @@ from rest_framework.response import Response
 from rest_framework.permissions import BasePermission
 from rest_framework import status
 from bims.models.location_site import LocationSite
+from bims.models.occurrence_rollup import (
+    OccurrenceRollup,
+    refresh_occurrence_rollups
+)
 from bims.models.search_process import SearchProcess
 
 
@@ -54,7 +58,9 @@ class MergeSites(APIView):
                 pass
 
             for model in apps.get_models():
-                if model._meta.label == 'bims.LocationContext':
+                # Rollups are rebuilt below from the moved records
+                if model._meta.label == 'bims.LocationContext' or (
+                        model is OccurrenceRollup):
                     continue
 
                 for field in model._meta.get_fields():
@@ -82,6 +88,12 @@ class MergeSites(APIView):
                         if cnt:
                             updated_counts[model._meta.label] = updated_counts.get(model._meta.label, 0) + cnt
 
+            # Bulk updates skip the post_save rebuild of the rollups
+            refresh_occurrence_rollups(
+                primary_site.id,
+                *[site.id for site in secondary_sites]
+            )
+
         return updated_counts
 
     def put(self, request, *args, **kwargs):
@@ -19,7 +19,9 @@ from preferences import preferences
 from bims.models.chemical_record import ChemicalRecord
 
 from bims.models.water_temperature import WaterTemperature
-from django.db.models import Q, Count, F, Value, Case, When, IntegerField
+from django.db.models import (
+    Q, Count, F, Value, Case, When, IntegerField, Sum
+)
 from django.db.models.functions import Concat
 from django.db.models.query import QuerySet
 from django.contrib.gis.db.models import Union, Extent
@@ -44,6 +46,9 @@ from bims.models import (
     TaxonGroup,
     TaxonOrigin
 )
+from bims.models.data_version import get_search_data_version
+from bims.models.occurrence_rollup import OccurrenceRollup
+from bims.models.search_document import search_collection_records
 from bims.tasks.search import search_task
 from sass.models import (
     SiteVisitTaxon
@@ -105,34 +110,39 @@ class CollectionSearchAPIView(BimsApiView):
             requester=self.request.user
         )
 
-        if self.is_cached():
+        data_version = get_search_data_version(parameters)
+
+        if self.is_cached() and not search_process.is_stale(data_version):
             results = search_process.get_file_if_exits()
             if results:
                 results['process_id'] = search_process.process_id
-                if 'sites' in results:
-                    results['total_unique_sites'] = len(results['sites'])
-                    results['sites'] = results['sites'][:MAX_PAGINATED_SITES]
-                if 'records' in results:
-                    results['total_unique_taxa'] = len(results['records'])
-                    results['records'] = (
-                        results['records'][:MAX_PAGINATED_RECORDS]
-                    )
-                results['sites_raw_query'] = search_process.process_id
+                results.pop('paginated_results', None)
+                sites, total_sites = search_process.get_result_page(
+                    'sites', 0, MAX_PAGINATED_SITES, results)
+                if sites is not None:
+                    results['total_unique_sites'] = total_sites
+                    results['sites'] = sites
+                records, total_records = search_process.get_result_page(
+                    'records', 0, MAX_PAGINATED_RECORDS, results)
+                if records is not None:
+                    results['total_unique_taxa'] = total_records
+                    results['records'] = records
+                results['sites_raw_query'] = search_process.view_name
+                search_process.touch_view()
                 return Response(results)
 
         # Create process id
         data_for_process_id = dict()
         data_for_process_id['search_uri'] = search_uri
         data_for_process_id['requester_id'] = request.user.id if not request.user.is_anonymous else 0
-        data_for_process_id['collections_total'] = (
-            BiologicalCollectionRecord.objects.all().count()
-        )
-        # Generate unique process id by search uri and total of collections
+        data_for_process_id['data_version'] = data_version
+        # Generate unique process id by search uri and version of the data
         process_id = hashlib.sha256(
             str(json.dumps(data_for_process_id, sort_keys=True)
                 ).encode('utf-8')
         ).hexdigest()
         search_process.set_process_id(process_id)
+        search_process.set_data_version(data_version)
         search_process.set_status(SEARCH_PROCESSING)
 
         if self.is_background_request():
@@ -660,46 +670,11 @@ class CollectionSearch(object):
                 'biologicalcollectionrecord__isnull': False
             })
         elif self.search_query:
-            bio = collection_records_by_site.filter(
-                Q(taxonomy__canonical_name__icontains=self.search_query) |
-                Q(taxonomy__accepted_taxonomy__canonical_name__icontains=self.search_query) |
-                Q(taxonomy__synonym__canonical_name__icontains=self.search_query)
+            bio = search_collection_records(
+                collection_records_by_site,
+                self.search_query
             )
 
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    original_species_name__icontains=self.search_query
-                )
-
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    taxonomy__scientific_name__icontains=self.search_query
-                )
-
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    site__site_code__icontains=self.search_query
-                )
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    site__legacy_river_name__icontains=self.search_query
-                )
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    site__river__name__icontains=self.search_query
-                )
-
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    taxonomy__vernacular_names__name__icontains=self.search_query
-                )
-
-            if not bio.exists():
-                bio = collection_records_by_site.filter(
-                    Q(taxonomy__tags__name__icontains=self.search_query) |
-                    Q(taxonomy__tags__slug__icontains=self.search_query)
-                ).distinct()
-
         if bio is None:
             bio = collection_records_by_site
         else:
@@ -846,26 +821,9 @@ class CollectionSearch(object):
         )
 
         if not self.bypass_data_type_checks:
-            is_sensitive_data_access_allowed = False
-            is_private_data_access_allowed = False
-            try:
-                requester = get_user_model().objects.get(id=requester_id)
-                user_groups = requester.groups.values_list('name', flat=True)
-                if 'SensitiveDataGroup' in user_groups:
-                    is_sensitive_data_access_allowed = True
-                if 'PrivateDataGroup' in user_groups:
-                    is_private_data_access_allowed = True
-            except get_user_model().DoesNotExist:
-                pass
-            accessible_data_types = ['public']
-            if is_sensitive_data_access_allowed:
-                accessible_data_types.append('sensitive')
-            if is_private_data_access_allowed:
-                accessible_data_types.append('private')
-
             bio = bio.filter(
                 Q(data_type='') |
-                Q(data_type__in=accessible_data_types)
+                Q(data_type__in=self.accessible_data_types(requester_id))
             )
 
         # Filter collection record with SASS Accreditation status
@@ -1089,6 +1047,141 @@ class CollectionSearch(object):
         self.collection_records = bio
         return self.collection_records
 
+    def accessible_data_types(self, requester_id):
+        """Data sharing levels of records the requester may see."""
+        accessible_data_types = ['public']
+        try:
+            requester = get_user_model().objects.get(id=requester_id)
+        except (get_user_model().DoesNotExist, ValueError, TypeError):
+            return accessible_data_types
+        user_groups = requester.groups.values_list('name', flat=True)
+        if 'SensitiveDataGroup' in user_groups:
+            accessible_data_types.append('sensitive')
+        if 'PrivateDataGroup' in user_groups:
+            accessible_data_types.append('private')
+        return accessible_data_types
+
+    def has_record_filters(self):
+        """
+        Whether the search filters records on anything else than sites
+        and modules, which the occurrence rollups can not answer.
+        """
+        return any([
+            self.search_query,
+            self.get_request_data('rank'),
+            self.is_sass_records_only(),
+            self.parse_request_json('validated'),
+            self.in_review,
+            self.invasions(),
+            self.categories,
+            self.taxon_tags,
+            self.decision_support_tools,
+            self.year_ranges,
+            self.months,
+            self.reference,
+            self.conservation_status,
+            self.source_collection,
+            self.dataset_keys,
+            self.endemic,
+            self.taxon_id,
+            self.boundary,
+            self.collector,
+            self.collectors,
+            self.reference_category,
+            (
+                preferences.SiteSetting.enable_ecosystem_type and
+                self.parameters.get('ecosystemType')
+            ),
+            self.spatial_filter,
+            self.advanced_spatial_filter,
+            self.user_boundary,
+            self.get_request_data('polygon'),
+            self.abiotic_data,
+            self.thermal_module,
+        ])
+
+    def rollup_records(self):
+        """
+        Occurrence rollups matching the search, or None when the search
+        has to run on the collection records.
+        """
+        if not self.site_ids and not self.modules:
+            return None
+        if self.has_record_filters():
+            return None
+        requester_id = self.parameters.get('requester', None)
+        today = datetime.date.today()
+        # Owners also see their own embargoed records
+        if requester_id and BiologicalCollectionRecord.objects.filter(
+                owner_id=requester_id,
+                end_embargo_date__gt=today).exists():
+            return None
+
+        rollups = OccurrenceRollup.objects.filter(
+            Q(end_embargo_date__lte=today) |
+            Q(end_embargo_date__isnull=True)
+        )
+        if not self.bypass_data_type_checks:
+            rollups = rollups.filter(
+                Q(data_type='') |
+                Q(data_type__in=self.accessible_data_types(requester_id))
+            )
+        if self.site_ids:
+            rollups = rollups.filter(
+                site__in=self.site_ids,
+                taxonomy__isnull=False
+            )
+        if self.modules:
+            rollups = rollups.filter(module_group__id__in=self.modules)
+        return rollups
+
+    def get_rollup_summary_data(self, rollups, order_by):
+        """Summary data of a search read from the occurrence rollups."""
+        def ordered(rows, survey_counts, key):
+            for row in rows:
+                row['total_survey'] = survey_counts.get(row[key], 0)
+            if order_by.endswith('total_survey'):
+                rows.sort(
+                    key=lambda row: row['total_survey'],
+                    reverse=order_by.startswith('-')
+                )
+            return rows
+
+        db_order_by = order_by if 'total_survey' not in order_by else 'name'
+        collections = ordered(list(
+            rollups.annotate(
+                name=F('taxonomy__canonical_name'),
+                taxon_id=F('taxonomy_id')
+            ).values(
+                'taxon_id', 'name'
+            ).annotate(
+                total=Sum('occurrences')
+            ).order_by(db_order_by)
+        ), rollups.survey_counts('taxonomy'), 'taxon_id')
+
+        sites = ordered(list(
+            rollups.annotate(
+                name=Case(
+                    When(site__site_code='',
+                         then=F('site__name')),
+                    default=F('site__site_code')
+                )
+            ).values(
+                'site_id', 'name'
+            ).annotate(
+                total=Sum('occurrences')
+            ).order_by(db_order_by)
+        ), rollups.survey_counts('site'), 'site_id')
+
+        return {
+            'duration': time.time() - self.start_time if self.start_time else 0,
+            'total_records': rollups.total_occurrences(),
+            'total_sites': len(sites),
+            'total_survey': len(rollups.survey_ids()),
+            'records': collections,
+            'sites': sites
+        }
+
     def search_sites_with_abiotic(self, site_ids: list):
         if not site_ids:
             site_ids = []
@@ -1137,6 +1230,11 @@ class CollectionSearch(object):
         if order_by not in valid_order:
             order_by = 'name'
 
+        # Counts of searches on sites and modules only come from the rollups
+        rollups = self.rollup_records()
+        if rollups is not None:
+            return self.get_rollup_summary_data(rollups, order_by)
+
         # Survey
         survey = (
             Survey.objects.filter(
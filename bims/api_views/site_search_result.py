@@ -1,6 +1,7 @@
+import math
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from bims.api_views.search import MAX_PAGINATED_SITES
 from bims.models.search_process import SearchProcess
 
@@ -32,24 +33,19 @@ class SiteSearchResult(APIView):
         if not search_process.finished:
             return self.error('Process not finished yet')
 
-        results = search_process.get_file_if_exits()
-        if not results:
+        # Only the requested page is read from the result store
+        site_results, total = search_process.get_result_page(
+            'sites', (page - 1) * MAX_PAGINATED_SITES, MAX_PAGINATED_SITES)
+        if site_results is None:
             return self.error('Results not found')
 
-        try:
-            site_results = results['sites']
-        except KeyError:
-            return self.error('File format error')
-
-        site_result_paginator = Paginator(site_results, MAX_PAGINATED_SITES)
-        try:
-            site_result_page = site_result_paginator.page(page)
-        except (EmptyPage, PageNotAnInteger) as e:
-            return self.error(e.message)
+        num_pages = max(int(math.ceil(total / MAX_PAGINATED_SITES)), 1)
+        if page > num_pages:
+            return self.error('That page contains no results')
 
         return Response({
-            'has_next': site_result_page.has_next(),
+            'has_next': page < num_pages,
             'current_page': int(page),
-            'num_pages': site_result_paginator.num_pages,
-            'data': site_result_page.object_list
+            'num_pages': num_pages,
+            'data': site_results
         })
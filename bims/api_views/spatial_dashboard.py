@@ -103,7 +103,7 @@ class SpatialDashboardMapApiView(SpatialDashboardBaseApiView):
             if existing_data:
                 return Response({
                     'extent': existing_data.get('extent', []),
-                    'sites_raw_query': existing.process_id
+                    'sites_raw_query': existing.view_name
                 })
         return super(SpatialDashboardMapApiView, self).get(request)
 
@@ -546,6 +546,8 @@ class TaxaList(APIView):
         validated = request.GET.get('validated', 'True')
         order = request.GET.get('o', '')
         author_names = request.GET.get('author', '')
+        class_name = request.GET.get('class', '')
+        order_name = request.GET.get('order', '')
         family_name = request.GET.get('family', '')
         genus_name = request.GET.get('genus', '')
         species_name = request.GET.get('species', '')
@@ -647,6 +649,14 @@ class TaxaList(APIView):
                 Q(accepted_taxonomy__canonical_name__icontains=taxon_name) |
                 Q(scientific_name__icontains=taxon_name)
             )
+        if class_name:
+            taxon_list = taxon_list.filter(
+                hierarchical_data__class_name__iexact=class_name
+            )
+        if order_name:
+            taxon_list = taxon_list.filter(
+                hierarchical_data__order_name__iexact=order_name
+            )
         if family_name:
             taxon_list = taxon_list.filter(
                 hierarchical_data__family_name__iexact=family_name
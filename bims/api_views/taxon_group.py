@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from bims.api_views.taxon_update import create_taxon_proposal
+from bims.models.occurrence_rollup import refresh_occurrence_rollups
 from bims.models import (
     TaxonGroup, Taxonomy, BiologicalCollectionRecord,
     TaxonExtraAttribute, TaxonomicGroupCategory,
@@ -38,9 +39,13 @@ def _remove_single_taxon(taxonomy, taxon_group, delete_if_orphaned=True):
                                belongs to any other group. Defaults to True.
     """
     taxon_group.taxonomies.remove(taxonomy)
-    BiologicalCollectionRecord.objects.filter(
+    records = BiologicalCollectionRecord.objects.filter(
         taxonomy=taxonomy
-    ).update(module_group=None)
+    )
+    records.update(module_group=None)
+    # Bulk updates skip the post_save rebuild of the rollups
+    refresh_occurrence_rollups(
+        *records.values_list('site_id', flat=True).distinct())
     if delete_if_orphaned and not TaxonGroupTaxonomy.objects.filter(taxonomy=taxonomy).exists():
         taxonomy.delete()
 
@@ -2,6 +2,7 @@ import ast
 import logging
 from datetime import datetime
 
+from django.db import connection
 from django.http import JsonResponse, HttpResponse, Http404
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
@@ -12,6 +13,11 @@ from bims.models.water_temperature import calculate_indicators, \
 
 logger = logging.getLogger('bims')
 
+# Batches up to this many site-years are calculated within the request
+BATCH_INDICATORS_INLINE_PAIRS = 20
+BATCH_INDICATORS_MAX_SITES = 200
+BATCH_INDICATORS_MAX_YEARS = 50
+
 
 def get_all_days_of_year(year):
     from datetime import date, timedelta
@@ -74,6 +80,70 @@ class ThermalDataApiView(APIView):
         )
 
 
+def _int_list(value):
+    return sorted(set(
+        int(item) for item in (value or '').split(',') if item.strip()
+    ))
+
+
+class WaterTemperatureIndicatorBatchApiView(APIView):
+    """
+    Indicators of many sites over many years, as one list per column with
+    an entry per site-year.
+    Query parameters:
+        site-id: comma separated site ids
+        year: comma separated years, or start-year and end-year
+    """
+
+    def get(self, request, *args):
+        from bims.cache import get_cache
+        from bims.models.water_temperature import batch_indicators_cache_key
+        from bims.tasks.water_temperature import (
+            calculate_water_temperature_indicators
+        )
+        try:
+            site_ids = _int_list(request.GET.get('site-id'))
+            years = _int_list(request.GET.get('year'))
+            start_year = request.GET.get('start-year')
+            end_year = request.GET.get('end-year')
+            if not years and start_year and end_year:
+                years = list(range(int(start_year), int(end_year) + 1))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'site-id and year must be integers'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        if not site_ids or not years:
+            return JsonResponse(
+                {'error': 'site-id and year are required'},
+                status=status.HTTP_400_BAD_REQUEST)
+        if (
+                len(site_ids) > BATCH_INDICATORS_MAX_SITES or
+                len(years) > BATCH_INDICATORS_MAX_YEARS
+        ):
+            return JsonResponse(
+                {'error': 'Too many sites or years requested'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        schema_name = str(connection.schema_name)
+        cache_key = batch_indicators_cache_key(schema_name, site_ids, years)
+        columns = get_cache(cache_key)
+        if columns is None:
+            if len(site_ids) * len(years) <= BATCH_INDICATORS_INLINE_PAIRS:
+                calculate_water_temperature_indicators(
+                    schema_name, site_ids, years)
+                columns = get_cache(cache_key)
+            else:
+                calculate_water_temperature_indicators.delay(
+                    schema_name, site_ids, years)
+        if columns is None:
+            return JsonResponse({'status': 'processing'})
+        return JsonResponse({
+            'status': 'finished',
+            'data': columns
+        })
+
+
 class WaterTemperatureThresholdApiView(APIView):
 
     def get(self, request, *args):
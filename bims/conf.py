@@ -56,6 +56,90 @@ TRACK_QUERY_STRING = getattr(
         'TRACK_QUERY_STRING',
         False)
 
+# Request logs and pageviews are written in batches of this many events,
+# or once the oldest buffered event is this many seconds old
+LOG_BUFFER_SIZE = getattr(
+        django_settings,
+        'LOG_BUFFER_SIZE',
+        50)
+
+LOG_BUFFER_SECONDS = getattr(
+        django_settings,
+        'LOG_BUFFER_SECONDS',
+        30)
+
+# Autocomplete queries of one request stop after this many milliseconds,
+# suggestions found until then are returned
+AUTOCOMPLETE_BUDGET_MS = getattr(
+        django_settings,
+        'AUTOCOMPLETE_BUDGET_MS',
+        500)
+
+# Suggestions for queries up to this many characters are cached
+AUTOCOMPLETE_CACHE_PREFIX_LENGTH = getattr(
+        django_settings,
+        'AUTOCOMPLETE_CACHE_PREFIX_LENGTH',
+        4)
+
+AUTOCOMPLETE_CACHE_SECONDS = getattr(
+        django_settings,
+        'AUTOCOMPLETE_CACHE_SECONDS',
+        60 * 60)
+
+# Map proxy: upstream timeout in seconds and pooled connections per host
+PROXY_TIMEOUT = getattr(
+        django_settings,
+        'PROXY_TIMEOUT',
+        5)
+
+PROXY_POOL_SIZE = getattr(
+        django_settings,
+        'PROXY_POOL_SIZE',
+        20)
+
+# Cache alias of the proxied tiles, e.g. a file based cache
+PROXY_CACHE_ALIAS = getattr(
+        django_settings,
+        'PROXY_CACHE_ALIAS',
+        'default')
+
+PROXY_CACHE_SECONDS = getattr(
+        django_settings,
+        'PROXY_CACHE_SECONDS',
+        60 * 60 * 24)
+
+# Larger responses are streamed without being cached
+PROXY_CACHE_MAX_SIZE = getattr(
+        django_settings,
+        'PROXY_CACHE_MAX_SIZE',
+        512 * 1024)
+
+# Site vector tiles below this zoom merge the sites of each grid cell, the
+# cells being this many per tile side
+SITE_TILE_CLUSTER_MAX_ZOOM = getattr(
+        django_settings,
+        'SITE_TILE_CLUSTER_MAX_ZOOM',
+        12)
+
+SITE_TILE_CLUSTER_CELLS = getattr(
+        django_settings,
+        'SITE_TILE_CLUSTER_CELLS',
+        16)
+
+# Boundaries drawn from each zoom level (first item) are simplified with
+# the tolerance in degrees (second item), None draws the full geometry
+BOUNDARY_SIMPLIFY_ZOOMS = getattr(
+        django_settings,
+        'BOUNDARY_SIMPLIFY_ZOOMS',
+        ((0, 0.02), (6, 0.002), (10, 0.0001), (14, None)))
+
+# Boundaries are cut into pieces of at most this many vertices for
+# intersection tests
+BOUNDARY_SUBDIVIDE_VERTICES = getattr(
+        django_settings,
+        'BOUNDARY_SUBDIVIDE_VERTICES',
+        256)
+
 # ---------------------------------------------------------------------------
 # FIPS site-code generator – spatial layer configuration
 # These mirror the Django settings of the same name (see project.py) so that
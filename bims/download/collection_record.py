@@ -1,11 +1,11 @@
 import logging
 import csv
+import json
 import os
 import time
 import gc
-import tempfile
-import shutil
 
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
 from bims.models.download_request import DownloadRequest
@@ -13,6 +13,8 @@ from bims.scripts.collection_csv_keys import PARK_OR_MPA_NAME, END_EMBARGO_DATE
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_SUFFIX = '.checkpoint'
+
 
 def queryset_iterator(qs, batch_size=500, gc_collect=True):
     iterator = (
@@ -57,71 +59,6 @@ def format_header(header: str) -> str:
     return header
 
 
-def write_to_csv(headers: list,
-                 rows: list,
-                 path_file: str,
-                 current_csv_row: int = 0):
-    fmt_map = {h: format_header(h) for h in headers}
-    incoming_fmt_headers = [fmt_map[h] for h in headers]
-
-    file_exists = os.path.exists(path_file) and os.path.getsize(path_file) > 0
-
-    if file_exists:
-        with open(path_file, newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            try:
-                existing_header = next(reader)
-            except StopIteration:
-                existing_header = []
-    else:
-        existing_header = []
-
-    existing_set = set(existing_header)
-    new_cols = [h for h in incoming_fmt_headers if h not in existing_set]
-    union_header = existing_header + new_cols if file_exists else incoming_fmt_headers
-
-    def row_to_union(row_dict):
-        out = {fmt_map[k]: v for k, v in row_dict.items() if k in fmt_map}
-        return [out.get(col, '') for col in union_header]
-
-    if not file_exists or new_cols:
-        tmp_path = f"{path_file}.tmp"
-        try:
-            with open(tmp_path, 'w', newline='', encoding='utf-8') as out_f:
-                w = csv.writer(out_f)
-                w.writerow(union_header)
-
-                if file_exists:
-                    with open(path_file, newline='', encoding='utf-8') as in_f:
-                        r = csv.DictReader(in_f)
-                        for old in r:
-                            w.writerow([old.get(col, '') for col in union_header])
-
-                for row in rows:
-                    current_csv_row += 1
-                    w.writerow(row_to_union(row))
-
-            os.replace(tmp_path, path_file)
-        except Exception as e:
-            logger.error(f"Rewrite failed: {e}")
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-            raise
-    else:
-        with open(path_file, 'a', newline='', encoding='utf-8', buffering=1) as f:
-            w = csv.writer(f)
-            for row in rows:
-                try:
-                    current_csv_row += 1
-                    w.writerow(row_to_union(row))
-                except Exception as e:
-                    logger.error(f"Error writing row {current_csv_row}: {e}")
-                    continue
-            f.flush()
-
-    return current_csv_row
-
-
 def count_csv_data_rows(path_file):
     """Return the number of data rows (excluding header) in an existing CSV."""
     if not os.path.exists(path_file) or os.path.getsize(path_file) == 0:
@@ -138,6 +75,200 @@ def count_csv_data_rows(path_file):
     return count
 
 
+def checkpoint_path(path_file):
+    return f'{path_file}{CHECKPOINT_SUFFIX}'
+
+
+def read_checkpoint(path_file):
+    """
+    Return the checkpoint of a partially written csv, or None when the
+    download has no usable checkpoint.
+    """
+    try:
+        with open(checkpoint_path(path_file), encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not all(key in checkpoint for key in (
+            'rows', 'last_pk', 'size', 'header')):
+        return None
+    return checkpoint
+
+
+def write_checkpoint(path_file, rows, last_pk, size, header):
+    """
+    Record how far a download got, written after each batch so a
+    resumed download can continue from last_pk without reading the csv.
+    """
+    tmp_path = f'{checkpoint_path(path_file)}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'rows': rows,
+            'last_pk': last_pk,
+            'size': size,
+            'header': header,
+        }, f)
+    os.replace(tmp_path, checkpoint_path(path_file))
+
+
+def remove_checkpoint(path_file):
+    try:
+        os.remove(checkpoint_path(path_file))
+    except OSError:
+        pass
+
+
+def _survey_and_chemical_headers(records):
+    """Survey data and chemical columns of the occurrence csv."""
+    from preferences import preferences
+    from bims.models.chem import Chem
+    from bims.models.chemical_record import ChemicalRecord
+    from bims.models.survey import SurveyData
+    from bims.serializers.bio_collection_serializer import (
+        CHEMICAL_UNIT_CODES,
+        SURVEY_DATA_HEADERS
+    )
+
+    headers = []
+    if preferences.SiteSetting.default_data_source == 'fbis':
+        for key in SURVEY_DATA_HEADERS:
+            if SurveyData.objects.filter(name__iexact=key).exists():
+                headers.append(key)
+        for chem_code in CHEMICAL_UNIT_CODES:
+            chem = Chem.objects.filter(
+                chem_code__iexact=chem_code
+            ).select_related('chem_unit').first()
+            if not chem:
+                continue
+            unit = chem.chem_unit.unit if chem.chem_unit else ''
+            headers.append(f'{chem.chem_description} ({unit})')
+    else:
+        chem_codes = ChemicalRecord.objects.filter(
+            Exists(records.filter(
+                site_id=OuterRef('survey__site_id'),
+                collection_date=OuterRef('survey__date')
+            ))
+        ).order_by().values_list('chem__chem_code', flat=True).distinct()
+        headers.extend(sorted(
+            set(code.upper() for code in chem_codes if code)))
+    return headers
+
+
+def _upload_template_headers(records, upload_template_headers):
+    """
+    Upload template columns of the occurrence csv, only exported when a
+    record has data for them.
+    """
+    from django.db.models import CharField, F, Func
+    from bims.serializers.bio_collection_serializer import (
+        additional_data_keys
+    )
+
+    data_keys = set(
+        records.filter(
+            additional_data__isnull=False
+        ).annotate(
+            data_type=Func(
+                F('additional_data'),
+                function='jsonb_typeof',
+                output_field=CharField()
+            )
+        ).filter(
+            data_type='object'
+        ).annotate(
+            data_key=Func(
+                F('additional_data'),
+                function='jsonb_object_keys',
+                output_field=CharField()
+            )
+        ).values_list('data_key', flat=True).distinct()
+    )
+    return [
+        tpl_header for tpl_header in upload_template_headers
+        if tpl_header.strip().lower().replace(' ', '_') != 'author(s)' and (
+            tpl_header == PARK_OR_MPA_NAME or data_keys.intersection(
+                additional_data_keys(tpl_header)))
+    ]
+
+
+def collection_records_header(
+        collection_results,
+        exclude_fields,
+        upload_template_headers):
+    """
+    Determine every column of the occurrence csv before any row is
+    serialized, so rows can be appended to the file with a fixed header.
+    Columns follow the order in which BioCollectionOneRowSerializer
+    adds them.
+    :param collection_results: queryset of the records to export
+    :param exclude_fields: serializer fields left out of the export
+    :param upload_template_headers: headers of the module upload templates
+    :return: list of serializer keys
+    """
+    from bims.models.location_context_group import LocationContextGroup
+    from bims.models.taxon_extra_attribute import TaxonExtraAttribute
+    from bims.models.taxon_group import TaxonGroup
+    from bims.serializers.bio_collection_serializer import (
+        ALGAE_HEADERS,
+        BioCollectionOneRowSerializer,
+        PARK_GROUP_KEYS,
+        SANPARK_PARK_NAME,
+        ordered_geocontext_groups
+    )
+
+    records = collection_results.order_by()
+    header = [
+        field for field in BioCollectionOneRowSerializer.Meta.fields
+        if field not in exclude_fields
+    ]
+
+    def _add(key):
+        if key not in header:
+            header.append(key)
+
+    if records.filter(module_group__name__icontains='algae').exists():
+        for key in ALGAE_HEADERS:
+            _add(key)
+    for key in _survey_and_chemical_headers(records):
+        _add(key)
+    for key in _upload_template_headers(records, upload_template_headers):
+        _add(key)
+    has_gbif = records.filter(source_collection='gbif').exists()
+
+    geocontext_groups = ordered_geocontext_groups()
+    for grp in geocontext_groups:
+        _add(grp['name'])
+    if PARK_OR_MPA_NAME in header and has_gbif and not any(
+            grp['name'] == SANPARK_PARK_NAME for grp in geocontext_groups):
+        if LocationContextGroup.objects.filter(
+                key__in=list(PARK_GROUP_KEYS)).exists() or (
+                LocationContextGroup.objects.filter(
+                    name__iexact=SANPARK_PARK_NAME).exists()):
+            _add(SANPARK_PARK_NAME)
+
+    if TaxonGroup.objects.filter(
+            category__icontains='division',
+            taxonomies__in=records.values('taxonomy_id')).exists():
+        _add('Division')
+
+    extra_attributes = TaxonExtraAttribute.objects.filter(
+        taxon_group__in=records.values('module_group_id')
+    ).order_by('taxon_group_id', 'id').values_list('name', flat=True)
+    for name in extra_attributes:
+        if name.lower().strip() == 'cites listing':
+            continue
+        _add(name.lower().replace(' ', '_'))
+
+    if has_gbif:
+        _add('GBIF key')
+    if records.filter(source_collection='virtual_museum').exists():
+        _add('VM-Number')
+
+    if PARK_OR_MPA_NAME in header:
+        header.insert(1, header.pop(header.index(PARK_OR_MPA_NAME)))
+    return header
+
+
 def download_collection_records(
         path_file,
         request,
@@ -147,7 +278,14 @@ def download_collection_records(
 ):
     from django.contrib.auth import get_user_model
     from bims.serializers.bio_collection_serializer import (
-        BioCollectionOneRowSerializer
+        BioCollectionOneRowSerializer,
+        CHEMICAL_UNIT_CODES,
+        SURVEY_DATA_HEADERS,
+        ordered_geocontext_groups
+    )
+    from bims.serializers.bio_collection_prefetch import (
+        BioCollectionPrefetch,
+        with_related
     )
     from bims.api_views.search import CollectionSearch
     from bims.models import BiologicalCollectionRecord
@@ -157,7 +295,6 @@ def download_collection_records(
     project_name = preferences.SiteSetting.project_name
 
     exclude_fields = []
-    headers = []
     added_headers = set()
 
     if project_name.lower() == 'sanparks':
@@ -210,44 +347,43 @@ def download_collection_records(
             site__id__in=site_ids
         ).distinct()
 
-    # Support resuming a partially completed download
-    rows_already_written = count_csv_data_rows(path_file)
-    current_csv_row = rows_already_written
     record_number = min(total_records, 500)
     collection_data = []
 
     if download_request and download_request.rejected:
         return
 
-    # When resuming, skip records already written to the file
-    if rows_already_written > 0 and rows_already_written < total_records:
-        logger.debug('Resuming download from row %d / %d', rows_already_written, total_records)
+    def send_csv():
+        if not send_email or not user_id:
+            return
+        UserModel = get_user_model()
         try:
-            resume_pk = collection_results.order_by('pk').values_list(
-                'pk', flat=True
-            )[rows_already_written - 1]
-            collection_results = collection_results.filter(pk__gt=resume_pk)
-        except (IndexError, Exception) as e:
-            logger.warning('Could not determine resume position, restarting: %s', e)
-            rows_already_written = 0
-            current_csv_row = 0
-    elif rows_already_written >= total_records:
-        logger.debug('Download already complete (%d rows), sending email', rows_already_written)
-        if send_email and user_id:
-            from django.contrib.auth import get_user_model
-            from bims.tasks.email_csv import send_csv_via_email
-            UserModel = get_user_model()
-            try:
-                user = UserModel.objects.get(id=user_id)
-                send_csv_via_email(
-                    user_id=user.id,
-                    file_name='Occurrence Data',
-                    csv_file=path_file,
-                    download_request_id=download_request_id
-                )
-            except UserModel.DoesNotExist:
-                pass
-        return
+            user = UserModel.objects.get(id=user_id)
+            send_csv_via_email(
+                user_id=user.id,
+                file_name='Occurrence Data',
+                csv_file=path_file,
+                download_request_id=download_request_id
+            )
+        except UserModel.DoesNotExist:
+            pass
+
+    # Support resuming a partially completed download
+    checkpoint = None
+    if os.path.exists(path_file):
+        checkpoint = read_checkpoint(path_file)
+    else:
+        remove_checkpoint(path_file)
+
+    if not checkpoint:
+        # A csv without a checkpoint is a finished download
+        rows_already_written = count_csv_data_rows(path_file)
+        if rows_already_written >= total_records:
+            logger.debug(
+                'Download already complete (%d rows), sending email',
+                rows_already_written)
+            send_csv()
+            return
 
     taxon_group = collection_results.first().module_group
     upload_template_headers = []
@@ -279,89 +415,123 @@ def download_collection_records(
             except (FileNotFoundError, UnicodeDecodeError, AttributeError):
                 continue
 
-    def write_batch_to_csv(header, rows, _path_file, _start_index):
+    if checkpoint:
+        logger.debug(
+            'Resuming download from row %d / %d',
+            checkpoint['rows'], total_records)
+        headers = checkpoint['header']
+        current_csv_row = checkpoint['rows']
+        collection_results = collection_results.filter(
+            pk__gt=checkpoint['last_pk'])
+        csv_file = open(path_file, 'r+', newline='', encoding='utf-8')
+        # Drop rows written after the last checkpoint
+        csv_file.truncate(checkpoint['size'])
+        csv_file.seek(checkpoint['size'])
+        csv_writer = csv.writer(csv_file)
+    else:
+        headers = collection_records_header(
+            collection_results,
+            exclude_fields,
+            upload_template_headers
+        )
+        current_csv_row = 0
+        csv_file = open(path_file, 'w', newline='', encoding='utf-8')
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow([format_header(h) for h in headers])
+
+    header_set = set(headers)
+    missing_headers = set()
+    is_fbis = preferences.SiteSetting.default_data_source == 'fbis'
+    geocontext_groups = ordered_geocontext_groups()
+
+    def write_batch_to_csv(rows):
+        prefetch = BioCollectionPrefetch(
+            rows,
+            chemical_unit_codes=CHEMICAL_UNIT_CODES if is_fbis else None,
+            survey_data_names=SURVEY_DATA_HEADERS if is_fbis else None,
+            geocontext_group_ids=[grp['id'] for grp in geocontext_groups]
+        )
         bio_serializer = BioCollectionOneRowSerializer(
             rows, many=True,
             context={
-                'header': header,
+                'header': list(headers),
                 'exclude_fields': exclude_fields,
                 'upload_template_headers': upload_template_headers,
                 'added_headers': added_headers,
+                'geocontext_groups': list(geocontext_groups),
+                'prefetch': prefetch,
             }
         )
-        bio_data = bio_serializer.data
-
-        header = bio_serializer.context['header']
-
-        present_cols = set()
-        for r in bio_data:
-            present_cols.update(r.keys())
-
-        filtered_header = [h for h in header if h in present_cols]
-
-        if PARK_OR_MPA_NAME in filtered_header:
-            i = filtered_header.index(PARK_OR_MPA_NAME)
-            if i != 1:
-                filtered_header.insert(1, filtered_header.pop(i))
-
-        csv_row = write_to_csv(
-            filtered_header,
-            bio_data,
-            _path_file,
-            _start_index
+        for row in bio_serializer.data:
+            unknown = set(row.keys()) - header_set - missing_headers
+            if unknown:
+                logger.warning(
+                    'Columns not in the download header: %s',
+                    ', '.join(sorted(unknown)))
+                missing_headers.update(unknown)
+            csv_writer.writerow([row.get(h, '') for h in headers])
+        csv_file.flush()
+        write_checkpoint(
+            path_file,
+            rows=current_csv_row + len(rows),
+            last_pk=rows[-1].pk,
+            size=csv_file.tell(),
+            header=headers
         )
         del bio_serializer
-        return csv_row, filtered_header
+        del prefetch
+        return current_csv_row + len(rows)
 
-    for obj in queryset_iterator(collection_results, batch_size=record_number):
-        collection_data.append(obj)
-        if len(collection_data) >= record_number:
-            start_index = current_csv_row
-            current_csv_row, headers = write_batch_to_csv(
-                headers,
-                collection_data,
-                path_file,
-                current_csv_row
-            )
+    try:
+        for obj in queryset_iterator(
+                with_related(collection_results),
+                batch_size=record_number):
+            collection_data.append(obj)
+            if len(collection_data) >= record_number:
+                start_index = current_csv_row
+                current_csv_row = write_batch_to_csv(collection_data)
+
+                logger.debug('Serialize time {0}:{1}: {2}'.format(
+                    start_index,
+                    current_csv_row,
+                    round(time.time() - start, 2))
+                )
 
+                del collection_data
+                collection_data = []
+
+                gc.collect()
+
+                download_request = get_download_request(download_request_id)
+
+                if download_request.rejected:
+                    logger.debug('Download request is rejected, closing.')
+                    csv_file.close()
+                    remove_checkpoint(path_file)
+                    try:
+                        os.remove(path_file)
+                    except Exception: # noqa
+                        pass
+                    return
+                else:
+                    download_request.progress = (
+                        f'{current_csv_row}/{total_records}'
+                    )
+                    download_request.progress_updated_at = timezone.now()
+                    download_request.save()
+
+        if collection_data:
+            start_index = current_csv_row
+            current_csv_row = write_batch_to_csv(collection_data)
             logger.debug('Serialize time {0}:{1}: {2}'.format(
                 start_index,
                 current_csv_row,
                 round(time.time() - start, 2))
             )
+    finally:
+        csv_file.close()
 
-            del collection_data
-            collection_data = []
-
-            gc.collect()
-
-            download_request = get_download_request(download_request_id)
-
-            if download_request.rejected:
-                logger.debug('Download request is rejected, closing.')
-                try:
-                    os.remove(path_file)
-                except Exception: # noqa
-                    pass
-                return
-            else:
-                download_request.progress = f'{current_csv_row}/{total_records}'
-                download_request.progress_updated_at = timezone.now()
-                download_request.save()
-
-    if collection_data:
-        start_index = current_csv_row
-        current_csv_row, headers = write_batch_to_csv(
-            headers,
-            collection_data,
-            path_file,
-            current_csv_row
-        )
-        logger.debug('Serialize time {0}:{1}: {2}'.format(
-            start_index,
-            current_csv_row,
-            round(time.time() - start, 2))
-        )
+    remove_checkpoint(path_file)
 
     logger.debug('Serialize time : {}'.format(
         round(time.time() - start, 2))
@@ -379,16 +549,5 @@ def download_collection_records(
         )
     )
 
-    if send_email and user_id:
-        UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(id=user_id)
-            send_csv_via_email(
-                user_id=user.id,
-                file_name='Occurrence Data',
-                csv_file=path_file,
-                download_request_id=download_request_id
-            )
-        except UserModel.DoesNotExist:
-            pass
+    send_csv()
     return
@@ -0,0 +1,43 @@
+# coding=utf-8
+"""Store the rank names of every taxon in its hierarchical data."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.utils.logger import log
+from bims.utils.taxonomy_rank_names import refresh_rank_names
+
+
+class Command(BaseCommand):
+    """Backfill the rank names (kingdom to subspecies) stored in
+    Taxonomy.hierarchical_data, for every tenant or the one given
+    with --tenant.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to backfill.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=1000,
+            help='Number of taxa updated per query.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                updated = refresh_rank_names(
+                    batch_size=options.get('batch_size'))
+                log('{schema}: rank names updated for {total} taxa'.format(
+                    schema=tenant.schema_name,
+                    total=updated
+                ))
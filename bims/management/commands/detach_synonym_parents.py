@@ -89,6 +89,7 @@ class Command(BaseCommand):
 
     def _detach(self, options):
         from bims.models import Taxonomy
+        from bims.models.taxonomy_closure import detach_taxonomy_subtree
 
         dry_run = options.get("dry_run", False)
 
@@ -111,7 +112,11 @@ class Command(BaseCommand):
             return
 
         with transaction.atomic():
+            taxonomy_ids = list(qs.values_list("id", flat=True))
             updated = qs.update(parent=None)
+            # update() bypasses the signals maintaining the closure table
+            for taxonomy_id in taxonomy_ids:
+                detach_taxonomy_subtree(taxonomy_id)
 
         self.stdout.write(
             self.style.SUCCESS(
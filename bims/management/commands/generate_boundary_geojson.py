@@ -5,15 +5,29 @@ import json
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from bims.models.boundary import Boundary
+from bims.models.boundary_geometry import with_display_geometry
 from bims.models.boundary_type import BoundaryType
 
 
 class Command(BaseCommand):
     help = 'Generate boundary geojson'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--zoom',
+            dest='zoom',
+            type=int,
+            default=None,
+            help='Write the geometries simplified for this zoom level, '
+                 'in <boundary type>_<zoom>.geojson files.'
+        )
+
     def handle(self, *args, **options):
+        zoom = options.get('zoom')
         for boundary_type in BoundaryType.objects.all():
             queryset = Boundary.objects.filter(type=boundary_type)
+            if zoom is not None:
+                queryset = with_display_geometry(queryset, zoom)
             directory = os.path.join(
                 settings.MEDIA_ROOT,
                 'geojson'
@@ -26,14 +40,19 @@ class Command(BaseCommand):
                 "features": []
             }
             for query in queryset:
-                if query.geometry:
+                # The full geometry is deferred when a simplified one is read
+                geometry = (
+                    query.display_geometry
+                    if hasattr(query, 'display_geometry') else query.geometry
+                )
+                if geometry:
                     geojson['features'].append(
                         {
                             "id": query.id,
                             "type": "Feature",
                             "geometry": {
                                 "type": "MultiPolygon",
-                                "coordinates": query.geometry.coords,
+                                "coordinates": geometry.coords,
                             },
                             "properties": {
                                 "name": query.name,
@@ -41,8 +60,11 @@ class Command(BaseCommand):
                         }
                     )
 
+            name = boundary_type.name
+            if zoom is not None:
+                name = '%s_%s' % (name, zoom)
             file_name = os.path.join(
-                directory, '%s.geojson' % boundary_type.name
+                directory, '%s.geojson' % name
             )
             try:
                 fd = open(file_name, 'w+')
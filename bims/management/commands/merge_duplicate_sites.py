@@ -4,6 +4,7 @@ from bims.models import (
     LocationSite,
     BiologicalCollectionRecord
 )
+from bims.models.occurrence_rollup import refresh_occurrence_rollups
 
 
 class Command(BaseCommand):
@@ -38,6 +39,8 @@ class Command(BaseCommand):
                 )
             for collections in all_collections:
                 collections.update(site=site_destination)
+            # Bulk updates skip the post_save rebuild of the rollups
+            refresh_occurrence_rollups(site_destination.id)
             for site in sites:
                 if site != site_destination:
                     site.delete()
@@ -0,0 +1,36 @@
+# coding=utf-8
+"""Rebuild the simplified geometries and pieces of the boundaries."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.models.boundary_geometry import rebuild_boundary_geometries
+from bims.utils.logger import log
+
+
+class Command(BaseCommand):
+    """Rebuild the simplified geometries and pieces of the boundaries of
+    every tenant, or of the tenant given with --tenant. Needed after
+    changing BOUNDARY_SIMPLIFY_ZOOMS or BOUNDARY_SUBDIVIDE_VERTICES, or
+    boundary changes that bypass signals.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to rebuild.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                total = rebuild_boundary_geometries()
+                log('{schema}: {total} boundaries'.format(
+                    schema=tenant.schema_name,
+                    total=total
+                ))
@@ -0,0 +1,47 @@
+# coding=utf-8
+"""Rebuild the occurrence rollups from the collection records."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.models.occurrence_rollup import rebuild_occurrence_rollups
+from bims.utils.logger import log
+
+
+class Command(BaseCommand):
+    """Rebuild the occurrence rollups of every tenant, or of the tenant
+    given with --tenant. Needed after changes to collection records that
+    bypass signals, e.g. queryset updates.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to rebuild.'
+        )
+        parser.add_argument(
+            '--site-ids',
+            dest='site_ids',
+            default=None,
+            help='Comma separated ids of the sites to rebuild.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+        site_ids = None
+        if options.get('site_ids'):
+            site_ids = [
+                site_id for site_id in options['site_ids'].split(',')
+                if site_id.strip()
+            ]
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                total = rebuild_occurrence_rollups(site_ids)
+                log('{schema}: {total} occurrence rollup rows'.format(
+                    schema=tenant.schema_name,
+                    total=total
+                ))
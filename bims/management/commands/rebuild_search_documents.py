@@ -0,0 +1,41 @@
+# coding=utf-8
+"""Rebuild the search documents of taxa and sites."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.models.search_document import (
+    rebuild_site_search_documents,
+    rebuild_taxon_search_documents
+)
+from bims.utils.logger import log
+
+
+class Command(BaseCommand):
+    """Rebuild the search documents of every tenant, or of the tenant
+    given with --tenant. Needed after changes to taxa, sites or rivers
+    that bypass signals, e.g. queryset updates.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to rebuild.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                taxa = rebuild_taxon_search_documents()
+                sites = rebuild_site_search_documents()
+                log('{schema}: {taxa} taxon and {sites} site search '
+                    'documents'.format(
+                        schema=tenant.schema_name,
+                        taxa=taxa,
+                        sites=sites
+                    ))
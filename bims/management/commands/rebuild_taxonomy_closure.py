@@ -0,0 +1,34 @@
+# coding=utf-8
+"""Rebuild the taxonomy closure table from the parent links."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.models.taxonomy_closure import rebuild_taxonomy_closure
+from bims.utils.logger import log
+
+
+class Command(BaseCommand):
+    """Rebuild the taxonomy closure table of every tenant, or of the
+    tenant given with --tenant.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to rebuild.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                total = rebuild_taxonomy_closure()
+                log('{schema}: {total} taxonomy closure rows'.format(
+                    schema=tenant.schema_name,
+                    total=total
+                ))
@@ -0,0 +1,84 @@
+# coding=utf-8
+"""Fill the GeoContext response cache for the points of existing sites."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.models.geocontext_response import cache_point, cache_precision
+from bims.models.location_site import LocationSite
+from bims.utils.get_key import get_key
+from bims.utils.location_context import (
+    GEOCONTEXT_HARVEST_BATCH_SIZE,
+    _prepare_group_keys,
+    get_geocontext_responses,
+)
+from bims.utils.logger import log
+from bims.utils.uuid import is_uuid
+
+
+class Command(BaseCommand):
+    """Request the GeoContext groups of every distinct site point that has
+    no fresh cached response, for every tenant or the one given with
+    --tenant.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to warm.'
+        )
+        parser.add_argument(
+            '--group-keys',
+            dest='group_keys',
+            default=None,
+            help='Comma separated GeoContext group keys, defaults to the '
+                 'keys of the GeoContext setting.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                self.warm(tenant.schema_name, options.get('group_keys'))
+
+    def warm(self, schema_name, group_keys):
+        geocontext_url = get_key('GEOCONTEXT_URL')
+        precision = cache_precision()
+        if not geocontext_url or precision is None:
+            log('{schema}: GeoContext url or cache not set'.format(
+                schema=schema_name))
+            return
+
+        points = sorted({
+            cache_point(longitude, latitude, precision)
+            for longitude, latitude in LocationSite.objects.filter(
+                longitude__isnull=False,
+                latitude__isnull=False
+            ).values_list('longitude', 'latitude').distinct().iterator()
+        })
+
+        for group_key in _prepare_group_keys(group_keys):
+            # Fields of local layers are not requested from GeoContext
+            if ':' in group_key and is_uuid(group_key.split(':')[0]):
+                continue
+            failed = 0
+            for start in range(
+                    0, len(points), GEOCONTEXT_HARVEST_BATCH_SIZE):
+                responses = get_geocontext_responses(
+                    geocontext_url,
+                    group_key,
+                    points[start:start + GEOCONTEXT_HARVEST_BATCH_SIZE]
+                )
+                failed += sum(
+                    1 for response in responses.values() if response is None)
+            log('{schema}: {key} cached for {total} points, {failed} '
+                'failed'.format(
+                    schema=schema_name,
+                    key=group_key,
+                    total=len(points) - failed,
+                    failed=failed
+                ))
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0516_dataversion_searchprocess_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchView',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=63, unique=True)),
+                ('query_hash', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Search view',
+                'verbose_name_plural': 'Search views',
+            },
+        ),
+        migrations.AddField(
+            model_name='searchprocess',
+            name='search_view',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='search_processes', to='bims.searchview'),
+        ),
+        migrations.AddField(
+            model_name='sitesetting',
+            name='max_search_views',
+            field=models.PositiveIntegerField(default=500, help_text='Maximum number of materialized search result views kept in the database. The least recently used views above this number are dropped periodically. Set to 0 for no limit.'),
+        ),
+        migrations.AddField(
+            model_name='sitesetting',
+            name='search_view_expiry_days',
+            field=models.PositiveSmallIntegerField(blank=True, default=7, help_text='Number of days a search result view is kept after it was last used. Leave blank or set to 0 to only apply the limit above.', null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MAX_CLOSURE_DEPTH = 50
+
+
+def build_closure(apps, schema_editor):
+    connection = schema_editor.connection
+    taxonomy = apps.get_model('bims', 'Taxonomy')
+    closure = apps.get_model('bims', 'TaxonomyClosure')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS ('
+            '  SELECT id, id, 0 FROM {taxonomy} '
+            '  UNION ALL '
+            '  SELECT paths.ancestor_id, taxon.id, paths.depth + 1 '
+            '  FROM paths JOIN {taxonomy} taxon '
+            '  ON taxon.parent_id = paths.descendant_id '
+            '  WHERE paths.depth < %s'
+            ') '
+            'INSERT INTO {closure} (ancestor_id, descendant_id, depth) '
+            'SELECT ancestor_id, descendant_id, MIN(depth) FROM paths '
+            'GROUP BY ancestor_id, descendant_id'.format(
+                taxonomy=connection.ops.quote_name(taxonomy._meta.db_table),
+                closure=connection.ops.quote_name(closure._meta.db_table)
+            ),
+            [MAX_CLOSURE_DEPTH]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0517_searchview_searchprocess_search_view_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxonomyClosure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='bims.taxonomy')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='bims.taxonomy')),
+            ],
+            options={
+                'verbose_name': 'Taxonomy closure',
+                'verbose_name_plural': 'Taxonomy closures',
+                'indexes': [models.Index(fields=['ancestor', 'depth'], name='taxonomy_closure_anc_depth'), models.Index(fields=['descendant', 'depth'], name='taxonomy_closure_desc_depth')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_taxonomy_closure_path')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
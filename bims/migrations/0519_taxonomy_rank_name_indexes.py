@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 20:30
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0518_taxonomyclosure'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['hierarchical_data'], name='taxonomy_hierarchy_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.fields.json.KT('hierarchical_data__class_name')), name='taxonomy_class_name_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.fields.json.KT('hierarchical_data__order_name')), name='taxonomy_order_name_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.fields.json.KT('hierarchical_data__family_name')), name='taxonomy_family_name_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.fields.json.KT('hierarchical_data__genus_name')), name='taxonomy_genus_name_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.fields.json.KT('hierarchical_data__species_name')), name='taxonomy_species_name_upper'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:40
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0519_taxonomy_rank_name_indexes'),
+    ]
+
+    operations = [
+        # In the public schema, so every tenant schema finds gin_trgm_ops
+        migrations.RunSQL(
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public',
+            migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=models.Index(django.db.models.functions.text.Upper('canonical_name'), name='taxonomy_canonical_name_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('legacy_canonical_name'), name='gin_trgm_ops'), name='taxonomy_legacy_name_trgm'),
+        ),
+    ]
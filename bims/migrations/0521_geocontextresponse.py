@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 22:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0520_taxonomy_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocontextResponse',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_key', models.CharField(max_length=255)),
+                ('longitude', models.FloatField()),
+                ('latitude', models.FloatField()),
+                ('response', models.JSONField()),
+                ('fetch_time', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group_key', 'longitude', 'latitude'), name='geocontext_response_unique_point')],
+            },
+        ),
+        migrations.AddField(
+            model_name='geocontextsetting',
+            name='response_cache_days',
+            field=models.PositiveIntegerField(default=30, help_text='Number of days GeoContext responses are cached, 0 disables the cache.'),
+        ),
+        migrations.AddField(
+            model_name='geocontextsetting',
+            name='response_cache_precision',
+            field=models.PositiveSmallIntegerField(default=4, help_text='Decimal places coordinates are rounded to when caching GeoContext responses, 4 is about 11 metres.'),
+        ),
+    ]
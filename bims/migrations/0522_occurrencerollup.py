@@ -0,0 +1,63 @@
+# Generated by Django 6.0.2 on 2026-10-18 22:45
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    connection = schema_editor.connection
+    record = apps.get_model('bims', 'BiologicalCollectionRecord')
+    rollup = apps.get_model('bims', 'OccurrenceRollup')
+    site_visit_taxon = apps.get_model('sass', 'SiteVisitTaxon')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {rollup} (site_id, module_group_id, year, '
+            'taxonomy_id, data_type, end_embargo_date, occurrences, '
+            'sass_occurrences, survey_ids) '
+            'SELECT record.site_id, record.module_group_id, '
+            'EXTRACT(YEAR FROM record.collection_date)::integer, '
+            'record.taxonomy_id, COALESCE(record.data_type, \'\'), '
+            'record.end_embargo_date, COUNT(*), COUNT(sass.{sass_pk}), '
+            'COALESCE(ARRAY_AGG(DISTINCT record.survey_id) '
+            'FILTER (WHERE record.survey_id IS NOT NULL), \'{{}}\') '
+            'FROM {record} record '
+            'LEFT JOIN {sass} sass ON sass.{sass_pk} = record.id '
+            'GROUP BY 1, 2, 3, 4, 5, 6'.format(
+                rollup=connection.ops.quote_name(rollup._meta.db_table),
+                record=connection.ops.quote_name(record._meta.db_table),
+                sass=connection.ops.quote_name(
+                    site_visit_taxon._meta.db_table),
+                sass_pk=site_visit_taxon._meta.pk.column
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0521_geocontextresponse'),
+        ('sass', '0064_remove_river_source_site'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccurrenceRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('data_type', models.CharField(blank=True, default='', max_length=128)),
+                ('end_embargo_date', models.DateField(blank=True, null=True)),
+                ('occurrences', models.PositiveIntegerField(default=0)),
+                ('sass_occurrences', models.PositiveIntegerField(default=0, help_text='Occurrences recorded in SASS site visits')),
+                ('survey_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None)),
+                ('module_group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='bims.taxongroup')),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrence_rollups', to='bims.locationsite')),
+                ('taxonomy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='bims.taxonomy')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['site', 'module_group'], name='occurrence_rollup_site_module'), models.Index(fields=['module_group', 'year'], name='occurrence_rollup_module_year')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
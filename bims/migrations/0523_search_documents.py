@@ -0,0 +1,114 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:40
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+SEPARATOR = '\n'
+
+
+def build_search_documents(apps, schema_editor):
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    taxonomy = apps.get_model('bims', 'Taxonomy')
+    vernacular_field = taxonomy._meta.get_field('vernacular_names')
+    site = apps.get_model('bims', 'LocationSite')
+    river = apps.get_model('sass', 'River')
+    tagged_item = apps.get_model('taggit', 'TaggedItem')
+    tag = apps.get_model('taggit', 'Tag')
+    taxon_document = apps.get_model('bims', 'TaxonSearchDocument')
+    site_document = apps.get_model('bims', 'SiteSearchDocument')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {document} (taxonomy_id, names, scientific_name, '
+            'vernacular_names, tags) '
+            'SELECT taxon.id, '
+            'concat_ws(%(separator)s, taxon.canonical_name, '
+            'accepted.canonical_name, ('
+            'SELECT string_agg(synonym.canonical_name, %(separator)s) '
+            'FROM {taxonomy} synonym '
+            'WHERE synonym.accepted_taxonomy_id = taxon.id)), '
+            'COALESCE(taxon.scientific_name, \'\'), '
+            'COALESCE((SELECT string_agg(vernacular.name, %(separator)s) '
+            'FROM {through} taxon_vernacular '
+            'JOIN {vernacular} vernacular '
+            'ON vernacular.id = taxon_vernacular.{vernacular_column} '
+            'WHERE taxon_vernacular.{taxonomy_column} = taxon.id), \'\'), '
+            'COALESCE((SELECT string_agg('
+            'concat_ws(%(separator)s, tag.name, tag.slug), %(separator)s) '
+            'FROM {tagged_item} item JOIN {tag} tag ON tag.id = item.tag_id '
+            'WHERE item.object_id = taxon.id AND item.content_type_id = ('
+            'SELECT id FROM django_content_type '
+            'WHERE app_label = \'bims\' AND model = \'taxonomy\')), \'\') '
+            'FROM {taxonomy} taxon '
+            'LEFT JOIN {taxonomy} accepted '
+            'ON accepted.id = taxon.accepted_taxonomy_id'.format(
+                document=quote(taxon_document._meta.db_table),
+                taxonomy=quote(taxonomy._meta.db_table),
+                through=quote(
+                    vernacular_field.remote_field.through._meta.db_table),
+                vernacular=quote(
+                    vernacular_field.related_model._meta.db_table),
+                vernacular_column=vernacular_field.m2m_reverse_name(),
+                taxonomy_column=vernacular_field.m2m_column_name(),
+                tagged_item=quote(tagged_item._meta.db_table),
+                tag=quote(tag._meta.db_table)
+            ),
+            {'separator': SEPARATOR}
+        )
+        cursor.execute(
+            'INSERT INTO {document} (site_id, site_code, legacy_river_name, '
+            'river_name) '
+            'SELECT site.id, COALESCE(site.site_code, \'\'), '
+            'COALESCE(site.legacy_river_name, \'\'), '
+            'COALESCE(river.name, \'\') '
+            'FROM {site} site '
+            'LEFT JOIN {river} river ON river.id = site.river_id'.format(
+                document=quote(site_document._meta.db_table),
+                site=quote(site._meta.db_table),
+                river=quote(river._meta.db_table)
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0522_occurrencerollup'),
+        ('sass', '0064_remove_river_source_site'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxonSearchDocument',
+            fields=[
+                ('taxonomy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='bims.taxonomy')),
+                ('names', models.TextField(blank=True, default='', help_text='Canonical names of the taxon, its accepted taxon and its synonyms')),
+                ('scientific_name', models.TextField(blank=True, default='')),
+                ('vernacular_names', models.TextField(blank=True, default='')),
+                ('tags', models.TextField(blank=True, default='', help_text='Names and slugs of the tags of the taxon')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('names'), name='gin_trgm_ops'), name='taxon_search_names_trgm'), django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('scientific_name'), name='gin_trgm_ops'), name='taxon_search_scientific_trgm'), django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('vernacular_names'), name='gin_trgm_ops'), name='taxon_search_vernacular_trgm'), django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('tags'), name='gin_trgm_ops'), name='taxon_search_tags_trgm')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SiteSearchDocument',
+            fields=[
+                ('site', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='bims.locationsite')),
+                ('site_code', models.TextField(blank=True, default='')),
+                ('legacy_river_name', models.TextField(blank=True, default='')),
+                ('river_name', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('site_code'), name='gin_trgm_ops'), name='site_search_code_trgm'), django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('legacy_river_name'), name='gin_trgm_ops'), name='site_search_legacy_river_trgm'), django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('river_name'), name='gin_trgm_ops'), name='site_search_river_trgm')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='biologicalcollectionrecord',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('original_species_name'), name='gin_trgm_ops'), name='collection_original_name_trgm'),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:55
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0523_search_documents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('canonical_name'), name='gin_trgm_ops'), name='taxonomy_canonical_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('scientific_name'), name='gin_trgm_ops'), name='taxonomy_scientific_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='taxonomy',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('author'), name='gin_trgm_ops'), name='taxonomy_author_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='speciesgroup',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='species_group_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='locationsite',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='location_site_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='locationsite',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('site_code'), name='gin_trgm_ops'), name='location_site_code_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='locationsite',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('legacy_river_name'), name='gin_trgm_ops'), name='location_site_river_trgm'),
+        ),
+    ]
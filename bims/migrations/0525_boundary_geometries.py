@@ -0,0 +1,72 @@
+# Generated by Django 6.0.2 on 2026-10-19 00:20
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+from bims.conf import BOUNDARY_SIMPLIFY_ZOOMS, BOUNDARY_SUBDIVIDE_VERTICES
+
+
+def build_boundary_geometries(apps, schema_editor):
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    tables = {
+        'boundary': quote(
+            apps.get_model('bims', 'Boundary')._meta.db_table),
+        'simplified': quote(apps.get_model(
+            'bims', 'BoundarySimplifiedGeometry')._meta.db_table),
+        'subdivision': quote(apps.get_model(
+            'bims', 'BoundarySubdivision')._meta.db_table),
+    }
+    tolerances = [
+        tolerance for _, tolerance in BOUNDARY_SIMPLIFY_ZOOMS
+        if tolerance is not None
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {simplified} (boundary_id, tolerance, geometry) '
+            'SELECT boundary.id, tolerance, ST_Multi('
+            'ST_SimplifyPreserveTopology(boundary.geometry, tolerance)) '
+            'FROM {boundary} boundary, '
+            'unnest(%s::float[]) tolerance'.format(**tables),
+            [tolerances]
+        )
+        cursor.execute(
+            'INSERT INTO {subdivision} (boundary_id, geometry) '
+            'SELECT boundary.id, ST_Multi(piece) '
+            'FROM {boundary} boundary, '
+            'ST_Subdivide(boundary.geometry, %s) piece '
+            'WHERE boundary.geometry IS NOT NULL'.format(**tables),
+            [BOUNDARY_SUBDIVIDE_VERTICES]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0524_autocomplete_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoundarySimplifiedGeometry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tolerance', models.FloatField(help_text='Simplification tolerance, in degrees')),
+                ('geometry', django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326)),
+                ('boundary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='simplified_geometries', to='bims.boundary')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('boundary', 'tolerance'), name='boundary_simplified_geometry_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BoundarySubdivision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geometry', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326)),
+                ('boundary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='bims.boundary')),
+            ],
+        ),
+        migrations.RunPython(build_boundary_geometries, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,10 @@ from bims.models.profile import Profile
 from bims.models.cluster import *  # noqa
 from bims.models.boundary import *  # noqa
 from bims.models.boundary_type import *  # noqa
+from bims.models.boundary_geometry import (
+    BoundarySimplifiedGeometry,
+    BoundarySubdivision
+)
 from bims.models.links import *
 from bims.models.shapefile import * #noqa
 from bims.models.shapefile_upload_session import * #noqa
@@ -15,10 +19,18 @@ from bims.models.non_biodiversity_layer import *  # noqa
 from bims.models.tracking import *  # noqa
 from bims.models.user_boundary import *  # noqa
 from bims.models.search_process import *  # noqa
+from bims.models.data_version import DataVersion
+from bims.models.occurrence_rollup import OccurrenceRollup
+from bims.models.search_view import SearchView
+from bims.models.search_document import (
+    TaxonSearchDocument,
+    SiteSearchDocument
+)
 from bims.models.validation import *  # noqa
 from bims.models.reference_link import *  # noqa
 from bims.models.endemism import *  # noqa
 from bims.models.taxonomy import *  # noqa
+from bims.models.taxonomy_closure import TaxonomyClosure
 from bims.models.taxon_group import *  # noqa
 from bims.models.vernacular_name import *  # noqa
 from bims.models.river_catchment import *  # noqa
@@ -53,6 +65,7 @@ from bims.models.taxon_extra_attribute import *  # noqa
 
 from bims.models.decision_support_tool import *  # noqa
 from bims.models.geocontext_setting import GeocontextSetting
+from bims.models.geocontext_response import GeocontextResponse
 from bims.models.decision_support_tool_name import *  # noqa
 
 from bims.models.notification import Notification
@@ -10,6 +10,8 @@ from django.dispatch import receiver
 from django.utils import timezone
 from django.db.models import JSONField
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 
 from preferences import preferences
 from bims.models.location_site import LocationSite
@@ -451,45 +453,35 @@ class BiologicalCollectionRecord(AbstractValidation):
         indexes = [
             models.Index(fields=['source_collection', 'taxonomy']),
             models.Index(fields=['owner', 'end_embargo_date']),
-            models.Index(fields=['data_type'])
+            models.Index(fields=['data_type']),
+            # original_species_name__icontains of the free-text search
+            GinIndex(
+                OpClass(Upper('original_species_name'), name='gin_trgm_ops'),
+                name='collection_original_name_trgm'
+            ),
         ]
 
     def on_post_save(self):
-        if not self.taxonomy:
+        if self.taxonomy_id or getattr(self, '_updating_taxonomy', False):
+            return
+        # update_collection_record saves the record again
+        self._updating_taxonomy = True
+        try:
             update_collection_record(self)
-        if not self.source_collection:
-            if preferences.SiteSetting.default_data_source:
-                self.source_collection = (
-                    preferences.SiteSetting.default_data_source
-                )
-                self.save()
-        if self.ecosystem_type != self.site.ecosystem_type:
-            self.ecosystem_type = self.site.ecosystem_type
-            self.save()
-        if self.taxonomy and not self.module_group:
-            # Get taxon group if exists
-            taxonomies = [self.taxonomy.id]
-            taxon_groups = TaxonGroup.objects.filter(
-                taxonomies__in=taxonomies,
-                category=TaxonomicGroupCategory.SPECIES_MODULE.name,
-            )
-            if taxon_groups.exists():
-                self.module_group = taxon_groups[0]
-                self.save()
-        record_types = [
-            'visual observation',
-            'photographic record'
-        ]
-        if (
-                self.sampling_method and
-                not self.record_type and
-                self.sampling_method.sampling_method.lower() in record_types
-        ):
-            record_type, created = RecordType.objects.get_or_create(
-                name=self.sampling_method.sampling_method
-            )
-            self.record_type = record_type
-            self.save()
+        finally:
+            self._updating_taxonomy = False
+
+    def apply_end_embargo_to_site(self):
+        """Embargo a site only surveyed by this record's survey."""
+        if not self.end_embargo_date:
+            return
+        location_site = self.site
+        other_surveys = Survey.objects.filter(
+            site=self.site
+        ).exclude(id=self.survey.id)
+        if not other_surveys.exists() and not location_site.end_embargo_date:
+            location_site.end_embargo_date = self.end_embargo_date
+            location_site.save()
 
     def save(self, *args, **kwargs):
         max_allowed = 10
@@ -535,14 +527,12 @@ class BiologicalCollectionRecord(AbstractValidation):
             self.survey.owner = self.owner
             self.survey.save()
 
-        if self.end_embargo_date:
-            location_site = self.site
-            other_surveys = Survey.objects.filter(
-                site=self.site
-            ).exclude(id=self.survey.id)
-            if not other_surveys.exists() and not location_site.end_embargo_date:
-                location_site.end_embargo_date = self.end_embargo_date
-                location_site.save()
+        self.apply_end_embargo_to_site()
+
+        derived_fields = apply_derived_fields([self])
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and derived_fields:
+            kwargs['update_fields'] = set(update_fields) | derived_fields
 
         super(BiologicalCollectionRecord, self).save(*args, **kwargs)
 
@@ -571,6 +561,8 @@ class BiologicalCollectionRecord(AbstractValidation):
     def __init__(self, *args, **kwargs):
         super(BiologicalCollectionRecord, self).__init__(*args, **kwargs)
         self.__original_validated = self.validated
+        # Read from __dict__, so a deferred site is not loaded here
+        self._original_site_id = self.__dict__.get('site_id')
 
     def is_cluster_generation_applied(self):
         if self.__original_validated != self.validated:
@@ -594,6 +586,138 @@ class BiologicalCollectionRecord(AbstractValidation):
         return label
 
 
+RECORD_TYPES_FROM_SAMPLING_METHOD = (
+    'visual observation',
+    'photographic record'
+)
+
+
+def _derive_source_collection(records):
+    """Default source collection of the records without one."""
+    changed = set()
+    if all(record.source_collection for record in records):
+        return changed
+    default_data_source = preferences.SiteSetting.default_data_source
+    if not default_data_source:
+        return changed
+    for record in records:
+        if not record.source_collection:
+            record.source_collection = default_data_source
+            changed.add('source_collection')
+    return changed
+
+
+def _derive_ecosystem_type(records):
+    """Ecosystem type of the site of every record."""
+    changed = set()
+    site_field = BiologicalCollectionRecord._meta.get_field('site')
+    site_ecosystem_types = dict(
+        (record.site_id, record.site.ecosystem_type) for record in records
+        if site_field.is_cached(record) and record.site
+    )
+    missing_site_ids = set(
+        record.site_id for record in records
+        if record.site_id and record.site_id not in site_ecosystem_types
+    )
+    if missing_site_ids:
+        site_ecosystem_types.update(
+            LocationSite.objects.filter(
+                id__in=missing_site_ids
+            ).values_list('id', 'ecosystem_type')
+        )
+    for record in records:
+        if record.site_id not in site_ecosystem_types:
+            continue
+        ecosystem_type = site_ecosystem_types[record.site_id]
+        if record.ecosystem_type != ecosystem_type:
+            record.ecosystem_type = ecosystem_type
+            changed.add('ecosystem_type')
+    return changed
+
+
+def _derive_module_group(records):
+    """Species module of the taxon of the records without a module."""
+    changed = set()
+    taxonomy_ids = set(
+        record.taxonomy_id for record in records
+        if record.taxonomy_id and not record.module_group_id
+    )
+    if not taxonomy_ids:
+        return changed
+    module_groups = {}
+    through = TaxonGroup.taxonomies.through
+    for taxonomy_id, taxon_group_id in through.objects.filter(
+            taxonomy_id__in=taxonomy_ids,
+            taxongroup__category=(
+                TaxonomicGroupCategory.SPECIES_MODULE.name)
+    ).order_by(
+        'taxongroup__display_order', 'taxongroup_id'
+    ).values_list('taxonomy_id', 'taxongroup_id'):
+        module_groups.setdefault(taxonomy_id, taxon_group_id)
+    for record in records:
+        if (
+                not record.module_group_id and
+                record.taxonomy_id in module_groups
+        ):
+            record.module_group_id = module_groups[record.taxonomy_id]
+            changed.add('module_group')
+    return changed
+
+
+def _derive_record_type(records):
+    """Record type of the sampling method of the records without one."""
+    from bims.models.sampling_method import SamplingMethod
+    changed = set()
+    sampling_method_ids = set(
+        record.sampling_method_id for record in records
+        if record.sampling_method_id and not record.record_type_id
+    )
+    if not sampling_method_ids:
+        return changed
+    sampling_methods = dict(
+        SamplingMethod.objects.filter(
+            id__in=sampling_method_ids
+        ).values_list('id', 'sampling_method')
+    )
+    record_types = {}
+    for record in records:
+        if record.record_type_id:
+            continue
+        name = sampling_methods.get(record.sampling_method_id) or ''
+        if name.lower() not in RECORD_TYPES_FROM_SAMPLING_METHOD:
+            continue
+        if name not in record_types:
+            record_types[name], _ = RecordType.objects.get_or_create(
+                name=name
+            )
+        record.record_type = record_types[name]
+        changed.add('record_type')
+    return changed
+
+
+def apply_derived_fields(records):
+    """
+    Fill the fields of collection records derived from related data:
+    the default source collection, the ecosystem type of the site, the
+    species module of the taxon and the record type of the sampling
+    method. Works on unsaved records with a fixed number of queries, so it
+    can run before bulk_create as well as in save.
+
+    :param records: list of BiologicalCollectionRecord
+    :return: set of the field names changed on any record
+    """
+    changed = set()
+    if not records:
+        return changed
+    for derive in (
+            _derive_source_collection,
+            _derive_ecosystem_type,
+            _derive_module_group,
+            _derive_record_type):
+        changed.update(derive(records))
+    return changed
+
+
 @receiver(models.signals.post_save)
 def collection_post_save_handler(sender, instance, created, **kwargs):
     """
@@ -602,9 +726,6 @@ def collection_post_save_handler(sender, instance, created, **kwargs):
 
     if not issubclass(sender, BiologicalCollectionRecord):
         return
-    models.signals.post_save.disconnect(
-        collection_post_save_handler,
-    )
     instance.on_post_save()
 
     if created:
@@ -619,10 +740,6 @@ def collection_post_save_handler(sender, instance, created, **kwargs):
                     send_notification_validation(survey.pk)
                 survey.save()
 
-    models.signals.post_save.connect(
-        collection_post_save_handler,
-    )
-
 
 @receiver(models.signals.post_save)
 def collection_post_save_update_cluster(sender, instance, **kwargs):
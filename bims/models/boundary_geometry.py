@@ -0,0 +1,205 @@
+# coding=utf-8
+"""Derived boundary geometry model definitions.
+
+Simplified copies of every boundary geometry, one per tolerance of
+BOUNDARY_SIMPLIFY_ZOOMS, served for display at the zoom levels they are
+drawn at. Simplification preserves the topology of each boundary, so no
+ring collapses or self-intersects.
+
+Boundaries are also cut into pieces of at most BOUNDARY_SUBDIVIDE_VERTICES
+vertices, each with its own spatial index entry, so intersection tests
+against large boundaries only compare sites with the pieces around them.
+The full geometry stays on the boundary for containment tests.
+
+Both are rebuilt when a boundary is saved; the rebuild_boundary_geometries
+command rebuilds them all.
+"""
+from django.contrib.gis.db import models
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from bims.conf import BOUNDARY_SIMPLIFY_ZOOMS, BOUNDARY_SUBDIVIDE_VERTICES
+from bims.models.boundary import Boundary
+
+# Boundaries rebuilt per statement
+BOUNDARY_BATCH_SIZE = 50
+
+# Site geometry fields tested against boundaries
+SITE_GEOMETRY_FIELDS = (
+    'geometry_point',
+    'geometry_line',
+    'geometry_polygon',
+    'geometry_multipolygon',
+)
+
+
+class BoundarySimplifiedGeometry(models.Model):
+    """Boundary geometry simplified with one tolerance."""
+
+    boundary = models.ForeignKey(
+        'bims.Boundary',
+        on_delete=models.CASCADE,
+        related_name='simplified_geometries'
+    )
+    tolerance = models.FloatField(
+        help_text='Simplification tolerance, in degrees'
+    )
+    geometry = models.MultiPolygonField(
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        app_label = 'bims'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['boundary', 'tolerance'],
+                name='boundary_simplified_geometry_unique'
+            )
+        ]
+
+    def __str__(self):
+        return '{boundary} - {tolerance}'.format(
+            boundary=self.boundary_id,
+            tolerance=self.tolerance
+        )
+
+
+class BoundarySubdivision(models.Model):
+    """Piece of a boundary geometry."""
+
+    boundary = models.ForeignKey(
+        'bims.Boundary',
+        on_delete=models.CASCADE,
+        related_name='subdivisions'
+    )
+    geometry = models.MultiPolygonField()
+
+    class Meta:
+        app_label = 'bims'
+
+    def __str__(self):
+        return str(self.boundary_id)
+
+
+def simplify_tolerance(zoom):
+    """
+    Tolerance of the geometries drawn at a zoom level.
+    :return: tolerance in degrees, None for the full geometry
+    """
+    tolerance = None
+    for min_zoom, zoom_tolerance in BOUNDARY_SIMPLIFY_ZOOMS:
+        if zoom >= min_zoom:
+            tolerance = zoom_tolerance
+    return tolerance
+
+
+def with_display_geometry(boundaries, zoom):
+    """
+    Annotate boundaries with display_geometry, the geometry to draw at a
+    zoom level, without reading the full geometry when a simplified one
+    is stored.
+    :param boundaries: Boundary queryset
+    """
+    tolerance = simplify_tolerance(zoom)
+    if tolerance is None:
+        return boundaries
+    return boundaries.annotate(
+        display_geometry=Coalesce(
+            Subquery(
+                BoundarySimplifiedGeometry.objects.filter(
+                    boundary=OuterRef('pk'),
+                    tolerance=tolerance
+                ).values('geometry')[:1],
+                output_field=models.MultiPolygonField()
+            ),
+            'geometry'
+        )
+    ).defer('geometry')
+
+
+def intersects_boundary(boundary, prefix=''):
+    """
+    Filter of the rows whose site geometries intersect a boundary, tested
+    against its pieces when they are built.
+    :param prefix: lookup path to the site, e.g. 'site__'
+    :return: Q
+    """
+    pieces = BoundarySubdivision.objects.filter(boundary=boundary)
+    condition = Q()
+    if not pieces.exists():
+        for field in SITE_GEOMETRY_FIELDS:
+            condition |= Q(**{
+                '{prefix}{field}__intersects'.format(
+                    prefix=prefix, field=field): boundary.geometry
+            })
+        return condition
+    for field in SITE_GEOMETRY_FIELDS:
+        condition |= Q(Exists(pieces.filter(
+            geometry__intersects=OuterRef(prefix + field)
+        )))
+    return condition
+
+
+def rebuild_boundary_geometries(boundary_ids=None):
+    """
+    Rebuild the simplified geometries and pieces of boundaries.
+    :param boundary_ids: boundary ids, every boundary when None
+    :return: number of boundaries rebuilt
+    """
+    boundaries = Boundary.objects.all()
+    if boundary_ids is not None:
+        boundaries = boundaries.filter(id__in=set(boundary_ids))
+    boundary_ids = list(boundaries.order_by('id').values_list('id', flat=True))
+    quote = connection.ops.quote_name
+    tables = {
+        'boundary': quote(Boundary._meta.db_table),
+        'simplified': quote(BoundarySimplifiedGeometry._meta.db_table),
+        'subdivision': quote(BoundarySubdivision._meta.db_table),
+    }
+    tolerances = [
+        tolerance for _, tolerance in BOUNDARY_SIMPLIFY_ZOOMS
+        if tolerance is not None
+    ]
+
+    for start in range(0, len(boundary_ids), BOUNDARY_BATCH_SIZE):
+        batch = boundary_ids[start:start + BOUNDARY_BATCH_SIZE]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM {simplified} WHERE boundary_id = ANY(%s)'.format(
+                    **tables),
+                [batch]
+            )
+            cursor.execute(
+                'DELETE FROM {subdivision} '
+                'WHERE boundary_id = ANY(%s)'.format(**tables),
+                [batch]
+            )
+            cursor.execute("""
+                INSERT INTO {simplified} (boundary_id, tolerance, geometry)
+                SELECT
+                    boundary.id,
+                    tolerance,
+                    ST_Multi(ST_SimplifyPreserveTopology(
+                        boundary.geometry, tolerance))
+                FROM {boundary} boundary, unnest(%s::float[]) tolerance
+                WHERE boundary.id = ANY(%s)
+            """.format(**tables), [tolerances, batch])
+            cursor.execute("""
+                INSERT INTO {subdivision} (boundary_id, geometry)
+                SELECT boundary.id, ST_Multi(piece)
+                FROM {boundary} boundary,
+                    ST_Subdivide(boundary.geometry, %s) piece
+                WHERE boundary.id = ANY(%s)
+                AND boundary.geometry IS NOT NULL
+            """.format(**tables), [BOUNDARY_SUBDIVIDE_VERTICES, batch])
+    return len(boundary_ids)
+
+
+@receiver(post_save, sender=Boundary)
+def boundary_geometry_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: rebuild_boundary_geometries([instance.id]))
@@ -0,0 +1,230 @@
+# coding=utf-8
+"""Data version model definition.
+
+Monotonic counters bumped whenever data behind a search changes, so cached
+search results can be validated without counting the collection table.
+Counters live in the tenant schema, which makes them per tenant.
+"""
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from bims.models.biological_collection_record import (
+    BiologicalCollectionRecord
+)
+
+SITE_VERSION_KEY = 'site'
+SURVEY_VERSION_KEY = 'survey'
+WATER_TEMPERATURE_VERSION_KEY = 'water_temperature'
+PHYSICO_CHEMISTRY_VERSION_KEY = 'physico_chemistry'
+CLIMATE_VERSION_KEY = 'climate'
+TAXONOMY_VERSION_KEY = 'taxonomy'
+OCCURRENCE_VERSION_PREFIX = 'occurrence:'
+
+_deferred = threading.local()
+
+
+def occurrence_version_key(module_group_id):
+    """Return the version key of occurrences in one module group."""
+    return '{prefix}{module}'.format(
+        prefix=OCCURRENCE_VERSION_PREFIX,
+        module=module_group_id if module_group_id else 'none'
+    )
+
+
+class DataVersion(models.Model):
+    """Version counter of one slice (module) of tenant data."""
+
+    key = models.CharField(
+        max_length=100,
+        unique=True
+    )
+    version = models.PositiveBigIntegerField(
+        default=0
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now
+    )
+
+    class Meta:
+        app_label = 'bims'
+        verbose_name = 'Data version'
+        verbose_name_plural = 'Data versions'
+
+    def __str__(self):
+        return '{key} ({version})'.format(
+            key=self.key,
+            version=self.version
+        )
+
+
+def _increment_versions(keys):
+    now = timezone.now()
+    for key in keys:
+        updated = DataVersion.objects.filter(key=key).update(
+            version=F('version') + 1,
+            updated_at=now
+        )
+        if not updated:
+            DataVersion.objects.get_or_create(
+                key=key,
+                defaults={'version': 1, 'updated_at': now}
+            )
+
+
+def bump_data_version(*keys):
+    """
+    Increment the version of each key once the current transaction commits.
+    Inside `defer_data_version_bumps` the keys are only collected.
+    :param keys: version keys, e.g. from `occurrence_version_key`
+    """
+    keys = set(key for key in keys if key)
+    if not keys:
+        return
+    pending = getattr(_deferred, 'keys', None)
+    if pending is not None:
+        pending.update(keys)
+        return
+    transaction.on_commit(lambda: _increment_versions(keys))
+
+
+@contextmanager
+def defer_data_version_bumps():
+    """
+    Collect version bumps made inside the block and apply each key once
+    on exit, so bulk imports do not update the counters for every row.
+    """
+    if getattr(_deferred, 'keys', None) is not None:
+        yield
+        return
+    _deferred.keys = set()
+    try:
+        yield
+    finally:
+        keys = _deferred.keys
+        _deferred.keys = None
+        bump_data_version(*keys)
+
+
+def search_version_keys(parameters):
+    """
+    Return the version keys a search depends on and whether it depends on
+    every occurrence module.
+    :param parameters: search parameters
+    :return: (list of keys, bool)
+    """
+    module = parameters.get('module', '')
+    if module == 'water_temperature':
+        return [SITE_VERSION_KEY, WATER_TEMPERATURE_VERSION_KEY], False
+    if module == 'physico_chemistry':
+        return [SITE_VERSION_KEY, PHYSICO_CHEMISTRY_VERSION_KEY], False
+    if module == 'climate':
+        return [SITE_VERSION_KEY, CLIMATE_VERSION_KEY], False
+    keys = [SITE_VERSION_KEY, SURVEY_VERSION_KEY]
+    modules = parameters.get('modules', '')
+    if not modules:
+        return keys, True
+    for module_id in str(modules).split(','):
+        if module_id.strip():
+            keys.append(occurrence_version_key(module_id.strip()))
+    return keys, False
+
+
+def get_search_data_version(parameters):
+    """
+    Hash of the current versions of the data a search depends on,
+    fetched with a single query on the small version table.
+    :param parameters: search parameters
+    :return: hex digest string
+    """
+    keys, all_occurrences = search_version_keys(parameters)
+    return data_version_hash(keys, all_occurrences)
+
+
+def data_version_hash(keys, all_occurrences=False):
+    """
+    Hash of the current versions of some keys.
+    :param keys: version keys
+    :param all_occurrences: include the keys of every occurrence module
+    :return: hex digest string
+    """
+    filters = Q(key__in=keys)
+    if all_occurrences:
+        filters |= Q(key__startswith=OCCURRENCE_VERSION_PREFIX)
+    versions = dict(
+        DataVersion.objects.filter(filters).values_list('key', 'version')
+    )
+    for key in keys:
+        versions.setdefault(key, 0)
+    return hashlib.sha256(
+        json.dumps(versions, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def collection_record_data_changed(sender, instance, **kwargs):
+    # Sent with the concrete sender, so subclasses (e.g. SiteVisitTaxon)
+    # are matched here as well
+    if not issubclass(sender, BiologicalCollectionRecord):
+        return
+    bump_data_version(occurrence_version_key(instance.module_group_id))
+
+
+@receiver(post_save, sender='bims.LocationSite')
+@receiver(post_delete, sender='bims.LocationSite')
+def location_site_data_changed(sender, instance, **kwargs):
+    bump_data_version(SITE_VERSION_KEY)
+
+
+@receiver(post_save, sender='sass.River')
+@receiver(post_delete, sender='sass.River')
+def river_data_changed(sender, instance, **kwargs):
+    # River names are searched as site data
+    bump_data_version(SITE_VERSION_KEY)
+
+
+@receiver(post_save, sender='bims.Survey')
+@receiver(post_delete, sender='bims.Survey')
+def survey_data_changed(sender, instance, **kwargs):
+    bump_data_version(SURVEY_VERSION_KEY)
+
+
+@receiver(post_save, sender='bims.WaterTemperature')
+@receiver(post_delete, sender='bims.WaterTemperature')
+def water_temperature_data_changed(sender, instance, **kwargs):
+    bump_data_version(WATER_TEMPERATURE_VERSION_KEY)
+
+
+@receiver(post_save, sender='bims.WaterTemperatureThreshold')
+@receiver(post_delete, sender='bims.WaterTemperatureThreshold')
+def water_temperature_threshold_changed(sender, instance, **kwargs):
+    # Thresholds feed the cached thermal indicators
+    bump_data_version(WATER_TEMPERATURE_VERSION_KEY)
+
+
+@receiver(post_save, sender='bims.ChemicalRecord')
+@receiver(post_delete, sender='bims.ChemicalRecord')
+def chemical_record_data_changed(sender, instance, **kwargs):
+    bump_data_version(PHYSICO_CHEMISTRY_VERSION_KEY)
+
+
+@receiver(post_save, sender='climate.Climate')
+@receiver(post_delete, sender='climate.Climate')
+def climate_data_changed(sender, instance, **kwargs):
+    bump_data_version(CLIMATE_VERSION_KEY)
+
+
+@receiver(post_save, sender='bims.Taxonomy')
+@receiver(post_delete, sender='bims.Taxonomy')
+@receiver(post_save, sender='bims.SpeciesGroup')
+@receiver(post_delete, sender='bims.SpeciesGroup')
+def taxonomy_data_changed(sender, instance, **kwargs):
+    bump_data_version(TAXONOMY_VERSION_KEY)
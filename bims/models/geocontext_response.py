@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Cache of GeoContext group responses.
+
+Responses of the GeoContext API are stored per group key and point, the
+point rounded to the precision set in GeocontextSetting, so sites at the
+same or nearly the same location reuse one request. Stored responses
+expire after the number of days set in GeocontextSetting, 0 disables the
+cache.
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+from preferences import preferences
+
+
+class GeocontextResponse(models.Model):
+    """Response of a GeoContext group query at a rounded point."""
+
+    group_key = models.CharField(
+        max_length=255
+    )
+    longitude = models.FloatField()
+    latitude = models.FloatField()
+    response = models.JSONField()
+    fetch_time = models.DateTimeField(
+        default=timezone.now
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group_key', 'longitude', 'latitude'],
+                name='geocontext_response_unique_point'
+            )
+        ]
+
+    def __str__(self):
+        return '{key} ({lon}, {lat})'.format(
+            key=self.group_key,
+            lon=self.longitude,
+            lat=self.latitude
+        )
+
+
+def cache_precision():
+    """
+    Decimal places cached points are rounded to, None when the cache is
+    disabled.
+    """
+    setting = preferences.GeocontextSetting
+    if setting.response_cache_days <= 0:
+        return None
+    return setting.response_cache_precision
+
+
+def cache_point(longitude, latitude, precision):
+    """The point a coordinate is cached and requested under."""
+    if precision is None:
+        return longitude, latitude
+    return round(longitude, precision), round(latitude, precision)
+
+
+def get_cached_responses(group_key, points):
+    """
+    Fresh cached responses of a group.
+
+    :param points: iterable of points returned by cache_point
+    :return: dict of point to response
+    """
+    points = set(points)
+    cache_days = preferences.GeocontextSetting.response_cache_days
+    if not points or cache_days <= 0:
+        return {}
+    oldest = timezone.now() - timedelta(days=cache_days)
+    cached = GeocontextResponse.objects.filter(
+        group_key=group_key,
+        fetch_time__gte=oldest,
+        longitude__in={point[0] for point in points},
+        latitude__in={point[1] for point in points}
+    ).values_list('longitude', 'latitude', 'response')
+    return {
+        (longitude, latitude): response
+        for longitude, latitude, response in cached.iterator()
+        if (longitude, latitude) in points
+    }
+
+
+def cache_responses(group_key, responses):
+    """
+    Store responses of a group, replacing the ones of the same points.
+
+    :param responses: dict of point to response
+    """
+    if not responses or cache_precision() is None:
+        return
+    fetch_time = timezone.now()
+    GeocontextResponse.objects.bulk_create(
+        [
+            GeocontextResponse(
+                group_key=group_key,
+                longitude=point[0],
+                latitude=point[1],
+                response=response,
+                fetch_time=fetch_time
+            ) for point, response in responses.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['group_key', 'longitude', 'latitude'],
+        update_fields=['response', 'fetch_time']
+    )
@@ -22,3 +22,15 @@ class GeocontextSetting(Preferences):
         default=0.0,
         help_text='The radius tolerance for the spatial query'
     )
+
+    response_cache_days = models.PositiveIntegerField(
+        default=30,
+        help_text='Number of days GeoContext responses are cached, '
+                  '0 disables the cache.'
+    )
+
+    response_cache_precision = models.PositiveSmallIntegerField(
+        default=4,
+        help_text='Decimal places coordinates are rounded to when '
+                  'caching GeoContext responses, 4 is about 11 metres.'
+    )
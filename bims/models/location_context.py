@@ -34,6 +34,31 @@ class LocationContextQuerySet(models.QuerySet):
         else:
             return '-'
 
+    def site_values_from_key(self, key='', layer_name='', layer_identifier=''):
+        """
+        Latest value of a context key of every site in the queryset, as
+        value_from_key returns it for one site.
+        :return: dict of site id to value
+        """
+        if layer_name:
+            from cloud_native_gis.models import Layer
+            layer = Layer.objects.filter(name__istartswith=layer_name).first()
+            if layer:
+                key = layer.unique_id
+        context_data = self.filter(group__key=key)
+        if layer_identifier:
+            context_data = context_data.filter(
+                group__layer_identifier=layer_identifier)
+        return dict(
+            context_data.order_by(
+                'site_id', '-fetch_time'
+            ).distinct(
+                'site_id'
+            ).values_list(
+                'site_id', 'value'
+            )
+        )
+
     def values_from_group(self, group):
         group_values = dict()
         values = self.filter(
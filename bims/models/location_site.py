@@ -4,6 +4,7 @@
 """
 
 import logging
+import time
 
 import requests
 import json
@@ -13,8 +14,10 @@ from bims.tasks.location_site import update_location_context
 from bims.models.validation import AbstractValidation
 from django.core.exceptions import ValidationError
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.dispatch import receiver
 from django.db.models import JSONField
+from django.db.models.functions import Upper
 from django.conf import settings
 from django.utils import timezone
 
@@ -23,6 +26,12 @@ from bims.utils.get_key import get_key
 from bims.enums.geomorphological_zone import GeomorphologicalZoneCategory
 from bims.models.location_context import LocationContext
 from bims.models.location_context_group import LocationContextGroup
+from bims.models.geocontext_response import (
+    cache_point,
+    cache_precision,
+    cache_responses,
+    get_cached_responses,
+)
 from bims.utils.decorator import prevent_recursion
 from bims.enums.ecosystem_type import (
     ECOSYSTEM_TYPE_CHOICES, HYDROGEOMORPHIC_NONE, HYDROGEOMORPHIC_CHOICES
@@ -32,6 +41,9 @@ from cloud_native_gis.utils.geometry import query_features
 
 LOGGER = logging.getLogger(__name__)
 
+# Seconds before the first retry of a failed GeoContext request
+GEOCONTEXT_RETRY_DELAY = 1
+
 ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 BASE = len(ALPHABET)
 
@@ -311,37 +323,20 @@ class LocationSite(AbstractValidation):
                 'Can not update location context document because centroid is '
                 'None. Please set it.')
             return False, message
-        longitude = self.longitude
-        latitude = self.latitude
-
-        geocontext_group_url_format = (
-            '{geocontext_url}/api/v2/query?registry=group&key={geocontext_group_key}&'
-            'x={longitude}&y={latitude}&outformat=json')
-        # build url
-        url = geocontext_group_url_format.format(
-            geocontext_url=geocontext_url,
-            geocontext_group_key=group_key,
-            longitude=longitude,
-            latitude=latitude,
-        )
-        LOGGER.info('Request url : {}'.format(url))
 
-        try:
-            r = requests.get(url, timeout=10)
-            if r.status_code != 200:
-                message = (
-                        'Request to url %s got %s [%s], can not update location '
-                        'context document.' % (url, r.status_code, r.reason))
-                LOGGER.info(message)
-                return None
-        except requests.exceptions.Timeout:
-            message = 'Request to url %s timed out.' % url
-            LOGGER.info(message)
-            return None
-        except requests.exceptions.SSLError:
-            return None
+        point = cache_point(
+            self.longitude, self.latitude, cache_precision())
+        cached = get_cached_responses(group_key, [point])
+        if point in cached:
+            return json.dumps(cached[point])
 
-        return json.dumps(r.json())
+        geocontext_data = fetch_geocontext_group_data(
+            geocontext_url, group_key, point[0], point[1]
+        )
+        if geocontext_data is None:
+            return None
+        cache_responses(group_key, {point: geocontext_data})
+        return json.dumps(geocontext_data)
 
     def add_context_group(self, group_key):
         from bims.models import LocationContext
@@ -360,33 +355,7 @@ class LocationSite(AbstractValidation):
                     coordinates=[(self.longitude, self.latitude)],
                     tolerance=preferences.GeocontextSetting.tolerance
                 )
-                # Find by name first
-                context_groups = LocationContextGroup.objects.filter(
-                    key=group_key,
-                    layer_identifier=context_key
-                )
-                if context_groups.exists():
-                    context_groups.update(
-                        geocontext_group_key=group_key,
-                        layer_identifier=context_key,
-                        key=group_key)
-                    context_group = context_groups.first()
-                else:
-                    # Check if name already exists
-                    layer_name = layer.name
-                    if LocationContextGroup.objects.filter(
-                        name=layer_name
-                    ).exists():
-                        layer_name = f'{layer.name} ({context_key})'
-
-                    context_group, _ = LocationContextGroup.objects.get_or_create(
-                        geocontext_group_key=group_key,
-                        key=group_key,
-                        layer_identifier=context_key,
-                        defaults = {
-                            'name': layer_name,
-                        }
-                    )
+                context_group = layer_context_group(layer, context_key)
 
                 for result in feature_data['result']:
                     if context_key in result['feature']:
@@ -418,34 +387,13 @@ class LocationSite(AbstractValidation):
             for geocontext_value in geocontext_data['services']:
                 if 'value' not in geocontext_value:
                     continue
-                try:
-                    location_context_group, group_created = (
-                        LocationContextGroup.objects.get_or_create(
-                            key=geocontext_value['key'],
-                            geocontext_group_key=group_key
-                        )
-                    )
-                except LocationContextGroup.MultipleObjectsReturned:
-                    _groups = LocationContextGroup.objects.filter(
-                        key=geocontext_value['key'],
-                        geocontext_group_key=group_key
-                    ).order_by('id')
-                    _first_group = _groups.first()
-                    _remaining_groups = _groups[1:]
-                    LocationContext.objects.filter(group__in=_groups).update(
-                        group=_first_group
-                    )
-                    for _group in _remaining_groups:
-                        _group.delete()
-                    location_context_group = _first_group
-                if LocationContext.objects.filter(
-                        site=self,
-                        group=location_context_group).exists():
-                    LocationContext.objects.filter(
-                        site=self,
-                        group=location_context_group
-                    ).delete()
-
+                location_context_group = geocontext_service_group(
+                    group_key, geocontext_value, geocontext_data['key']
+                )
+                LocationContext.objects.filter(
+                    site=self,
+                    group=location_context_group
+                ).delete()
                 if geocontext_value.get('value') is not None:
                     LocationContext.objects.create(
                         site=self,
@@ -453,16 +401,6 @@ class LocationSite(AbstractValidation):
                         fetch_time=timezone.now(),
                         value=str(geocontext_value['value'])
                     )
-                if (
-                        not location_context_group.name or
-                        location_context_group.name == '-'
-                ):
-                    location_context_group.name = geocontext_value['name']
-                location_context_group.key = geocontext_value['key']
-                location_context_group.geocontext_group_key = (
-                    geocontext_data['key']
-                )
-                location_context_group.save()
 
         except (ValueError, KeyError, TypeError):
             return False, 'Could not format the geocontext data'
@@ -489,6 +427,17 @@ class LocationSite(AbstractValidation):
     class Meta:
         """Meta class for project."""
         app_label = 'bims'
+        indexes = [
+            # icontains lookups of the autocomplete views
+            GinIndex(
+                OpClass(Upper(field), name='gin_trgm_ops'),
+                name=name
+            ) for field, name in (
+                ('name', 'location_site_name_trgm'),
+                ('site_code', 'location_site_code_trgm'),
+                ('legacy_river_name', 'location_site_river_trgm'),
+            )
+        ]
 
     def __unicode__(self):
         return u'%s' % self.name
@@ -582,6 +531,117 @@ class LocationSite(AbstractValidation):
             return
 
 
+def fetch_geocontext_group_data(
+        geocontext_url, group_key, longitude, latitude, retries=1):
+    """
+    Query a GeoContext group at a point.
+    Timeouts, connection and server errors are retried up to `retries`
+    times with a growing delay.
+    :return: the decoded response, None when the request failed
+    """
+    url = (
+        '{geocontext_url}/api/v2/query?registry=group&key={group_key}&'
+        'x={longitude}&y={latitude}&outformat=json'
+    ).format(
+        geocontext_url=geocontext_url,
+        group_key=group_key,
+        longitude=longitude,
+        latitude=latitude,
+    )
+    LOGGER.info('Request url : {}'.format(url))
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(GEOCONTEXT_RETRY_DELAY * 2 ** (attempt - 1))
+        try:
+            r = requests.get(url, timeout=10)
+        except (requests.exceptions.Timeout,
+                requests.exceptions.ConnectionError):
+            LOGGER.info('Request to url %s timed out.' % url)
+            continue
+        except requests.exceptions.RequestException:
+            return None
+        if r.status_code == 200:
+            try:
+                return r.json()
+            except ValueError:
+                return None
+        LOGGER.info(
+            'Request to url %s got %s [%s], can not update location '
+            'context document.' % (url, r.status_code, r.reason))
+        if r.status_code < 500:
+            return None
+    return None
+
+
+def layer_context_group(layer, context_key):
+    """The location context group of a field of a cloud native layer."""
+    group_key = str(layer.unique_id)
+    # Find by name first
+    context_groups = LocationContextGroup.objects.filter(
+        key=group_key,
+        layer_identifier=context_key
+    )
+    if context_groups.exists():
+        context_groups.update(
+            geocontext_group_key=group_key,
+            layer_identifier=context_key,
+            key=group_key)
+        return context_groups.first()
+
+    # Check if name already exists
+    layer_name = layer.name
+    if LocationContextGroup.objects.filter(
+        name=layer_name
+    ).exists():
+        layer_name = f'{layer.name} ({context_key})'
+
+    context_group, _ = LocationContextGroup.objects.get_or_create(
+        geocontext_group_key=group_key,
+        key=group_key,
+        layer_identifier=context_key,
+        defaults={
+            'name': layer_name,
+        }
+    )
+    return context_group
+
+
+def geocontext_service_group(group_key, geocontext_value, data_key):
+    """
+    The location context group of a service returned by a GeoContext
+    group query, duplicated groups are merged into the oldest one.
+    """
+    try:
+        location_context_group, group_created = (
+            LocationContextGroup.objects.get_or_create(
+                key=geocontext_value['key'],
+                geocontext_group_key=group_key
+            )
+        )
+    except LocationContextGroup.MultipleObjectsReturned:
+        _groups = LocationContextGroup.objects.filter(
+            key=geocontext_value['key'],
+            geocontext_group_key=group_key
+        ).order_by('id')
+        _first_group = _groups.first()
+        _remaining_groups = _groups[1:]
+        LocationContext.objects.filter(group__in=_groups).update(
+            group=_first_group
+        )
+        for _group in _remaining_groups:
+            _group.delete()
+        location_context_group = _first_group
+    if (
+            not location_context_group.name or
+            location_context_group.name == '-'
+    ):
+        location_context_group.name = geocontext_value['name']
+    location_context_group.key = geocontext_value['key']
+    location_context_group.geocontext_group_key = data_key
+    location_context_group.save()
+    return location_context_group
+
+
 def update_location_site_context(location_site_id):
     async_result = update_location_context.delay(location_site_id)
     return async_result
@@ -0,0 +1,290 @@
+# coding=utf-8
+"""Occurrence rollup model definition.
+
+Collection records aggregated per site, module, year, taxon, data type and
+embargo date, with the number of records and the distinct surveys of each
+group. Dashboards and search summaries read the counts of a site (or of
+many sites) from here instead of counting the collection table. Category
+breakdowns (origin, endemism, conservation status) are grouped in SQL
+through the taxon, so editing a taxon never leaves them stale.
+
+Rows are rebuilt per site when collection records of the site are saved or
+deleted. Imports that bypass signals mark the sites they touched with
+`refresh_occurrence_rollups`; the rebuild_occurrence_rollups command
+rebuilds everything.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bims.models.biological_collection_record import (
+    BiologicalCollectionRecord
+)
+
+# Sites rebuilt per statement
+ROLLUP_BATCH_SIZE = 500
+
+_pending = threading.local()
+
+
+class OccurrenceRollupQuerySet(models.QuerySet):
+
+    def total_occurrences(self):
+        return self.aggregate(
+            total=Sum('occurrences')
+        )['total'] or 0
+
+    def summary(self):
+        """Number of occurrences, distinct sites and distinct taxa."""
+        result = self.aggregate(
+            occurrences=Sum('occurrences'),
+            sites=Count('site', distinct=True),
+            taxa=Count('taxonomy', distinct=True)
+        )
+        result['occurrences'] = result['occurrences'] or 0
+        return result
+
+    def survey_ids(self):
+        """Ids of the distinct surveys of the rows."""
+        sql, params = self.values('survey_ids').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT DISTINCT survey_id FROM ({sql}) rollup, '
+                'unnest(rollup.survey_ids) survey_id'.format(sql=sql),
+                params
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def survey_counts(self, field):
+        """
+        Number of distinct surveys per value of a column.
+        :param field: concrete field name, e.g. 'site' or 'taxonomy'
+        :return: dict of column value to number of surveys
+        """
+        column = self.model._meta.get_field(field).attname
+        sql, params = self.values(
+            column, 'survey_ids').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rollup.{column}, COUNT(DISTINCT survey_id) '
+                'FROM ({sql}) rollup, unnest(rollup.survey_ids) survey_id '
+                'GROUP BY rollup.{column}'.format(column=column, sql=sql),
+                params
+            )
+            return dict(cursor.fetchall())
+
+
+class OccurrenceRollup(models.Model):
+    """Collection records of a site, module, year and taxon."""
+
+    site = models.ForeignKey(
+        'bims.LocationSite',
+        on_delete=models.CASCADE,
+        related_name='occurrence_rollups'
+    )
+    module_group = models.ForeignKey(
+        'bims.TaxonGroup',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    year = models.IntegerField(
+        null=True,
+        blank=True
+    )
+    taxonomy = models.ForeignKey(
+        'bims.Taxonomy',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    data_type = models.CharField(
+        max_length=128,
+        blank=True,
+        default=''
+    )
+    end_embargo_date = models.DateField(
+        null=True,
+        blank=True
+    )
+    occurrences = models.PositiveIntegerField(
+        default=0
+    )
+    sass_occurrences = models.PositiveIntegerField(
+        default=0,
+        help_text='Occurrences recorded in SASS site visits'
+    )
+    survey_ids = ArrayField(
+        models.IntegerField(),
+        default=list,
+        blank=True
+    )
+
+    objects = OccurrenceRollupQuerySet.as_manager()
+
+    class Meta:
+        app_label = 'bims'
+        indexes = [
+            models.Index(
+                fields=['site', 'module_group'],
+                name='occurrence_rollup_site_module'),
+            models.Index(
+                fields=['module_group', 'year'],
+                name='occurrence_rollup_module_year'),
+        ]
+
+    def __str__(self):
+        return '{site} - {module} - {year}'.format(
+            site=self.site_id,
+            module=self.module_group_id,
+            year=self.year
+        )
+
+
+def occurrence_count(records, field='id'):
+    """
+    Expression counting occurrences, for collection records or rollups.
+    :param records: queryset of either model
+    :param field: field counted on collection records
+    """
+    if records.model is OccurrenceRollup:
+        return Sum('occurrences')
+    return Count(field)
+
+
+def rebuild_occurrence_rollups(site_ids=None):
+    """
+    Rebuild the rollup rows of sites from their collection records.
+    :param site_ids: site ids, every site when None
+    :return: number of rows written
+    """
+    record_table = BiologicalCollectionRecord._meta.db_table
+    rollup_table = OccurrenceRollup._meta.db_table
+    try:
+        site_visit_taxon = apps.get_model('sass', 'SiteVisitTaxon')
+        sass_join = 'LEFT JOIN {table} sass ON sass.{pk} = record.id'.format(
+            table=site_visit_taxon._meta.db_table,
+            pk=site_visit_taxon._meta.pk.column
+        )
+        sass_count = 'COUNT(sass.{pk})'.format(
+            pk=site_visit_taxon._meta.pk.column)
+    except LookupError:
+        sass_join = ''
+        sass_count = '0'
+
+    if site_ids is None:
+        batches = [None]
+    else:
+        site_ids = sorted(set(int(site_id) for site_id in site_ids))
+        batches = [
+            site_ids[start:start + ROLLUP_BATCH_SIZE]
+            for start in range(0, len(site_ids), ROLLUP_BATCH_SIZE)
+        ]
+
+    total = 0
+    for batch in batches:
+        where = '' if batch is None else 'WHERE record.site_id = ANY(%s)'
+        params = [] if batch is None else [batch]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if batch is None:
+                cursor.execute('DELETE FROM {table}'.format(
+                    table=rollup_table))
+            else:
+                cursor.execute(
+                    'DELETE FROM {table} WHERE site_id = ANY(%s)'.format(
+                        table=rollup_table),
+                    params
+                )
+            cursor.execute("""
+                INSERT INTO {rollup_table} (
+                    site_id, module_group_id, year, taxonomy_id, data_type,
+                    end_embargo_date, occurrences, sass_occurrences,
+                    survey_ids
+                )
+                SELECT
+                    record.site_id,
+                    record.module_group_id,
+                    EXTRACT(YEAR FROM record.collection_date)::integer,
+                    record.taxonomy_id,
+                    COALESCE(record.data_type, ''),
+                    record.end_embargo_date,
+                    COUNT(*),
+                    {sass_count},
+                    COALESCE(
+                        ARRAY_AGG(DISTINCT record.survey_id)
+                        FILTER (WHERE record.survey_id IS NOT NULL),
+                        '{{}}'
+                    )
+                FROM {record_table} record
+                {sass_join}
+                {where}
+                GROUP BY 1, 2, 3, 4, 5, 6
+            """.format(
+                rollup_table=rollup_table,
+                record_table=record_table,
+                sass_count=sass_count,
+                sass_join=sass_join,
+                where=where
+            ), params)
+            total += cursor.rowcount
+    return total
+
+
+def _flush_pending_sites():
+    site_ids = getattr(_pending, 'site_ids', None)
+    if not site_ids or getattr(_pending, 'deferred', False):
+        return
+    _pending.site_ids = set()
+    rebuild_occurrence_rollups(site_ids)
+
+
+def refresh_occurrence_rollups(*site_ids):
+    """
+    Rebuild the rollups of sites once the current transaction commits.
+    Sites marked several times before then are rebuilt once, and inside
+    `defer_occurrence_rollups` only when the block exits.
+    """
+    site_ids = set(site_id for site_id in site_ids if site_id)
+    if not site_ids:
+        return
+    if getattr(_pending, 'site_ids', None) is None:
+        _pending.site_ids = set()
+    _pending.site_ids.update(site_ids)
+    if not getattr(_pending, 'deferred', False):
+        transaction.on_commit(_flush_pending_sites)
+
+
+@contextmanager
+def defer_occurrence_rollups():
+    """
+    Collect the sites marked inside the block and rebuild them once on
+    exit, so imports do not rebuild a site for every record.
+    """
+    if getattr(_pending, 'deferred', False):
+        yield
+        return
+    _pending.deferred = True
+    try:
+        yield
+    finally:
+        _pending.deferred = False
+        if getattr(_pending, 'site_ids', None):
+            transaction.on_commit(_flush_pending_sites)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def collection_record_rollup_changed(sender, instance, **kwargs):
+    # Sent with the concrete sender, so subclasses (e.g. SiteVisitTaxon)
+    # are matched here as well
+    if not issubclass(sender, BiologicalCollectionRecord):
+        return
+    refresh_occurrence_rollups(
+        instance.site_id, getattr(instance, '_original_site_id', None))
+    instance._original_site_id = instance.site_id
@@ -0,0 +1,399 @@
+# coding=utf-8
+"""Search document model definitions.
+
+The names of a taxon and of a site matched by the free-text box of the
+collection search, in one row per taxon and per site with a trigram index
+on every field. A search resolves the matching taxon and site ids with one
+indexed query per table, then filters collection records by id.
+
+Documents are rebuilt when taxa, their vernacular names or tags, sites or
+rivers are saved; the rebuild_search_documents command rebuilds them all.
+"""
+import threading
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import connection, models, transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Upper
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+# Documents rebuilt per statement
+SEARCH_DOCUMENT_BATCH_SIZE = 500
+
+# Matches are tried in this order, the first one with records is used
+TAXON_NAME = 1
+ORIGINAL_SPECIES_NAME = 2
+SCIENTIFIC_NAME = 3
+SITE_CODE = 4
+LEGACY_RIVER_NAME = 5
+RIVER_NAME = 6
+VERNACULAR_NAME = 7
+TAG = 8
+
+# Separates the values of a field, so a match never spans two names
+SEPARATOR = '\n'
+
+_pending = threading.local()
+
+
+def trigram_index(field, name):
+    return GinIndex(
+        OpClass(Upper(field), name='gin_trgm_ops'),
+        name=name
+    )
+
+
+class TaxonSearchDocument(models.Model):
+    """Names a taxon is found by."""
+
+    taxonomy = models.OneToOneField(
+        'bims.Taxonomy',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    names = models.TextField(
+        blank=True,
+        default='',
+        help_text='Canonical names of the taxon, its accepted taxon and '
+                  'its synonyms'
+    )
+    scientific_name = models.TextField(
+        blank=True,
+        default=''
+    )
+    vernacular_names = models.TextField(
+        blank=True,
+        default=''
+    )
+    tags = models.TextField(
+        blank=True,
+        default='',
+        help_text='Names and slugs of the tags of the taxon'
+    )
+
+    class Meta:
+        app_label = 'bims'
+        indexes = [
+            trigram_index('names', 'taxon_search_names_trgm'),
+            trigram_index('scientific_name', 'taxon_search_scientific_trgm'),
+            trigram_index(
+                'vernacular_names', 'taxon_search_vernacular_trgm'),
+            trigram_index('tags', 'taxon_search_tags_trgm'),
+        ]
+
+    def __str__(self):
+        return str(self.taxonomy_id)
+
+
+class SiteSearchDocument(models.Model):
+    """Names a site is found by."""
+
+    site = models.OneToOneField(
+        'bims.LocationSite',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    site_code = models.TextField(
+        blank=True,
+        default=''
+    )
+    legacy_river_name = models.TextField(
+        blank=True,
+        default=''
+    )
+    river_name = models.TextField(
+        blank=True,
+        default=''
+    )
+
+    class Meta:
+        app_label = 'bims'
+        indexes = [
+            trigram_index('site_code', 'site_search_code_trgm'),
+            trigram_index(
+                'legacy_river_name', 'site_search_legacy_river_trgm'),
+            trigram_index('river_name', 'site_search_river_trgm'),
+        ]
+
+    def __str__(self):
+        return str(self.site_id)
+
+
+def _matches(documents, fields, query):
+    """
+    Ids of the documents matching a query, with the first match level of
+    each.
+    :param fields: list of (field name, match level), in level order
+    :return: dict of match level to list of ids
+    """
+    conditions = Q()
+    levels = []
+    for field, level in fields:
+        condition = Q(**{'{}__icontains'.format(field): query})
+        conditions |= condition
+        levels.append(When(condition, then=Value(level)))
+    matches = {}
+    for pk, level in documents.filter(conditions).annotate(
+        match_level=Case(*levels)
+    ).values_list('pk', 'match_level').iterator():
+        matches.setdefault(level, []).append(pk)
+    return matches
+
+
+def search_collection_records(records, query):
+    """
+    Collection records matching the free-text search, from the first
+    match level with records: taxon names, original species name,
+    scientific name, site code, legacy river name, river name, vernacular
+    names and tags.
+    :param records: collection record queryset to search in
+    :return: filtered queryset, empty when nothing matches
+    """
+    matches = _matches(
+        TaxonSearchDocument.objects.all(),
+        [
+            ('names', TAXON_NAME),
+            ('scientific_name', SCIENTIFIC_NAME),
+            ('vernacular_names', VERNACULAR_NAME),
+            ('tags', TAG),
+        ],
+        query
+    )
+    matches.update(_matches(
+        SiteSearchDocument.objects.all(),
+        [
+            ('site_code', SITE_CODE),
+            ('legacy_river_name', LEGACY_RIVER_NAME),
+            ('river_name', RIVER_NAME),
+        ],
+        query
+    ))
+    # Original species names are a field of the records themselves
+    matches[ORIGINAL_SPECIES_NAME] = None
+
+    for level in sorted(matches):
+        if level == ORIGINAL_SPECIES_NAME:
+            bio = records.filter(original_species_name__icontains=query)
+        elif level in (SITE_CODE, LEGACY_RIVER_NAME, RIVER_NAME):
+            bio = records.filter(site_id__in=matches[level])
+        else:
+            bio = records.filter(taxonomy_id__in=matches[level])
+        if bio.exists():
+            return bio
+    return records.none()
+
+
+def rebuild_taxon_search_documents(taxon_ids=None):
+    """
+    Rebuild the search documents of taxa.
+    :param taxon_ids: taxon ids, every taxon when None
+    :return: number of documents written
+    """
+    from bims.models.taxonomy import Taxonomy
+    from taggit.models import Tag, TaggedItem
+
+    vernacular_through = Taxonomy.vernacular_names.through
+    quote = connection.ops.quote_name
+    sql = """
+        INSERT INTO {document} (
+            taxonomy_id, names, scientific_name, vernacular_names, tags
+        )
+        SELECT
+            taxon.id,
+            concat_ws(%(separator)s,
+                taxon.canonical_name,
+                accepted.canonical_name,
+                (
+                    SELECT string_agg(synonym.canonical_name, %(separator)s)
+                    FROM {taxonomy} synonym
+                    WHERE synonym.accepted_taxonomy_id = taxon.id
+                )
+            ),
+            COALESCE(taxon.scientific_name, ''),
+            COALESCE((
+                SELECT string_agg(vernacular.name, %(separator)s)
+                FROM {vernacular_through} taxon_vernacular
+                JOIN {vernacular} vernacular
+                    ON vernacular.id = taxon_vernacular.{vernacular_column}
+                WHERE taxon_vernacular.{taxonomy_column} = taxon.id
+            ), ''),
+            COALESCE((
+                SELECT string_agg(
+                    concat_ws(%(separator)s, tag.name, tag.slug),
+                    %(separator)s)
+                FROM {tagged_item} item
+                JOIN {tag} tag ON tag.id = item.tag_id
+                WHERE item.object_id = taxon.id
+                AND item.content_type_id = (
+                    SELECT id FROM django_content_type
+                    WHERE app_label = 'bims' AND model = 'taxonomy'
+                )
+            ), '')
+        FROM {taxonomy} taxon
+        LEFT JOIN {taxonomy} accepted
+            ON accepted.id = taxon.accepted_taxonomy_id
+        {where}
+        ON CONFLICT (taxonomy_id) DO UPDATE SET
+            names = EXCLUDED.names,
+            scientific_name = EXCLUDED.scientific_name,
+            vernacular_names = EXCLUDED.vernacular_names,
+            tags = EXCLUDED.tags
+    """
+    tables = {
+        'document': quote(TaxonSearchDocument._meta.db_table),
+        'taxonomy': quote(Taxonomy._meta.db_table),
+        'vernacular_through': quote(vernacular_through._meta.db_table),
+        'vernacular': quote(
+            Taxonomy.vernacular_names.field.related_model._meta.db_table),
+        'vernacular_column': Taxonomy.vernacular_names.field.m2m_reverse_name(),
+        'taxonomy_column': Taxonomy.vernacular_names.field.m2m_column_name(),
+        'tagged_item': quote(TaggedItem._meta.db_table),
+        'tag': quote(Tag._meta.db_table),
+    }
+    return _rebuild(sql, tables, 'taxon.id', taxon_ids)
+
+
+def rebuild_site_search_documents(site_ids=None):
+    """
+    Rebuild the search documents of sites.
+    :param site_ids: site ids, every site when None
+    :return: number of documents written
+    """
+    from bims.models.location_site import LocationSite
+
+    quote = connection.ops.quote_name
+    sql = """
+        INSERT INTO {document} (
+            site_id, site_code, legacy_river_name, river_name
+        )
+        SELECT
+            site.id,
+            COALESCE(site.site_code, ''),
+            COALESCE(site.legacy_river_name, ''),
+            COALESCE(river.name, '')
+        FROM {site} site
+        LEFT JOIN {river} river ON river.id = site.river_id
+        {where}
+        ON CONFLICT (site_id) DO UPDATE SET
+            site_code = EXCLUDED.site_code,
+            legacy_river_name = EXCLUDED.legacy_river_name,
+            river_name = EXCLUDED.river_name
+    """
+    tables = {
+        'document': quote(SiteSearchDocument._meta.db_table),
+        'site': quote(LocationSite._meta.db_table),
+        'river': quote(
+            LocationSite._meta.get_field('river').related_model._meta.db_table
+        ),
+    }
+    return _rebuild(sql, tables, 'site.id', site_ids)
+
+
+def _rebuild(sql, tables, id_column, ids):
+    if ids is None:
+        batches = [None]
+    else:
+        ids = sorted(set(int(pk) for pk in ids))
+        batches = [
+            ids[start:start + SEARCH_DOCUMENT_BATCH_SIZE]
+            for start in range(0, len(ids), SEARCH_DOCUMENT_BATCH_SIZE)
+        ]
+    total = 0
+    for batch in batches:
+        params = {'separator': SEPARATOR}
+        where = ''
+        if batch is not None:
+            where = 'WHERE {column} = ANY(%(ids)s)'.format(column=id_column)
+            params['ids'] = batch
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(where=where, **tables), params)
+            total += cursor.rowcount
+    return total
+
+
+def _flush_pending_documents():
+    from bims.models.taxonomy import Taxonomy
+
+    taxon_ids = getattr(_pending, 'taxon_ids', None) or set()
+    site_ids = getattr(_pending, 'site_ids', None) or set()
+    _pending.taxon_ids = set()
+    _pending.site_ids = set()
+    if taxon_ids:
+        # Canonical names are also part of the documents of the accepted
+        # taxon and of the synonyms
+        related = set()
+        for pk, accepted_id in Taxonomy.objects.filter(
+            Q(id__in=taxon_ids) | Q(accepted_taxonomy_id__in=taxon_ids)
+        ).values_list('id', 'accepted_taxonomy_id'):
+            related.add(pk)
+            if accepted_id:
+                related.add(accepted_id)
+        rebuild_taxon_search_documents(related)
+    if site_ids:
+        rebuild_site_search_documents(site_ids)
+
+
+def refresh_search_documents(taxon_ids=(), site_ids=()):
+    """
+    Rebuild the search documents of taxa and sites once the current
+    transaction commits, once for ids marked several times before then.
+    """
+    taxon_ids = set(pk for pk in taxon_ids if pk)
+    site_ids = set(pk for pk in site_ids if pk)
+    if not taxon_ids and not site_ids:
+        return
+    if getattr(_pending, 'taxon_ids', None) is None:
+        _pending.taxon_ids = set()
+    if getattr(_pending, 'site_ids', None) is None:
+        _pending.site_ids = set()
+    _pending.taxon_ids.update(taxon_ids)
+    _pending.site_ids.update(site_ids)
+    transaction.on_commit(_flush_pending_documents)
+
+
+@receiver(post_save, sender='bims.Taxonomy')
+def taxonomy_search_document(sender, instance, **kwargs):
+    refresh_search_documents(
+        taxon_ids=[instance.id, instance.accepted_taxonomy_id])
+
+
+@receiver(m2m_changed, sender='bims.Taxonomy_vernacular_names')
+def taxonomy_vernacular_names_search_document(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_search_documents(taxon_ids=[instance.id])
+    elif pk_set:
+        refresh_search_documents(taxon_ids=pk_set)
+
+
+@receiver(post_save, sender='bims.VernacularName')
+def vernacular_name_search_document(sender, instance, created, **kwargs):
+    if created:
+        return
+    refresh_search_documents(taxon_ids=instance.taxonomy_set.values_list(
+        'id', flat=True))
+
+
+@receiver(post_save, sender='taggit.TaggedItem')
+@receiver(post_delete, sender='taggit.TaggedItem')
+def tagged_taxonomy_search_document(sender, instance, **kwargs):
+    content_type = ContentType.objects.get_for_id(instance.content_type_id)
+    if content_type.app_label == 'bims' and content_type.model == 'taxonomy':
+        refresh_search_documents(taxon_ids=[instance.object_id])
+
+
+@receiver(post_save, sender='bims.LocationSite')
+def location_site_search_document(sender, instance, **kwargs):
+    refresh_search_documents(site_ids=[instance.id])
+
+
+@receiver(post_save, sender='sass.River')
+def river_search_document(sender, instance, **kwargs):
+    refresh_search_documents(site_ids=instance.locationsite_set.values_list(
+        'id', flat=True))
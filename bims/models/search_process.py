@@ -9,13 +9,18 @@ import errno
 from datetime import date
 
 from django.contrib.sites.models import Site
-from django.db import connection, DatabaseError
-from django.db.utils import ProgrammingError
 from django.conf import settings
 from django.db import models
 from django.db.models.signals import pre_delete
 from django.dispatch.dispatcher import receiver
 
+from bims.utils.result_store import (
+    write_results,
+    read_results,
+    count_results,
+    remove_results
+)
+
 CLUSTER_GENERATION = 'cluster_generation'
 SEARCH_RESULTS = 'search_results'
 SITES_SUMMARY = 'sites_summary'
@@ -27,6 +32,9 @@ SPATIAL_DASHBOARD_SUMMARY = 'spatial_dashboard_summary'
 SPATIAL_DASHBOARD_SPECIES_DOWNLOAD = 'spatial_dashboard_species_download'
 TAXON_SUMMARY = 'taxon_summary'
 
+# Result lists stored as seekable pages next to the result file
+PAGINATED_RESULT_KEYS = ('sites', 'records')
+
 SEARCH_PROCESSING = 'processing'
 SEARCH_FINISHED = 'finished'
 SEARCH_FAILED = 'failed'
@@ -117,6 +125,19 @@ class SearchProcess(models.Model):
     locked = models.BooleanField(
         default=False
     )
+    data_version = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text='Hash of the data versions the results were computed from.'
+    )
+    search_view = models.ForeignKey(
+        'bims.SearchView',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='search_processes'
+    )
     site = models.ForeignKey(
         Site,
         on_delete=models.CASCADE,
@@ -149,38 +170,35 @@ class SearchProcess(models.Model):
         self.search_raw_query = query_string
         self.save()
 
+    @property
+    def view_name(self):
+        """Name of the materialized view holding the searched sites."""
+        if self.search_view_id:
+            return self.search_view.name
+        return self.process_id
+
     def create_view(self):
         if self.process_id and self.search_raw_query:
-            cursor = connection.cursor()
-            try:
-                sql = (
-                    'DROP MATERIALIZED VIEW IF EXISTS "{view_name}"'.
-                    format(
-                        view_name=self.process_id
-                    ))
-                cursor.execute('''%s''' % sql)
-            except (ProgrammingError, DatabaseError):
-                pass
-            sql = (
-                'CREATE MATERIALIZED VIEW "{view_name}" AS {sql_raw}'.
-                format(
-                    view_name=self.process_id,
-                    sql_raw=self.search_raw_query
-                ))
-            cursor.execute('''%s''' % sql)
+            from bims.models.data_version import get_search_data_version
+            from bims.models.search_view import SearchView
+            self.search_view = SearchView.objects.acquire(
+                self.search_raw_query,
+                self.data_version or get_search_data_version({})
+            )
+            self.save()
+
+    def touch_view(self):
+        if self.search_view_id:
+            self.search_view.touch()
 
     def delete_view(self):
+        if self.search_view_id:
+            # Shared views are dropped by the eviction task
+            self.search_view = None
+            return
         if self.finished and self.process_id and self.search_raw_query:
-            cursor = connection.cursor()
-            try:
-                sql = (
-                    'DROP MATERIALIZED VIEW IF EXISTS "{view_name}"'.
-                    format(
-                        view_name=self.process_id
-                    ))
-                cursor.execute('''%s''' % sql)
-            except (ProgrammingError, DatabaseError):
-                return
+            from bims.models.search_view import drop_materialized_view
+            drop_materialized_view(self.process_id)
 
     def set_status(self, value, should_save_to_file=True):
         if value == SEARCH_FINISHED:
@@ -202,6 +220,54 @@ class SearchProcess(models.Model):
         with open(self.file_path, 'wb') as status_file:
             status_file.write(bytes(json.dumps(results).encode('utf-8')))
 
+    def save_results_to_file(self, results):
+        """
+        Save search results to file, storing the large result lists as
+        separately readable pages so a page fetch does not decode the
+        whole result.
+        :param results: dictionary
+        """
+        summary = dict(results)
+        paginated_results = {}
+        for key in PAGINATED_RESULT_KEYS:
+            if isinstance(summary.get(key), list):
+                paginated_results[key] = write_results(
+                    self.file_path, key, summary.pop(key))
+        summary['paginated_results'] = paginated_results
+        self.save_to_file(summary)
+
+    def get_result_page(self, key, offset, limit, results=None):
+        """
+        Get a slice of a result list.
+        :param key: name of the result list, e.g. 'sites'
+        :param offset: index of the first item
+        :param limit: maximum number of items
+        :param results: already loaded results, used for result files
+            saved before the lists were paginated
+        :return: tuple of (items, total), items is None if there is no list
+        """
+        total = count_results(self.file_path, key)
+        if total is not None:
+            return read_results(self.file_path, key, offset, limit), total
+        if results is None and os.path.exists(self.file_path):
+            with open(self.file_path, 'r') as raw_data:
+                try:
+                    results = json.loads(raw_data.read())
+                except ValueError:
+                    results = None
+        items = results.get(key) if isinstance(results, dict) else None
+        if not isinstance(items, list):
+            return None, 0
+        return items[offset:offset + limit], len(items)
+
+    def remove_files(self):
+        if not self.file_path:
+            return
+        for key in PAGINATED_RESULT_KEYS:
+            remove_results(self.file_path, key)
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
     def get_file_if_exits(self, finished=True):
         if os.path.exists(self.file_path) and self.finished == finished:
             with open(self.file_path, 'r') as raw_data:
@@ -215,7 +281,20 @@ class SearchProcess(models.Model):
             self.save()
         return None
 
+    def is_stale(self, data_version):
+        """Whether the results were computed from older data."""
+        return self.data_version != data_version
+
+    def set_data_version(self, data_version):
+        self.data_version = data_version
+        self.save()
+
     def set_process_id(self, process_id):
+        if self.process_id and self.process_id != process_id:
+            # Results of the previous data version are no longer reachable
+            self.delete_view()
+            self.remove_files()
+            self.finished = False
         self.process_id = process_id
         path_folder = os.path.join(settings.MEDIA_ROOT, self.category)
         try:
@@ -230,9 +309,7 @@ class SearchProcess(models.Model):
 
 @receiver(pre_delete, sender=SearchProcess)
 def searchprocess_delete(sender, instance, **kwargs):
-    import os
     if sender != SearchProcess:
         return
     instance.delete_view()
-    if os.path.exists(instance.file_path):
-        os.remove(instance.file_path)
+    instance.remove_files()
@@ -0,0 +1,228 @@
+# coding=utf-8
+"""Search view model definition.
+
+Materialized views of search results, shared by every search process that
+produces the same raw query and evicted by a periodic task.
+"""
+import hashlib
+import logging
+import re
+from datetime import timedelta
+
+from django.db import connection, models, DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Postgres truncates identifiers to 63 characters
+SEARCH_VIEW_PREFIX = 'search_view_'
+SEARCH_VIEW_NAME_LENGTH = 63
+
+# Views created before the pool existed were named by the process id
+LEGACY_SEARCH_VIEW_PATTERN = re.compile(r'^[0-9a-f]{63,64}$')
+
+
+def search_view_query_hash(raw_query, data_version=''):
+    return hashlib.sha256(
+        '{version}:{query}'.format(
+            version=data_version,
+            query=raw_query
+        ).encode('utf-8')
+    ).hexdigest()
+
+
+class SearchViewManager(models.Manager):
+
+    def acquire(self, raw_query, data_version=''):
+        """
+        Return the view materializing raw_query, creating it if needed.
+        Views are only shared between searches made on the same data.
+        :param raw_query: formatted raw sql of the search
+        :param data_version: hash of the data versions the query reads
+        :return: SearchView
+        """
+        query_hash = search_view_query_hash(raw_query, data_version)
+        search_view, created = self.get_or_create(
+            query_hash=query_hash,
+            defaults={
+                'name': (
+                    SEARCH_VIEW_PREFIX + query_hash
+                )[:SEARCH_VIEW_NAME_LENGTH]
+            }
+        )
+        if created or not search_view.exists_in_database():
+            search_view.materialize(raw_query)
+        search_view.touch()
+        return search_view
+
+
+class SearchView(models.Model):
+    """Materialized view of the sites returned by a search."""
+
+    name = models.CharField(
+        max_length=SEARCH_VIEW_NAME_LENGTH,
+        unique=True
+    )
+    query_hash = models.CharField(
+        max_length=64,
+        unique=True
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now
+    )
+    last_used_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True
+    )
+    hit_count = models.PositiveIntegerField(
+        default=0
+    )
+
+    objects = SearchViewManager()
+
+    class Meta:
+        app_label = 'bims'
+        verbose_name = 'Search view'
+        verbose_name_plural = 'Search views'
+
+    def __str__(self):
+        return self.name
+
+    def exists_in_database(self):
+        return materialized_view_exists(self.name)
+
+    def materialize(self, raw_query):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE MATERIALIZED VIEW IF NOT EXISTS "{view_name}" '
+                'AS {sql_raw}'.format(
+                    view_name=self.name,
+                    sql_raw=raw_query
+                ))
+
+    def touch(self):
+        """Record a use of the view, for LRU eviction."""
+        self.last_used_at = timezone.now()
+        SearchView.objects.filter(id=self.id).update(
+            last_used_at=self.last_used_at,
+            hit_count=F('hit_count') + 1
+        )
+
+    def drop(self):
+        """
+        Drop the view and invalidate the search processes using it, so
+        their next request recomputes the search, and the cached map tiles
+        drawing it.
+        """
+        from bims.models.search_process import SearchProcess
+        from bims.utils.tile_cache import invalidate_search_view_tiles
+        SearchProcess.objects.filter(search_view=self).update(
+            finished=False,
+            search_view=None
+        )
+        drop_materialized_view(self.name)
+        invalidate_search_view_tiles(self.name)
+        self.delete()
+
+
+def materialized_view_exists(view_name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_matviews '
+            'WHERE schemaname = current_schema() AND matviewname = %s',
+            [view_name]
+        )
+        return cursor.fetchone() is not None
+
+
+def is_search_view(view_name):
+    """Whether a name is the name of an existing search view."""
+    return bool(view_name) and (
+        view_name.startswith(SEARCH_VIEW_PREFIX) or
+        bool(LEGACY_SEARCH_VIEW_PATTERN.match(view_name))
+    ) and materialized_view_exists(view_name)
+
+
+def drop_materialized_view(view_name):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DROP MATERIALIZED VIEW IF EXISTS "{view_name}"'.format(
+                    view_name=view_name
+                ))
+    except DatabaseError as e:
+        logger.error('Could not drop view %s: %s', view_name, e)
+
+
+def evict_search_views(max_views=None, ttl_days=None):
+    """
+    Drop search views unused for longer than ttl_days and the least
+    recently used ones above max_views. Views of locked search processes
+    are kept. Legacy views named by process id that no search process
+    refers to anymore are dropped as well.
+    :param max_views: maximum number of views to keep, falsy for no limit
+    :param ttl_days: days a view is kept after its last use, falsy to
+        keep views until the limit is reached
+    :return: number of views dropped
+    """
+    from bims.models.search_process import SearchProcess
+
+    candidates = SearchView.objects.exclude(
+        id__in=SearchProcess.objects.filter(
+            locked=True,
+            search_view__isnull=False
+        ).values('search_view_id')
+    )
+    to_drop = set()
+    if ttl_days:
+        expired_before = timezone.now() - timedelta(days=ttl_days)
+        to_drop.update(
+            candidates.filter(
+                last_used_at__lt=expired_before
+            ).values_list('id', flat=True)
+        )
+    if max_views:
+        to_drop.update(
+            candidates.order_by('-last_used_at').values_list(
+                'id', flat=True)[max_views:]
+        )
+
+    dropped = 0
+    for search_view in SearchView.objects.filter(id__in=to_drop):
+        search_view.drop()
+        dropped += 1
+
+    return dropped + drop_legacy_search_views()
+
+
+def drop_legacy_search_views():
+    """Drop views named by a process id that no search refers to."""
+    from bims.models.search_process import SearchProcess
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT matviewname FROM pg_matviews '
+            'WHERE schemaname = current_schema()'
+        )
+        view_names = [
+            row[0] for row in cursor.fetchall()
+            if LEGACY_SEARCH_VIEW_PATTERN.match(row[0])
+        ]
+    if not view_names:
+        return 0
+    used_names = set(
+        process_id[:SEARCH_VIEW_NAME_LENGTH] for process_id in
+        SearchProcess.objects.filter(
+            search_view__isnull=True,
+            finished=True
+        ).exclude(
+            search_raw_query__isnull=True
+        ).values_list('process_id', flat=True)
+    )
+    dropped = 0
+    for view_name in view_names:
+        if view_name not in used_names:
+            drop_materialized_view(view_name)
+            dropped += 1
+    return dropped
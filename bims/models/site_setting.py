@@ -287,6 +287,23 @@ class SiteSetting(Preferences):
             'to never expire.'
         )
     )
+    max_search_views = models.PositiveIntegerField(
+        default=500,
+        help_text=(
+            'Maximum number of materialized search result views kept in '
+            'the database. The least recently used views above this number '
+            'are dropped periodically. Set to 0 for no limit.'
+        )
+    )
+    search_view_expiry_days = models.PositiveSmallIntegerField(
+        default=7,
+        null=True,
+        blank=True,
+        help_text=(
+            'Number of days a search result view is kept after it was last '
+            'used. Leave blank or set to 0 to only apply the limit above.'
+        )
+    )
 
     show_module_summary_on_dashboard = models.BooleanField(
         default=False,
@@ -11,7 +11,7 @@ from taggit.models import GenericTaggedItemBase, TagBase, TaggedItemBase
 from bims.models.cites_listing_info import CITESListingInfo
 from bims.models.source_reference import SourceReference
 from bims.models.validation import AbstractValidation
-from django.db import models
+from django.db import models, transaction
 from django.dispatch import receiver
 
 from bims.enums.taxonomic_status import TaxonomicStatus
@@ -25,7 +25,10 @@ from bims.models.notification import (
     get_recipients_for_notification,
     NEW_TAXONOMY
 )
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db.models import JSONField, OuterRef, Subquery, signals
+from django.db.models.fields.json import KT
+from django.db.models.functions import Upper
 
 ORIGIN_CATEGORIES = {
     'non-native': 'alien',
@@ -35,6 +38,28 @@ ORIGIN_CATEGORIES = {
     'non-native: non-invasive': 'alien-non-invasive'
 }
 
+# Maximum number of parents followed when walking up the tree
+MAX_ANCESTOR_DEPTH = 20
+
+# Keys of Taxonomy.hierarchical_data holding the name of each higher rank.
+# They are refreshed on save, so the rank name properties read them
+# instead of walking the tree. 'species_name' is also stored, holding the
+# species name without its genus.
+RANK_NAME_KEYS = {
+    TaxonomicRank.KINGDOM.name: 'kingdom_name',
+    TaxonomicRank.PHYLUM.name: 'phylum_name',
+    TaxonomicRank.CLASS.name: 'class_name',
+    TaxonomicRank.ORDER.name: 'order_name',
+    TaxonomicRank.FAMILY.name: 'family_name',
+    TaxonomicRank.SUBFAMILY.name: 'sub_family_name',
+    TaxonomicRank.TRIBE.name: 'tribe_name',
+    TaxonomicRank.SUBTRIBE.name: 'sub_tribe_name',
+    TaxonomicRank.GENUS.name: 'genus_name',
+    TaxonomicRank.SUBGENUS.name: 'sub_genus_name',
+    TaxonomicRank.SPECIES.name: 'species_canonical_name',
+    TaxonomicRank.SUBSPECIES.name: 'sub_species_name',
+}
+
 
 class TaxonTag(TagBase):
     name = models.CharField(
@@ -53,6 +78,14 @@ class SpeciesGroup(models.Model):
     name = models.CharField(max_length=200, unique=True)
     description = models.TextField(blank=True, default='')
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='species_group_name_trgm'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -327,6 +360,10 @@ class AbstractTaxonomy(AbstractValidation):
             return ','.join(list(cites_listing_info.values_list(
                 'appendix', flat=True
             )))
+        return self.additional_cites_listing()
+
+    def additional_cites_listing(self):
+        """CITES listing stored in the additional data of the taxon."""
         if self.additional_data:
             if 'CITES Listing' in self.additional_data:
                 return self.additional_data['CITES Listing']
@@ -338,30 +375,28 @@ class AbstractTaxonomy(AbstractValidation):
 
     @property
     def taxon_class(self):
-        if self.rank != TaxonomicRank.CLASS.name and self.parent:
-            return self.parent.taxon_class
-        if self.rank == TaxonomicRank.CLASS.name:
-            return self
+        for taxon in self.ancestor_chain():
+            if taxon.rank == TaxonomicRank.CLASS.name:
+                return taxon
         return None
 
-    def get_parent_by_rank(self, rank):
-        limit = 20
-        current_try = 0
+    def ancestor_chain(self):
+        """
+        Return this taxon followed by its ancestors, nearest first.
+        """
+        chain = [self]
         _taxon = self
-        _parent = _taxon.parent if _taxon.parent else None
-        _rank = _taxon.rank
-        while (
-                _parent and _rank
-                and _rank != rank
-                and current_try < limit
-        ):
-            current_try += 1
-            _taxon = _parent
-            _rank = _taxon.rank
-            _parent = _taxon.parent if _taxon.parent else None
+        while _taxon.parent and len(chain) <= MAX_ANCESTOR_DEPTH:
+            _taxon = _taxon.parent
+            chain.append(_taxon)
+        return chain
 
-        if _rank == rank:
-            return _taxon
+    def get_parent_by_rank(self, rank):
+        for _taxon in self.ancestor_chain():
+            if _taxon.rank == rank:
+                return _taxon
+            if not _taxon.rank:
+                break
         return None
 
     def _get_rank_name_from_canonical(self, rank):
@@ -410,9 +445,6 @@ class AbstractTaxonomy(AbstractValidation):
         return ' '.join(cleaned_tokens[:depth])
 
     def get_taxon_rank_name(self, rank):
-        limit = 20
-        current_try = 0
-
         target_rank = rank.name if isinstance(rank, TaxonomicRank) else rank
 
         status = (self.taxonomic_status or '').upper()
@@ -434,20 +466,8 @@ class AbstractTaxonomy(AbstractValidation):
         else:
             _taxon = self
 
-        _parent = _taxon.parent if _taxon.parent else None
-        _rank = _taxon.rank
-
-        while (
-                _parent and _rank
-                and _rank != target_rank
-                and current_try < limit
-        ):
-            current_try += 1
-            _taxon = _parent
-            _rank = _taxon.rank
-            _parent = _taxon.parent if _taxon.parent else None
-
-        if _rank == target_rank:
+        _taxon = _taxon.get_parent_by_rank(target_rank)
+        if _taxon:
             return _taxon.canonical_name
         return ''
 
@@ -691,6 +711,38 @@ class Taxonomy(AbstractTaxonomy):
         app_label = 'bims'
         verbose_name_plural = 'Taxa'
         verbose_name = 'Taxonomy'
+        indexes = [
+            GinIndex(
+                fields=['hierarchical_data'],
+                opclasses=['jsonb_path_ops'],
+                name='taxonomy_hierarchy_gin'
+            ),
+        ] + [
+            models.Index(
+                Upper(KT(f'hierarchical_data__{key}')),
+                name=f'taxonomy_{key}_upper'
+            ) for key in (
+                'class_name', 'order_name', 'family_name', 'genus_name',
+                'species_name'
+            )
+        ] + [
+            # canonical_name__iexact and legacy_canonical_name__icontains
+            # lookups of the name resolvers
+            models.Index(
+                Upper('canonical_name'),
+                name='taxonomy_canonical_name_upper'
+            ),
+            GinIndex(
+                OpClass(Upper('legacy_canonical_name'), name='gin_trgm_ops'),
+                name='taxonomy_legacy_name_trgm'
+            ),
+        ] + [
+            # icontains lookups of the autocomplete views
+            GinIndex(
+                OpClass(Upper(field), name='gin_trgm_ops'),
+                name=f'taxonomy_{field}_trgm'
+            ) for field in ('canonical_name', 'scientific_name', 'author')
+        ]
 
     def __unicode__(self):
         return '%s - %s' % (
@@ -711,40 +763,94 @@ class Taxonomy(AbstractTaxonomy):
         return children
 
     def get_all_children(self):
-        query = {}
-        parent = ''
-        or_condition = models.Q()
-        for i in range(6):  # species to class
-            parent += 'parent__'
-            query[parent + 'in'] = [self]
-        for key, value in query.items():
-            or_condition |= models.Q(**{key: value})
-        return Taxonomy.objects.filter(or_condition)
+        return self.get_descendants()
+
+    def get_descendants(self, include_self=False):
+        """All taxa below this one, read from the closure table."""
+        # Both conditions in one filter call, so they apply to the same
+        # closure row
+        links = {'ancestor_links__ancestor_id': self.id}
+        if not include_self:
+            links['ancestor_links__depth__gt'] = 0
+        return Taxonomy.objects.filter(**links)
+
+    def get_ancestors(self, include_self=False):
+        """All taxa above this one, nearest first."""
+        links = {'descendant_links__descendant_id': self.id}
+        if not include_self:
+            links['descendant_links__depth__gt'] = 0
+        return Taxonomy.objects.filter(**links).order_by(
+            'descendant_links__depth'
+        )
+
+    def get_ancestor_by_rank(self, rank):
+        """Nearest taxon of the given rank, this one included."""
+        return self.get_ancestors(include_self=True).filter(
+            rank=rank
+        ).first()
+
+    def descendant_count(self):
+        return self.descendant_links.filter(depth__gt=0).count()
+
+    def ancestor_chain(self):
+        """
+        Parents already loaded in memory are walked as they are, otherwise
+        the whole chain is fetched with one closure table query and linked
+        so later parent accesses do not hit the database.
+        """
+        parent_field = Taxonomy._meta.get_field('parent')
+        if (
+                not self.pk or not self.parent_id or
+                parent_field.is_cached(self)
+        ):
+            return super(Taxonomy, self).ancestor_chain()
+        ancestors = list(
+            self.get_ancestors()[:MAX_ANCESTOR_DEPTH]
+        )
+        if not ancestors or ancestors[0].id != self.parent_id:
+            # Closure rows are missing or stale
+            return super(Taxonomy, self).ancestor_chain()
+        chain = [self] + ancestors
+        for child, parent in zip(chain, chain[1:]):
+            if child.parent_id != parent.id:
+                return super(Taxonomy, self).ancestor_chain()
+            parent_field.set_cached_value(child, parent)
+        return chain
 
     def parent_by_rank(self, rank):
-        taxon = self
-        current_rank = taxon.rank
-        while current_rank != rank and taxon.parent:
-            taxon = taxon.parent
-            current_rank = taxon.rank
-        if current_rank == rank:
-            return taxon
+        for taxon in self.ancestor_chain():
+            if taxon.rank == rank:
+                return taxon
         return None
 
-    def save(self, *args, **kwargs):
-        update_taxon_with_gbif = False
-
-        rank_order = [r.name for r in TaxonomicRank.hierarchy()]
-        cur_rank = (self.rank or "").upper()
+    def get_taxon_rank_name(self, rank):
+        target_rank = rank.name if isinstance(rank, TaxonomicRank) else rank
+        key = RANK_NAME_KEYS.get(target_rank)
+        if (
+                key and isinstance(self.hierarchical_data, dict) and
+                key in self.hierarchical_data
+        ):
+            return self.hierarchical_data[key] or ''
+        return super(Taxonomy, self).get_taxon_rank_name(target_rank)
 
-        try:
-            cur_idx = rank_order.index(cur_rank)
-        except ValueError:
-            cur_idx = None
+    def compute_hierarchical_data(self):
+        """
+        Return the rank names of this taxon computed from the tree,
+        ignoring the names stored in hierarchical_data.
+        """
+        hierarchical_data = {}
+        for rank, key in RANK_NAME_KEYS.items():
+            hierarchical_data[key] = AbstractTaxonomy.get_taxon_rank_name(
+                self, rank)
+        genus_name = hierarchical_data['genus_name']
+        species_name = hierarchical_data['species_canonical_name']
+        if genus_name and genus_name in species_name:
+            species_name = species_name.split(genus_name)[-1].strip()
+        hierarchical_data['species_name'] = species_name
+        return hierarchical_data
 
-        family_idx = rank_order.index(TaxonomicRank.FAMILY.name)
-        genus_idx = rank_order.index(TaxonomicRank.GENUS.name)
-        species_idx = rank_order.index(TaxonomicRank.SPECIES.name)
+    def save(self, *args, **kwargs):
+        update_taxon_with_gbif = False
 
         if self.gbif_data:
             self.gbif_data = self.save_json_data(self.gbif_data)
@@ -753,27 +859,35 @@ class Taxonomy(AbstractTaxonomy):
         if self.additional_data and 'fetch_gbif' in self.additional_data:
             update_taxon_with_gbif = True
             del self.additional_data['fetch_gbif']
-        species_name = ''
-        if not self.hierarchical_data or 'species_name' not in self.hierarchical_data:
-            species_name = self.species_name
-            genus_name = self.genus_name
-            if genus_name in species_name and genus_name:
-                species_name = species_name.split(genus_name)[-1].strip()
-        if not self.hierarchical_data:
-            self.hierarchical_data = {
-                'family_name': self.get_taxon_rank_name(TaxonomicRank.FAMILY.name),
-                'genus_name': self.get_taxon_rank_name(TaxonomicRank.GENUS.name),
-                'species_name': species_name
-            }
-        elif ('family_name' not in self.hierarchical_data or not self.hierarchical_data['family_name']) and cur_idx and cur_idx >= family_idx:
-            self.hierarchical_data['family_name'] = self.get_taxon_rank_name(TaxonomicRank.FAMILY.name)
-        elif ('genus_name' not in self.hierarchical_data or not self.hierarchical_data['genus_name']) and cur_idx and cur_idx >= genus_idx:
-            self.hierarchical_data['genus_name'] = self.get_taxon_rank_name(TaxonomicRank.GENUS.name)
-        elif ('species_name' not in self.hierarchical_data or not self.hierarchical_data['species_name']) and cur_idx and cur_idx >= species_idx:
-            self.hierarchical_data['species_name'] = species_name
+
+        previous = None
+        if self.pk:
+            previous = Taxonomy.objects.filter(pk=self.pk).values(
+                'parent_id', 'rank', 'canonical_name', 'hierarchical_data'
+            ).first()
+        hierarchical_data = (
+            self.hierarchical_data
+            if isinstance(self.hierarchical_data, dict) else {}
+        )
+        self.hierarchical_data = dict(
+            hierarchical_data, **self.compute_hierarchical_data())
 
         super(Taxonomy, self).save(*args, **kwargs)
 
+        if previous and (
+                previous['parent_id'] != self.parent_id or
+                previous['rank'] != self.rank or
+                previous['canonical_name'] != self.canonical_name or
+                previous['hierarchical_data'] != self.hierarchical_data
+        ):
+            # Names stored on taxa below this one are now stale
+            from bims.utils.taxonomy_rank_names import (
+                refresh_descendant_rank_names
+            )
+            taxonomy_id = self.id
+            transaction.on_commit(
+                lambda: refresh_descendant_rank_names(taxonomy_id))
+
         if update_taxon_with_gbif:
             from bims.utils.fetch_gbif import fetch_all_species_from_gbif
             fetch_all_species_from_gbif(
@@ -0,0 +1,185 @@
+# coding=utf-8
+"""Taxonomy closure table.
+
+One row per (ancestor, descendant) pair of the taxonomy tree, including a
+row of depth 0 linking every taxon to itself. Descendants, ancestors and
+subtree counts are then single indexed queries instead of parent walks.
+Rows are kept in sync when a taxon is saved or deleted; bulk changes that
+bypass signals can be repaired with the rebuild_taxonomy_closure command.
+"""
+import logging
+
+from django.db import connection, models, transaction
+from django.db.models import Count
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from bims.models.taxonomy import Taxonomy
+
+logger = logging.getLogger('bims')
+
+# Guards the recursive rebuild against cycles in broken trees
+MAX_CLOSURE_DEPTH = 50
+
+
+class TaxonomyClosure(models.Model):
+    """Path from a taxon to one of its descendants."""
+
+    ancestor = models.ForeignKey(
+        Taxonomy,
+        on_delete=models.CASCADE,
+        related_name='descendant_links'
+    )
+    descendant = models.ForeignKey(
+        Taxonomy,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links'
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0
+    )
+
+    class Meta:
+        app_label = 'bims'
+        verbose_name = 'Taxonomy closure'
+        verbose_name_plural = 'Taxonomy closures'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor', 'descendant'],
+                name='unique_taxonomy_closure_path'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['ancestor', 'depth'],
+                name='taxonomy_closure_anc_depth'
+            ),
+            models.Index(
+                fields=['descendant', 'depth'],
+                name='taxonomy_closure_desc_depth'
+            ),
+        ]
+
+    def __str__(self):
+        return '{ancestor} > {descendant} ({depth})'.format(
+            ancestor=self.ancestor_id,
+            descendant=self.descendant_id,
+            depth=self.depth
+        )
+
+
+def _tables():
+    return {
+        'closure': connection.ops.quote_name(TaxonomyClosure._meta.db_table),
+        'taxonomy': connection.ops.quote_name(Taxonomy._meta.db_table),
+    }
+
+
+def subtree_counts(taxonomy_ids):
+    """Return the number of descendants of each taxon, keyed by id."""
+    counts = dict.fromkeys(taxonomy_ids, 0)
+    counts.update(
+        TaxonomyClosure.objects.filter(
+            ancestor_id__in=taxonomy_ids,
+            depth__gt=0
+        ).values('ancestor_id').annotate(
+            total=Count('descendant_id')
+        ).values_list('ancestor_id', 'total')
+    )
+    return counts
+
+
+def detach_taxonomy_subtree(taxonomy_id):
+    """Remove the paths from the ancestors of a taxon to its subtree."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {closure} WHERE descendant_id IN ('
+            '  SELECT descendant_id FROM {closure} WHERE ancestor_id = %s'
+            ') AND ancestor_id NOT IN ('
+            '  SELECT descendant_id FROM {closure} WHERE ancestor_id = %s'
+            ')'.format(**_tables()),
+            [taxonomy_id, taxonomy_id]
+        )
+
+
+def sync_taxonomy_closure(taxonomy_id, parent_id):
+    """
+    Make the closure rows of a taxon and its subtree match its parent.
+    Nothing is rewritten when the stored parent link is already current.
+    """
+    tables = _tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {closure} (ancestor_id, descendant_id, depth) '
+            'SELECT id, id, 0 FROM {taxonomy} WHERE id IN %s '
+            'ON CONFLICT (ancestor_id, descendant_id) DO NOTHING'.format(
+                **tables),
+            [tuple(filter(None, [taxonomy_id, parent_id]))]
+        )
+        cursor.execute(
+            'SELECT ancestor_id FROM {closure} '
+            'WHERE descendant_id = %s AND depth = 1'.format(**tables),
+            [taxonomy_id]
+        )
+        current_parents = [row[0] for row in cursor.fetchall()]
+    if current_parents == ([parent_id] if parent_id else []):
+        return
+
+    with transaction.atomic():
+        detach_taxonomy_subtree(taxonomy_id)
+        if not parent_id:
+            return
+        if TaxonomyClosure.objects.filter(
+                ancestor_id=taxonomy_id,
+                descendant_id=parent_id).exists():
+            logger.warning(
+                'Taxonomy %s can not be placed under its own descendant %s',
+                taxonomy_id, parent_id
+            )
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {closure} (ancestor_id, descendant_id, depth) '
+                'SELECT up.ancestor_id, down.descendant_id, '
+                '  up.depth + down.depth + 1 '
+                'FROM {closure} up, {closure} down '
+                'WHERE up.descendant_id = %s AND down.ancestor_id = %s '
+                'ON CONFLICT (ancestor_id, descendant_id) DO NOTHING'.format(
+                    **tables),
+                [parent_id, taxonomy_id]
+            )
+
+
+def rebuild_taxonomy_closure():
+    """Recreate every closure row from the parent links."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {closure}'.format(**_tables()))
+        cursor.execute(
+            'WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS ('
+            '  SELECT id, id, 0 FROM {taxonomy} '
+            '  UNION ALL '
+            '  SELECT paths.ancestor_id, taxon.id, paths.depth + 1 '
+            '  FROM paths JOIN {taxonomy} taxon '
+            '  ON taxon.parent_id = paths.descendant_id '
+            '  WHERE paths.depth < %s'
+            ') '
+            'INSERT INTO {closure} (ancestor_id, descendant_id, depth) '
+            'SELECT ancestor_id, descendant_id, MIN(depth) FROM paths '
+            'GROUP BY ancestor_id, descendant_id'.format(**_tables()),
+            [MAX_CLOSURE_DEPTH]
+        )
+        return cursor.rowcount
+
+
+@receiver(post_save, sender=Taxonomy)
+def taxonomy_closure_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_taxonomy_closure(instance.id, instance.parent_id)
+
+
+@receiver(pre_delete, sender=Taxonomy)
+def taxonomy_closure_pre_delete(sender, instance, **kwargs):
+    # Children are detached (parent set to null) by the delete, so their
+    # subtrees lose the ancestors of the deleted taxon as well
+    detach_taxonomy_subtree(instance.id)
@@ -1,11 +1,14 @@
 # coding=utf-8
 """Vernacular name model definition.
 """
+import hashlib
+import json
+
 from django.db import models
-from django.db.models import Avg, F, Max, Min, Count
-from django.db.models.aggregates import StdDev
+from django.db.models import Avg, Max, Min
 from django.db.models.functions import TruncDay
 from django.conf import settings
+from django.utils import timezone
 
 import numpy as np
 
@@ -187,10 +190,13 @@ class WaterTemperature(models.Model):
 
 
 def get_thermal_zone(location_site: LocationSite):
-    zone = (
-        location_site.locationcontext_set.value_from_key(
-            'thermal_zone').lower()
+    return thermal_zone_from_value(
+        location_site.locationcontext_set.value_from_key('thermal_zone')
     )
+
+
+def thermal_zone_from_value(zone):
+    zone = (zone or '').lower()
     if not zone or zone == '-':
         zone = 'upper'
     else:
@@ -201,17 +207,100 @@ def get_thermal_zone(location_site: LocationSite):
     return zone
 
 
+MONTH_NAMES = [
+    'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug',
+    'Sep', 'Oct', 'Nov', 'Dec'
+]
+
+
+def _to_array(values):
+    return np.array(
+        [np.nan if value is None else value for value in values],
+        dtype=float
+    )
+
+
+def _nan_mean(values):
+    """Mean ignoring missing values, None when there is none (as Avg)."""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    return float(values.mean())
+
+
+def _nan_std(values):
+    """Population standard deviation ignoring missing values (as StdDev)."""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    return float(values.std())
+
+
+def forward_window_mean(values, window):
+    """
+    Mean of values[day:day + window] for every day, windows at the end of
+    the array being cut short, computed from cumulative sums.
+    Missing values are ignored as in _nan_mean, a window without any
+    value being NaN.
+    :param values: 1-d numpy array
+    :param window: window length in days
+    :return: numpy array of the same length as values
+    """
+    size = len(values)
+    sums = np.concatenate(([0.0], np.nancumsum(values)))
+    counts = np.concatenate(([0], np.cumsum(~np.isnan(values))))
+    starts = np.arange(size)
+    ends = np.minimum(starts + window, size)
+    window_counts = counts[ends] - counts[starts]
+    return np.divide(
+        sums[ends] - sums[starts],
+        window_counts,
+        out=np.full(size, np.nan),
+        where=window_counts > 0
+    )
+
+
+def max_run_length(mask):
+    """Length of the longest run of True in a boolean array."""
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(
+        np.diff(np.concatenate(([0], mask.astype(int), [0])))
+    )
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def daily_temperature_arrays(temperature_data_annual, is_daily):
+    """
+    Load the daily series of a site-year with one query.
+    Sub-daily data is aggregated per day in the database first.
+    :return: dict of dates (list) and mean, min, max numpy arrays
+    """
+    if is_daily:
+        rows = temperature_data_annual.values_list(
+            'date_time', 'value', 'minimum', 'maximum'
+        )
+    else:
+        rows = temperature_data_annual.annotate(
+            start_day=TruncDay('date_time')
+        ).values('start_day').order_by('start_day').annotate(
+            mean=Avg('value'), max=Max('value'), min=Min('value')
+        ).values_list('start_day', 'mean', 'min', 'max')
+    rows = list(rows)
+    return {
+        'dates': [row[0] for row in rows],
+        'mean': _to_array([row[1] for row in rows]),
+        'min': _to_array([row[2] for row in rows]),
+        'max': _to_array([row[3] for row in rows]),
+    }
+
+
 def calculate_indicators(
         location_site: LocationSite,
         year: int,
         return_weekly: bool = False,
         water_temperature = None):
 
-    month_name = [
-        'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug',
-        'Sep', 'Oct', 'Nov', 'Dec'
-    ]
-
     indicators = dict()
 
     if not water_temperature:
@@ -226,92 +315,23 @@ def calculate_indicators(
 
     site_zone = get_thermal_zone(location_site)
 
-    if not temperature_data_annual.exists():
+    first_data = temperature_data_annual.first()
+    if not first_data:
         return indicators
 
-    is_daily = temperature_data_annual.first().is_daily
-    mean_key = 'value'
-    max_key = 'maximum'
-    min_key = 'minimum'
-    date_key = 'date_time'
-
-    if not is_daily:
-        mean_key = 'mean'
-        max_key = 'max'
-        min_key = 'min'
-        date_key = 'start_day'
-        temperature_data_annual = temperature_data_annual.annotate(
-            start_day=TruncDay('date_time')).values('start_day').order_by(
-            'start_day').annotate(mean=Avg('value'), max=Max('value'),
-                                  min=Min('value'),
-                                  count=Count('id')).annotate(
-            range=F('max') - F('min'))
-    else:
-        temperature_data_annual = temperature_data_annual.annotate(
-            range=F('maximum') - F('minimum')
-        )
+    daily_data = daily_temperature_arrays(
+        temperature_data_annual, first_data.is_daily)
 
-    indicators['year'] = year
-    indicators['monthly'] = {}
-    indicators['annual'] = {}
-
-    indicators['annual'] = temperature_data_annual.aggregate(
-        annual_mean=Avg(mean_key),
-        annual_max=Avg(max_key),
-        annual_min=Avg(min_key),
-        annual_range=Avg('range'),
-        annual_sd=StdDev(mean_key),
-        annual_range_sd=StdDev('range')
+    return indicators_from_daily_data(
+        daily_data,
+        year,
+        site_thresholds(
+            get_site_threshold(location_site), site_zone),
+        return_weekly
     )
 
-    indicators['annual']['annual_cv'] = (
-        (indicators['annual']['annual_sd'] * 100) /
-        indicators['annual']['annual_mean']
-    )
-
-    for month in range(12):
-        temperature_data_in_month = temperature_data_annual.filter(
-            date_time__month=month+1
-        )
-        indicators['monthly'][month_name[month]] = (
-            temperature_data_in_month.aggregate(
-                monthly_mean=Avg(mean_key),
-                monthly_max=Avg(max_key),
-                monthly_min=Avg(min_key),
-                monthly_range=Avg('range')
-            )
-        )
-
-    if is_daily:
-        temperature_data_annual = temperature_data_annual.values(
-            'date_time', 'value', 'minimum', 'maximum'
-        )
-
-    weekly_data = {
-        'weekly_mean_data': [],
-        'weekly_min_data': [],
-        'weekly_max_data': [],
-    }
-    thirty_data = {
-        'thirty_min_data': [],
-        'thirty_max_data': [],
-    }
-    ninety_data = {
-        'ninety_min_data': [],
-        'ninety_max_data': [],
-    }
-
-    weekly_mean_threshold = 0
-    weekly_mean_threshold_dur = 0
-    weekly_mean_threshold_dur_max = 0
-    weekly_min_threshold = 0
-    weekly_min_threshold_dur = 0
-    weekly_min_threshold_dur_max = 0
-    weekly_max_threshold = 0
-    weekly_max_threshold_dur = 0
-    weekly_max_threshold_dur_max = 0
-    date_time = []
 
+def get_site_threshold(location_site):
     water_temperature_threshold = WaterTemperatureThreshold.objects.filter(
         location_site=location_site
     ).first()
@@ -320,172 +340,299 @@ def calculate_indicators(
             location_site=None,
             creator=None
         )
+    return water_temperature_threshold
+
+
+def site_thresholds(water_temperature_threshold, site_zone):
+    """
+    :return: (mean, minimum, maximum) thresholds of the thermal zone
+    """
+    if site_zone == 'upper':
+        return (
+            water_temperature_threshold.upper_mean_threshold,
+            water_temperature_threshold.upper_minimum_threshold,
+            water_temperature_threshold.upper_maximum_threshold
+        )
+    return (
+        water_temperature_threshold.lower_mean_threshold,
+        water_temperature_threshold.lower_minimum_threshold,
+        water_temperature_threshold.lower_maximum_threshold
+    )
 
 
-    for day in range(len(temperature_data_annual)):
-        mean_data = []
-        min_data = []
-        max_data = []
-
-        min_data_30 = []
-        max_data_30 = []
-
-        min_data_90 = []
-        max_data_90 = []
-
-        date_time.append(str(temperature_data_annual[day][date_key].date()))
-
-        for temp_data in temperature_data_annual[day:day + 7]:
-            mean_data.append(temp_data[mean_key])
-            min_data.append(temp_data[min_key])
-            max_data.append(temp_data[max_key])
-
-        if day >= 30:
-            for temp_data in temperature_data_annual[day:day + 30]:
-                min_data_30.append(temp_data[min_key])
-                max_data_30.append(temp_data[max_key])
+def indicators_from_daily_data(
+        daily_data, year, thresholds, return_weekly=False):
+    """
+    Compute the indicators of one site-year from its daily arrays.
+    :param daily_data: dict from daily_temperature_arrays
+    :param year: year of the data
+    :param thresholds: (mean, minimum, maximum) thresholds of the site
+    :param return_weekly: include the daily weekly series
+    """
+    indicators = dict()
+    mean_threshold, minimum_threshold, maximum_threshold = thresholds
+    mean_data = daily_data['mean']
+    min_data = daily_data['min']
+    max_data = daily_data['max']
+    range_data = max_data - min_data
+    total_days = len(mean_data)
 
-            thirty_data['thirty_min_data'].append(
-                sum(min_data_30) / len(min_data_30))
-            thirty_data['thirty_max_data'].append(
-                sum(max_data_30) / len(max_data_30))
+    indicators['year'] = year
+    indicators['monthly'] = {}
+    indicators['annual'] = {
+        'annual_mean': _nan_mean(mean_data),
+        'annual_max': _nan_mean(max_data),
+        'annual_min': _nan_mean(min_data),
+        'annual_range': _nan_mean(range_data),
+        'annual_sd': _nan_std(mean_data),
+        'annual_range_sd': _nan_std(range_data)
+    }
 
-        if day >= 90:
-            for temp_data in temperature_data_annual[day:day + 90]:
-                min_data_90.append(temp_data[min_key])
-                max_data_90.append(temp_data[max_key])
+    indicators['annual']['annual_cv'] = (
+        (indicators['annual']['annual_sd'] * 100) /
+        indicators['annual']['annual_mean']
+    )
 
-            ninety_data['ninety_min_data'].append(
-                sum(min_data_90) / len(min_data_90))
-            ninety_data['ninety_max_data'].append(
-                sum(max_data_90) / len(max_data_90))
+    months = np.array([
+        (timezone.localtime(date) if timezone.is_aware(date) else date).month
+        for date in daily_data['dates']
+    ])
+    for month in range(12):
+        in_month = months == month + 1
+        indicators['monthly'][MONTH_NAMES[month]] = {
+            'monthly_mean': _nan_mean(mean_data[in_month]),
+            'monthly_max': _nan_mean(max_data[in_month]),
+            'monthly_min': _nan_mean(min_data[in_month]),
+            'monthly_range': _nan_mean(range_data[in_month])
+        }
 
-        weekly_mean_data = sum(mean_data) / len(mean_data)
-        weekly_data['weekly_mean_data'].append(weekly_mean_data)
-        # Check if weekly mean is exceeding the threshold
-        mean_threshold = (
-            water_temperature_threshold.upper_mean_threshold if site_zone == 'upper' else
-            water_temperature_threshold.lower_mean_threshold
-        )
-        if day <= len(temperature_data_annual) - 7:
-            if (
-                weekly_mean_data >= mean_threshold
-            ):
-                weekly_mean_threshold += 1
-                weekly_mean_threshold_dur += 1
-            else:
-                if weekly_mean_threshold_dur > weekly_mean_threshold_dur_max:
-                    weekly_mean_threshold_dur_max = weekly_mean_threshold_dur
-                weekly_mean_threshold_dur = 0
-
-        weekly_min_data = sum(min_data) / len(min_data)
-        weekly_data['weekly_min_data'].append(weekly_min_data)
-        # Check if weekly min is exceeding the threshold
-        minimum_threshold = (
-            water_temperature_threshold.upper_minimum_threshold if site_zone == 'upper' else
-            water_temperature_threshold.lower_minimum_threshold
-        )
-        if day <= len(temperature_data_annual) - 7:
-            if (
-                weekly_min_data <= minimum_threshold
-            ):
-                if weekly_min_threshold == 0:
-                    weekly_min_threshold = 6
-                weekly_min_threshold += 1
-                weekly_min_threshold_dur += 1
-            else:
-                if weekly_min_threshold_dur > weekly_min_threshold_dur_max:
-                    weekly_min_threshold_dur_max = weekly_min_threshold_dur
-                weekly_min_threshold_dur = 0
-
-        weekly_max_data = sum(max_data) / len(max_data)
-        weekly_data['weekly_max_data'].append(weekly_max_data)
-        # Check if weekly max is exceeding the threshold
-        maximum_threshold = (
-            water_temperature_threshold.upper_maximum_threshold if site_zone == 'upper' else
-            water_temperature_threshold.lower_maximum_threshold
-        )
-        if day <= len(temperature_data_annual) - 7:
-            if (
-                weekly_max_data >= maximum_threshold
-            ):
-                weekly_max_threshold += 1
-                weekly_max_threshold_dur += 1
-            else:
-                if weekly_max_threshold_dur > weekly_max_threshold_dur_max:
-                    weekly_max_threshold_dur_max = weekly_max_threshold_dur
-                weekly_max_threshold_dur = 0
-
-    try:
+    # Windows start at each day and look forward, the last windows of the
+    # year being shorter. 30 and 90 day windows start from day 30 and 90.
+    weekly_mean_data = forward_window_mean(mean_data, 7)
+    weekly_min_data = forward_window_mean(min_data, 7)
+    weekly_max_data = forward_window_mean(max_data, 7)
+    thirty_min_data = forward_window_mean(min_data, 30)[30:]
+    thirty_max_data = forward_window_mean(max_data, 30)[30:]
+    ninety_min_data = forward_window_mean(min_data, 90)[90:]
+    ninety_max_data = forward_window_mean(max_data, 90)[90:]
+
+    # Thresholds are only checked on full weeks
+    full_weeks = max(total_days - 6, 0)
+    weekly_mean_exceeded = weekly_mean_data[:full_weeks] >= mean_threshold
+    weekly_min_exceeded = weekly_min_data[:full_weeks] <= minimum_threshold
+    weekly_max_exceeded = weekly_max_data[:full_weeks] >= maximum_threshold
+
+    weekly_min_threshold = int(weekly_min_exceeded.sum())
+    if weekly_min_threshold:
+        # The first week below the minimum counts all of its days
+        weekly_min_threshold += 6
+
+    if total_days:
         indicators['weekly'] = {
-            'weekly_mean_avg': (
-                max(weekly_data['weekly_mean_data'])
-            ),
-            'weekly_min_avg': (
-                min(weekly_data['weekly_min_data'])
-            ),
-            'weekly_max_avg': (
-                max(weekly_data['weekly_max_data'])
-            ),
+            'weekly_mean_avg': float(weekly_mean_data.max()),
+            'weekly_min_avg': float(weekly_min_data.min()),
+            'weekly_max_avg': float(weekly_max_data.max()),
         }
-    except ValueError:
-        pass
 
     if return_weekly:
-        indicators['date_time'] = date_time
-        indicators['weekly']['weekly_mean_data'] = (
-            weekly_data['weekly_mean_data']
-        )
-        indicators['weekly']['weekly_min_data'] = (
-            weekly_data['weekly_min_data']
-        )
-        indicators['weekly']['weekly_max_data'] = (
-            weekly_data['weekly_max_data']
-        )
-
-    try:
+        indicators['date_time'] = [
+            str(date.date()) for date in daily_data['dates']
+        ]
+        indicators['weekly']['weekly_mean_data'] = weekly_mean_data.tolist()
+        indicators['weekly']['weekly_min_data'] = weekly_min_data.tolist()
+        indicators['weekly']['weekly_max_data'] = weekly_max_data.tolist()
+
+    if thirty_min_data.size:
         indicators['thirty_days'] = {
-            'thirty_max_avg': (
-                max(thirty_data['thirty_max_data'])
-            ),
-            'thirty_min_avg': (
-                min(thirty_data['thirty_min_data'])
-            ),
+            'thirty_max_avg': float(thirty_max_data.max()),
+            'thirty_min_avg': float(thirty_min_data.min()),
         }
-    except ValueError:
-        pass
 
-    try:
+    if ninety_min_data.size:
         indicators['ninety_days'] = {
-            'ninety_max_avg': (
-                max(ninety_data['ninety_max_data'])
-            ),
-            'ninety_min_avg': (
-                min(ninety_data['ninety_min_data'])
-            ),
+            'ninety_max_avg': float(ninety_max_data.max()),
+            'ninety_min_avg': float(ninety_min_data.min()),
         }
-    except ValueError:
-        pass
-
-    if weekly_mean_threshold_dur > weekly_mean_threshold_dur_max:
-        weekly_mean_threshold_dur_max = weekly_mean_threshold_dur
-    if weekly_min_threshold_dur > weekly_min_threshold_dur_max:
-        weekly_min_threshold_dur_max = weekly_min_threshold_dur
-    if weekly_max_threshold_dur > weekly_max_threshold_dur_max:
-        weekly_max_threshold_dur_max = weekly_max_threshold_dur
 
     indicators['threshold'] = {
-        'weekly_mean': weekly_mean_threshold,
+        'weekly_mean': int(weekly_mean_exceeded.sum()),
         'weekly_min': weekly_min_threshold,
-        'weekly_max': weekly_max_threshold,
-        'weekly_mean_dur': weekly_mean_threshold_dur_max,
-        'weekly_min_dur': weekly_min_threshold_dur_max,
-        'weekly_max_dur': weekly_max_threshold_dur_max,
+        'weekly_max': int(weekly_max_exceeded.sum()),
+        'weekly_mean_dur': max_run_length(weekly_mean_exceeded),
+        'weekly_min_dur': max_run_length(weekly_min_exceeded),
+        'weekly_max_dur': max_run_length(weekly_max_exceeded),
     }
 
     return indicators
 
 
+def batch_daily_temperature_arrays(site_ids, years):
+    """
+    Daily series of many site-years loaded with one grouped query.
+    A site-year uses the daily or sub-daily rows, following its first day.
+    :param site_ids: location site ids
+    :param years: years
+    :return: dict of daily_temperature_arrays dicts keyed by (site id, year)
+    """
+    rows = WaterTemperature.objects.filter(
+        location_site_id__in=site_ids,
+        date_time__year__in=years
+    ).annotate(
+        day=TruncDay('date_time')
+    ).values('location_site_id', 'day', 'is_daily').annotate(
+        mean=Avg('value'),
+        min=Min('value'),
+        max=Max('value'),
+        daily_min=Avg('minimum'),
+        daily_max=Avg('maximum')
+    ).order_by('location_site_id', 'day', 'is_daily')
+
+    grouped = {}
+    for row in rows.iterator():
+        day = row['day']
+        year = (timezone.localtime(day) if timezone.is_aware(day) else day).year
+        group = grouped.setdefault(
+            (row['location_site_id'], year),
+            {'is_daily': row['is_daily'], 'rows': []}
+        )
+        if row['is_daily'] == group['is_daily']:
+            group['rows'].append(row)
+
+    series = {}
+    for key, group in grouped.items():
+        min_key, max_key = (
+            ('daily_min', 'daily_max') if group['is_daily'] else
+            ('min', 'max')
+        )
+        series[key] = {
+            'dates': [row['day'] for row in group['rows']],
+            'mean': _to_array([row['mean'] for row in group['rows']]),
+            'min': _to_array([row[min_key] for row in group['rows']]),
+            'max': _to_array([row[max_key] for row in group['rows']]),
+        }
+    return series
+
+
+def batch_calculate_indicators(site_ids, years):
+    """
+    Indicators of every (site, year) pair that has data.
+    :return: dict of calculate_indicators results keyed by (site id, year)
+    """
+    site_ids = sorted(set(site_ids))
+    series = batch_daily_temperature_arrays(site_ids, sorted(set(years)))
+    if not series:
+        return {}
+
+    thresholds = {}
+    for threshold in WaterTemperatureThreshold.objects.filter(
+            location_site_id__in=site_ids).order_by('id'):
+        thresholds.setdefault(threshold.location_site_id, threshold)
+    default_threshold = None
+    if any(site_id not in thresholds for site_id, _ in series):
+        default_threshold, _ = WaterTemperatureThreshold.objects.get_or_create(
+            location_site=None,
+            creator=None
+        )
+
+    from bims.models.location_context import LocationContext
+    zones = {}
+    for site_id, value in LocationContext.objects.filter(
+            site_id__in=site_ids,
+            group__key='thermal_zone'
+    ).order_by('site_id', '-fetch_time').values_list('site_id', 'value'):
+        zones.setdefault(site_id, value)
+
+    results = {}
+    for (site_id, year), daily_data in sorted(series.items()):
+        results[(site_id, year)] = indicators_from_daily_data(
+            daily_data,
+            year,
+            site_thresholds(
+                thresholds.get(site_id, default_threshold),
+                thermal_zone_from_value(zones.get(site_id))
+            )
+        )
+    return results
+
+
+# (column, indicator section, indicator key)
+INDICATOR_COLUMNS = [
+    ('annual_mean', 'annual', 'annual_mean'),
+    ('annual_max', 'annual', 'annual_max'),
+    ('annual_min', 'annual', 'annual_min'),
+    ('annual_range', 'annual', 'annual_range'),
+    ('annual_sd', 'annual', 'annual_sd'),
+    ('annual_range_sd', 'annual', 'annual_range_sd'),
+    ('annual_cv', 'annual', 'annual_cv'),
+    ('weekly_mean_avg', 'weekly', 'weekly_mean_avg'),
+    ('weekly_min_avg', 'weekly', 'weekly_min_avg'),
+    ('weekly_max_avg', 'weekly', 'weekly_max_avg'),
+    ('thirty_max_avg', 'thirty_days', 'thirty_max_avg'),
+    ('thirty_min_avg', 'thirty_days', 'thirty_min_avg'),
+    ('ninety_max_avg', 'ninety_days', 'ninety_max_avg'),
+    ('ninety_min_avg', 'ninety_days', 'ninety_min_avg'),
+    ('threshold_weekly_mean', 'threshold', 'weekly_mean'),
+    ('threshold_weekly_min', 'threshold', 'weekly_min'),
+    ('threshold_weekly_max', 'threshold', 'weekly_max'),
+    ('threshold_weekly_mean_dur', 'threshold', 'weekly_mean_dur'),
+    ('threshold_weekly_min_dur', 'threshold', 'weekly_min_dur'),
+    ('threshold_weekly_max_dur', 'threshold', 'weekly_max_dur'),
+]
+MONTHLY_INDICATOR_COLUMNS = [
+    'monthly_mean', 'monthly_max', 'monthly_min', 'monthly_range'
+]
+
+
+def batch_indicators_cache_key(schema_name, site_ids, years):
+    """
+    Cache key of a batch payload. It changes with the water temperature
+    data version, so cached payloads are never stale.
+    """
+    from bims.models.data_version import get_search_data_version
+    return 'THERMAL_INDICATORS_{schema}_{digest}'.format(
+        schema=schema_name,
+        digest=hashlib.sha256(json.dumps({
+            'sites': sorted(set(site_ids)),
+            'years': sorted(set(years)),
+            'version': get_search_data_version(
+                {'module': 'water_temperature'})
+        }).encode('utf-8')).hexdigest()
+    )
+
+
+def _json_number(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+def indicators_to_columns(results):
+    """
+    Columnar payload of batch_calculate_indicators results: one list per
+    column, with one entry per site-year. Monthly columns hold a list of
+    12 values per site-year.
+    """
+    columns = {'site_id': [], 'year': []}
+    for column, _, _ in INDICATOR_COLUMNS:
+        columns[column] = []
+    for column in MONTHLY_INDICATOR_COLUMNS:
+        columns[column] = []
+
+    for (site_id, year), indicators in sorted(results.items()):
+        columns['site_id'].append(site_id)
+        columns['year'].append(year)
+        for column, section, key in INDICATOR_COLUMNS:
+            columns[column].append(
+                _json_number(indicators.get(section, {}).get(key))
+            )
+        for column in MONTHLY_INDICATOR_COLUMNS:
+            columns[column].append([
+                _json_number(indicators['monthly'][month][column])
+                for month in MONTH_NAMES
+            ])
+    return columns
+
+
 def thermograph_data(weekly_temperature_data):
     range_min = []
     range_max = []
@@ -0,0 +1,127 @@
+# coding=utf-8
+"""Buffered writes of request logs.
+
+Log events are collected per tenant schema in the memory of the process
+serving the request, and written by a background task in one batch once
+LOG_BUFFER_SIZE events are buffered or the oldest is LOG_BUFFER_SECONDS
+old. A thread of the process sends the aged buffers, so events are written
+even when no new request arrives. Events still buffered when the process
+exits are sent on exit.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.db import connection, connections
+
+from bims.conf import LOG_BUFFER_SECONDS, LOG_BUFFER_SIZE
+
+REQUEST_LOG_EVENT = 'request_log'
+
+logger = logging.getLogger('bims')
+
+_lock = threading.Lock()
+_buffers = {}
+_flush_thread = None
+
+
+def buffer_log_event(kind, values):
+    """
+    Add a log event to the buffer of the current tenant.
+    :param kind: REQUEST_LOG_EVENT
+    :param values: JSON serializable dict of the event values
+    """
+    _start_flush_thread()
+    schema_name = getattr(connection, 'schema_name', None)
+    events = None
+    with _lock:
+        buffer = _buffers.setdefault(
+            schema_name, {'events': [], 'since': time.time()})
+        if not buffer['events']:
+            buffer['since'] = time.time()
+        buffer['events'].append((kind, values))
+        if (
+            len(buffer['events']) >= LOG_BUFFER_SIZE or
+            time.time() - buffer['since'] >= LOG_BUFFER_SECONDS
+        ):
+            events = buffer['events']
+            buffer['events'] = []
+    if events:
+        _send_events(events)
+
+
+def flush_log_buffers(max_age=None):
+    """
+    Send the buffered events of every tenant.
+    :param max_age: only send the buffers whose oldest event is at least
+        this many seconds old
+    """
+    from django_tenants.utils import schema_context
+    now = time.time()
+    buffers = []
+    with _lock:
+        for schema_name, buffer in _buffers.items():
+            if not buffer['events']:
+                continue
+            if max_age is not None and now - buffer['since'] < max_age:
+                continue
+            buffers.append((schema_name, buffer['events']))
+            buffer['events'] = []
+    for schema_name, events in buffers:
+        if schema_name:
+            with schema_context(schema_name):
+                _send_events(events)
+        else:
+            _send_events(events)
+
+
+def _flush_aged_buffers():
+    while True:
+        time.sleep(LOG_BUFFER_SECONDS)
+        try:
+            flush_log_buffers(max_age=LOG_BUFFER_SECONDS)
+        except Exception as e:  # noqa
+            logger.exception('Could not flush the log buffers: %s', e)
+        finally:
+            connections.close_all()
+
+
+def _start_flush_thread():
+    global _flush_thread
+    if _flush_thread is not None:
+        return
+    with _lock:
+        if _flush_thread is None:
+            _flush_thread = threading.Thread(
+                target=_flush_aged_buffers,
+                name='log-buffer-flush',
+                daemon=True
+            )
+            _flush_thread.start()
+
+
+def _send_events(events):
+    from bims.tasks.request_log import write_log_events_task
+    try:
+        write_log_events_task.delay(events)
+    except Exception as e:  # noqa
+        # Broker unavailable, do not lose the events
+        logger.warning('Writing %s log events inline: %s', len(events), e)
+        write_log_events(events)
+
+
+def write_log_events(events):
+    """
+    Write buffered log events with one insert per table.
+    :param events: list of (kind, values) tuples
+    """
+    from bims.models.request_log import RequestLog
+
+    RequestLog.objects.bulk_create([
+        RequestLog(**values)
+        for kind, values in events if kind == REQUEST_LOG_EVENT
+    ])
+
+
+atexit.register(flush_log_buffers)
@@ -1,6 +1,7 @@
 import socket
 import time
-from bims.models.request_log import RequestLog
+
+from bims.request_log.buffer import REQUEST_LOG_EVENT, buffer_log_event
 
 
 class RequestLogMiddleware(object):
@@ -9,16 +10,16 @@ class RequestLogMiddleware(object):
 
     def process_response(self, request, response):
 
-        # save log_data in some way
+        # Buffered and written in batches by a background task
         if not request.user.is_anonymous:
-            RequestLog.objects.create(
-                user=request.user,
-                remote_address=request.META['REMOTE_ADDR'],
-                server_hostname=socket.gethostname(),
-                request_path=request.get_full_path(),
-                response_status=response.status_code,
-                start_time=request.start_time,
-                run_time=time.time() - request.start_time,
-            )
+            buffer_log_event(REQUEST_LOG_EVENT, {
+                'user_id': request.user.id,
+                'remote_address': request.META['REMOTE_ADDR'],
+                'server_hostname': socket.gethostname(),
+                'request_path': request.get_full_path()[:255],
+                'response_status': response.status_code,
+                'start_time': request.start_time,
+                'run_time': time.time() - request.start_time,
+            })
 
         return response
@@ -3,6 +3,9 @@ import re
 import copy
 import logging
 from io import StringIO
+from itertools import islice
+
+from django.conf import settings
 
 from bims.scripts.species_keys import *  # noqa
 from bims.models import (
@@ -14,6 +17,9 @@ logger = logging.getLogger('bims')
 
 FALLBACK_ENCODINGS = ("utf-8-sig", "utf-8", "cp1252", "latin-1")
 
+# Rows processed between two cancellation checks and checkpoints
+CSV_UPLOAD_CHUNK_SIZE = getattr(settings, 'CSV_UPLOAD_CHUNK_SIZE', 100)
+
 
 class DataCSVUpload(object):
     upload_session = UploadSession.objects.none()
@@ -24,6 +30,7 @@ class DataCSVUpload(object):
     domain = ''
     csv_dict_reader = None
     model_name = ''
+    chunk_size = CSV_UPLOAD_CHUNK_SIZE
 
     def process_started(self):
         pass
@@ -229,43 +236,66 @@ class DataCSVUpload(object):
             pass
         return row_value
 
+    def is_canceled(self):
+        return UploadSession.objects.filter(
+            id=self.upload_session.id,
+            canceled=True
+        ).exists()
+
+    def save_checkpoint(self, index):
+        """Record that all rows up to index are complete."""
+        from django.utils import timezone
+        self.upload_session.progress = '{index}/{total}'.format(
+            index=index,
+            total=self.total_rows
+        )
+        self.upload_session.start_row = index
+        self.upload_session.last_progress_update = timezone.now()
+        self.upload_session.save(update_fields=[
+            'progress', 'start_row', 'last_progress_update'
+        ])
+
     def process_csv_dict_reader(self):
         """
-        Read and process data from csv file, supporting resume from a
-        previously saved checkpoint (upload_session.start_row).
+        Read and process data from csv file in chunks of chunk_size rows,
+        supporting resume from a previously saved checkpoint
+        (upload_session.start_row). Cancellation and the checkpoint are
+        checked and saved once per chunk.
         """
-        from django.utils import timezone
         start_row = self.upload_session.start_row or 0
-        index = 1
-        for row in self.csv_dict_reader:
-            if UploadSession.objects.get(id=self.upload_session.id).canceled:
-                print('Canceled')
+        # Skip already-processed rows when resuming from a checkpoint
+        index = start_row
+        for _ in islice(self.csv_dict_reader, start_row):
+            pass
+
+        while True:
+            rows = list(islice(self.csv_dict_reader, self.chunk_size))
+            if not rows:
+                break
+            if self.is_canceled():
+                logger.info('Upload session %s canceled', self.upload_session.id)
                 return
+            self.process_chunk(rows, first_index=index + 1)
+            index += len(rows)
+            self.save_checkpoint(index)
 
-            # Skip already-processed rows when resuming from a checkpoint
-            if index <= start_row:
-                index += 1
-                continue
+        self.finish(self.csv_dict_reader.fieldnames)
 
+    def process_chunk(self, rows, first_index=1):
+        """
+        Process a chunk of rows, one at a time by default.
+        :param rows: list of csv rows
+        :param first_index: row number of the first row, 1 being the first
+            row after the header
+        """
+        for index, row in enumerate(rows, start=first_index):
             logger.debug(row)
-            self.upload_session.progress = '{index}/{total}'.format(
-                index=index,
-                total=self.total_rows
-            )
-            # Record checkpoint: all rows before this one are complete
-            self.upload_session.start_row = index - 1
-            self.upload_session.last_progress_update = timezone.now()
-            self.upload_session.save()
-            index += 1
-
             try:
                 self.process_row(row=row)
             except Exception as e:
-                logger.exception('Error processing row %s: %s', index - 1, e)
+                logger.exception('Error processing row %s: %s', index, e)
                 self.error_file(row, str(e))
 
-        self.finish(self.csv_dict_reader.fieldnames)
-
     def process_row(self, row):
         """ Processing row of the csv files """
         raise NotImplementedError(
@@ -5,7 +5,9 @@ import datetime
 import logging
 import os
 import time
+import uuid
 import zipfile
+from itertools import islice
 from pathlib import Path
 from typing import Tuple, Optional, List
 
@@ -15,6 +17,7 @@ from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.gis.geos import Point, MultiPolygon, GEOSGeometry
 from django.contrib.gis.measure import D
+from django.db.models import Count
 
 from bims.utils.gbif_download import submit_download, get_ready_download_url, is_canceled, download_archive
 from geonode.people.models import Profile
@@ -30,11 +33,23 @@ from bims.models import (
     Boundary,
     Dataset, Taxonomy
 )
+from bims.models.biological_collection_record import apply_derived_fields
 from bims.models.source_reference import DatabaseRecord
+from bims.models.data_version import (
+    bump_data_version,
+    defer_data_version_bumps,
+    occurrence_version_key,
+    SURVEY_VERSION_KEY
+)
 from bims.models.location_site import generate_site_code
+from bims.models.occurrence_rollup import (
+    defer_occurrence_rollups,
+    refresh_occurrence_rollups
+)
 from bims.models.survey import Survey
 from bims.scripts.extract_dataset_keys import create_dataset_from_gbif
 from bims.utils.gbif import round_coordinates, ACCEPTED_TAXON_KEY
+from bims.utils.site_resolver import SiteResolver
 
 logger = logging.getLogger('bims')
 
@@ -302,7 +317,8 @@ def process_gbif_row(
     log,
     habitat = None,
     origin = None,
-    excluded_project_ids = None
+    excluded_project_ids = None,
+    site_resolver = None
 ) -> Tuple[Optional["BiologicalCollectionRecord"], bool]:
     """Synchronise a GBIF occurrence with *BiologicalCollectionRecord*.
 
@@ -316,6 +332,8 @@ def process_gbif_row(
     :param harvest_session: Current `HarvestSession` or *None* when called ad‑hoc
     :param habitat: Optional supplementary information
     :param origin: Optional supplementary information
+    :param site_resolver: Optional :class:`SiteResolver` answering the site
+        lookups of successive rows from memory
 
     :return: tuple
         ``(record_or_none, processed)`` where ``record_or_none`` is a new
@@ -537,7 +555,12 @@ def process_gbif_row(
 
     except BiologicalCollectionRecord.DoesNotExist:
         # --- Create path: find or create location site by coordinates ---
-        if coord_uncertainty and coord_uncertainty > 0:
+        if site_resolver is not None:
+            location_sites = LocationSite.objects.filter(
+                id=site_resolver.find(
+                    longitude, latitude, coord_uncertainty)
+            )
+        elif coord_uncertainty and coord_uncertainty > 0:
             location_sites = LocationSite.objects.filter(
                 geometry_point__distance_lte=(site_point, D(m=coord_uncertainty))
             )
@@ -582,6 +605,8 @@ def process_gbif_row(
                 )
                 location_site.site_code = site_code
                 location_site.save()
+            if site_resolver is not None:
+                site_resolver.add(location_site)
 
         # Prepare a new record
         new_record = BiologicalCollectionRecord(
@@ -634,6 +659,520 @@ def process_gbif_row(
         return None, True
 
 
+# Number of occurrence.txt rows resolved together by process_gbif_chunk
+GBIF_CHUNK_SIZE = 5000
+SITE_PRECISION_FIELDS = (
+    'coordinate_precision',
+    'coordinate_uncertainty_in_meters',
+    'harvested_from_gbif',
+)
+# LocationSite.__init__ reads the coordinates and geomorphological zone and
+# apply_derived_fields the ecosystem type, they are loaded too so deferred
+# fields are not fetched site by site
+SITE_LOAD_FIELDS = (
+    'id',
+    'geometry_point',
+    'latitude',
+    'longitude',
+    'refined_geomorphological',
+    'ecosystem_type',
+) + SITE_PRECISION_FIELDS
+RECORD_UPDATE_FIELDS = [
+    'site', 'taxonomy', 'source_reference', 'original_species_name',
+    'collector', 'source_collection', 'institution_id', 'reference',
+    'module_group', 'additional_data', 'collection_date', 'owner',
+    'validated', 'coordinate_uncertainty_in_meters', 'coordinate_precision',
+    'dataset_key', 'collection_habitat', 'category', 'survey',
+    'ecosystem_type', 'record_type',
+]
+
+
+def _float_or_none(value):
+    value = (value or '').strip()
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_gbif_row(row, source_collection, log, excluded_project_ids=None):
+    """
+    Validate one occurrence of a Darwin-Core archive and extract the values
+    used for the import, without touching the database.
+
+    :return: dictionary of the occurrence values, None when it is skipped
+    """
+    proj = (row.get("projectId") or "").strip().lower()
+    if proj and proj in (excluded_project_ids or []):
+        log(f"Excluded by tenant setting: projectId='{proj}', skipping...")
+        return None
+
+    basis_of_record = row.get('basisOfRecord', '')
+    if basis_of_record not in ACCEPTED_BASIS_OF_RECORD:
+        log(f"Unsupported basisOfRecord '{basis_of_record}', skipping.")
+        return None
+
+    upstream_id = row.get(UPSTREAM_ID_KEY)
+    try:
+        longitude = float(row.get(LON_KEY))
+        latitude = float(row.get(LAT_KEY))
+    except (TypeError, ValueError):
+        log(f"Invalid coordinates for upstream_id={upstream_id}; skipping.")
+        return None
+
+    event_date = str(row.get(EVENT_DATE_KEY, '') or '').strip()
+    if "/" in event_date:
+        log(f"Interval eventDate '{event_date}' for upstream_id={upstream_id}; skipping.")
+        return None
+    collection_date = None
+    if event_date:
+        try:
+            collection_date = parse(event_date).date()
+        except Exception as e:
+            log(f"Date parsing failed for event_date={event_date}: {e}")
+            return None
+    if not collection_date:
+        log(f'Date not found for {upstream_id}, skipping.')
+        return None
+
+    taxon_key = (row.get(TAXON_KEY) or '').strip()
+    return {
+        'upstream_id': upstream_id,
+        'longitude': longitude,
+        'latitude': latitude,
+        'coord_uncertainty': _float_or_none(
+            row.get(COORDINATE_UNCERTAINTY_KEY, '')),
+        'coord_precision': _float_or_none(
+            row.get(COORDINATE_PRECISION_KEY, '')),
+        'collection_date': collection_date,
+        'collector': row.get(COLLECTOR_KEY, ''),
+        'institution_code': row.get(INSTITUTION_CODE_KEY, source_collection),
+        'reference': row.get(REFERENCE_KEY, ''),
+        'species': row.get(SPECIES_KEY, None),
+        'dataset_key': row.get(DATASET_KEY, None),
+        'taxon_key': taxon_key if taxon_key.isdigit() else None,
+        'accepted_taxon_key': row.get(ACCEPTED_TAXON_KEY, None),
+        'locality': (
+            row.get(LOCALITY_KEY) or
+            row.get(VERBATIM_LOCALITY_KEY, DEFAULT_LOCALITY) or
+            DEFAULT_LOCALITY
+        ),
+    }
+
+
+def _create_gbif_site(occurrence, location_type):
+    location_site = LocationSite.objects.create(
+        geometry_point=Point(
+            occurrence['longitude'], occurrence['latitude'], srid=4326),
+        name=occurrence['locality'][:200],
+        location_type=location_type,
+        site_description=occurrence['locality'][:300],
+        coordinate_precision=occurrence['coord_precision'],
+        coordinate_uncertainty_in_meters=occurrence['coord_uncertainty'],
+        harvested_from_gbif=True
+    )
+    if not location_site.site_code:
+        site_code, _ = generate_site_code(
+            location_site,
+            lat=location_site.latitude,
+            lon=location_site.longitude
+        )
+        location_site.site_code = site_code
+        location_site.save()
+    return location_site
+
+
+def _fill_site_precision(site, occurrence, harvested=True):
+    """Set the coordinate values a site is missing, returns changed fields."""
+    fields = []
+    if (
+            occurrence['coord_precision'] is not None and
+            site.coordinate_precision is None
+    ):
+        site.coordinate_precision = occurrence['coord_precision']
+        fields.append('coordinate_precision')
+    if (
+            occurrence['coord_uncertainty'] is not None and
+            site.coordinate_uncertainty_in_meters is None
+    ):
+        site.coordinate_uncertainty_in_meters = (
+            occurrence['coord_uncertainty'])
+        fields.append('coordinate_uncertainty_in_meters')
+    if harvested and not site.harvested_from_gbif:
+        site.harvested_from_gbif = True
+        fields.append('harvested_from_gbif')
+    return fields
+
+
+def _resolve_gbif_surveys(records, owner):
+    """Assign a survey per (site, date) of the GBIF owner to the records."""
+    keys = set(
+        (record.site_id, record.collection_date) for record in records)
+    if not keys:
+        return
+    surveys = {}
+    for survey in Survey.objects.filter(
+            site_id__in=set(key[0] for key in keys),
+            date__in=set(key[1] for key in keys),
+            collector_user=owner,
+            owner=owner
+    ).order_by('-id'):
+        surveys[(survey.site_id, survey.date)] = survey
+    missing = [
+        Survey(
+            site_id=site_id,
+            date=date,
+            collector_user=owner,
+            owner=owner,
+            validated=True,
+            uuid=str(uuid.uuid4())
+        ) for site_id, date in keys if (site_id, date) not in surveys
+    ]
+    if missing:
+        for survey in Survey.objects.bulk_create(missing):
+            surveys[(survey.site_id, survey.date)] = survey
+        # bulk_create sends no post_save
+        bump_data_version(SURVEY_VERSION_KEY)
+    for record in records:
+        record.survey = surveys[(record.site_id, record.collection_date)]
+
+
+def _parse_gbif_chunk(rows, source_collection, log, excluded_project_ids):
+    """
+    Occurrences of the valid rows of a chunk. Rows repeating an upstream id
+    of the chunk replace the earlier ones, so each id makes one record.
+    """
+    occurrences = {}
+    for index, row in enumerate(rows):
+        occurrence = parse_gbif_row(
+            row, source_collection, log, excluded_project_ids)
+        if not occurrence:
+            continue
+        key = occurrence['upstream_id'] or ('row', index)
+        if key in occurrences:
+            log(f"Duplicated upstream_id={key} in chunk, keeping the last row.")
+            del occurrences[key]
+        occurrences[key] = occurrence
+    return list(occurrences.values())
+
+
+def _resolve_gbif_taxa(occurrences, log):
+    """Set the taxonomy_id of the occurrences, dropping those without one."""
+    taxa = dict(
+        (str(gbif_key), taxonomy_id)
+        for gbif_key, taxonomy_id in Taxonomy.objects.filter(
+            gbif_key__in=set(
+                o['taxon_key'] for o in occurrences if o['taxon_key'])
+        ).order_by('-id').values_list('gbif_key', 'id')
+    )
+    accepted = []
+    for occurrence in occurrences:
+        taxonomy_id = taxa.get(occurrence['taxon_key'])
+        if taxonomy_id:
+            occurrence['taxonomy_id'] = taxonomy_id
+            accepted.append(occurrence)
+            continue
+        upstream_id = occurrence['upstream_id']
+        taxon_key = occurrence['taxon_key']
+        accepted_taxon_key = occurrence['accepted_taxon_key']
+        if accepted_taxon_key and accepted_taxon_key != taxon_key:
+            log(
+                f"Skipping occurrence {upstream_id}: local taxonomy missing for GBIF taxonKey={taxon_key}. "
+                f"GBIF marks it as a synonym of acceptedTaxonKey={accepted_taxon_key}. "
+                f"Please import/sync this taxonomy before harvesting."
+            )
+        else:
+            log(
+                f"Skipping occurrence {upstream_id}: local taxonomy not found for GBIF taxonKey={taxon_key}."
+            )
+    return accepted
+
+
+def _create_missing_gbif_datasets(occurrences):
+    dataset_keys = set(
+        o['dataset_key'] for o in occurrences if o['dataset_key'])
+    if not dataset_keys:
+        return
+    existing_keys = set(
+        str(key) for key in Dataset.objects.filter(
+            uuid__in=dataset_keys).values_list('uuid', flat=True)
+    )
+    for dataset_key in dataset_keys - existing_keys:
+        create_dataset_from_gbif(dataset_key)
+
+
+def _existing_gbif_records(occurrences, log):
+    """
+    Stored records of the occurrences keyed by upstream id, keeping the
+    latest of duplicated upstream ids and deleting the others.
+    """
+    existing = {}
+    duplicate_ids = []
+    for record in BiologicalCollectionRecord.objects.filter(
+            upstream_id__in=set(o['upstream_id'] for o in occurrences)
+    ).select_related('site').order_by('id'):
+        if record.upstream_id in existing:
+            duplicate_ids.append(existing[record.upstream_id].id)
+        existing[record.upstream_id] = record
+    if duplicate_ids:
+        BiologicalCollectionRecord.objects.filter(
+            id__in=duplicate_ids).delete()
+        log(f'--- Removed {len(duplicate_ids)} duplicated records\n')
+    return existing
+
+
+class _ChunkSites(object):
+    """Location sites read, created and changed by one chunk."""
+
+    def __init__(self, site_resolver, site_ids):
+        self.site_resolver = site_resolver
+        self.sites = LocationSite.objects.only(
+            *SITE_LOAD_FIELDS).in_bulk(set(site_ids))
+        self.location_type = None
+        self.changed_sites = {}
+        self.changed_fields = set()
+
+    def get(self, site_id):
+        if site_id not in self.sites:
+            self.sites[site_id] = LocationSite.objects.only(
+                *SITE_LOAD_FIELDS).get(id=site_id)
+        return self.sites[site_id]
+
+    def create(self, occurrence):
+        if self.location_type is None:
+            self.location_type, _ = LocationType.objects.get_or_create(
+                name='PointObservation',
+                allowed_geometry='POINT'
+            )
+        location_site = _create_gbif_site(occurrence, self.location_type)
+        self.site_resolver.add(location_site)
+        self.sites[location_site.id] = location_site
+        return location_site
+
+    def fill_precision(self, site, occurrence, harvested=True):
+        fields = _fill_site_precision(site, occurrence, harvested)
+        if fields:
+            self.changed_sites[site.id] = site
+            self.changed_fields.update(fields)
+
+    def save_changed(self):
+        if self.changed_sites:
+            LocationSite.objects.bulk_update(
+                list(self.changed_sites.values()), list(self.changed_fields))
+
+
+def _move_gbif_site(location_site, site_point, occurrence):
+    """Move the only site of a record to the new coordinates."""
+    location_site.geometry_point = site_point
+    location_site.latitude = occurrence['latitude']
+    location_site.longitude = occurrence['longitude']
+    location_site.harvested_from_gbif = True
+    if occurrence['coord_precision'] is not None:
+        location_site.coordinate_precision = occurrence['coord_precision']
+    if occurrence['coord_uncertainty'] is not None:
+        location_site.coordinate_uncertainty_in_meters = (
+            occurrence['coord_uncertainty'])
+    location_site.save()
+
+
+def _existing_record_site(
+        record, occurrence, chunk_sites, site_record_counts, log):
+    """Site of a stored record, following changed coordinates."""
+    site_point = Point(
+        occurrence['longitude'], occurrence['latitude'], srid=4326)
+    old_site = record.site
+    if (
+            old_site and old_site.geometry_point and
+            old_site.geometry_point.equals(site_point)
+    ):
+        chunk_sites.fill_precision(old_site, occurrence)
+        return old_site
+    if old_site and site_record_counts.get(old_site.id, 0) <= 1:
+        _move_gbif_site(old_site, site_point, occurrence)
+        chunk_sites.site_resolver.add(old_site)
+        log(
+            f'--- Updated site coordinates for upstream ID: {occurrence["upstream_id"]} '
+            f'(site id={old_site.id})\n'
+        )
+        return old_site
+    site_id = chunk_sites.site_resolver.find(
+        occurrence['longitude'], occurrence['latitude'])
+    if site_id:
+        location_site = chunk_sites.get(site_id)
+    else:
+        location_site = chunk_sites.create(occurrence)
+    if old_site:
+        site_record_counts[old_site.id] = (
+            site_record_counts.get(old_site.id, 1) - 1)
+    log(
+        f'--- Created new site for updated coordinates, upstream ID: {occurrence["upstream_id"]} '
+        f'(new site id={location_site.id})\n'
+    )
+    return location_site
+
+
+def _new_record_site(occurrence, chunk_sites):
+    """Nearest site within the coordinate uncertainty, or a new one."""
+    site_id = chunk_sites.site_resolver.find(
+        occurrence['longitude'], occurrence['latitude'],
+        occurrence['coord_uncertainty'])
+    if not site_id:
+        return chunk_sites.create(occurrence)
+    location_site = chunk_sites.get(site_id)
+    chunk_sites.fill_precision(location_site, occurrence, harvested=False)
+    return location_site
+
+
+def _resolve_gbif_sites(occurrences, existing, site_resolver, log):
+    """
+    Site of every occurrence, in the order of the occurrences, with the
+    sites around the chunk loaded at once.
+    """
+    # Number of records left on the current site of each existing record
+    site_record_counts = dict(
+        BiologicalCollectionRecord.objects.filter(
+            site_id__in=set(r.site_id for r in existing.values())
+        ).values('site_id').annotate(
+            total=Count('id')
+        ).values_list('site_id', 'total')
+    )
+    new_occurrences = [
+        o for o in occurrences if o['upstream_id'] not in existing]
+    site_resolver.preload(
+        [(o['longitude'], o['latitude']) for o in occurrences],
+        max([o['coord_uncertainty'] or 0 for o in new_occurrences] or [0])
+    )
+    chunk_sites = _ChunkSites(site_resolver, filter(None, [
+        site_resolver.find(
+            o['longitude'], o['latitude'], o['coord_uncertainty'])
+        for o in new_occurrences
+    ]))
+
+    record_sites = []
+    for occurrence in occurrences:
+        record = existing.get(occurrence['upstream_id'])
+        if record:
+            record_sites.append(_existing_record_site(
+                record, occurrence, chunk_sites, site_record_counts, log))
+        else:
+            record_sites.append(_new_record_site(occurrence, chunk_sites))
+    chunk_sites.save_changed()
+    return record_sites
+
+
+def _gbif_category(origin):
+    """Category code of an origin label, the origin itself otherwise."""
+    for cat_code, cat_label in BiologicalCollectionRecord.CATEGORY_CHOICES:
+        if origin.lower() == cat_label.lower():
+            return cat_code
+    return origin
+
+
+def _fill_gbif_record(record, occurrence, location_site, values):
+    """
+    Set the values of an occurrence on a new or stored record.
+    :param values: values shared by the records of the chunk
+    """
+    record.site = location_site
+    record.taxonomy_id = occurrence['taxonomy_id']
+    record.original_species_name = occurrence['species']
+    record.collector = occurrence['collector']
+    record.institution_id = occurrence['institution_code']
+    record.reference = occurrence['reference']
+    record.collection_date = occurrence['collection_date']
+    record.coordinate_uncertainty_in_meters = occurrence['coord_uncertainty']
+    record.coordinate_precision = occurrence['coord_precision']
+    record.validated = True
+    for field, value in values.items():
+        setattr(record, field, value)
+
+
+def process_gbif_chunk(
+    rows,
+    owner,
+    source_reference,
+    source_collection,
+    taxon_group,
+    log,
+    habitat=None,
+    origin=None,
+    excluded_project_ids=None,
+    site_resolver=None
+) -> Tuple[List["BiologicalCollectionRecord"], int]:
+    """Synchronise a chunk of GBIF occurrences with set-based queries.
+
+    Taxa, existing records, datasets, location sites and surveys are
+    resolved for the whole chunk at once. Existing records are written with
+    one ``bulk_update``; new records are returned unsaved so the caller can
+    ``bulk_create`` them.
+
+    :param rows: list of occurrence dictionaries read from occurrence.txt
+    :param site_resolver: :class:`SiteResolver` shared by the chunks of an
+        import, so sites created by one chunk are reused by the next ones
+    :return: tuple ``(new_records, processed_count)``
+    """
+    occurrences = _resolve_gbif_taxa(
+        _parse_gbif_chunk(
+            rows, source_collection, log, excluded_project_ids),
+        log
+    )
+    if not occurrences:
+        return [], 0
+
+    _create_missing_gbif_datasets(occurrences)
+    existing = _existing_gbif_records(occurrences, log)
+    if site_resolver is None:
+        site_resolver = SiteResolver()
+    record_sites = _resolve_gbif_sites(
+        occurrences, existing, site_resolver, log)
+
+    values = {
+        'source_reference': source_reference,
+        'source_collection': source_collection,
+        'module_group': taxon_group,
+        'additional_data': {
+            'fetch_from_gbif': True,
+            'date_fetched': datetime.datetime.now().strftime(
+                '%Y-%m-%d %H:%M:%S')
+        },
+        'owner': owner,
+    }
+    if habitat:
+        values['collection_habitat'] = habitat.lower()
+    if origin:
+        values['category'] = _gbif_category(origin)
+    new_records = []
+    updated_records = []
+    for occurrence, location_site in zip(occurrences, record_sites):
+        record = existing.get(occurrence['upstream_id'])
+        if not record:
+            record = BiologicalCollectionRecord(
+                upstream_id=occurrence['upstream_id'],
+                dataset_key=occurrence['dataset_key'] or '',
+            )
+            new_records.append(record)
+        else:
+            if occurrence['dataset_key']:
+                record.dataset_key = occurrence['dataset_key']
+            updated_records.append(record)
+        _fill_gbif_record(record, occurrence, location_site, values)
+
+    _resolve_gbif_surveys(new_records + updated_records, owner)
+    apply_derived_fields(new_records + updated_records)
+    if updated_records:
+        BiologicalCollectionRecord.objects.bulk_update(
+            updated_records, RECORD_UPDATE_FIELDS)
+        # Records moved to another site also change the old one
+        refresh_occurrence_rollups(*set(
+            site_id for record in updated_records
+            for site_id in (record.site_id, record._original_site_id)
+        ))
+        log(f'--- Updated {len(updated_records)} existing records\n')
+    log(f'--- Prepared {len(new_records)} new records\n')
+
+    return new_records, len(occurrences)
+
+
 def process_gbif_response(
     zip_path: Path,
     session_id: Optional[int],
@@ -642,18 +1181,18 @@ def process_gbif_response(
     origin: Optional[str] = None,
     log_file: Optional[str] = None,
     *,
-    batch_size: int = 1000,
+    batch_size: int = GBIF_CHUNK_SIZE,
 ) -> Tuple[Optional[str], int]:
     """Import a Darwin‑Core archive downloaded from GBIF.
 
     :param zip_path: Filesystem path to the ``.zip`` file returned by the GBIF export
     :param session_id: Primary‑key of the active HarvestSession
-    :param taxon_group: Context/metadata passed straight through to process_gbif_row
-    :param habitat: Context/metadata passed straight through to process_gbif_row
-    :param origin: Context/metadata passed straight through to process_gbif_row
+    :param taxon_group: Context/metadata passed straight through to process_gbif_chunk
+    :param habitat: Context/metadata passed straight through to process_gbif_chunk
+    :param origin: Context/metadata passed straight through to process_gbif_chunk
     :param log_file: Optional path to a file where human‑readable progress messages
-    :param batch_size: Number of new records to accumulate before issuing a
-        ``bulk_create`` – tune to balance memory vs. database round‑trips.
+    :param batch_size: Number of occurrence rows resolved together by
+        ``process_gbif_chunk`` – tune to balance memory vs. database round‑trips.
 
     :return ``(error_msg_or_None, processed_count)``. If an unrecoverable
         error occurs while opening the archive the function returns a
@@ -691,40 +1230,48 @@ def process_gbif_response(
                     except HarvestSession.DoesNotExist:
                         _log(f"HarvestSession id={session_id} not found – proceeding without session.")
 
-                records_to_create: List["BiologicalCollectionRecord"] = []
                 processed_count = 0
 
                 excluded_project_ids = set(
                     preferences.SiteSetting.gbif_excluded_project_ids_effective or []
                 )
 
-                for idx, row in enumerate(reader, start=1):
-                    new_record, accepted = process_gbif_row(
-                        row=row,
-                        owner=gbif_owner,
-                        source_reference=source_reference,
-                        source_collection=source_collection,
-                        harvest_session=harvest_session,
-                        taxon_group=taxon_group,
-                        log=_log,
-                        habitat=habitat,
-                        origin=origin,
-                        excluded_project_ids=excluded_project_ids
+                # bulk_create sends no post_save, so the occurrence version
+                # of the module is bumped and the rollups of the sites are
+                # rebuilt explicitly, once for the archive
+                with defer_data_version_bumps(), defer_occurrence_rollups():
+                    bump_data_version(
+                        occurrence_version_key(getattr(taxon_group, 'id', None))
                     )
-
-                    if accepted:
-                        processed_count += 1
-
-                    if new_record is not None:
-                        records_to_create.append(new_record)
-                        if len(records_to_create) >= batch_size:
-                            BiologicalCollectionRecord.objects.bulk_create(records_to_create)
-                            records_to_create.clear()
-                            _log(f"-- committed batch up to row {idx} (total={processed_count})")
-
-                if records_to_create:
-                    BiologicalCollectionRecord.objects.bulk_create(records_to_create)
-                    records_to_create.clear()
+                    row_count = 0
+                    site_resolver = SiteResolver()
+                    while True:
+                        rows = list(islice(reader, batch_size))
+                        if not rows:
+                            break
+                        if is_canceled(harvest_session):
+                            _log('Harvest session canceled')
+                            break
+                        row_count += len(rows)
+                        new_records, accepted = process_gbif_chunk(
+                            rows=rows,
+                            owner=gbif_owner,
+                            source_reference=source_reference,
+                            source_collection=source_collection,
+                            taxon_group=taxon_group,
+                            log=_log,
+                            habitat=habitat,
+                            origin=origin,
+                            excluded_project_ids=excluded_project_ids,
+                            site_resolver=site_resolver
+                        )
+                        processed_count += accepted
+                        if new_records:
+                            BiologicalCollectionRecord.objects.bulk_create(new_records)
+                            refresh_occurrence_rollups(*set(
+                                record.site_id for record in new_records
+                            ))
+                        _log(f"-- committed chunk up to row {row_count} (total={processed_count})")
 
                 _log(f"-- processed {processed_count} accepted occurrences from archive")
                 return None, processed_count
@@ -1,4 +1,5 @@
 import csv
+import math
 import uuid
 import json
 import logging
@@ -10,7 +11,7 @@ from datetime import datetime
 from dateutil.parser import parse as parse_datetime
 
 from django.contrib.gis.geos import Point
-from django.db.models import Q
+from django.db import DatabaseError, transaction
 
 from bims.models import (
     LocationType,
@@ -39,8 +40,17 @@ from bims.models import (
 )
 from sass.models.river import River
 from bims.models.taxon_origin import TaxonOrigin
+from bims.models.biological_collection_record import apply_derived_fields
+from bims.models.occurrence_rollup import refresh_occurrence_rollups
+from bims.models.data_version import (
+    bump_data_version,
+    occurrence_version_key,
+    PHYSICO_CHEMISTRY_VERSION_KEY
+)
 from bims.signals.utils import disconnect_bims_signals, connect_bims_signals
 from bims.utils.feature_info import get_feature_centroid
+from bims.utils.site_resolver import SiteResolver, METERS_PER_DEGREE
+from bims.utils.taxon_name_resolver import TaxonNameResolver
 from bims.utils.user import create_users_from_string
 from bims.scripts.data_upload import DataCSVUpload
 from bims.tasks.location_site import update_location_context
@@ -88,6 +98,10 @@ class OccurrenceProcessor(object):
     park_centroid = {}
     parks_data = {}
     section_data = {}
+    site_resolver = None
+    taxon_name_resolver = None
+    # Queue new records and write them per chunk, see OccurrencesCSVUpload
+    bulk_mode = False
 
     def __init__(self, upload_session=None, log_every=200):
         self.upload_session = upload_session
@@ -123,6 +137,179 @@ class OccurrenceProcessor(object):
         self._start_ts = time.time()
         self._log(logging.INFO, "Occurrence processing started")
 
+    def get_site_resolver(self):
+        """Sites of the upload, indexed in memory by ecosystem type."""
+        if self.site_resolver is None:
+            self.site_resolver = SiteResolver(key_fields=("ecosystem_type",))
+        return self.site_resolver
+
+    def get_taxon_name_resolver(self):
+        """Taxon names of the module group, loaded once per upload."""
+        if (
+            self.taxon_name_resolver is None or
+            self.taxon_name_resolver.taxon_group != self.module_group
+        ):
+            self.taxon_name_resolver = TaxonNameResolver(self.module_group)
+        return self.taxon_name_resolver
+
+    def find_site_by_coordinate_prefix(self, latitude, longitude, ecosystem_type):
+        """
+        Site whose stored coordinates start with the given ones, e.g.
+        -33.123 matches -33.12345, nearest first.
+        """
+        latitude_prefix = str(latitude)
+        longitude_prefix = str(longitude)
+        decimals = max(
+            len(latitude_prefix.partition(".")[2]),
+            len(longitude_prefix.partition(".")[2])
+        )
+        # Distance covered by the digits after the prefix on both axes
+        tolerance_m = 2 * METERS_PER_DEGREE * 10 ** -decimals / max(
+            math.cos(math.radians(latitude)), 0.01
+        )
+        # Nearby sites come from the spatial index, the prefixes are
+        # matched against the stored latitude and longitude columns
+        candidate_ids = [
+            site.id for _, site in self.get_site_resolver().candidates(
+                longitude, latitude, tolerance_m, key=(ecosystem_type,))
+        ]
+        if not candidate_ids:
+            return None
+        stored = LocationSite.objects.filter(
+            id__in=candidate_ids,
+            latitude__startswith=latitude_prefix,
+            longitude__startswith=longitude_prefix
+        ).values_list('id', flat=True)
+        matched = set(stored)
+        for site_id in candidate_ids:
+            if site_id in matched:
+                return site_id
+        return None
+
+    def start_bulk_chunk(self, rows):
+        """Prepare the queue of the records of a chunk of rows."""
+        self.pending_records = []
+        self.pending_uuids = {}
+        self.row_chemical_values = []
+        uuids = set()
+        for row in rows:
+            try:
+                uuids.add(str(uuid.UUID(DataCSVUpload.row_value(row, UUID))))
+            except ValueError:
+                continue
+        # Rows with the uuid of a stored record update it in place
+        self.existing_uuids = set(
+            str(value) for value in BiologicalCollectionRecord.objects.filter(
+                uuid__in=uuids
+            ).values_list("uuid", flat=True)
+        )
+
+    def reset_bulk_caches(self):
+        """Forget the rows cached from a rolled back transaction."""
+        self.surveys = {}
+        self.chems = {}
+        self.site_resolver = None
+
+    def queue_record(self, row, defaults, location_site, sampling_date, canonical_uuid=None):
+        """Build the record of a row, saved later with flush_bulk_records."""
+        record = self.pending_uuids.get(canonical_uuid)
+        if record:
+            for field, value in defaults.items():
+                setattr(record, field, value)
+        else:
+            record = BiologicalCollectionRecord(**defaults)
+            if canonical_uuid:
+                record.uuid = canonical_uuid
+                self.pending_uuids[canonical_uuid] = record
+        # Same preparation as BiologicalCollectionRecord.save
+        record.additional_data = json.loads(defaults["additional_data"])
+        if not record.original_species_name:
+            record.original_species_name = record.taxonomy.canonical_name
+        record.apply_end_embargo_to_site()
+        self.pending_records.append((
+            row,
+            record,
+            location_site,
+            sampling_date,
+            self.survey,
+            self.row_chemical_values,
+        ))
+        self._log(logging.DEBUG, "Queued BCR for bulk create")
+        return record
+
+    def flush_bulk_records(self):
+        """Insert the queued records and chemical records of a chunk."""
+        if not self.pending_records:
+            return
+        records = list(dict(
+            (id(pending[1]), pending[1]) for pending in self.pending_records
+        ).values())
+        apply_derived_fields(records)
+        BiologicalCollectionRecord.objects.bulk_create(records)
+
+        # Later rows win, like the get_or_create and save of row mode
+        chemical_values = {}
+        for _, _, location_site, sampling_date, survey, chemicals in (
+                self.pending_records):
+            if isinstance(sampling_date, datetime):
+                sampling_date = sampling_date.date()
+            for chem_id, value in chemicals:
+                chemical_values[(
+                    location_site.id,
+                    sampling_date,
+                    chem_id,
+                    survey.id if survey else None
+                )] = value
+        if chemical_values:
+            existing = {}
+            for chemical_record in ChemicalRecord.objects.filter(
+                    location_site_id__in=set(
+                        key[0] for key in chemical_values),
+                    chem_id__in=set(key[2] for key in chemical_values),
+                    date__in=set(key[1] for key in chemical_values)
+            ).order_by("-id"):
+                existing[(
+                    chemical_record.location_site_id,
+                    chemical_record.date,
+                    chemical_record.chem_id,
+                    chemical_record.survey_id
+                )] = chemical_record
+            updated = []
+            created = []
+            for key, value in chemical_values.items():
+                chemical_record = existing.get(key)
+                if chemical_record:
+                    chemical_record.value = value
+                    updated.append(chemical_record)
+                else:
+                    created.append(ChemicalRecord(
+                        location_site_id=key[0],
+                        date=key[1],
+                        chem_id=key[2],
+                        survey_id=key[3],
+                        value=value
+                    ))
+            if updated:
+                ChemicalRecord.objects.bulk_update(updated, ["value"])
+            if created:
+                ChemicalRecord.objects.bulk_create(created)
+            bump_data_version(PHYSICO_CHEMISTRY_VERSION_KEY)
+
+        # bulk_create sends no post_save
+        bump_data_version(*set(
+            occurrence_version_key(record.module_group_id)
+            for record in records
+        ))
+        refresh_occurrence_rollups(*set(
+            record.site_id for record in records
+        ))
+        for row, record, location_site, _, _, _ in self.pending_records:
+            if str(location_site.id) not in self.site_ids:
+                self.site_ids.append(str(location_site.id))
+            self.finish_processing_row(row, record)
+        self.pending_records = []
+        self.pending_uuids = {}
+
     def update_location_site_context(self):
         self._log(logging.INFO, f"Queueing location context update for {len(self.site_ids)} site(s)")
         update_location_context.delay(
@@ -192,29 +379,41 @@ class OccurrenceProcessor(object):
         self.handle_error(row=row, message=f"Incorrect date format: {date_string}")
         return None
 
-    def process_survey(self, record, location_site, sampling_date, collector):
-        """Process survey data"""
+    def get_or_create_survey(self, location_site, sampling_date, collector):
+        survey = None
         try:
-            self.survey, _ = Survey.objects.get_or_create(
+            survey, _ = Survey.objects.get_or_create(
                 site=location_site,
                 date=sampling_date,
                 collector_user=collector,
                 owner=collector,
                 validated=True
             )
-            if not self.survey.uuid:
-                self.survey.save()
-            self._log(logging.DEBUG, f"Using survey id={self.survey.id}")
+            if not survey.uuid:
+                survey.save()
+            self._log(logging.DEBUG, f"Using survey id={survey.id}")
         except Survey.MultipleObjectsReturned:
-            self.survey = Survey.objects.filter(
+            survey = Survey.objects.filter(
                 site=location_site,
                 date=sampling_date,
                 collector_user=collector,
                 owner=collector,
                 validated=True
             ).first()
-            if self.survey:
-                self._log(logging.WARNING, f"Multiple surveys found; using first id={self.survey.id}")
+            if survey:
+                self._log(logging.WARNING, f"Multiple surveys found; using first id={survey.id}")
+        return survey
+
+    def process_survey(self, record, location_site, sampling_date, collector):
+        """Process survey data"""
+        survey_key = (location_site.id, sampling_date, collector.id)
+        if self.bulk_mode and survey_key in self.surveys:
+            self.survey = self.surveys[survey_key]
+        else:
+            self.survey = self.get_or_create_survey(
+                location_site, sampling_date, collector)
+            if self.bulk_mode and self.survey:
+                self.surveys[survey_key] = self.survey
 
         for survey_data_key in SURVEY_DATA:
             if survey_data_key in record and DataCSVUpload.row_value(record, survey_data_key):
@@ -417,29 +616,31 @@ class OccurrenceProcessor(object):
                 self._log(logging.DEBUG, f"Matched existing site by site_code={existing_site_code.strip()}")
 
         # Find existing location site by lat and lon (starts-with)
+        site_resolver = self.get_site_resolver()
         if not location_site:
             if len(str(latitude)) > 5 and len(str(longitude)) > 5:
-                location_site = LocationSite.objects.filter(
-                    latitude__startswith=latitude,
-                    longitude__startswith=longitude,
-                    ecosystem_type=ecosystem_type
-                ).first()
-                if location_site:
+                site_id = self.find_site_by_coordinate_prefix(
+                    latitude, longitude, ecosystem_type)
+                if site_id:
+                    location_site = LocationSite.objects.get(id=site_id)
                     self._set_row_ctx(site=location_site.site_code)
                     self._log(logging.DEBUG, "Matched existing site by coordinate prefix")
 
         if not location_site:
-            location_site = LocationSite.objects.filter(
-                geometry_point=record_point,
-                ecosystem_type=ecosystem_type
-            ).first()
-            if not location_site:
-                location_site, status = LocationSite.objects.get_or_create(
+            site_id = site_resolver.find(
+                longitude, latitude, key=(ecosystem_type,)
+            )
+            if site_id:
+                location_site = LocationSite.objects.get(id=site_id)
+                self._log(logging.INFO, f"Selected site id={location_site.id}")
+            else:
+                location_site = LocationSite.objects.create(
                     geometry_point=record_point,
                     ecosystem_type=ecosystem_type,
                     location_type=location_type
                 )
-                self._log(logging.INFO, f"{'Created' if status else 'Selected'} site id={location_site.id}")
+                site_resolver.add(location_site)
+                self._log(logging.INFO, f"Created site id={location_site.id}")
 
         # Update fields
         if not location_site.name and location_site_name:
@@ -582,15 +783,25 @@ class OccurrenceProcessor(object):
             chem_value = DataCSVUpload.row_value(record, chem_key).strip()
             if not chem_value:
                 continue
-            chem = Chem.objects.filter(
-                chem_code__iexact=chemical_units[chem_key]
-            )
-            if chem.exists():
-                chem = chem[0]
+            chem_code = chemical_units[chem_key]
+            if self.bulk_mode and chem_code in self.chems:
+                chem = self.chems[chem_code]
             else:
-                chem = Chem.objects.create(
-                    chem_code=chemical_units[chem_key],
+                chem = Chem.objects.filter(
+                    chem_code__iexact=chem_code
                 )
+                if chem.exists():
+                    chem = chem[0]
+                else:
+                    chem = Chem.objects.create(
+                        chem_code=chem_code,
+                    )
+                if self.bulk_mode:
+                    self.chems[chem_code] = chem
+            if self.bulk_mode:
+                # Written with the record of the row by flush_bulk_records
+                self.row_chemical_values.append((chem.id, chem_value))
+                continue
             chem_record, _ = ChemicalRecord.objects.get_or_create(
                 date=date,
                 chem=chem,
@@ -616,25 +827,13 @@ class OccurrenceProcessor(object):
         # enrich log context with species for downstream logs
         self._set_row_ctx(species=species_name)
 
-        # Find existing taxonomy with ACCEPTED taxonomic status
+        # Find existing taxonomy, ACCEPTED taxonomic status first
         self._log(logging.DEBUG, f"Lookup taxonomy rank={taxon_rank} name={species_name} group={self.module_group}")
-        taxa = Taxonomy.objects.filter(
-            Q(canonical_name__iexact=species_name) |
-            Q(legacy_canonical_name__icontains=species_name),
-            rank=taxon_rank,
-            taxonomic_status="ACCEPTED",
-            taxongroup=self.module_group
+        taxonomy_id = self.get_taxon_name_resolver().resolve(
+            species_name, taxon_rank
         )
-        if not taxa.exists():
-            # Find existing taxonomy with any taxonomic status
-            taxa = Taxonomy.objects.filter(
-                Q(canonical_name__iexact=species_name) |
-                Q(legacy_canonical_name__icontains=species_name),
-                rank=taxon_rank,
-                taxongroup=self.module_group
-            )
-        if taxa.exists():
-            taxonomy = taxa[0]
+        if taxonomy_id:
+            taxonomy = Taxonomy.objects.get(id=taxonomy_id)
             self._log(logging.DEBUG, f"Matched taxonomy id={taxonomy.id} status={taxonomy.taxonomic_status}")
         else:
             self.handle_error(row=record, message="Taxonomy does not exist for this group")
@@ -678,6 +877,7 @@ class OccurrenceProcessor(object):
             self._log(logging.INFO, f"Progress: processed {self._row_no} rows…")
 
         optional_data = {}
+        self.row_chemical_values = []
 
         try:
             # -- UUID
@@ -958,6 +1158,16 @@ class OccurrenceProcessor(object):
             if self.module_group:
                 defaults["module_group"] = self.module_group
 
+            if self.bulk_mode:
+                canonical_uuid = str(uuid.UUID(uuid_value)) if uuid_value else None
+                if canonical_uuid not in self.existing_uuids:
+                    record = self.queue_record(
+                        row, defaults, location_site, sampling_date,
+                        canonical_uuid
+                    )
+                    row[UUID] = record.uuid
+                    return
+
             try:
                 if uuid_value:
                     canonical_uuid = str(uuid.UUID(uuid_value))
@@ -971,6 +1181,12 @@ class OccurrenceProcessor(object):
                     record = BiologicalCollectionRecord.objects.create(**defaults)
                     self._log(logging.DEBUG, "Create BCR: no UUID provided")
                     row[UUID] = record.uuid
+            except DatabaseError as e:
+                # The savepoint of the row is rolled back by process_chunk
+                if self.bulk_mode:
+                    raise
+                self.handle_error(row=row, message=str(e))
+                return
             except Exception as e:
                 self.handle_error(row=row, message=str(e))
                 return
@@ -980,6 +1196,10 @@ class OccurrenceProcessor(object):
 
             self.finish_processing_row(row, record)
 
+        except DatabaseError as e:
+            if self.bulk_mode:
+                raise
+            self.handle_error(row=row, message=f"Unhandled error: {e}")
         except Exception as e:
             # Catch any unexpected row crash so the loop can continue
             self.handle_error(row=row, message=f"Unhandled error: {e}")
@@ -987,12 +1207,71 @@ class OccurrenceProcessor(object):
 
 class OccurrencesCSVUpload(DataCSVUpload, OccurrenceProcessor):
     model_name = "biologicalcollectionrecord"
+    bulk_mode = True
 
     def process_started(self):
         # Initialize OccurrenceProcessor’s runtime state for this session
         OccurrenceProcessor.__init__(self, upload_session=getattr(self, "upload_session", None))
+        self.reset_bulk_caches()
         self.start_process()
 
+    def process_chunk(self, rows, first_index=1):
+        """
+        Process a chunk of rows in one transaction, inserting its new
+        records and chemical records in bulk at the end. Each row runs in
+        a savepoint so a failing row does not roll back the others. When
+        the bulk insert fails, the chunk is processed again row by row.
+        """
+        if not self.bulk_mode:
+            return super().process_chunk(rows, first_index)
+        state = (
+            len(self.error_list),
+            len(self.success_list),
+            len(self.site_ids),
+            self._count_ok,
+            self._count_err,
+            self._row_no,
+        )
+        try:
+            with transaction.atomic():
+                self.start_bulk_chunk(rows)
+                for row in rows:
+                    self.process_bulk_row(row)
+                self.flush_bulk_records()
+        except DatabaseError as e:
+            self._log(
+                logging.WARNING,
+                f"Bulk insert of rows {first_index}-{first_index + len(rows) - 1} "
+                f"failed ({e}), processing them row by row"
+            )
+            del self.error_list[state[0]:]
+            del self.success_list[state[1]:]
+            del self.site_ids[state[2]:]
+            self._count_ok, self._count_err, self._row_no = state[3:]
+            self.reset_bulk_caches()
+            for row in rows:
+                row.pop("error_message", None)
+            self.bulk_mode = False
+            try:
+                super().process_chunk(rows, first_index)
+            finally:
+                self.bulk_mode = True
+
+    def process_bulk_row(self, row):
+        """
+        Process a row of a bulk chunk in a savepoint. Database errors of
+        the row leave the savepoint, so it is rolled back and the chunk
+        transaction stays usable for the next rows.
+        """
+        queued = len(self.pending_records)
+        try:
+            with transaction.atomic():
+                self.process_row(row=row)
+        except DatabaseError as e:
+            del self.pending_records[queued:]
+            self.reset_bulk_caches()
+            self.handle_error(row=row, message=f"Unhandled error: {e}")
+
     def process_ended(self):
         self.finish_process()
 
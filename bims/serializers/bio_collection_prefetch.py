@@ -0,0 +1,327 @@
+"""
+Batch loader for BioCollectionOneRowSerializer.
+
+Given a batch of BiologicalCollectionRecord objects, every related row the
+serializer needs is loaded with a fixed number of set-based queries and
+kept in dictionaries. The serializer reads from those instead of querying
+per record when an instance is passed in its context under 'prefetch'.
+"""
+import uuid
+from collections import defaultdict
+
+from django.db.models import Q
+
+from bims.models.algae_data import AlgaeData
+from bims.models.biological_collection_record import (
+    BiologicalCollectionRecord
+)
+from bims.models.chem import Chem
+from bims.models.chemical_record import ChemicalRecord
+from bims.models.cites_listing_info import CITESListingInfo
+from bims.models.dataset import Dataset
+from bims.models.decision_support_tool import DecisionSupportTool
+from bims.models.location_context import LocationContext
+from bims.models.location_context_group import LocationContextGroup
+from bims.models.source_reference import SourceReference
+from bims.models.survey import SurveyData, SurveyDataValue
+from bims.models.taxon_extra_attribute import TaxonExtraAttribute
+from bims.models.taxon_group import TaxonGroup
+from bims.models.taxonomy import Taxonomy
+from bims.serializers.bio_collection_serializer import (
+    PARK_GROUP_KEYS,
+    SANPARK_PARK_NAME
+)
+
+# Guards against cycles in broken taxonomy trees, same limit as
+# Taxonomy.get_taxon_rank_name
+MAX_TAXONOMY_DEPTH = 20
+
+RECORD_RELATED_FIELDS = (
+    'site',
+    'site__river',
+    'site__location_type',
+    'module_group',
+    'survey',
+    'collector_user',
+    'owner',
+    'analyst',
+    'sampling_method',
+    'sampling_effort_link',
+    'abundance_type',
+    'hydroperiod',
+    'wetland_indicator_status',
+    'biotope',
+    'specific_biotope',
+    'substratum',
+    'record_type',
+    'licence',
+)
+
+TAXONOMY_RELATED_FIELDS = (
+    'iucn_status',
+    'national_conservation_status',
+    'endemism',
+    'origin',
+)
+
+
+def with_related(queryset):
+    """Join the foreign keys read by the serializer into the record query."""
+    return queryset.select_related(*RECORD_RELATED_FIELDS)
+
+
+class BioCollectionPrefetch(object):
+    """In-memory maps of the rows related to a batch of records."""
+
+    def __init__(self, records, chemical_unit_codes=None,
+                 survey_data_names=None, geocontext_group_ids=None):
+        """
+        :param records: list of BiologicalCollectionRecord
+        :param chemical_unit_codes: chem codes exported as unit columns,
+            None to load every chemical record of the batch surveys
+        :param survey_data_names: names of the exported survey data
+        :param geocontext_group_ids: location context groups exported
+        """
+        self.records = list(records)
+        self.site_ids = set(r.site_id for r in self.records if r.site_id)
+        self.survey_ids = set(
+            r.survey_id for r in self.records if r.survey_id)
+        self.dates = set(
+            r.collection_date for r in self.records if r.collection_date)
+
+        self._load_source_references()
+        self._load_taxonomies()
+        self._load_datasets()
+        self._load_decision_support_tools()
+        self._load_location_contexts(geocontext_group_ids)
+        self._load_chemical_records(chemical_unit_codes)
+        self._load_survey_data(survey_data_names or [])
+        self._load_algae_data()
+        self._load_taxon_groups()
+
+    def _load_source_references(self):
+        # Loaded polymorphically, so isinstance checks on the serializer
+        # side still see the concrete reference type
+        references = SourceReference.objects.in_bulk(set(
+            r.source_reference_id for r in self.records
+            if r.source_reference_id
+        ))
+        field = BiologicalCollectionRecord._meta.get_field('source_reference')
+        for record in self.records:
+            if record.source_reference_id in references:
+                field.set_cached_value(
+                    record, references[record.source_reference_id])
+
+    def _load_taxonomies(self):
+        """
+        Load the taxa of the batch with their ancestors and accepted taxa,
+        linking them in memory so rank names resolve without queries.
+        """
+        taxa = {}
+        pending = set(r.taxonomy_id for r in self.records if r.taxonomy_id)
+        depth = 0
+        while pending and depth <= MAX_TAXONOMY_DEPTH:
+            depth += 1
+            # Ancestors come from the closure table in the same query
+            loaded = Taxonomy.objects.select_related(
+                *TAXONOMY_RELATED_FIELDS
+            ).filter(
+                Q(id__in=pending) |
+                Q(descendant_links__descendant_id__in=pending)
+            ).distinct()
+            taxa.update((taxon.id, taxon) for taxon in loaded)
+            pending = set()
+            for taxon in taxa.values():
+                for related_id in (
+                        taxon.parent_id, taxon.accepted_taxonomy_id):
+                    if related_id and related_id not in taxa:
+                        pending.add(related_id)
+
+        parent_field = Taxonomy._meta.get_field('parent')
+        accepted_field = Taxonomy._meta.get_field('accepted_taxonomy')
+        for taxon in taxa.values():
+            if taxon.parent_id in taxa:
+                parent_field.set_cached_value(taxon, taxa[taxon.parent_id])
+            if taxon.accepted_taxonomy_id in taxa:
+                accepted_field.set_cached_value(
+                    taxon, taxa[taxon.accepted_taxonomy_id])
+
+        taxonomy_field = BiologicalCollectionRecord._meta.get_field(
+            'taxonomy')
+        for record in self.records:
+            if record.taxonomy_id in taxa:
+                taxonomy_field.set_cached_value(
+                    record, taxa[record.taxonomy_id])
+
+        self.cites_listings = defaultdict(list)
+        for taxonomy_id, appendix in CITESListingInfo.objects.filter(
+                taxonomy_id__in=taxa.keys()
+        ).order_by('id').values_list('taxonomy_id', 'appendix'):
+            self.cites_listings[taxonomy_id].append(appendix)
+
+    def _load_datasets(self):
+        dataset_keys = set()
+        for record in self.records:
+            try:
+                dataset_keys.add(str(uuid.UUID(str(record.dataset_key))))
+            except ValueError:
+                continue
+        self.datasets = {}
+        if not dataset_keys:
+            return
+        for dataset_uuid, abbreviation in Dataset.objects.filter(
+                uuid__in=dataset_keys
+        ).values_list('uuid', 'abbreviation'):
+            self.datasets[str(dataset_uuid)] = abbreviation
+
+    def _load_decision_support_tools(self):
+        names = defaultdict(set)
+        for record_id, name in DecisionSupportTool.objects.filter(
+                biological_collection_record_id__in=[
+                    r.id for r in self.records]
+        ).values_list('biological_collection_record_id', 'dst_name__name'):
+            names[record_id].add(name)
+        self.decision_support_tools = {
+            record_id: ', '.join(sorted(n for n in dst_names if n))
+            for record_id, dst_names in names.items()
+        }
+
+    def _load_location_contexts(self, group_ids):
+        group_ids = set(group_ids or [])
+        group_ids.update(LocationContextGroup.objects.filter(
+            Q(key__in=list(PARK_GROUP_KEYS)) |
+            Q(name__iexact=SANPARK_PARK_NAME)
+        ).values_list('id', flat=True))
+        self.location_contexts = {}
+        for site_id, group_id, value in LocationContext.objects.filter(
+                site_id__in=self.site_ids,
+                group_id__in=group_ids
+        ).order_by('-id').values_list('site_id', 'group_id', 'value'):
+            # Descending ids, so the first context of a pair wins
+            self.location_contexts[(site_id, group_id)] = value
+
+    def _load_chemical_records(self, chemical_unit_codes):
+        """
+        With unit codes, values are keyed by (site, date, chem id).
+        Without, by (site, date) and then by upper-cased chem code.
+        """
+        chemical_records = ChemicalRecord.objects.filter(
+            survey__site_id__in=self.site_ids,
+            survey__date__in=self.dates
+        ).order_by('-id')
+        self.chemical_units = []
+        self.chemical_values = {}
+        if chemical_unit_codes is not None:
+            chems = {}
+            chem_filter = Q()
+            for chem_code in chemical_unit_codes:
+                chem_filter |= Q(chem_code__iexact=chem_code)
+            for chem in Chem.objects.filter(chem_filter).select_related(
+                    'chem_unit').order_by('-id'):
+                chems[chem.chem_code.lower()] = chem
+            for chem_code in chemical_unit_codes:
+                chem = chems.get(chem_code.lower())
+                if not chem:
+                    continue
+                unit = chem.chem_unit.unit if chem.chem_unit else ''
+                self.chemical_units.append((
+                    chem_code,
+                    chem.id,
+                    f'{chem.chem_description} ({unit})'
+                ))
+            for site_id, date, chem_id, value in chemical_records.filter(
+                    chem_id__in=[unit[1] for unit in self.chemical_units]
+            ).values_list('survey__site_id', 'survey__date', 'chem_id',
+                          'value'):
+                self.chemical_values[(site_id, date, chem_id)] = value
+        else:
+            for site_id, date, chem_code, value in chemical_records.values_list(
+                    'survey__site_id', 'survey__date', 'chem__chem_code',
+                    'value'):
+                self.chemical_values.setdefault(
+                    (site_id, date), {}
+                )[chem_code.upper()] = value
+
+    def _load_survey_data(self, survey_data_names):
+        self.survey_data_ids = {}
+        for name in survey_data_names:
+            survey_data = SurveyData.objects.filter(
+                name__iexact=name
+            ).order_by('id').values_list('id', flat=True).first()
+            if survey_data:
+                self.survey_data_ids[name] = survey_data
+        self.survey_data_values = {}
+        for survey_id, survey_data_id, option in SurveyDataValue.objects.filter(
+                survey_id__in=self.survey_ids,
+                survey_data_id__in=self.survey_data_ids.values()
+        ).order_by('-id').values_list(
+            'survey_id', 'survey_data_id', 'survey_data_option__option'
+        ):
+            self.survey_data_values[(survey_id, survey_data_id)] = option
+
+    def _load_algae_data(self):
+        self.algae_data = {}
+        for algae_data in AlgaeData.objects.filter(
+                survey_id__in=self.survey_ids).order_by('-id'):
+            self.algae_data[algae_data.survey_id] = algae_data
+
+    def _load_taxon_groups(self):
+        taxonomy_ids = set(
+            r.taxonomy_id for r in self.records if r.taxonomy_id)
+        self.divisions = {}
+        through = TaxonGroup.taxonomies.through
+        for taxonomy_id, name in through.objects.filter(
+                taxonomy_id__in=taxonomy_ids,
+                taxongroup__category__icontains='division'
+        ).order_by(
+            '-taxongroup__display_order', '-taxongroup_id'
+        ).values_list('taxonomy_id', 'taxongroup__name'):
+            self.divisions[taxonomy_id] = name
+
+        self.extra_attributes = defaultdict(list)
+        for attribute in TaxonExtraAttribute.objects.filter(
+                taxon_group_id__in=set(
+                    r.module_group_id for r in self.records
+                    if r.module_group_id)
+        ).order_by('id'):
+            self.extra_attributes[attribute.taxon_group_id].append(
+                attribute)
+
+    def dataset_abbreviation(self, dataset_key):
+        try:
+            return self.datasets.get(str(uuid.UUID(str(dataset_key))), '')
+        except ValueError:
+            return ''
+
+    def decision_support_tool(self, record_id):
+        return self.decision_support_tools.get(record_id) or '-'
+
+    def cites_listing(self, taxonomy):
+        """Same value as Taxonomy.cites_listing, without a query."""
+        if taxonomy.id in self.cites_listings:
+            return ','.join(self.cites_listings[taxonomy.id])
+        return taxonomy.additional_cites_listing()
+
+    def location_context(self, site_id, group_id):
+        return self.location_contexts.get((site_id, group_id)) or '-'
+
+    def chemical_value(self, site_id, date, chem_id):
+        return self.chemical_values.get((site_id, date, chem_id), '-')
+
+    def chemical_records(self, site_id, date):
+        return self.chemical_values.get((site_id, date), {})
+
+    def survey_data_value(self, survey_id, name):
+        survey_data_id = self.survey_data_ids.get(name)
+        if not survey_data_id:
+            return None
+        return self.survey_data_values.get((survey_id, survey_data_id))
+
+    def algae(self, survey_id):
+        return self.algae_data.get(survey_id)
+
+    def division(self, taxonomy_id):
+        return self.divisions.get(taxonomy_id)
+
+    def taxon_extra_attributes(self, taxon_group_id):
+        return self.extra_attributes.get(taxon_group_id, [])
@@ -46,6 +46,75 @@ ORIGIN = {
 logger = logging.getLogger(__name__)
 TEMPLATE_HEADER_KEYS = 'upload_template_headers'
 SANPARK_PARK_NAME = 'SANParks and MPAs'
+PARK_GROUP_KEYS = {
+    'park_or_mpa_name', 'park_or_mpa',
+    'parks_and_mpas', 'sanparks_and_mpas',
+    'sanparks_mpas', 'parks_mpas'
+}
+ALGAE_HEADERS = [
+    'Curation process',
+    'Biomass Indicator: Chl A',
+    'Biomass Indicator: AFDM',
+    'Autotrophic Index (AI)',
+]
+# FBIS only
+SURVEY_DATA_HEADERS = [
+    'Water Level',
+    'Water Turbidity',
+    'Embeddedness'
+]
+CHEMICAL_UNIT_CODES = [
+    TEMP, CONDUCTIVITY, PH, DISSOLVED_OXYGEN_MG, DISSOLVED_OXYGEN_PERCENT,
+    TURBIDITY, DEPTH_M, NBV, ORTHOPHOSPHATE, TOT, SILICA, NH3_N, NH4_N,
+    NO3_NO2_N, NO2_N, NO3_N, TIN, CHLA_B, AFDM
+]
+
+
+def additional_data_keys(header):
+    """Key variants under which a template header is stored in
+    additional_data."""
+    return [
+        header,
+        header.strip(),
+        header.lower(),
+        header.replace(' ', '_'),
+        header.lower().replace(' ', '_'),
+        header.replace('/', ' or '),
+        header.lower().replace('/', ' or '),
+    ]
+
+
+def ordered_geocontext_groups():
+    """
+    Location context groups exported as columns, in filter display order.
+    :return: list of dicts with the column name, key and id of each group
+    """
+    ordered_group_ids = list(
+        LocationContextFilterGroupOrder.objects
+        .order_by('filter__display_order', 'group_display_order')
+        .values_list('group_id', flat=True)
+        .distinct()
+    )
+    group_lookup = {
+        g.id: g for g in LocationContextGroup.objects.filter(
+            id__in=ordered_group_ids
+        )
+    }
+    seen = set()
+    groups = []
+    for gid in ordered_group_ids:
+        if gid in seen or gid not in group_lookup:
+            continue
+        seen.add(gid)
+        grp = group_lookup[gid]
+        if (grp.key and grp.key.lower() in PARK_GROUP_KEYS) or (
+                'park' in grp.name.lower() and 'mpa' in grp.name.lower()
+        ):
+            display_name = SANPARK_PARK_NAME
+        else:
+            display_name = grp.name
+        groups.append({'name': display_name, 'key': grp.key, 'id': grp.id})
+    return groups
 
 
 class BioCollectionSerializer(serializers.ModelSerializer):
@@ -187,21 +256,19 @@ class BioCollectionOneRowSerializer(
         """Try several key variants to find the value in additional_data."""
         if not isinstance(additional, dict):
             return None
-        variants = [
-            header,
-            header.strip(),
-            header.lower(),
-            header.replace(' ', '_'),
-            header.lower().replace(' ', '_'),
-            header.replace('/', ' or '),
-            header.lower().replace('/', ' or '),
-        ]
-        for k in variants:
+        for k in additional_data_keys(header):
             if k in additional:
                 return additional[k]
         return None
 
+    @property
+    def prefetch(self):
+        """BioCollectionPrefetch of the current batch, if any."""
+        return self.context.get('prefetch')
+
     def get_dataset(self, obj: BiologicalCollectionRecord):
+        if obj.dataset_key and self.prefetch:
+            return self.prefetch.dataset_abbreviation(obj.dataset_key)
         if obj.dataset_key:
             dataset = self.get_context_cache(
                 'dataset',
@@ -243,6 +310,8 @@ class BioCollectionOneRowSerializer(
         return '-'
 
     def spatial_data(self, obj, key):
+        if self.prefetch:
+            return self.prefetch.location_context(obj.site.id, key)
         spatial_data_cache = self.get_context_cache(
             obj.site.id,
             key
@@ -380,6 +449,8 @@ class BioCollectionOneRowSerializer(
         return obj.site.site_code
 
     def get_cites_listing(self, obj: BiologicalCollectionRecord):
+        if self.prefetch:
+            return self.prefetch.cites_listing(obj.taxonomy)
         return obj.taxonomy.cites_listing
 
     def get_user_site_code(self, obj):
@@ -661,6 +732,8 @@ class BioCollectionOneRowSerializer(
         return '-'
 
     def get_decision_support_tool(self, obj):
+        if self.prefetch:
+            return self.prefetch.decision_support_tool(obj.id)
         dst_set = obj.decisionsupporttool_set.all()
         if dst_set.exists():
             dst_set_names = dst_set.values_list(
@@ -810,11 +883,7 @@ class BioCollectionOneRowSerializer(
         ]
 
     def _get_geocontext_parks_group(self):
-        park_keys = {
-            'park_or_mpa_name', 'park_or_mpa',
-            'parks_and_mpas', 'sanparks_and_mpas',
-            'sanparks_mpas', 'parks_mpas'
-        }
+        park_keys = PARK_GROUP_KEYS
 
         geocontext_groups = self.context.setdefault('geocontext_groups', [])
         for g in geocontext_groups:
@@ -845,16 +914,175 @@ class BioCollectionOneRowSerializer(
             return self.spatial_data(instance, grp['id'])
         return '-'
 
-    def to_representation(self, instance: BiologicalCollectionRecord):
-        result = super(
-            BioCollectionOneRowSerializer, self).to_representation(
-            instance)
+    def _add_header(self, header):
+        if header not in self.context['header']:
+            self.context['header'].append(header)
+
+    def _algae_data(self, instance):
+        """AlgaeData of the survey of the record, or None."""
+        if self.prefetch:
+            return self.prefetch.algae(instance.survey_id)
+        algae_data = self.get_context_cache('algae', instance.survey)
+        if not algae_data and instance.survey:
+            algae_data = AlgaeData.objects.filter(
+                survey=instance.survey).first()
+            if algae_data:
+                self.set_context_cache(
+                    'algae',
+                    instance.survey,
+                    algae_data
+                )
+        return algae_data or None
+
+    def _survey_data_values(self, instance):
+        """Survey data options of the survey, by SURVEY_DATA_HEADERS."""
+        if not instance.survey:
+            return {}
+        if self.prefetch:
+            return {
+                survey_data_key: self.prefetch.survey_data_value(
+                    instance.survey_id, survey_data_key)
+                for survey_data_key in SURVEY_DATA_HEADERS
+                if survey_data_key in self.prefetch.survey_data_ids
+            }
+        values = {}
+        for survey_data_key in SURVEY_DATA_HEADERS:
+            survey_data = SurveyData.objects.filter(
+                name__iexact=survey_data_key
+            )
+            if not survey_data.exists():
+                continue
+            sdv_data = self.get_context_cache(
+                instance.survey.id,
+                'survey_data'
+            )
+            if not sdv_data:
+                sdv = SurveyDataValue.objects.filter(
+                    survey=instance.survey,
+                    survey_data=survey_data.first()
+                )
+                if sdv.exists():
+                    sdv_data = sdv.first().survey_data_option.option
+                    self.set_context_cache(
+                        instance.survey.id,
+                        'survey_data',
+                        sdv_data
+                    )
+            values[survey_data_key] = sdv_data
+        return values
+
+    def _chemical_units(self):
+        """(chem code, chem id, header) of the FBIS chemical units."""
+        if self.prefetch:
+            return self.prefetch.chemical_units
+        chemical_units = []
+        for chem_key in CHEMICAL_UNIT_CODES:
+            chemical_unit_obj = Chem.objects.filter(
+                chem_code__iexact=chem_key
+            ).first()
+            if not chemical_unit_obj:
+                continue
+
+            unit = (
+                chemical_unit_obj.chem_unit.unit if
+                chemical_unit_obj.chem_unit else ""
+            )
+            chemical_units.append((
+                chem_key,
+                chemical_unit_obj.id,
+                f'{chemical_unit_obj.chem_description} ({unit})'
+            ))
+        return chemical_units
+
+    def _chemical_value(self, instance, chem_key, chem_id):
+        """Value of a chemical unit at the site on the collection date."""
+        if self.prefetch:
+            return self.prefetch.chemical_value(
+                instance.site.id,
+                instance.collection_date,
+                chem_id
+            )
+        identifier = '{site_id}{collection_date}{chem_key}'.format(
+            site_id=instance.site.id,
+            collection_date=instance.collection_date,
+            chem_key=chem_key
+        )
+        chem_data = self.get_context_cache(
+            identifier,
+            'chem_data'
+        )
+        if not chem_data:
+            chem_record = ChemicalRecord.objects.filter(
+                chem_id=chem_id,
+                survey__site=instance.site,
+                survey__date=instance.collection_date
+            )
+            if chem_record.exists():
+                chem_data = chem_record.first().value
+            else:
+                chem_data = '-'
+            self.set_context_cache(
+                identifier,
+                'chem_data',
+                chem_data
+            )
+        return chem_data
+
+    def _chemical_records(self, instance):
+        """Chemical record values at the site on the collection date,
+        by upper-cased chem code."""
+        if self.prefetch:
+            return self.prefetch.chemical_records(
+                instance.site.id, instance.collection_date)
+        chem_records_cached = self.context.setdefault(
+            'chem_records_cached', {})
         chem_records_identifier = (
             '{site}-{date}'.format(
                 site=instance.site,
                 date=instance.collection_date
             )
         )
+        if chem_records_identifier not in chem_records_cached:
+            chem_records = ChemicalRecord.objects.filter(
+                survey__site=instance.site,
+                survey__date=instance.collection_date
+            ).distinct('chem__chem_code')
+            chem_records_cached[chem_records_identifier] = {
+                chem_record.chem.chem_code.upper(): chem_record.value
+                for chem_record in chem_records
+            }
+        return chem_records_cached[chem_records_identifier]
+
+    def _division_name(self, instance):
+        """Name of the division group of the taxonomy, or None."""
+        if self.prefetch:
+            return self.prefetch.division(instance.taxonomy.id)
+        division = instance.taxonomy.taxongroup_set.filter(
+            category__icontains='division').first()
+        return division.name if division else None
+
+    def _taxon_extra_attributes(self, taxon_group):
+        if self.prefetch:
+            return self.prefetch.taxon_extra_attributes(taxon_group.id)
+        return list(
+            TaxonExtraAttribute.objects.filter(
+                taxon_group=taxon_group
+            )
+        )
+
+    def _geocontext_groups(self):
+        """Location context groups exported as columns, loaded once."""
+        geocontext_groups = self.context.setdefault('geocontext_groups', [])
+        if not geocontext_groups:
+            for grp in ordered_geocontext_groups():
+                self._add_header(grp['name'])
+                geocontext_groups.append(grp)
+        return geocontext_groups
+
+    def to_representation(self, instance: BiologicalCollectionRecord):
+        result = super(
+            BioCollectionOneRowSerializer, self).to_representation(
+            instance)
 
         if not instance.survey:
             try:
@@ -868,8 +1096,6 @@ class BioCollectionOneRowSerializer(
             except Survey.MultipleObjectsReturned:
                 pass
 
-        if 'chem_records_cached' not in self.context:
-            self.context['chem_records_cached'] = {}
         if 'header' not in self.context or not self.context['header']:
             self.context['header'] = list(result.keys())
         if 'show_link' in self.context and self.context['show_link']:
@@ -880,27 +1106,8 @@ class BioCollectionOneRowSerializer(
             is_algae = 'algae' in instance.module_group.name.lower()
 
         if is_algae:
-            algae_keys = [
-                'Curation process',
-                'Biomass Indicator: Chl A',
-                'Biomass Indicator: AFDM',
-                'Autotrophic Index (AI)',
-            ]
-
-            algae_data = self.get_context_cache('algae', instance.survey)
-            if not algae_data and instance.survey:
-                algae_data = AlgaeData.objects.filter(survey=instance.survey)
-                if algae_data.exists():
-                    algae_data = algae_data.first()
-                    self.set_context_cache(
-                        'algae',
-                        instance.survey,
-                        algae_data
-                    )
-                else:
-                    algae_data = None
-
-            for algae_key in algae_keys:
+            algae_data = self._algae_data(instance)
+            for algae_key in ALGAE_HEADERS:
                 if algae_key not in self.context['header']:
                     self.context['header'].append(algae_key)
                 if algae_data:
@@ -915,127 +1122,21 @@ class BioCollectionOneRowSerializer(
 
         # FBIS ONLY
         if preferences.SiteSetting.default_data_source == 'fbis':
-            all_survey_data = [
-                'Water Level',
-                'Water Turbidity',
-                'Embeddedness'
-            ]
-            for survey_data_key in all_survey_data:
-                if survey_data_key not in self.context['header']:
-                    self.context['header'].append(survey_data_key)
-                survey_data = SurveyData.objects.filter(
-                    name__iexact=survey_data_key
-                )
-                if survey_data.exists() and instance.survey:
-                    sdv_data = self.get_context_cache(
-                        instance.survey.id,
-                        'survey_data'
-                    )
-                    if not sdv_data:
-                        sdv = SurveyDataValue.objects.filter(
-                            survey=instance.survey,
-                            survey_data=survey_data.first()
-                        )
-                        if sdv.exists():
-                            sdv_data = sdv.first().survey_data_option.option
-                            self.set_context_cache(
-                                instance.survey.id,
-                                'survey_data',
-                                sdv_data
-                            )
-                    result[survey_data_key] = sdv_data
-
-            chemical_units = {
-                TEMP: TEMP,
-                CONDUCTIVITY: CONDUCTIVITY,
-                PH: PH,
-                DISSOLVED_OXYGEN_MG: DISSOLVED_OXYGEN_MG,
-                DISSOLVED_OXYGEN_PERCENT: DISSOLVED_OXYGEN_PERCENT,
-                TURBIDITY: TURBIDITY,
-                DEPTH_M: DEPTH_M,
-                NBV: NBV,
-                ORTHOPHOSPHATE: ORTHOPHOSPHATE,
-                TOT: TOT,
-                SILICA: SILICA,
-                NH3_N: NH3_N,
-                NH4_N: NH4_N,
-                NO3_NO2_N: NO3_NO2_N,
-                NO2_N: NO2_N,
-                NO3_N: NO3_N,
-                TIN: TIN,
-                CHLA_B: CHLA_B,
-                AFDM: AFDM
-            }
-            for chem_key, chem_value in chemical_units.items():
-                chemical_unit_obj = Chem.objects.filter(
-                    chem_code__iexact=chem_key
-                ).first()
-                if not chemical_unit_obj:
-                    continue
-
-                unit = (
-                    chemical_unit_obj.chem_unit.unit if
-                    chemical_unit_obj.chem_unit else ""
-                )
-
-                chemical_unit = (
-                    f'{chemical_unit_obj.chem_description} '
-                    f'({unit})'
-                )
+            for survey_data_key in SURVEY_DATA_HEADERS:
+                self._add_header(survey_data_key)
+            result.update(self._survey_data_values(instance))
 
-                if chemical_unit not in self.context['header']:
-                    self.context['header'].append(
-                        chemical_unit
-                    )
-                identifier = '{site_id}{collection_date}{chem_key}'.format(
-                    site_id=instance.site.id,
-                    collection_date=instance.collection_date,
-                    chem_key=chem_key
-                )
-                chem_data = self.get_context_cache(
-                    identifier,
-                    'chem_data'
-                )
-                if not chem_data:
-                    chem_record = ChemicalRecord.objects.filter(
-                        chem_id=chemical_unit_obj.id,
-                        survey__site=instance.site,
-                        survey__date=instance.collection_date
-                    )
-                    if chem_record.exists():
-                        chem_data = chem_record.first().value
-                    else:
-                        chem_data = '-'
-                    self.set_context_cache(
-                        identifier,
-                        'chem_data',
-                        chem_data
-                    )
+            for chem_key, chem_id, chemical_unit in self._chemical_units():
+                self._add_header(chemical_unit)
+                chem_data = self._chemical_value(instance, chem_key, chem_id)
                 if chem_data:
                     result[chemical_unit] = chem_data
 
         else:
-            if chem_records_identifier in self.context['chem_records_cached']:
-                result.update(
-                    self.context[
-                        'chem_records_cached'][chem_records_identifier]
-                )
-            else:
-                chem_record_data = {}
-                chem_records = ChemicalRecord.objects.filter(
-                    survey__site=instance.site,
-                    survey__date=instance.collection_date
-                ).distinct('chem__chem_code')
-                for chem_record in chem_records:
-                    chem_code = chem_record.chem.chem_code.upper()
-                    if chem_code not in self.context['header']:
-                        self.context['header'].append(chem_code)
-                    chem_record_data[chem_code] = chem_record.value
-                self.context[
-                    'chem_records_cached'][chem_records_identifier] = (
-                    chem_record_data
-                )
-                result.update(chem_record_data)
+            chem_record_data = self._chemical_records(instance)
+            for chem_code in chem_record_data:
+                self._add_header(chem_code)
+            result.update(chem_record_data)
 
         # Taxon attribute
         taxon_group = instance.module_group
@@ -1084,46 +1185,7 @@ class BioCollectionOneRowSerializer(
                     if 'site_description' in self.context['header']:
                         self.context['header'].remove('site_description')
 
-        geocontext_groups = self.context.setdefault('geocontext_groups', [])
-        if not geocontext_groups:
-            park_keys = {
-                'park_or_mpa_name', 'park_or_mpa',
-                'parks_and_mpas', 'sanparks_and_mpas',
-                'sanparks_mpas', 'parks_mpas'
-            }
-            ordered_group_ids = list(
-                LocationContextFilterGroupOrder.objects
-                .order_by('filter__display_order', 'group_display_order')
-                .values_list('group_id', flat=True)
-                .distinct()
-            )
-            matching_groups = LocationContextGroup.objects.filter(
-                id__in=ordered_group_ids
-            )
-            group_lookup = {g.id: g for g in matching_groups}
-            seen = set()
-            ordered_groups = []
-            for gid in ordered_group_ids:
-                if gid not in seen and gid in group_lookup:
-                    ordered_groups.append(group_lookup[gid])
-                    seen.add(gid)
-
-            for grp in ordered_groups:
-                if (grp.key and grp.key.lower() in park_keys) or (
-                        'park' in grp.name.lower() and 'mpa' in grp.name.lower()
-                ):
-                    display_name = 'SANParks and MPAs'
-                else:
-                    display_name = grp.name
-
-                if display_name not in self.context['header']:
-                    self.context['header'].append(display_name)
-
-                geocontext_groups.append(
-                    {'name': display_name, 'key': grp.key, 'id': grp.id}
-                )
-
-        for grp in geocontext_groups:
+        for grp in self._geocontext_groups():
             result[grp['name']] = self.spatial_data(instance, grp['id'])
 
         if 'show_link' in self.context and self.context['show_link']:
@@ -1138,22 +1200,17 @@ class BioCollectionOneRowSerializer(
                  )])
 
         # Check DIVISION
-        divisions = (
-            instance.taxonomy.taxongroup_set.filter(
-                category__icontains='division')
-        )
-        if divisions.count() > 0:
-            division = divisions.first()
+        division_name = self._division_name(instance)
+        if division_name is not None:
             division_key = 'Division'
             if division_key not in self.context['header']:
                 self.context['header'].append(division_key)
-            result[division_key] = division.name
+            result[division_key] = division_name
 
         if taxon_group:
-            taxon_extra_attributes = TaxonExtraAttribute.objects.filter(
-                taxon_group=taxon_group
-            )
-            if taxon_extra_attributes.exists():
+            taxon_extra_attributes = self._taxon_extra_attributes(
+                taxon_group)
+            if taxon_extra_attributes:
                 for taxon_extra_attribute in taxon_extra_attributes:
                     taxon_attribute_name = taxon_extra_attribute.name
                     if taxon_attribute_name.lower().strip() == 'cites listing':
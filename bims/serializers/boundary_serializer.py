@@ -90,6 +90,8 @@ class BoundaryGeojsonSerializer(GeoFeatureModelSerializer):
         fields = []
 
     def get_geometry(self, obj):
+        if hasattr(obj, 'display_geometry'):
+            return obj.display_geometry
         return obj.geometry
 
 
@@ -21,6 +21,7 @@ from bims.tasks.cites_info import fetch_and_save_cites_listing
 from bims.tasks.virtual_museum_import import import_data_task
 from bims.tasks.taxon_group import delete_occurrences_by_taxon_group
 from bims.tasks.caches import reset_caches
+from bims.tasks.request_log import write_log_events_task
 from bims.tasks.dataset import retrieve_datasets_from_gbif
 from bims.tasks.harvest_schedule import run_scheduled_gbif_harvest
 from bims.tasks.gbif_publish import run_scheduled_gbif_publish
@@ -2,7 +2,7 @@ import json
 import time
 
 from celery import shared_task, current_task
-from django.db.models import Q, F, Count, Case, When, Value
+from django.db.models import Q, F, Count, Case, When, Value, Sum
 from django.db.models.functions import Coalesce, ExtractYear
 from preferences import preferences
 from sorl.thumbnail import get_thumbnail
@@ -30,6 +30,9 @@ SURVEY = 'survey'
 @shared_task(bind=True, name='bims.tasks.generate_location_site_summary', queue='search')
 def generate_location_site_summary(
         self, filters, search_process_id):
+    from bims.models.occurrence_rollup import (
+        OccurrenceRollup, occurrence_count
+    )
     from bims.models import (
         IUCNStatus, Taxonomy, BiologicalCollectionRecord, TaxonGroup, DashboardConfiguration,
         ChemicalRecord, Survey, SiteImage, SEARCH_FINISHED, Biotope, SearchProcess, TaxonOrigin
@@ -58,6 +61,12 @@ def generate_location_site_summary(
 
     start_time = time.time()
     collection_results = search.process_search()
+    # Counts and breakdowns are read from the occurrence rollups when the
+    # search only filters sites and modules
+    rollups = search.rollup_records()
+    summary_records = (
+        rollups if rollups is not None else collection_results
+    )
 
     def multiple_site_details(collection_records):
         """
@@ -69,6 +78,13 @@ def generate_location_site_summary(
             'overview': {}
         }
 
+        if collection_records.model is OccurrenceRollup:
+            rollup_summary = collection_records.summary()
+            summary['overview']['Occurences'] = rollup_summary['occurrences']
+            summary['overview']['Number of Sites'] = rollup_summary['sites']
+            summary['overview']['Number of Taxa'] = rollup_summary['taxa']
+            return summary
+
         summary['overview']['Occurences'] = (
             collection_records.count()
         )
@@ -111,11 +127,15 @@ def generate_location_site_summary(
             return str(string_in)
 
     def get_number_of_records_and_taxa(records_collection):
-        records_collection.annotate()
         result = dict()
-        number_of_occurrence_records = records_collection.count()
-        number_of_unique_taxa = records_collection.values(
-            'taxonomy_id').distinct().count()
+        if records_collection.model is OccurrenceRollup:
+            rollup_summary = records_collection.summary()
+            number_of_occurrence_records = rollup_summary['occurrences']
+            number_of_unique_taxa = rollup_summary['taxa']
+        else:
+            number_of_occurrence_records = records_collection.count()
+            number_of_unique_taxa = records_collection.values(
+                'taxonomy_id').distinct().count()
         result['Number of Occurrences'] = parse_string(
             number_of_occurrence_records)
         result['Number of Taxa'] = parse_string(number_of_unique_taxa)
@@ -127,12 +147,19 @@ def generate_location_site_summary(
         :param: collection_records: collection record queryset
         :return: dict of taxa occurrence data for stacked bar graph
         """
-        taxa_occurrence_data = collection_records.annotate(
-            year=ExtractYear('collection_date'),
-        ).values('year'
-                 ).annotate(count=Count('year')
-                            ).values('year', 'count'
-                                     ).order_by('year')
+        if collection_records.model is OccurrenceRollup:
+            taxa_occurrence_data = collection_records.values(
+                'year'
+            ).annotate(
+                count=Sum('occurrences')
+            ).values('year', 'count').order_by('year')
+        else:
+            taxa_occurrence_data = collection_records.annotate(
+                year=ExtractYear('collection_date'),
+            ).values('year'
+                     ).annotate(count=Count('year')
+                                ).values('year', 'count'
+                                         ).order_by('year')
         result = dict()
         result['occurrences_line_chart'] = {}
         result['occurrences_line_chart']['values'] = list(
@@ -150,13 +177,13 @@ def generate_location_site_summary(
         cons_status_data = collection_records.annotate(
             status=Coalesce(F(status_field_path), Value('NE'))
         ).values('status').annotate(
-            count=Count('status')
+            count=occurrence_count(collection_records, 'status')
         ).order_by('status')
         keys = [item['status'] for item in cons_status_data]
         values = [item['count'] for item in cons_status_data]
         return [keys, values]
 
-    def get_biodiversity_data(collection_records):
+    def get_biodiversity_data(collection_records, summary_records):
         biodiversity_data = {}
         biodiversity_data['times'] = {}
         biodiversity_data['species'] = {}
@@ -167,14 +194,14 @@ def generate_location_site_summary(
         biodiversity_data['species']['biotope_chart'] = {}
 
         start_time = time.time()
-        origin_data = collection_records.annotate(
+        origin_data = summary_records.annotate(
             name=Case(When(taxonomy__origin__isnull=True,
                            then=Value('unknown')),
                       default=F('taxonomy__origin__category'))
         ).values(
             'name'
         ).annotate(
-            count=Count('name')
+            count=occurrence_count(summary_records, 'name')
         ).order_by(
             'name'
         )
@@ -187,7 +214,7 @@ def generate_location_site_summary(
         start_time = time.time()
         local_conservation_status_data = conservation_status_data(
             False,
-            collection_records
+            summary_records
         )
 
         global_iucn_colors = dict(IUCNStatus.objects.filter(national=False).values_list(
@@ -206,7 +233,7 @@ def generate_location_site_summary(
         ))
         national_conservation_status_data = conservation_status_data(
             True,
-            collection_records
+            summary_records
         )
 
         if preferences.SiteSetting.project_name != "fbis_africa":
@@ -224,14 +251,14 @@ def generate_location_site_summary(
         biodiversity_data['times']['conservation_status_data'] = time.time() - start_time
 
         start_time = time.time()
-        endemism_data = collection_records.annotate(
+        endemism_data = summary_records.annotate(
             name=Case(When(taxonomy__endemism__name__isnull=False,
                            then=F('taxonomy__endemism__name')),
                       default=Value('Unknown'))
         ).values(
             'name'
         ).annotate(
-            count=Count('name')
+            count=occurrence_count(summary_records, 'name')
         ).order_by(
             'name'
         )
@@ -305,7 +332,7 @@ def generate_location_site_summary(
             'taxon', 'origin', 'cons_status',
             'cons_status_national', 'endemism'
         ).annotate(
-            count=Count('taxon')
+            count=occurrence_count(collection_records, 'taxon')
         ).order_by('taxon')
         return list(occurrence_table_data)
 
@@ -329,16 +356,16 @@ def generate_location_site_summary(
         )
     else:
         taxa_occurrence = site_taxa_occurrences_per_year(
-            collection_results)
+            summary_records)
 
-    category_summary = collection_results.exclude(
+    category_summary = summary_records.exclude(
         taxonomy__origin__isnull=True
     ).annotate(
         origin=F('taxonomy__origin__category')
     ).values_list(
         'origin'
     ).annotate(
-        count=Count('taxonomy__origin')
+        count=occurrence_count(summary_records, 'taxonomy__origin')
     )
     is_multi_sites = False
     is_sass_exists = False
@@ -347,12 +374,12 @@ def generate_location_site_summary(
         start_time = time.time()
         site_details = overview_site_detail(site_id)
         site_details['Species and Occurences'] = (
-            get_number_of_records_and_taxa(collection_results))
+            get_number_of_records_and_taxa(summary_records))
         times['overview_site_detail'] = time.time() - start_time
     else:
         start_time = time.time()
         is_multi_sites = True
-        site_details = multiple_site_details(collection_results)
+        site_details = multiple_site_details(summary_records)
         times['multiple_site_details'] = time.time() - start_time
         is_sass_exists = collection_results.filter(
             notes__icontains='sass'
@@ -364,7 +391,8 @@ def generate_location_site_summary(
     search_process.create_view()
 
     start_time = time.time()
-    biodiversity_data = get_biodiversity_data(collection_results)
+    biodiversity_data = get_biodiversity_data(
+        collection_results, summary_records)
     site_images = []
     if not is_multi_sites:
         site_image_objects = SiteImage.objects.filter(
@@ -400,8 +428,12 @@ def generate_location_site_summary(
 
     # - Survey
     survey_list = []
+    if rollups is not None:
+        survey_ids = rollups.survey_ids()
+    else:
+        survey_ids = collection_results.values('survey')
     surveys = Survey.objects.filter(
-        id__in=collection_results.values('survey')
+        id__in=survey_ids
     ).order_by('-date')
     for survey in surveys[:5]:
         survey_list.append({
@@ -490,11 +522,14 @@ def generate_location_site_summary(
         dashboard_configuration = {}
 
     response_data = {
-        TOTAL_RECORDS: collection_results.count(),
+        TOTAL_RECORDS: (
+            rollups.total_occurrences() if rollups is not None
+            else collection_results.count()
+        ),
         SITE_DETAILS: dict(site_details),
         TAXA_OCCURRENCE: dict(taxa_occurrence),
         CATEGORY_SUMMARY: dict(category_summary),
-        OCCURRENCE_DATA: occurrence_data(collection_results),
+        OCCURRENCE_DATA: occurrence_data(summary_records),
         IUCN_NAME_LIST: iucn_category,
         ORIGIN_NAME_LIST: origin_name_list,
         BIODIVERSITY_DATA: dict(biodiversity_data),
@@ -505,7 +540,7 @@ def generate_location_site_summary(
         'site_images': list(site_images),
         'process': search_process.process_id,
         'extent': search.extent(),
-        'sites_raw_query': search_process.process_id,
+        'sites_raw_query': search_process.view_name,
         'is_multi_sites': is_multi_sites,
         'is_sass_exists': is_sass_exists,
         'is_chem_exists': chem_exist,
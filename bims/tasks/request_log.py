@@ -0,0 +1,11 @@
+from celery import shared_task
+
+
+@shared_task(
+    name='bims.tasks.write_log_events',
+    queue='update',
+    ignore_result=True)
+def write_log_events_task(events):
+    from bims.request_log.buffer import write_log_events
+
+    write_log_events(events)
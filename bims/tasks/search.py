@@ -58,7 +58,7 @@ def search_task(parameters, search_process_id, background=True):
                     search_process.set_status(SEARCH_FINISHED, False)
                     search_results['status'] = SEARCH_FINISHED
                     search_results['extent'] = search.extent()
-                    search_process.save_to_file(search_results)
+                    search_process.save_results_to_file(search_results)
                 else:
                     search_process.set_status(SEARCH_FAILED)
                 return
@@ -75,7 +75,33 @@ def search_task(parameters, search_process_id, background=True):
             search_process.set_status(SEARCH_FINISHED, False)
             search_results['status'] = SEARCH_FINISHED
             search_results['extent'] = search.extent()
-            search_process.save_to_file(search_results)
+            search_process.save_results_to_file(search_results)
         else:
             search_process.set_status(SEARCH_FAILED)
         return search_results
+
+
+@shared_task(name='bims.tasks.evict_search_views', queue='update', ignore_result=True)
+def evict_search_views():
+    """
+    Periodic task: drop materialized search views above each tenant's
+    limit (least recently used first) or unused for longer than its
+    expiry period.
+    """
+    from django_tenants.utils import get_tenant_model, tenant_context
+    from bims.models.search_view import evict_search_views as evict_views
+
+    for tenant in get_tenant_model().objects.exclude(schema_name='public'):
+        with tenant_context(tenant):
+            from preferences import preferences
+            dropped = evict_views(
+                max_views=getattr(
+                    preferences.SiteSetting, 'max_search_views', 500),
+                ttl_days=getattr(
+                    preferences.SiteSetting, 'search_view_expiry_days', 7)
+            )
+            if dropped:
+                logger.info(
+                    '[%s] Dropped %d search views',
+                    tenant.schema_name, dropped
+                )
@@ -421,7 +421,7 @@ def spatial_dashboard_map(search_parameters=None, search_process_id=None):
                     search.location_sites_raw_query
                 )
                 search_process.create_view()
-                view_name = search_process.process_id
+                view_name = search_process.view_name
             else:
                 view_name = None
 
@@ -600,3 +600,16 @@ def clear_taxa_not_associated_in_taxon_group(
     logger.info(message.replace("\n", " "))
 
     return result
+
+
+@shared_task(name="bims.tasks.refresh_taxonomy_rank_names", queue="update")
+def refresh_taxonomy_rank_names(taxonomy_ids: list[int] | None = None) -> int:
+    """
+    Recompute the rank names stored in hierarchical_data for the given
+    taxa, or for every taxon when no ids are given.
+    """
+    from bims.utils.taxonomy_rank_names import refresh_rank_names
+
+    updated = refresh_rank_names(taxonomy_ids)
+    logger.info("Rank names updated for %s taxa", updated)
+    return updated
@@ -11,6 +11,9 @@ from bims.models import (
     SourceReference, WaterTemperature, SiteImage
 )
 from bims.models.location_site import LocationSite
+from bims.models.data_version import (
+    bump_data_version, WATER_TEMPERATURE_VERSION_KEY
+)
 from celery import shared_task
 WATER_TEMPERATURE_CACHE_KEY = 'key'
 
@@ -214,6 +217,9 @@ def process_water_temperature_data(
                         upload_session_id)
                 site_image.save()
 
+            if new_data or existing_data:
+                bump_data_version(WATER_TEMPERATURE_VERSION_KEY)
+
             upload_session.processed = True
 
             if not success_response:
@@ -226,3 +232,45 @@ def process_water_temperature_data(
                 success_response
             )
             upload_session.save()
+
+
+BATCH_INDICATORS_CACHE_TIMEOUT = 60 * 60 * 24
+BATCH_INDICATORS_LOCK_EXPIRE = 60 * 10
+
+
+@shared_task(
+    name='bims.tasks.calculate_water_temperature_indicators',
+    queue='update')
+def calculate_water_temperature_indicators(schema_name, site_ids, years):
+    """
+    Compute the indicators of every (site, year) pair in one pass and cache
+    the columnar payload under batch_indicators_cache_key.
+    :return: cache key of the payload, None if another worker is on it
+    """
+    from django.core.cache import cache
+    from django_tenants.utils import schema_context
+    from bims.cache import set_cache
+    from bims.models.water_temperature import (
+        batch_calculate_indicators,
+        batch_indicators_cache_key,
+        indicators_to_columns
+    )
+
+    with schema_context(schema_name):
+        cache_key = batch_indicators_cache_key(schema_name, site_ids, years)
+        lock_id = f'{cache_key}_lock'
+        if not cache.add(lock_id, 'true', BATCH_INDICATORS_LOCK_EXPIRE):
+            logger.info(
+                'Indicators %s are already being calculated', cache_key)
+            return None
+        try:
+            set_cache(
+                cache_key,
+                indicators_to_columns(
+                    batch_calculate_indicators(site_ids, years)
+                ),
+                timeout=BATCH_INDICATORS_CACHE_TIMEOUT
+            )
+        finally:
+            cache.delete(lock_id)
+    return cache_key
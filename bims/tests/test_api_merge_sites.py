@@ -26,6 +26,10 @@ from bims.tests.model_factories import (
     WaterTemperatureF
 )
 from bims.api_views.merge_sites import MergeSites
+from bims.models.occurrence_rollup import (
+    OccurrenceRollup,
+    rebuild_occurrence_rollups
+)
 
 
 logger = logging.getLogger('bims')
@@ -166,3 +170,33 @@ class TestApiMergeSites(FastTenantTestCase):
             ],
             2
         )
+
+    def test_merge_sites_rollups(self):
+        user = UserF.create(is_superuser=True)
+        client = TenantClient(self.tenant)
+        client.login(
+            username=user.username,
+            password='password'
+        )
+        secondary_site = LocationSiteF.create()
+        with factory.django.mute_signals(signals.pre_save, signals.post_save):
+            BiologicalCollectionRecordF.create(site=self.location_site)
+            BiologicalCollectionRecordF.create(site=secondary_site)
+            BiologicalCollectionRecordF.create(site=secondary_site)
+        rebuild_occurrence_rollups()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = client.put('/api/merge-sites/', {
+                PRIMARY_SITE: str(self.location_site.id),
+                MERGED_SITES: str(secondary_site.id)
+            }, content_type='application/json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            OccurrenceRollup.objects.filter(
+                site=self.location_site
+            ).total_occurrences(),
+            3
+        )
+        self.assertFalse(
+            OccurrenceRollup.objects.filter(site=secondary_site).exists()
+        )
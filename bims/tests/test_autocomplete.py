@@ -0,0 +1,68 @@
+import json
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from bims.models.taxonomy import Taxonomy
+from bims.tests.model_factories import TaxonomyF
+from bims.utils.autocomplete import (
+    SuggestionBudget,
+    cached_suggestions,
+    rank_suggestions
+)
+from bims.views.autocomplete_search import author_autocomplete
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestAutocomplete(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_rank_suggestions(self, mock_iucn):
+        for name in ('Labeobarbus', 'Barbus anoplus', 'Barbus', 'Enteromius'):
+            TaxonomyF.create(canonical_name=name)
+        names = list(rank_suggestions(
+            Taxonomy.objects.filter(canonical_name__icontains='barbus'),
+            'canonical_name',
+            'barbus'
+        ).values_list('canonical_name', flat=True))
+        self.assertEqual(names, ['Barbus', 'Barbus anoplus', 'Labeobarbus'])
+
+    def test_author_autocomplete(self, mock_iucn):
+        TaxonomyF.create(author='Smith, 1936')
+        TaxonomyF.create(author='Smith, 1936')
+        TaxonomyF.create(author='Goldsmith')
+        request = self.factory.get(
+            '/author-autocomplete/', {'term': 'smith'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(
+            json.loads(author_autocomplete(request).content),
+            [{'author': 'Smith, 1936'}, {'author': 'Goldsmith'}]
+        )
+
+    def test_budget(self, mock_iucn):
+        TaxonomyF.create()
+        self.assertEqual(
+            len(SuggestionBudget().fetch(Taxonomy.objects.all())), 1)
+        budget = SuggestionBudget(milliseconds=0)
+        self.assertEqual(budget.fetch(Taxonomy.objects.all()), [])
+        self.assertTrue(budget.exceeded)
+
+    @mock.patch('bims.utils.autocomplete.cache')
+    def test_cached_suggestions(self, mock_cache, mock_iucn):
+        mock_cache.get.return_value = None
+        suggest = mock.Mock(return_value=['Barbus'])
+        self.assertEqual(
+            cached_suggestions('test', 'bar', {}, [], suggest), ['Barbus'])
+        self.assertEqual(mock_cache.set.call_count, 1)
+
+        cached_suggestions('test', 'barbus', {}, [], suggest)
+        self.assertEqual(mock_cache.get.call_count, 1)
+
+        def exceeded(budget):
+            budget.exceeded = True
+            return []
+        cached_suggestions('test', 'bar', {}, [], exceeded)
+        self.assertEqual(mock_cache.set.call_count, 1)
@@ -0,0 +1,61 @@
+from django.contrib.gis.geos import MultiPolygon, Point
+from django.test import TestCase
+
+from bims.models.boundary import Boundary
+from bims.models.boundary_geometry import (
+    BoundarySimplifiedGeometry,
+    BoundarySubdivision,
+    intersects_boundary,
+    simplify_tolerance,
+    with_display_geometry
+)
+from bims.models.location_site import LocationSite
+from bims.tests.model_factories import BoundaryF, LocationSiteF
+
+
+class TestBoundaryGeometry(TestCase):
+
+    def setUp(self):
+        # Circle of about two thousand vertices
+        circle = Point(28.0, -26.0, srid=4326).buffer(1.0, quadsegs=500)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.boundary = BoundaryF.create(
+                geometry=MultiPolygon(circle, srid=4326))
+
+    def test_geometries_built(self):
+        simplified = BoundarySimplifiedGeometry.objects.filter(
+            boundary=self.boundary).order_by('tolerance')
+        self.assertEqual(
+            list(simplified.values_list('tolerance', flat=True)),
+            [0.0001, 0.002, 0.02]
+        )
+        self.assertLess(
+            simplified.last().geometry.num_coords,
+            self.boundary.geometry.num_coords
+        )
+        self.assertGreater(
+            BoundarySubdivision.objects.filter(
+                boundary=self.boundary).count(),
+            1
+        )
+
+    def test_display_geometry(self):
+        self.assertEqual(simplify_tolerance(3), 0.02)
+        self.assertIsNone(simplify_tolerance(15))
+        boundary = with_display_geometry(
+            Boundary.objects.filter(id=self.boundary.id), 3).get()
+        self.assertLess(
+            boundary.display_geometry.num_coords,
+            self.boundary.geometry.num_coords
+        )
+
+    def test_intersects_boundary(self):
+        inside = LocationSiteF.create(
+            geometry_point=Point(28.1, -26.1, srid=4326))
+        LocationSiteF.create(geometry_point=Point(10.0, 10.0, srid=4326))
+        self.assertEqual(
+            list(LocationSite.objects.filter(
+                intersects_boundary(self.boundary)
+            ).values_list('id', flat=True)),
+            [inside.id]
+        )
@@ -0,0 +1,71 @@
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.enums.taxonomic_group_category import TaxonomicGroupCategory
+from bims.models.biological_collection_record import (
+    BiologicalCollectionRecord,
+    apply_derived_fields
+)
+from bims.tests.model_factories import (
+    BiologicalCollectionRecordF,
+    LocationSiteF,
+    RecordTypeF,
+    SamplingMethodF,
+    SurveyF,
+    TaxonGroupF,
+    TaxonomyF,
+    UserF
+)
+
+
+class TestCollectionDerivedFields(FastTenantTestCase):
+
+    def setUp(self):
+        self.site = LocationSiteF.create(ecosystem_type='Wetland')
+        self.taxonomy = TaxonomyF.create()
+        self.module = TaxonGroupF.create(
+            category=TaxonomicGroupCategory.SPECIES_MODULE.name,
+            taxonomies=(self.taxonomy,)
+        )
+        self.sampling_method = SamplingMethodF.create(
+            sampling_method='Visual observation')
+
+    def test_derived_before_first_write(self):
+        record = BiologicalCollectionRecordF.create(
+            site=self.site,
+            taxonomy=self.taxonomy,
+            sampling_method=self.sampling_method,
+            source_collection='fbis'
+        )
+        record = BiologicalCollectionRecord.objects.get(id=record.id)
+        self.assertEqual(record.ecosystem_type, 'Wetland')
+        self.assertEqual(record.module_group, self.module)
+        self.assertEqual(
+            record.record_type.name, self.sampling_method.sampling_method)
+
+    def test_bulk_apply(self):
+        owner = UserF.create()
+        record_type = RecordTypeF.create(name='Visual observation')
+        records = [
+            BiologicalCollectionRecord(
+                site=self.site,
+                taxonomy=self.taxonomy,
+                sampling_method=self.sampling_method,
+                survey=SurveyF.create(site=self.site),
+                owner=owner,
+                source_collection='gbif',
+                original_species_name='species'
+            ) for _ in range(3)
+        ]
+        with self.assertNumQueries(3):
+            changed = apply_derived_fields(records)
+        self.assertEqual(
+            changed, {'ecosystem_type', 'module_group', 'record_type'})
+        BiologicalCollectionRecord.objects.bulk_create(records)
+        self.assertEqual(
+            BiologicalCollectionRecord.objects.filter(
+                module_group=self.module,
+                ecosystem_type='Wetland',
+                record_type=record_type
+            ).count(),
+            3
+        )
@@ -1,4 +1,7 @@
-from django.test import TestCase
+import os
+import tempfile
+
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 from django_tenants.test.cases import FastTenantTestCase
 from django_tenants.test.client import TenantClient
@@ -14,6 +17,14 @@ from bims.models import BiologicalCollectionRecord
 from bims.models.location_context_filter import LocationContextFilter
 from bims.models.location_context_filter_group_order import LocationContextFilterGroupOrder
 from bims.serializers.bio_collection_serializer import BioCollectionOneRowSerializer
+from bims.serializers.bio_collection_prefetch import BioCollectionPrefetch
+from bims.scripts.collection_csv_keys import PARK_OR_MPA_NAME
+from bims.download.collection_record import (
+    collection_records_header,
+    read_checkpoint,
+    remove_checkpoint,
+    write_checkpoint
+)
 
 
 class TestBioCollectionOneRowSerializerGeoContext(FastTenantTestCase):
@@ -82,3 +93,70 @@ class TestBioCollectionOneRowSerializerGeoContext(FastTenantTestCase):
 
         self.assertIn("Geomorphology", serializer.context["header"])
         self.assertIn("Freshwater", serializer.context["header"])
+
+    def test_header_covers_serialized_columns(self):
+        """The header built up front should hold every serialized column."""
+        header = collection_records_header(
+            BiologicalCollectionRecord.objects.filter(id=self.collection.id),
+            exclude_fields=[],
+            upload_template_headers=[]
+        )
+        data = BioCollectionOneRowSerializer(
+            self.collection,
+            context={"header": list(header)}
+        ).data
+
+        self.assertEqual(set(data.keys()) - set(header), set())
+        self.assertLess(
+            header.index("Geomorphology"), header.index("Freshwater")
+        )
+
+    def test_header_keeps_site_description_with_park_name(self):
+        """The park or MPA name column does not drop the site description."""
+        header = collection_records_header(
+            BiologicalCollectionRecord.objects.filter(id=self.collection.id),
+            exclude_fields=[],
+            upload_template_headers=[PARK_OR_MPA_NAME]
+        )
+
+        self.assertEqual(header[1], PARK_OR_MPA_NAME)
+        self.assertIn("site_description", header)
+
+    def test_prefetched_serializer_matches_per_record(self):
+        """Serializing from a prefetched batch gives the same row."""
+        records = list(
+            BiologicalCollectionRecord.objects.filter(id=self.collection.id)
+        )
+        expected = BioCollectionOneRowSerializer(
+            records[0],
+            context={"header": []}
+        ).data
+        prefetch = BioCollectionPrefetch(
+            records,
+            geocontext_group_ids=[self.grp1.id, self.grp2.id]
+        )
+        data = BioCollectionOneRowSerializer(
+            records, many=True,
+            context={"header": [], "prefetch": prefetch}
+        ).data
+
+        self.assertEqual(dict(data[0]), dict(expected))
+        self.assertEqual(data[0]["Geomorphology"], "GMZ1")
+
+
+class TestDownloadCheckpoint(SimpleTestCase):
+
+    def test_checkpoint_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path_file = os.path.join(tmp_dir, 'download.csv')
+            self.assertIsNone(read_checkpoint(path_file))
+            write_checkpoint(
+                path_file, rows=500, last_pk=1234, size=2048,
+                header=['uuid', 'taxon']
+            )
+            checkpoint = read_checkpoint(path_file)
+            self.assertEqual(checkpoint['rows'], 500)
+            self.assertEqual(checkpoint['last_pk'], 1234)
+            self.assertEqual(checkpoint['header'], ['uuid', 'taxon'])
+            remove_checkpoint(path_file)
+            self.assertIsNone(read_checkpoint(path_file))
@@ -0,0 +1,58 @@
+from django.test import TestCase
+
+from bims.models.data_version import (
+    DataVersion,
+    bump_data_version,
+    defer_data_version_bumps,
+    get_search_data_version,
+    occurrence_version_key
+)
+from bims.tests.model_factories import (
+    BiologicalCollectionRecordF,
+    TaxonGroupF
+)
+
+
+class TestDataVersion(TestCase):
+
+    def setUp(self):
+        self.module_1 = TaxonGroupF.create()
+        self.module_2 = TaxonGroupF.create()
+
+    def test_bump_data_version(self):
+        key = occurrence_version_key(self.module_1.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version(key)
+        self.assertEqual(DataVersion.objects.get(key=key).version, 2)
+
+    def test_deferred_bumps_applied_once(self):
+        key = occurrence_version_key(self.module_1.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            with defer_data_version_bumps():
+                for _ in range(10):
+                    bump_data_version(key)
+                self.assertFalse(DataVersion.objects.filter(key=key).exists())
+        self.assertEqual(DataVersion.objects.get(key=key).version, 1)
+
+    def test_search_version_only_changes_for_its_module(self):
+        search_module_1 = {'modules': str(self.module_1.id)}
+        search_module_2 = {'modules': str(self.module_2.id)}
+        search_all = {}
+        version_1 = get_search_data_version(search_module_1)
+        version_2 = get_search_data_version(search_module_2)
+        version_all = get_search_data_version(search_all)
+
+        record = BiologicalCollectionRecordF.create(
+            module_group=self.module_1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delete()
+
+        self.assertNotEqual(
+            get_search_data_version(search_module_1), version_1)
+        self.assertEqual(
+            get_search_data_version(search_module_2), version_2)
+        self.assertNotEqual(
+            get_search_data_version(search_all), version_all)
@@ -9,7 +9,10 @@ from django.contrib.gis.geos import Point
 from django_tenants.test.cases import FastTenantTestCase
 
 from bims.models import LocationSite, LocationType, BiologicalCollectionRecord
-from bims.scripts.import_gbif_occurrences import process_gbif_row
+from bims.scripts.import_gbif_occurrences import (
+    process_gbif_chunk,
+    process_gbif_row
+)
 from bims.tests.model_factories import (
     TaxonomyF,
     UserF,
@@ -299,3 +302,91 @@ class TestGbifCoordinateFields(FastTenantTestCase):
         self.assertEqual(site.coordinate_precision, Decimal("1.0"))
         self.assertIsNone(site.coordinate_uncertainty_in_meters)
         self.assertTrue(site.harvested_from_gbif)
+
+
+@mock.patch("bims.models.location_site.update_location_site_context")
+@mock.patch("bims.scripts.import_gbif_occurrences.create_dataset_from_gbif", _mock_create_dataset)
+class TestGbifChunkImport(FastTenantTestCase):
+    """Test the set-based import of a chunk of GBIF occurrences."""
+
+    def setUp(self):
+        self.taxonomy = TaxonomyF.create(gbif_key=23456)
+        self.owner = UserF.create(username="gbif_chunk_user")
+        self.source_reference = SourceReferenceDatabaseF.create(
+            source_name="Test Source"
+        )
+        self.taxon_group = TaxonGroupF.create()
+        self.location_type, _ = LocationType.objects.get_or_create(
+            name="PointObservation", allowed_geometry="POINT"
+        )
+        self.log = lambda msg: None
+
+    def _row(self, gbif_id, lon, lat, uncertainty="", taxon_key="23456"):
+        return {
+            "gbifID": gbif_id,
+            "decimalLongitude": str(lon),
+            "decimalLatitude": str(lat),
+            "coordinateUncertaintyInMeters": uncertainty,
+            "coordinatePrecision": "",
+            "eventDate": "2021-01-01",
+            "recordedBy": "Test Collector",
+            "institutionCode": "TEST",
+            "references": "",
+            "locality": "Test Location",
+            "species": "Test species",
+            "datasetKey": "",
+            "taxonKey": taxon_key,
+            "basisOfRecord": "OBSERVATION",
+        }
+
+    def _process(self, rows):
+        return process_gbif_chunk(
+            rows=rows,
+            owner=self.owner,
+            source_reference=self.source_reference,
+            source_collection="gbif",
+            taxon_group=self.taxon_group,
+            log=self.log,
+        )
+
+    def test_chunk(self, mock_update_location_context):
+        nearby_site = LocationSite.objects.create(
+            geometry_point=Point(26.0, -29.0, srid=4326),
+            name="Nearby Site",
+            location_type=self.location_type,
+        )
+        new_records, processed = self._process([
+            # Snaps to the site ~11 m away
+            self._row("chunk1", 26.0001, -29.0, uncertainty="50"),
+            # Two occurrences on a new point share one new site
+            self._row("chunk2", 27.0, -30.0),
+            self._row("chunk3", 27.0, -30.0),
+            # Unknown taxon is skipped
+            self._row("chunk4", 27.0, -30.0, taxon_key="99999"),
+        ])
+        self.assertEqual(processed, 3)
+        self.assertEqual(len(new_records), 3)
+        self.assertEqual(new_records[0].site_id, nearby_site.id)
+        self.assertEqual(new_records[1].site_id, new_records[2].site_id)
+        self.assertEqual(new_records[1].survey_id, new_records[2].survey_id)
+        BiologicalCollectionRecord.objects.bulk_create(new_records)
+
+        new_records, processed = self._process([
+            self._row("chunk1", 26.0001, -29.0, uncertainty="50"),
+        ])
+        self.assertEqual((new_records, processed), ([], 1))
+        self.assertEqual(
+            BiologicalCollectionRecord.objects.filter(
+                upstream_id="chunk1").count(),
+            1
+        )
+
+    def test_chunk_repeated_upstream_id(self, mock_update_location_context):
+        new_records, processed = self._process([
+            self._row("chunk5", 27.0, -30.0),
+            self._row("chunk5", 28.0, -31.0),
+        ])
+        self.assertEqual(processed, 1)
+        self.assertEqual(len(new_records), 1)
+        self.assertEqual(
+            new_records[0].site.geometry_point.coords, (28.0, -31.0))
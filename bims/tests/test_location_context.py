@@ -3,12 +3,18 @@ import mock
 import json
 
 from cloud_native_gis.tests.model_factories import create_user
+from django.contrib.gis.geos import Point
+from django.db import connection
 from django.test import TestCase, override_settings
 
-from bims.utils.location_context import get_location_context_data
+from bims.utils.location_context import (
+    get_location_context_data,
+    harvest_layer_context
+)
 from bims.tests.model_factories import LocationSiteF, LocationContextGroupF, UserF
 from bims.models.location_context_group import LocationContextGroup
 from bims.models.location_context import LocationContext
+from bims.models.geocontext_response import GeocontextResponse
 from cloud_native_gis.models import Layer
 
 test_data_directory = os.path.join(
@@ -95,6 +101,59 @@ class TestLocationContext(TestCase):
             ).exists()
         )
 
+    @override_settings(GEOCONTEXT_URL="test.gecontext.com")
+    def test_get_location_context_data_distinct_coordinates(self):
+        same_point_site = LocationSiteF.create(
+            geometry_point=self.site.geometry_point
+        )
+        other_site = LocationSiteF.create(
+            geometry_point=Point(
+                self.site.longitude + 1, self.site.latitude)
+        )
+        with mock.patch('requests.get', mock.Mock(
+                side_effect=mocked_location_context_data)) as mock_get:
+            get_location_context_data(
+                group_keys=self.location_context_group_keys
+            )
+        # One request per distinct coordinate
+        self.assertEqual(mock_get.call_count, 2)
+        for site in (self.site, same_point_site, other_site):
+            self.assertEqual(
+                LocationContext.objects.get(
+                    group__key='value_with_comma',
+                    site=site
+                ).value,
+                'test, comma'
+            )
+
+    @override_settings(GEOCONTEXT_URL="test.gecontext.com")
+    def test_geocontext_response_cache(self):
+        site = LocationSiteF.create(
+            geometry_point=Point(25.12341, -29.5)
+        )
+        nearby_site = LocationSiteF.create(
+            geometry_point=Point(25.12342, -29.5)
+        )
+        with mock.patch('requests.get', mock.Mock(
+                side_effect=mocked_location_context_data)) as mock_get:
+            site.get_geocontext_group_data('group1')
+            nearby_site.get_geocontext_group_data('group1')
+            get_location_context_data(
+                group_keys=self.location_context_group_keys,
+                site_id=f'{site.id},{nearby_site.id}'
+            )
+        # Both sites round to the same cached point
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(
+            GeocontextResponse.objects.filter(group_key='group1').count(), 1)
+        self.assertEqual(
+            LocationContext.objects.get(
+                group__key='value_with_comma',
+                site=nearby_site
+            ).value,
+            'test, comma'
+        )
+
 
 class TestAddLocationContext(TestCase):
     def setUp(self) -> None:
@@ -160,3 +219,63 @@ class TestAddLocationContext(TestCase):
             location_context_values.count(),
             2
         )
+
+
+class TestHarvestLayerContext(TestCase):
+    def setUp(self) -> None:
+        self.layer = Layer.objects.create(
+            name='harvest_layer_test',
+            created_by=create_user(password='password')
+        )
+        # Features table of the layer, as loaded by cloud native gis
+        table_name = (
+            f'{connection.schema_name}_gis.{self.layer.table_name}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE SCHEMA IF NOT EXISTS {connection.schema_name}_gis')
+            cursor.execute(f"""
+                CREATE TABLE {table_name} (
+                    id serial PRIMARY KEY,
+                    geometry geometry(Polygon, 4326),
+                    province varchar
+                )
+            """)
+            cursor.execute(f"""
+                INSERT INTO {table_name} (geometry, province) VALUES
+                (ST_MakeEnvelope(0, 0, 10, 10, 4326), 'West'),
+                (ST_MakeEnvelope(10, 0, 20, 10, 4326), 'East'),
+                (ST_MakeEnvelope(20, 0, 30, 10, 4326), NULL)
+            """)
+
+    def test_harvest_layer_context(self):
+        west_site = LocationSiteF.create(geometry_point=Point(5, 5))
+        east_site = LocationSiteF.create(geometry_point=Point(15, 5))
+        no_value_site = LocationSiteF.create(geometry_point=Point(25, 5))
+        outside_site = LocationSiteF.create(geometry_point=Point(50, 50))
+
+        found = harvest_layer_context(
+            [west_site.id, east_site.id, no_value_site.id, outside_site.id],
+            self.layer,
+            'province'
+        )
+
+        self.assertEqual(found, {west_site.id, east_site.id})
+        group = LocationContextGroup.objects.get(
+            key=str(self.layer.unique_id),
+            layer_identifier='province'
+        )
+        self.assertEqual(
+            dict(LocationContext.objects.filter(
+                group=group
+            ).values_list('site_id', 'value')),
+            {west_site.id: 'West', east_site.id: 'East'}
+        )
+
+        # Harvesting again updates the values instead of adding rows
+        harvest_layer_context([west_site.id], self.layer, 'province')
+        self.assertEqual(
+            LocationContext.objects.filter(
+                group=group, site=west_site).count(),
+            1
+        )
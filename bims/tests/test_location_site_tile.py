@@ -0,0 +1,64 @@
+import math
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory, TestCase
+from django.http import Http404
+
+from bims.tests.model_factories import LocationSiteF
+from bims.views.location_site_tile import location_site_tile
+
+
+def tile_of(lon, lat, z):
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int(
+        (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return z, x, y
+
+
+class TestLocationSiteTile(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        patcher = mock.patch(
+            'bims.utils.tile_cache.tile_cache',
+            return_value=LocMemCache('tiles', {}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        LocationSiteF.create(geometry_point=Point(28.05, -26.2, srid=4326))
+        LocationSiteF.create(geometry_point=Point(28.06, -26.21, srid=4326))
+
+    def get(self, z, x, y, **parameters):
+        request = self.factory.get(
+            '/location-site-tiles/{}/{}/{}.pbf'.format(z, x, y), parameters)
+        return location_site_tile(request, str(z), str(x), str(y))
+
+    def test_tiles(self):
+        for zoom in (3, 15):
+            response = self.get(*tile_of(28.05, -26.2, zoom))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response['Content-Type'],
+                'application/vnd.mapbox-vector-tile')
+            self.assertTrue(response.content)
+
+        self.assertEqual(self.get(*tile_of(-70.0, 40.0, 15)).content, b'')
+
+        z, x, y = tile_of(28.05, -26.2, 15)
+        response = self.get(z, x, y)
+        request = self.factory.get(
+            '/location-site-tiles/{}/{}/{}.pbf'.format(z, x, y),
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(
+            location_site_tile(request, str(z), str(x), str(y)).status_code,
+            304)
+
+    def test_invalid_tiles(self):
+        with self.assertRaises(Http404):
+            self.get(2, 4, 0)
+        with self.assertRaises(Http404):
+            self.get(2, 1, 1, view='search_view_missing')
+        with self.assertRaises(Http404):
+            self.get(2, 1, 1, view='bims_locationsite')
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from bims.api_views.search import CollectionSearch
+from bims.models.occurrence_rollup import (
+    OccurrenceRollup,
+    defer_occurrence_rollups,
+    refresh_occurrence_rollups
+)
+from bims.tests.model_factories import (
+    BiologicalCollectionRecordF,
+    LocationSiteF,
+    SurveyF,
+    TaxonGroupF,
+    TaxonomyF
+)
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestOccurrenceRollup(TestCase):
+
+    def setUp(self):
+        self.module = TaxonGroupF.create()
+        self.site = LocationSiteF.create()
+        self.other_site = LocationSiteF.create()
+
+    def create_records(self):
+        taxon_1 = TaxonomyF.create()
+        taxon_2 = TaxonomyF.create()
+        survey_1 = SurveyF.create(site=self.site)
+        survey_2 = SurveyF.create(site=self.site)
+        with self.captureOnCommitCallbacks(execute=True):
+            records = [
+                BiologicalCollectionRecordF.create(
+                    site=self.site,
+                    module_group=self.module,
+                    taxonomy=taxonomy,
+                    survey=survey
+                ) for taxonomy, survey in (
+                    (taxon_1, survey_1),
+                    (taxon_1, survey_1),
+                    (taxon_2, survey_2),
+                )
+            ]
+        return records
+
+    def test_rollups_follow_record_changes(self, mock_iucn):
+        records = self.create_records()
+        rollups = OccurrenceRollup.objects.filter(site=self.site)
+        self.assertEqual(
+            rollups.summary(),
+            {'occurrences': 3, 'sites': 1, 'taxa': 2}
+        )
+        self.assertEqual(len(rollups.survey_ids()), 2)
+        self.assertEqual(
+            rollups.survey_counts('taxonomy'),
+            {records[0].taxonomy_id: 1, records[2].taxonomy_id: 1}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            records[2].site = self.other_site
+            records[2].save()
+        self.assertEqual(rollups.total_occurrences(), 2)
+        self.assertEqual(
+            OccurrenceRollup.objects.filter(
+                site=self.other_site).total_occurrences(),
+            1
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            records[0].delete()
+        self.assertEqual(rollups.total_occurrences(), 1)
+
+    def test_deferred_refresh(self, mock_iucn):
+        records = self.create_records()
+        OccurrenceRollup.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with defer_occurrence_rollups():
+                refresh_occurrence_rollups(records[0].site_id)
+                self.assertFalse(OccurrenceRollup.objects.exists())
+        self.assertEqual(
+            OccurrenceRollup.objects.filter(
+                site=self.site).total_occurrences(),
+            3
+        )
+
+    def test_search_rollups(self, mock_iucn):
+        self.create_records()
+        search = CollectionSearch({
+            'siteId': str(self.site.id),
+            'modules': str(self.module.id)
+        })
+        rollups = search.rollup_records()
+        self.assertIsNotNone(rollups)
+        self.assertEqual(
+            rollups.total_occurrences(),
+            search.process_search().count()
+        )
+        summary = search.get_summary_data()
+        self.assertEqual(summary['total_records'], 3)
+        self.assertEqual(summary['total_survey'], 2)
+        self.assertEqual(
+            sorted(row['total'] for row in summary['records']), [1, 2])
+
+        self.assertIsNone(CollectionSearch({
+            'siteId': str(self.site.id),
+            'search': 'name'
+        }).rollup_records())
+        self.assertIsNone(CollectionSearch({}).rollup_records())
@@ -19,7 +19,9 @@ from bims.tests.model_factories import (
     TaxonomyF,
     TaxonGroupF, BiologicalCollectionRecordF, SiteF,
 )
-from bims.models import UploadSession, BiologicalCollectionRecord
+from bims.models import (
+    UploadSession, BiologicalCollectionRecord, TaxonGroup
+)
 from bims.scripts.occurrences_upload import (
     OccurrencesCSVUpload
 )
@@ -290,4 +292,116 @@ class TestCollectionUpload(FastTenantTestCase):
                 site__latitude=31.0522,
                 site__longitude=-111.2437
             ).count(), 1
-        )
\ No newline at end of file
+        )
+
+    @mock.patch('bims.scripts.data_upload.DataCSVUpload.finish')
+    @mock.patch('bims.scripts.occurrences_upload.OccurrenceProcessor.update_location_site_context')
+    @mock.patch('bims.scripts.occurrences_upload.get_feature_centroid')
+    @mock.patch('bims.scripts.occurrences_upload.fetch_river_name')
+    def test_csv_upload_chunks(self,
+                               mock_fetch_river_name,
+                               mock_get_feature_centroid,
+                               mock_update_location_context,
+                               mock_finish):
+        mock_get_feature_centroid.return_value = None
+        mock_fetch_river_name.return_value = None
+        taxonomy = TaxonomyF.create(
+            canonical_name='Achnanthes eutrophila',
+            rank='SPECIES',
+            taxonomic_status='ACCEPTED'
+        )
+        taxon_group = TaxonGroupF.create(
+            name='test',
+            taxonomies=(taxonomy,)
+        )
+        with open(os.path.join(
+            test_data_directory, 'csv_upload_test.csv'
+        ), 'rb') as file:
+            upload_session = UploadSessionF.create(
+                uploader=self.owner,
+                process_file=File(file),
+                module_group=taxon_group
+            )
+
+        data_upload = OccurrencesCSVUpload()
+        data_upload.upload_session = UploadSession.objects.get(
+            pk=upload_session.pk)
+        data_upload.chunk_size = 4
+        data_upload.start()
+
+        upload_session.refresh_from_db()
+        self.assertEqual(upload_session.start_row, 6)
+        self.assertEqual(upload_session.progress, '6/6')
+        self.assertEqual(
+            len(data_upload.success_list) + len(data_upload.error_list), 6)
+        self.assertTrue(data_upload.success_list)
+        records = BiologicalCollectionRecord.objects.filter(
+            uuid__in=[row['UUID'] for row in data_upload.success_list]
+        )
+        self.assertEqual(records.count(), len(data_upload.success_list))
+        self.assertFalse(records.filter(survey__isnull=True).exists())
+
+    @mock.patch('bims.scripts.data_upload.DataCSVUpload.finish')
+    @mock.patch('bims.scripts.occurrences_upload.OccurrenceProcessor.update_location_site_context')
+    @mock.patch('bims.scripts.occurrences_upload.get_feature_centroid')
+    @mock.patch('bims.scripts.occurrences_upload.fetch_river_name')
+    def test_csv_upload_chunk_row_database_error(self,
+                                                 mock_fetch_river_name,
+                                                 mock_get_feature_centroid,
+                                                 mock_update_location_context,
+                                                 mock_finish):
+        mock_get_feature_centroid.return_value = None
+        mock_fetch_river_name.return_value = None
+        taxonomy = TaxonomyF.create(
+            canonical_name='Achnanthes eutrophila',
+            rank='SPECIES',
+            taxonomic_status='ACCEPTED'
+        )
+        taxon_group = TaxonGroupF.create(
+            name='test',
+            taxonomies=(taxonomy,)
+        )
+        with open(os.path.join(
+            test_data_directory, 'csv_upload_test.csv'
+        ), 'rb') as file:
+            upload_session = UploadSessionF.create(
+                uploader=self.owner,
+                process_file=File(file),
+                module_group=taxon_group
+            )
+
+        queue_record = OccurrencesCSVUpload.queue_record
+        queued_rows = []
+
+        def failing_queue_record(upload, row, *args, **kwargs):
+            queued_rows.append(row)
+            if len(queued_rows) == 1:
+                # Duplicated primary key, aborts the transaction
+                TaxonGroup.objects.bulk_create([
+                    TaxonGroup(id=taxon_group.id, name='duplicate')
+                ])
+            return queue_record(upload, row, *args, **kwargs)
+
+        data_upload = OccurrencesCSVUpload()
+        data_upload.upload_session = UploadSession.objects.get(
+            pk=upload_session.pk)
+        data_upload.chunk_size = 6
+        with mock.patch.object(
+                OccurrencesCSVUpload, 'queue_record', failing_queue_record):
+            data_upload.start()
+
+        self.assertGreater(len(queued_rows), 1)
+        failed_row = queued_rows[0]
+        self.assertIn(failed_row, data_upload.error_list)
+        self.assertNotIn(
+            'current transaction is aborted',
+            ' '.join(
+                str(row.get('error_message', ''))
+                for row in data_upload.error_list
+            )
+        )
+        self.assertTrue(data_upload.success_list)
+        records = BiologicalCollectionRecord.objects.filter(
+            uuid__in=[row['UUID'] for row in data_upload.success_list]
+        )
+        self.assertEqual(records.count(), len(data_upload.success_list))
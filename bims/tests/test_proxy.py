@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory, TestCase, override_settings
+
+from bims.utils.tile_cache import (
+    invalidate_search_view_tiles,
+    normalize_url
+)
+from bims.views.proxy import proxy_request
+
+GEOSERVER = 'https://maps.example.com/geoserver/wms'
+VIEW_NAME = 'search_view_' + 'a' * 51
+
+
+def upstream_response(content=b'tile', status_code=200):
+    response = mock.Mock(
+        status_code=status_code,
+        headers={'content-type': 'image/png', 'ETag': '"upstream"'}
+    )
+    response.iter_content.return_value = iter([content])
+    return response
+
+
+@override_settings(PROXY_ALLOWED_HOSTS=('.example.com',))
+@mock.patch('bims.views.proxy.session')
+class TestProxy(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.cache = LocMemCache('tiles', {})
+        patcher = mock.patch(
+            'bims.utils.tile_cache.tile_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, path, parameters=None, access_token=None, **headers):
+        request = self.factory.get(
+            '/bims_proxy/' + path, parameters or {}, **headers)
+        request.session = SessionStore()
+        if access_token:
+            request.session['access_token'] = access_token
+        return proxy_request(request, path)
+
+    def test_normalize_url(self, mock_session):
+        self.assertEqual(
+            normalize_url('HTTPS://Maps.Example.com/wms?WIDTH=256&LAYERS=a'),
+            'https://maps.example.com/wms?layers=a&width=256'
+        )
+
+    def test_cached_tiles(self, mock_session):
+        mock_session.get.return_value = upstream_response()
+        response = self.get(GEOSERVER, {'LAYERS': 'sites', 'WIDTH': '256'})
+        self.assertEqual(response.content, b'tile')
+        etag = response['ETag']
+
+        # Same tile with the parameters in another order, from the cache
+        response = self.get(GEOSERVER, {'WIDTH': '256', 'LAYERS': 'sites'})
+        self.assertEqual(response.content, b'tile')
+        self.assertEqual(mock_session.get.call_count, 1)
+
+        response = self.get(
+            GEOSERVER, {'LAYERS': 'sites', 'WIDTH': '256'},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_search_view_tiles_invalidated(self, mock_session):
+        mock_session.get.return_value = upstream_response()
+        parameters = {'viewparams': 'where:public."{}"'.format(VIEW_NAME)}
+        self.get(GEOSERVER, parameters)
+        invalidate_search_view_tiles(VIEW_NAME)
+        mock_session.get.return_value = upstream_response()
+        self.get(GEOSERVER, parameters)
+        self.assertEqual(mock_session.get.call_count, 2)
+
+    def test_other_hosts_forbidden(self, mock_session):
+        for path in (
+                'https://tiles.example.org/1/2/3.png',
+                'http://169.254.169.254/latest/meta-data/'):
+            response = self.get(path)
+            self.assertEqual(response.status_code, 403)
+        mock_session.get.assert_not_called()
+
+    def test_token_responses_streamed(self, mock_session):
+        mock_session.get.side_effect = (
+            lambda *args, **kwargs: upstream_response(b'private'))
+        for _ in range(2):
+            response = self.get(
+                GEOSERVER, access_token='token',
+                HTTP_IF_NONE_MATCH='"upstream"')
+            self.assertEqual(
+                b''.join(response.streaming_content), b'private')
+            self.assertEqual(response['ETag'], '"upstream"')
+        self.assertEqual(mock_session.get.call_count, 2)
+        self.assertEqual(
+            mock_session.get.call_args[1]['headers'],
+            {'Access-Token': 'token', 'If-None-Match': '"upstream"'}
+        )
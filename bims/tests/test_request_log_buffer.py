@@ -0,0 +1,70 @@
+"""Tests for the buffered writes of request logs."""
+import time
+from unittest import mock
+
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.models.request_log import RequestLog
+from bims.request_log.buffer import (
+    LOG_BUFFER_SECONDS,
+    REQUEST_LOG_EVENT,
+    buffer_log_event,
+    flush_log_buffers
+)
+from bims.tests.model_factories import UserF
+
+
+class TestRequestLogBuffer(FastTenantTestCase):
+
+    def setUp(self):
+        self.user = UserF.create()
+        # Buffers are flushed by the tests, not by the background thread
+        patcher = mock.patch(
+            'bims.request_log.buffer._start_flush_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request_log(self, path):
+        return {
+            'user_id': self.user.id,
+            'remote_address': '127.0.0.1',
+            'server_hostname': 'localhost',
+            'request_path': path,
+            'response_status': 200,
+            'start_time': 0.0,
+            'run_time': 0.1,
+        }
+
+    @mock.patch('bims.request_log.buffer.LOG_BUFFER_SIZE', 2)
+    def test_events_written_in_batches(self):
+        flush_log_buffers()
+        buffer_log_event(REQUEST_LOG_EVENT, self.request_log('/one/'))
+        self.assertFalse(RequestLog.objects.exists())
+        buffer_log_event(REQUEST_LOG_EVENT, self.request_log('/two/'))
+        self.assertEqual(
+            sorted(RequestLog.objects.values_list(
+                'request_path', flat=True)),
+            ['/one/', '/two/']
+        )
+
+        buffer_log_event(REQUEST_LOG_EVENT, self.request_log('/three/'))
+        flush_log_buffers()
+        self.assertEqual(RequestLog.objects.count(), 3)
+
+    def test_aged_buffer_flushed(self):
+        flush_log_buffers()
+        buffer_log_event(REQUEST_LOG_EVENT, self.request_log('/one/'))
+
+        # The flush thread leaves a buffer younger than LOG_BUFFER_SECONDS
+        flush_log_buffers(max_age=LOG_BUFFER_SECONDS)
+        self.assertFalse(RequestLog.objects.exists())
+
+        # and sends it once aged, without a new event arriving
+        aged = time.time() + LOG_BUFFER_SECONDS
+        with mock.patch('bims.request_log.buffer.time.time',
+                        return_value=aged):
+            flush_log_buffers(max_age=LOG_BUFFER_SECONDS)
+        self.assertEqual(
+            list(RequestLog.objects.values_list('request_path', flat=True)),
+            ['/one/']
+        )
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from bims.utils.result_store import (
+    write_results,
+    read_results,
+    count_results,
+    remove_results
+)
+
+
+class TestResultStore(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'process_id')
+        self.sites = [
+            {'site_id': i, 'name': 'Site\n{}'.format(i), 'total': i * 2}
+            for i in range(45)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_pages(self):
+        self.assertEqual(write_results(self.path, 'sites', self.sites), 45)
+        self.assertEqual(count_results(self.path, 'sites'), 45)
+        self.assertEqual(
+            read_results(self.path, 'sites', 0, 20), self.sites[:20])
+        self.assertEqual(
+            read_results(self.path, 'sites', 40, 20), self.sites[40:])
+        self.assertEqual(read_results(self.path, 'sites', 60, 20), [])
+
+    def test_missing_store(self):
+        self.assertIsNone(count_results(self.path, 'records'))
+        self.assertIsNone(read_results(self.path, 'records', 0, 20))
+
+    def test_empty_and_removed_store(self):
+        write_results(self.path, 'records', [])
+        self.assertEqual(count_results(self.path, 'records'), 0)
+        self.assertEqual(read_results(self.path, 'records', 0, 20), [])
+        remove_results(self.path, 'records')
+        self.assertIsNone(count_results(self.path, 'records'))
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from bims.models.biological_collection_record import (
+    BiologicalCollectionRecord
+)
+from bims.models.search_document import (
+    SiteSearchDocument,
+    TaxonSearchDocument,
+    rebuild_site_search_documents,
+    rebuild_taxon_search_documents,
+    search_collection_records
+)
+from bims.tests.model_factories import (
+    BiologicalCollectionRecordF,
+    LocationSiteF,
+    RiverF,
+    TaxonomyF,
+    VernacularNameF
+)
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestSearchDocument(TestCase):
+
+    def create_records(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.river = RiverF.create(name='Crocodile')
+            self.site = LocationSiteF.create(
+                site_code='CROC-001', river=self.river)
+            self.other_site = LocationSiteF.create(site_code='OTHER-001')
+            self.accepted = TaxonomyF.create(canonical_name='Barbus anoplus')
+            self.synonym = TaxonomyF.create(
+                canonical_name='Enteromius anoplus',
+                accepted_taxonomy=self.accepted,
+                vernacular_names=[
+                    VernacularNameF.create(name='Chubbyhead barb')
+                ]
+            )
+            self.taxon_record = BiologicalCollectionRecordF.create(
+                site=self.other_site,
+                taxonomy=self.synonym,
+                original_species_name='Barbus sp.'
+            )
+            self.site_record = BiologicalCollectionRecordF.create(
+                site=self.site,
+                taxonomy=TaxonomyF.create(),
+                original_species_name='Unknown'
+            )
+
+    def search(self, query):
+        return set(search_collection_records(
+            BiologicalCollectionRecord.objects.all(), query
+        ).values_list('id', flat=True))
+
+    def test_documents_follow_changes(self, mock_iucn):
+        self.create_records()
+        document = TaxonSearchDocument.objects.get(taxonomy=self.synonym)
+        self.assertIn('Enteromius anoplus', document.names)
+        self.assertIn('Barbus anoplus', document.names)
+        self.assertIn('Chubbyhead barb', document.vernacular_names)
+        self.assertIn(
+            'Enteromius anoplus',
+            TaxonSearchDocument.objects.get(taxonomy=self.accepted).names
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.river.name = 'Limpopo'
+            self.river.save()
+        self.assertEqual(
+            SiteSearchDocument.objects.get(site=self.site).river_name,
+            'Limpopo'
+        )
+
+    def test_search_levels(self, mock_iucn):
+        self.create_records()
+        # Canonical name of the accepted taxon finds the synonym records
+        self.assertEqual(self.search('barbus anoplus'), {self.taxon_record.id})
+        # Original species name before the scientific name
+        self.assertEqual(self.search('barbus sp'), {self.taxon_record.id})
+        self.assertEqual(self.search('croc-001'), {self.site_record.id})
+        self.assertEqual(self.search('crocodile'), {self.site_record.id})
+        self.assertEqual(self.search('chubbyhead'), {self.taxon_record.id})
+        self.assertEqual(self.search('no such name'), set())
+
+    def test_rebuild(self, mock_iucn):
+        self.create_records()
+        TaxonSearchDocument.objects.all().delete()
+        SiteSearchDocument.objects.all().delete()
+        self.assertEqual(self.search('croc-001'), set())
+        rebuild_taxon_search_documents([self.synonym.id])
+        rebuild_site_search_documents()
+        self.assertEqual(TaxonSearchDocument.objects.count(), 1)
+        self.assertEqual(self.search('croc-001'), {self.site_record.id})
+        self.assertEqual(self.search('enteromius'), {self.taxon_record.id})
@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from bims.models.search_process import SearchProcess, SEARCH_RESULTS
+from bims.models.search_view import SearchView, evict_search_views
+
+RAW_QUERY = 'SELECT id AS site_id FROM bims_locationsite'
+
+
+class TestSearchView(TestCase):
+
+    def create_search_process(self, process_id, raw_query=RAW_QUERY):
+        search_process = SearchProcess.objects.create(
+            category=SEARCH_RESULTS,
+            query=process_id,
+            process_id=process_id,
+            search_raw_query=raw_query,
+            finished=True
+        )
+        search_process.create_view()
+        return search_process
+
+    def test_identical_query_reuses_view(self):
+        search_1 = self.create_search_process('process_1')
+        search_2 = self.create_search_process('process_2')
+        self.assertEqual(search_1.search_view, search_2.search_view)
+        self.assertEqual(search_1.view_name, search_2.view_name)
+        self.assertTrue(search_1.search_view.exists_in_database())
+        self.assertEqual(SearchView.objects.count(), 1)
+
+    def test_evict_least_recently_used(self):
+        old_search = self.create_search_process(
+            'process_old', RAW_QUERY + ' WHERE id > 0')
+        new_search = self.create_search_process('process_new')
+        old_view = old_search.search_view
+
+        self.assertEqual(evict_search_views(max_views=1), 1)
+
+        self.assertFalse(SearchView.objects.filter(id=old_view.id).exists())
+        self.assertFalse(old_view.exists_in_database())
+        old_search.refresh_from_db()
+        self.assertFalse(old_search.finished)
+        self.assertIsNone(old_search.search_view)
+        new_search.refresh_from_db()
+        self.assertTrue(new_search.search_view.exists_in_database())
+
+    def test_locked_search_view_is_kept(self):
+        search = self.create_search_process('process_locked')
+        search.locked = True
+        search.save()
+        self.assertEqual(evict_search_views(max_views=0, ttl_days=0), 0)
+        self.create_search_process('process_other', RAW_QUERY + ' LIMIT 1')
+        evict_search_views(max_views=1)
+        self.assertTrue(
+            SearchView.objects.filter(id=search.search_view_id).exists())
@@ -0,0 +1,68 @@
+"""Tests for the in-memory site resolver used by imports."""
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.models import LocationSite, LocationType
+from bims.utils.site_resolver import SiteResolver, distance_in_meters
+
+
+@mock.patch("bims.models.location_site.update_location_site_context")
+class TestSiteResolver(FastTenantTestCase):
+
+    def setUp(self):
+        self.location_type, _ = LocationType.objects.get_or_create(
+            name="PointObservation", allowed_geometry="POINT"
+        )
+        self.site = self._site(26.0, -29.0, ecosystem_type="River")
+        self.far_site = self._site(26.01, -29.0, ecosystem_type="River")
+
+    def _site(self, lon, lat, **kwargs):
+        return LocationSite.objects.create(
+            geometry_point=Point(lon, lat, srid=4326),
+            location_type=self.location_type,
+            **kwargs
+        )
+
+    def test_distance(self, mock_context):
+        # A thousandth of a degree of latitude is about 111 m
+        self.assertAlmostEqual(
+            distance_in_meters(26.0, -29.0, 26.0, -29.001), 111.2, places=0)
+
+    def test_find(self, mock_context):
+        resolver = SiteResolver()
+        self.assertEqual(resolver.find(26.0, -29.0), self.site.id)
+        self.assertIsNone(resolver.find(26.0001, -29.0))
+        self.assertEqual(
+            resolver.find(26.0001, -29.0, tolerance_m=50), self.site.id)
+        self.assertEqual(
+            resolver.find(26.0099, -29.0, tolerance_m=2000),
+            self.far_site.id)
+        self.assertIsNone(resolver.find(26.5, -29.0, tolerance_m=50))
+
+    def test_key_fields(self, mock_context):
+        resolver = SiteResolver(key_fields=("ecosystem_type",))
+        self.assertEqual(
+            resolver.find(26.0, -29.0, key=("river",)), self.site.id)
+        self.assertIsNone(resolver.find(26.0, -29.0, key=("Wetland",)))
+
+    def test_preload_and_add(self, mock_context):
+        resolver = SiteResolver()
+        resolver.preload([(26.0, -29.0), (26.01, -29.0)], tolerance_m=100)
+        new_site = self._site(26.005, -29.0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(resolver.find(26.0, -29.0), self.site.id)
+            # Not loaded yet, created after the preload
+            self.assertIsNone(resolver.find(26.005, -29.0))
+            resolver.add(new_site)
+            self.assertEqual(
+                resolver.find(26.0051, -29.0, tolerance_m=50), new_site.id)
+        self.assertEqual(len(queries), 0)
+
+        new_site.geometry_point = Point(27.0, -30.0, srid=4326)
+        resolver.add(new_site)
+        self.assertIsNone(
+            resolver.find(26.0051, -29.0, tolerance_m=50))
@@ -10,6 +10,7 @@ from django_tenants.test.client import TenantClient
 from django_tenants.utils import schema_context
 
 from bims.models import LocationSite, location_site_post_save_handler
+from bims.models.occurrence_rollup import OccurrenceRollup
 from bims.tests.custom_test_case import CustomFastTenantTestCase
 from bims.tests.model_factories import (
     SurveyF, UserF, Survey,
@@ -146,15 +147,23 @@ class TestSiteVisitView(FastTenantTestCase):
             'date': '2021-07-09',
             'end_embargo_date': '2022-09-09'
         }
-        self.client.post(
-            '/site-visit/update/1/',
-            post_data
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/site-visit/update/1/',
+                post_data
+            )
         bio = BiologicalCollectionRecord.objects.filter(
             survey=self.survey
         )
         self.assertEqual(bio.count(), 2)
         self.assertEqual(str(bio[0].end_embargo_date), '2022-09-09')
+        # Rollups are rebuilt after the bulk update of the embargo date
+        self.assertFalse(
+            OccurrenceRollup.objects.filter(
+                site_id=bio_1.site_id,
+                end_embargo_date__isnull=True
+            ).exists()
+        )
 
     def test_SiteVisitView_update_anonymous_access(self):
         self.client.login(
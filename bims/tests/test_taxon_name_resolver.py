@@ -0,0 +1,57 @@
+"""Tests for the in-memory taxon name resolver of uploads."""
+from unittest import mock
+
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.tests.model_factories import TaxonomyF, TaxonGroupF
+from bims.utils.taxon_name_resolver import TaxonNameResolver
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestTaxonNameResolver(FastTenantTestCase):
+
+    def setUp(self):
+        self.synonym = TaxonomyF.create(
+            canonical_name='Baetis harrisoni',
+            rank='SPECIES',
+            taxonomic_status='SYNONYM'
+        )
+        self.accepted = TaxonomyF.create(
+            canonical_name='Baetis harrisonii',
+            legacy_canonical_name='Baetis harrisoni Barnard',
+            rank='SPECIES',
+            taxonomic_status='ACCEPTED'
+        )
+        self.other_rank = TaxonomyF.create(
+            canonical_name='Baetis',
+            rank='GENUS',
+            taxonomic_status='ACCEPTED'
+        )
+        self.outside = TaxonomyF.create(
+            canonical_name='Caenis',
+            rank='GENUS',
+            taxonomic_status='ACCEPTED'
+        )
+        self.taxon_group = TaxonGroupF.create(
+            taxonomies=(self.synonym, self.accepted, self.other_rank)
+        )
+
+    def test_resolve(self, mock_iucn):
+        resolver = TaxonNameResolver(self.taxon_group)
+        # Accepted taxon matched through its legacy name comes first
+        self.assertEqual(
+            resolver.resolve('baetis HARRISONI', 'SPECIES'), self.accepted.id)
+        self.assertEqual(
+            resolver.resolve('Baetis harrisonii', 'SPECIES'),
+            self.accepted.id)
+        self.assertEqual(
+            resolver.resolve('Baetis', 'GENUS'), self.other_rank.id)
+        self.assertIsNone(resolver.resolve('Baetis', 'FAMILY'))
+        self.assertIsNone(resolver.resolve('Caenis', 'GENUS'))
+
+    def test_synonym_fallback(self, mock_iucn):
+        self.accepted.legacy_canonical_name = ''
+        self.accepted.save()
+        resolver = TaxonNameResolver(self.taxon_group)
+        self.assertEqual(
+            resolver.resolve('Baetis harrisoni', 'SPECIES'), self.synonym.id)
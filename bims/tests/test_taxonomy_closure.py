@@ -0,0 +1,90 @@
+"""Tests for the taxonomy closure table."""
+from unittest import mock
+
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.enums.taxonomic_rank import TaxonomicRank
+from bims.models import Taxonomy, TaxonomyClosure
+from bims.models.taxonomy_closure import (
+    rebuild_taxonomy_closure,
+    subtree_counts
+)
+from bims.tests.model_factories import TaxonomyF
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestTaxonomyClosure(FastTenantTestCase):
+
+    def setUp(self):
+        self.kingdom = TaxonomyF.create(
+            rank=TaxonomicRank.KINGDOM.name, canonical_name='Animalia')
+        self.taxon_class = TaxonomyF.create(
+            rank=TaxonomicRank.CLASS.name, canonical_name='Insecta',
+            parent=self.kingdom)
+        self.family = TaxonomyF.create(
+            rank=TaxonomicRank.FAMILY.name, canonical_name='Baetidae',
+            parent=self.taxon_class)
+        self.genus = TaxonomyF.create(
+            rank=TaxonomicRank.GENUS.name, canonical_name='Baetis',
+            parent=self.family)
+        self.species = TaxonomyF.create(
+            rank=TaxonomicRank.SPECIES.name, canonical_name='Baetis harrisoni',
+            parent=self.genus)
+
+    def _paths(self):
+        return set(TaxonomyClosure.objects.values_list(
+            'ancestor_id', 'descendant_id', 'depth'))
+
+    def test_descendants_and_ancestors(self, mock_iucn):
+        self.assertCountEqual(
+            list(self.kingdom.get_all_children()),
+            [self.taxon_class, self.family, self.genus, self.species]
+        )
+        self.assertEqual(list(self.genus.get_all_children()), [self.species])
+        self.assertEqual(
+            list(self.genus.get_descendants(include_self=True).order_by('id')),
+            [self.genus, self.species]
+        )
+        self.assertEqual(
+            list(self.species.get_ancestors()),
+            [self.genus, self.family, self.taxon_class, self.kingdom]
+        )
+        self.assertEqual(
+            self.species.get_ancestor_by_rank(TaxonomicRank.CLASS.name),
+            self.taxon_class
+        )
+        self.assertEqual(self.kingdom.descendant_count(), 4)
+        self.assertEqual(
+            subtree_counts([self.family.id, self.species.id]),
+            {self.family.id: 2, self.species.id: 0}
+        )
+
+    def test_rank_names_use_one_query(self, mock_iucn):
+        species = Taxonomy.objects.get(id=self.species.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(species.class_name, 'Insecta')
+            self.assertEqual(species.family_name, 'Baetidae')
+            self.assertEqual(species.taxon_class, self.taxon_class)
+
+    def test_reparent_moves_subtree(self, mock_iucn):
+        other_family = TaxonomyF.create(
+            rank=TaxonomicRank.FAMILY.name, canonical_name='Caenidae',
+            parent=self.taxon_class)
+        self.genus.parent = other_family
+        self.genus.save()
+
+        self.assertEqual(
+            list(self.species.get_ancestors()),
+            [self.genus, other_family, self.taxon_class, self.kingdom]
+        )
+        self.assertFalse(self.family.get_all_children().exists())
+
+        paths = self._paths()
+        rebuild_taxonomy_closure()
+        self.assertEqual(paths, self._paths())
+
+    def test_delete_detaches_children(self, mock_iucn):
+        self.family.delete()
+        self.assertFalse(self.genus.get_ancestors().exists())
+        self.assertEqual(
+            set(self.kingdom.get_all_children()), {self.taxon_class})
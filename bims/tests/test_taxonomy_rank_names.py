@@ -0,0 +1,52 @@
+"""Tests for the rank names stored in Taxonomy.hierarchical_data."""
+from unittest import mock
+
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.enums.taxonomic_rank import TaxonomicRank
+from bims.models import Taxonomy
+from bims.tests.model_factories import TaxonomyF
+from bims.utils.taxonomy_rank_names import refresh_rank_names
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestTaxonomyRankNames(FastTenantTestCase):
+
+    def setUp(self):
+        self.taxon_class = TaxonomyF.create(
+            rank=TaxonomicRank.CLASS.name, canonical_name='Insecta')
+        self.family = TaxonomyF.create(
+            rank=TaxonomicRank.FAMILY.name, canonical_name='Baetidae',
+            parent=self.taxon_class)
+        self.genus = TaxonomyF.create(
+            rank=TaxonomicRank.GENUS.name, canonical_name='Baetis',
+            parent=self.family)
+        self.species = TaxonomyF.create(
+            rank=TaxonomicRank.SPECIES.name, canonical_name='Baetis harrisoni',
+            parent=self.genus)
+
+    def test_names_stored_on_save(self, mock_iucn):
+        species = Taxonomy.objects.get(id=self.species.id)
+        self.assertEqual(
+            species.hierarchical_data['family_name'], 'Baetidae')
+        self.assertEqual(
+            species.hierarchical_data['species_name'], 'harrisoni')
+        with self.assertNumQueries(0):
+            self.assertEqual(species.class_name, 'Insecta')
+            self.assertEqual(species.genus_name, 'Baetis')
+            self.assertEqual(species.species_name, 'Baetis harrisoni')
+            self.assertEqual(species.order_name, '')
+
+    def test_rename_refreshes_descendants(self, mock_iucn):
+        self.family.canonical_name = 'Caenidae'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.family.save()
+        species = Taxonomy.objects.get(id=self.species.id)
+        self.assertEqual(species.family_name, 'Caenidae')
+
+    def test_backfill(self, mock_iucn):
+        Taxonomy.objects.update(hierarchical_data={})
+        self.assertEqual(refresh_rank_names(batch_size=2), 4)
+        species = Taxonomy.objects.get(id=self.species.id)
+        self.assertEqual(species.hierarchical_data['class_name'], 'Insecta')
+        self.assertEqual(refresh_rank_names(), 0)
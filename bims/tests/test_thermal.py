@@ -3,13 +3,18 @@ import os
 import csv
 from datetime import datetime
 
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase, TestCase
 from bims.tests.model_factories import (
     LocationSiteF, LocationContextF, LocationContextGroupF, WaterTemperatureF
 )
 from bims.models.water_temperature import (
     get_thermal_zone,
     calculate_indicators,
+    batch_calculate_indicators,
+    forward_window_mean,
+    indicators_to_columns,
+    max_run_length,
     thermograph_data
 )
 
@@ -128,6 +133,23 @@ class TestThermalData(TestCase):
             24.48
         )
 
+    def test_batch_indicators_match_single(self):
+        single = calculate_indicators(self.location_site, 2009)
+        batch = batch_calculate_indicators(
+            [self.location_site.id], [2008, 2009])
+
+        self.assertEqual(list(batch.keys()), [(self.location_site.id, 2009)])
+        result = batch[(self.location_site.id, 2009)]
+        self.assertAlmostEqual(
+            result['annual']['annual_mean'],
+            single['annual']['annual_mean'])
+        self.assertEqual(result['threshold'], single['threshold'])
+
+        columns = indicators_to_columns(batch)
+        self.assertEqual(columns['site_id'], [self.location_site.id])
+        self.assertEqual(columns['year'], [2009])
+        self.assertEqual(len(columns['monthly_mean'][0]), 12)
+
     def test_ninetydays_data(self):
 
         max_day = 28
@@ -154,3 +176,30 @@ class TestThermalData(TestCase):
         self.assertTrue('ninety_days' not in result)
         self.assertTrue('thirty_days' not in result)
         self.assertTrue('weekly' in result)
+
+
+class TestThermalWindows(SimpleTestCase):
+
+    def test_forward_window_mean(self):
+        values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(
+            forward_window_mean(values, 3).tolist(),
+            [2.0, 3.0, 4.0, 4.5, 5.0]
+        )
+
+    def test_forward_window_mean_missing_days(self):
+        values = np.array([1.0, np.nan, 3.0, np.nan, np.nan, 6.0])
+        means = forward_window_mean(values, 2)
+        # A missing day is left out of its windows
+        self.assertEqual(means[:3].tolist(), [1.0, 3.0, 3.0])
+        # A window without any data is NaN
+        self.assertTrue(np.isnan(means[3]))
+        self.assertEqual(means[4:].tolist(), [6.0, 6.0])
+
+    def test_max_run_length(self):
+        self.assertEqual(
+            max_run_length(np.array([True, True, False, True, True, True])),
+            3
+        )
+        self.assertEqual(max_run_length(np.array([False, False])), 0)
+        self.assertEqual(max_run_length(np.array([], dtype=bool)), 0)
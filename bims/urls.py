@@ -12,6 +12,7 @@ from bims.views.download_occurrence_template import download_occurrence_template
 from bims.views.edit_taxon_view import EditTaxonView
 from bims.views.physico_chemical_upload import PhysicoChemicalUploadView
 from bims.views.proxy import proxy_request
+from bims.views.location_site_tile import location_site_tile
 
 from bims.views.map import MapPageView
 from bims.views.spatial_layer import SpatialLayerUploadView, VisualizationLayerView
@@ -160,6 +161,9 @@ urlpatterns = [
             location_context_value_autocomplete,
             name='location-context-autocomplete'),
     re_path(r'^bims_proxy/(?P<path>.*)', proxy_request),
+    re_path(r'^location-site-tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.pbf$',
+            location_site_tile,
+            name='location-site-tile'),
     re_path(r'^fish-form/$', FishFormView.as_view(), name='fish-form'),
     re_path(r'^invert-form/$', InvertFormView.as_view(), name='invert-form'),
     re_path(r'^algae-form/$', AlgaeFormView.as_view(), name='algae-form'),
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""Helpers of the autocomplete views.
+
+Suggestions are ranked exact match first, then prefix matches, then other
+substring matches, shorter names first. Name columns have trigram indexes
+so the substring filters do not scan the tables. The queries of a request
+share a time budget enforced with a statement timeout.
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Length
+
+from bims.conf import (
+    AUTOCOMPLETE_BUDGET_MS,
+    AUTOCOMPLETE_CACHE_PREFIX_LENGTH,
+    AUTOCOMPLETE_CACHE_SECONDS
+)
+from bims.models.data_version import data_version_hash
+
+logger = logging.getLogger('bims')
+
+
+def rank_suggestions(queryset, field, query):
+    """
+    Order a queryset by how well a name field matches a query.
+    :param queryset: queryset filtered on field__icontains=query
+    :param field: name field, e.g. 'canonical_name'
+    """
+    return queryset.annotate(
+        match_rank=Case(
+            When(**{'{}__iexact'.format(field): query}, then=Value(0)),
+            When(**{'{}__istartswith'.format(field): query}, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField()
+        ),
+        name_length=Length(field)
+    ).order_by('match_rank', 'name_length', field)
+
+
+def distinct_rows(queryset):
+    """
+    Rows of a queryset filtered through joins, once each, in a queryset
+    that can still be ordered freely.
+    """
+    return queryset.model.objects.filter(pk__in=queryset.values('pk'))
+
+
+class SuggestionBudget(object):
+    """Time left for the suggestion queries of one request."""
+
+    def __init__(self, milliseconds=AUTOCOMPLETE_BUDGET_MS):
+        self.deadline = time.monotonic() + milliseconds / 1000.0
+        self.exceeded = False
+
+    def remaining(self):
+        """Milliseconds left."""
+        return int((self.deadline - time.monotonic()) * 1000)
+
+    def fetch(self, queryset):
+        """
+        Rows of a queryset, or an empty list when the budget is spent
+        before or while the query runs.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            self.exceeded = True
+            return []
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    'SET LOCAL statement_timeout = {:d}'.format(remaining))
+                return list(queryset)
+        except OperationalError as e:
+            logger.warning('Autocomplete query cancelled: %s', e)
+            self.exceeded = True
+            return []
+
+
+def cached_suggestions(name, query, parameters, version_keys, suggest):
+    """
+    Suggestions within the time budget, from the cache for short queries,
+    which most users type. Cached entries are dropped when the data they
+    come from changes, suggestions cut short by the budget are not cached.
+    :param name: name of the autocomplete
+    :param query: text typed
+    :param parameters: other parameters the suggestions depend on
+    :param version_keys: data version keys the suggestions depend on,
+        besides the ones of every occurrence module
+    :param suggest: function of a SuggestionBudget returning the
+        suggestions
+    """
+    budget = SuggestionBudget()
+    if len(query) > AUTOCOMPLETE_CACHE_PREFIX_LENGTH:
+        return suggest(budget)
+    key = 'autocomplete:{name}:{hash}'.format(
+        name=name,
+        hash=hashlib.sha256(json.dumps({
+            'query': query.lower(),
+            'parameters': parameters,
+            'version': data_version_hash(version_keys, True)
+        }, sort_keys=True).encode('utf-8')).hexdigest()
+    )
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = suggest(budget)
+        if not budget.exceeded:
+            cache.set(key, suggestions, AUTOCOMPLETE_CACHE_SECONDS)
+    return suggestions
@@ -3,7 +3,6 @@ __date__ = '21/05/18'
 
 import json
 import logging
-from django.db.models import Q
 from bims.models.boundary import Boundary, BoundaryType
 from bims.models.cluster import Cluster
 from bims.tasks.collection_record import update_cluster as task_update_cluster
@@ -28,11 +27,10 @@ def update_cluster(boundary):
         LocationSiteClusterSerializer
     )
 
+    from bims.models.boundary_geometry import intersects_boundary
+
     records = BiologicalCollectionRecord.objects.filter(validated=True).filter(
-        Q(site__geometry_point__intersects=boundary.geometry) |
-        Q(site__geometry_line__intersects=boundary.geometry) |
-        Q(site__geometry_polygon__intersects=boundary.geometry) |
-        Q(site__geometry_multipolygon__intersects=boundary.geometry)
+        intersects_boundary(boundary, prefix='site__')
     )
     sites = records.values('site').distinct()
 
@@ -8,7 +8,16 @@ from bims.utils.gbif import (
     get_children, find_species, get_species, get_vernacular_names,
     gbif_name_suggest, gbif_synonyms_by_usage
 )
-from bims.models import Taxonomy, VernacularName, TaxonGroup
+from bims.models import (
+    BiologicalCollectionRecord,
+    Taxonomy,
+    VernacularName,
+    TaxonGroup
+)
+from bims.models.occurrence_rollup import (
+    OccurrenceRollup,
+    refresh_occurrence_rollups
+)
 from bims.enums import TaxonomicRank, TaxonomicStatus
 
 logger = logging.getLogger('bims')
@@ -36,6 +45,11 @@ def merge_taxa_data(gbif_key='', excluded_taxon=None, taxa_list=None):
 
     logger.info('Merging %s data' % len(taxa))
 
+    # Sites whose rollups count the merged taxa
+    site_ids = set(BiologicalCollectionRecord.objects.filter(
+        taxonomy__in=taxa
+    ).values_list('site_id', flat=True).distinct())
+
     taxon_groups = TaxonGroup.objects.filter(
         taxonomies__in=taxa
     )
@@ -63,6 +77,9 @@ def merge_taxa_data(gbif_key='', excluded_taxon=None, taxa_list=None):
                     continue
                 try:
                     objects = getattr(taxon, link).all()
+                    # Rebuilt below from the moved records
+                    if objects.model is OccurrenceRollup:
+                        continue
                     if objects.count() > 0:
                         print('Updating {obj} for : {taxon}'.format(
                             obj=str(objects.model._meta.label),
@@ -78,6 +95,8 @@ def merge_taxa_data(gbif_key='', excluded_taxon=None, taxa_list=None):
             logger.info(''.join(['-' for i in range(len(str(taxon)) + 12)]))
 
     taxa.delete()
+    # Bulk updates skip the post_save rebuild of the rollups
+    refresh_occurrence_rollups(*site_ids)
 
     if vernacular_names:
         excluded_taxon.vernacular_names.add(*vernacular_names)
@@ -4,38 +4,34 @@ from bims.models.location_context import LocationContext
 from bims.models.location_site import LocationSite
 from bims.utils.site_code import get_feature_data
 
+UPPER_DATA = [
+    'mountain headwater stream',
+    'mountain stream',
+    'transitional',
+    'upper foothill'
+]
+LOWER_DATA = [
+    'lower foothill',
+    'lowland river'
+]
 
-def get_geomorphological_zone_class(location_site: LocationSite) -> str:
-    """
-    Get geomorphological zone class from the location site,
-        if it has the required data
-    :param location_site: Location site object
-    :return: Upper, Lower, or empty string
-    """
 
-    upper_data = [
-        'mountain headwater stream',
-        'mountain stream',
-        'transitional',
-        'upper foothill'
-    ]
-    lower_data = [
-        'lower foothill',
-        'lowland river'
-    ]
+def _zone_class(value):
+    if value:
+        if value.lower().strip() in UPPER_DATA:
+            return 'Upper'
+        elif value.lower().strip() in LOWER_DATA:
+            return 'Lower'
+    return None
 
+
+def _geomorphological_zone_class(location_site, geo_class, geo_class_recoded):
     if location_site.refined_geomorphological:
-        if location_site.refined_geomorphological.lower() in upper_data:
+        if location_site.refined_geomorphological.lower() in UPPER_DATA:
             return 'Upper'
-        elif location_site.refined_geomorphological.lower() in lower_data:
+        elif location_site.refined_geomorphological.lower() in LOWER_DATA:
             return 'Lower'
 
-    context = LocationContext.objects.filter(
-        site=location_site
-    )
-    geo_class = context.value_from_key(
-        layer_name='geomorphological zone'
-    )
     if geo_class == '-':
         geo_class = get_feature_data(
             lon=location_site.longitude,
@@ -47,19 +43,48 @@ def get_geomorphological_zone_class(location_site: LocationSite) -> str:
         )
 
     if geo_class != '-' or not geo_class:
-        if geo_class:
-            if geo_class.lower().strip() in upper_data:
-                return 'Upper'
-            elif geo_class.lower().strip() in lower_data:
-                return 'Lower'
+        zone_class = _zone_class(geo_class)
+        if zone_class:
+            return zone_class
+
+    return _zone_class(geo_class_recoded) or ''
 
-    geo_class_recoded = context.value_from_key(
-        'geo_class_recoded'
+
+def get_geomorphological_zone_class(location_site: LocationSite) -> str:
+    """
+    Get geomorphological zone class from the location site,
+        if it has the required data
+    :param location_site: Location site object
+    :return: Upper, Lower, or empty string
+    """
+    context = LocationContext.objects.filter(
+        site=location_site
     )
-    if geo_class_recoded:
-        if geo_class_recoded.lower().strip() in upper_data:
-            return 'Upper'
-        elif geo_class_recoded.lower().strip() in lower_data:
-            return 'Lower'
+    return _geomorphological_zone_class(
+        location_site,
+        context.value_from_key(layer_name='geomorphological zone'),
+        context.value_from_key('geo_class_recoded')
+    )
+
 
-    return ''
+def get_geomorphological_zone_classes(location_sites) -> dict:
+    """
+    Geomorphological zone classes of many sites, reading their location
+    context with two queries instead of two per site.
+    :param location_sites: iterable of location sites
+    :return: dict of site id to Upper, Lower, or empty string
+    """
+    location_sites = list(location_sites)
+    context = LocationContext.objects.filter(
+        site__in=[site.id for site in location_sites]
+    )
+    geo_classes = context.site_values_from_key(
+        layer_name='geomorphological zone')
+    geo_classes_recoded = context.site_values_from_key('geo_class_recoded')
+    return {
+        site.id: _geomorphological_zone_class(
+            site,
+            geo_classes.get(site.id, '-'),
+            geo_classes_recoded.get(site.id, '-')
+        ) for site in location_sites
+    }
@@ -1,26 +1,52 @@
 import logging
 import operator
 import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from typing import Optional, Iterable, List
 
 from django.conf import settings
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import Q
 from django.db.models.fields.related import ForeignObjectRel
+from django.utils import timezone
+from preferences import preferences
 
 from bims.cache import HARVESTING_GEOCONTEXT, set_cache
 from bims.models.spatial_scale import SpatialScale
 from bims.models.spatial_scale_group import SpatialScaleGroup
-from bims.models.location_site import LocationSite, generate_site_code
+from bims.models.location_site import (
+    LocationSite,
+    generate_site_code,
+    fetch_geocontext_group_data,
+    geocontext_service_group,
+    layer_context_group,
+)
 from bims.models.location_context import LocationContext
+from bims.models.geocontext_response import (
+    cache_point,
+    cache_precision,
+    cache_responses,
+    get_cached_responses,
+)
+from bims.utils.get_key import get_key
 from bims.utils.logger import log
+from bims.utils.uuid import is_uuid
 
 from bims.models.geocontext_setting import GeocontextSetting
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Sites harvested together, one spatial join or one round of requests
+GEOCONTEXT_HARVEST_BATCH_SIZE = getattr(
+    settings, 'GEOCONTEXT_HARVEST_BATCH_SIZE', 500)
+# Concurrent requests to the GeoContext API
+GEOCONTEXT_HARVEST_WORKERS = getattr(
+    settings, 'GEOCONTEXT_HARVEST_WORKERS', 8)
+GEOCONTEXT_HARVEST_RETRIES = getattr(
+    settings, 'GEOCONTEXT_HARVEST_RETRIES', 2)
+
 
 def array_to_dict(array, key_name='key'):
     dictionary = {}
@@ -140,6 +166,186 @@ def _init_file_logger() -> logging.Logger:
     return logger
 
 
+def save_context_values(group, values):
+    """
+    Insert or update the context values of a group.
+
+    :param group: the LocationContextGroup
+    :param values: dict of site id to value
+    """
+    if not values:
+        return
+    fetch_time = timezone.now()
+    existing = {}
+    duplicates = []
+    for context in LocationContext.objects.filter(
+            group=group, site_id__in=list(values)).order_by('id'):
+        if context.site_id in existing:
+            duplicates.append(context.id)
+        else:
+            existing[context.site_id] = context
+    to_update = []
+    to_create = []
+    for site_id, value in values.items():
+        context = existing.get(site_id)
+        if context:
+            context.value = value
+            context.fetch_time = fetch_time
+            to_update.append(context)
+        else:
+            to_create.append(LocationContext(
+                site_id=site_id,
+                group=group,
+                value=value,
+                fetch_time=fetch_time
+            ))
+    with transaction.atomic():
+        if duplicates:
+            LocationContext.objects.filter(id__in=duplicates).delete()
+        LocationContext.objects.bulk_update(
+            to_update, ['value', 'fetch_time'])
+        LocationContext.objects.bulk_create(to_create)
+
+
+def harvest_layer_context(site_ids, layer, context_key):
+    """
+    Harvest a field of a cloud native layer for many sites with a single
+    spatial join, instead of one feature query per site.
+
+    :return: ids of the sites a value was found for
+    """
+    table_name = f'{connection.schema_name}_gis.{layer.table_name}'
+    tolerance = preferences.GeocontextSetting.tolerance or 0
+    if tolerance > 0:
+        condition = (
+            'ST_DWithin(ST_Transform(l.geometry, 4326)::geography, '
+            's.geometry_point::geography, %s)'
+        )
+        params = [tolerance]
+    else:
+        condition = (
+            'ST_Intersects(l.geometry, '
+            'ST_Transform(s.geometry_point, ST_SRID(l.geometry)))'
+        )
+        params = []
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT DISTINCT ON (s.id) s.id, l."{context_key}"
+            FROM {LocationSite._meta.db_table} s
+            JOIN {table_name} l ON {condition}
+            WHERE s.id = ANY(%s)
+              AND l."{context_key}" IS NOT NULL
+            ORDER BY s.id,
+                ST_Distance(
+                    ST_Transform(l.geometry, 4326), s.geometry_point)
+        """, params + [list(site_ids)])
+        values = {
+            site_id: str(value) for site_id, value in cursor.fetchall()
+        }
+    save_context_values(layer_context_group(layer, context_key), values)
+    return set(values)
+
+
+def get_geocontext_responses(geocontext_url, group_key, coordinates):
+    """
+    Responses of a GeoContext group at many coordinates. Cached responses
+    are read in one query, the others are requested concurrently and
+    cached. Coordinates are expected to be rounded with cache_point when
+    the cache is enabled.
+
+    :return: dict of coordinate to response, None for failed requests
+    """
+    coordinates = list(coordinates)
+    responses = get_cached_responses(group_key, coordinates)
+    missing = [
+        coordinate for coordinate in coordinates
+        if coordinate not in responses
+    ]
+    if not missing:
+        return responses
+    with ThreadPoolExecutor(
+            max_workers=GEOCONTEXT_HARVEST_WORKERS) as executor:
+        fetched = dict(zip(missing, executor.map(
+            lambda coordinate: fetch_geocontext_group_data(
+                geocontext_url, group_key, coordinate[0], coordinate[1],
+                retries=GEOCONTEXT_HARVEST_RETRIES
+            ),
+            missing
+        )))
+    cache_responses(group_key, {
+        coordinate: response for coordinate, response in fetched.items()
+        if response is not None
+    })
+    responses.update(fetched)
+    return responses
+
+
+def harvest_remote_context(sites, group_key, group_cache=None):
+    """
+    Harvest a GeoContext group for many sites. Responses are requested
+    once per distinct (rounded) coordinate, see get_geocontext_responses,
+    and the results are saved in bulk.
+
+    :param sites: iterable of (site id, longitude, latitude)
+    :param group_cache: dict of the context groups already resolved,
+        shared between batches
+    :return: ids of the sites the group was harvested for
+    """
+    geocontext_url = get_key('GEOCONTEXT_URL')
+    if not geocontext_url:
+        return set()
+    if group_cache is None:
+        group_cache = {}
+
+    precision = cache_precision()
+    sites_by_coordinate = {}
+    for site_id, longitude, latitude in sites:
+        if not longitude and not latitude:
+            continue
+        sites_by_coordinate.setdefault(
+            cache_point(longitude, latitude, precision), []).append(site_id)
+
+    responses = get_geocontext_responses(
+        geocontext_url, group_key, sites_by_coordinate)
+
+    group_values = {}
+    harvested = set()
+    for coordinate, geocontext_data in responses.items():
+        try:
+            services = [
+                service for service in geocontext_data['services']
+                if 'value' in service
+            ]
+            for service in services:
+                if service['key'] not in group_cache:
+                    group_cache[service['key']] = geocontext_service_group(
+                        group_key, service, geocontext_data['key'])
+        except (KeyError, TypeError):
+            continue
+        site_ids = sites_by_coordinate[coordinate]
+        harvested.update(site_ids)
+        for service in services:
+            values = group_values.setdefault(
+                group_cache[service['key']], {})
+            for site_id in site_ids:
+                values[site_id] = service['value']
+
+    for group, values in group_values.items():
+        with transaction.atomic():
+            LocationContext.objects.filter(
+                group=group, site_id__in=list(values)
+            ).delete()
+            LocationContext.objects.bulk_create([
+                LocationContext(
+                    site_id=site_id,
+                    group=group,
+                    fetch_time=timezone.now(),
+                    value=str(value)
+                ) for site_id, value in values.items() if value is not None
+            ])
+    return harvested
+
+
 def get_location_context_data(
     *,
     group_keys: Optional[Iterable[str]] = None,
@@ -164,6 +370,11 @@ def get_location_context_data(
     should_generate_site_code
         When harvesting succeeds and a site is missing ``site_code``, generate
         one using :func:`bims.utils.site_code.generate_site_code`.
+
+    Sites are harvested in batches of ``GEOCONTEXT_HARVEST_BATCH_SIZE``.
+    Fields of local cloud native layers (``<layer uuid>:<field>`` keys) are
+    read with one spatial join per batch, GeoContext groups are requested
+    concurrently, once per distinct coordinate of the batch.
     """
     _init_file_logger()
     _log = logger.info
@@ -208,22 +419,66 @@ def get_location_context_data(
 
         _log("Harvesting context '%s' for %d site(s).", key, total)
 
-        for idx, site in enumerate(sites_for_group, start=1):
-            _log("[%s/%s] [SITE %s] Adding context '%s'", idx, total, site.id, key)
-            success, message = site.add_context_group(key)
-            status = "SUCCESS" if success else "FAILED"
-            _log("[%s] [SITE %s] [%s] %s", status, site.id, key, message)
+        layer = None
+        if identifier and is_uuid(key.split(':')[0]):
+            from cloud_native_gis.models import Layer
+            layer = Layer.objects.filter(unique_id=key.split(':')[0]).first()
+            if not layer:
+                _log("Layer of context '%s' not found – skipping.", key)
+                continue
 
-            if should_generate_site_code and not site.site_code:
-                scode, _ = generate_site_code(site, lat=site.latitude, lon=site.longitude)
-                site.site_code = scode
-                site.save(update_fields=["site_code"])
-                _log("Generated site code '%s' for site %s", scode, site.id)
+        group_cache = {}
+        site_values = sites_for_group.order_by('id').values_list(
+            'id', 'longitude', 'latitude'
+        )
+        batch = []
+        done = 0
+        for site in site_values.iterator():
+            batch.append(site)
+            if len(batch) < GEOCONTEXT_HARVEST_BATCH_SIZE:
+                continue
+            done += len(batch)
+            _harvest_batch(
+                batch, key, layer, identifier, group_cache,
+                should_generate_site_code)
+            _log("[%s/%s] Harvested context '%s'", done, total, key)
+            batch = []
+        if batch:
+            done += len(batch)
+            _harvest_batch(
+                batch, key, layer, identifier, group_cache,
+                should_generate_site_code)
+            _log("[%s/%s] Harvested context '%s'", done, total, key)
 
     set_cache(HARVESTING_GEOCONTEXT, False)
     _log("GeoContext harvesting completed.")
 
 
+def _harvest_batch(batch, key, layer, identifier, group_cache,
+                   should_generate_site_code):
+    site_ids = [site[0] for site in batch]
+    if layer:
+        harvested = harvest_layer_context(site_ids, layer, identifier)
+    else:
+        harvested = harvest_remote_context(batch, key, group_cache)
+    failed = [site_id for site_id in site_ids if site_id not in harvested]
+    if failed:
+        logger.info(
+            "[FAILED] [%s] No context found for site(s) %s",
+            key, ', '.join(str(site_id) for site_id in failed))
+
+    if should_generate_site_code:
+        for site in LocationSite.objects.filter(
+                id__in=site_ids).filter(
+                Q(site_code__isnull=True) | Q(site_code='')):
+            scode, _ = generate_site_code(
+                site, lat=site.latitude, lon=site.longitude)
+            site.site_code = scode
+            site.save(update_fields=["site_code"])
+            logger.info(
+                "Generated site code '%s' for site %s", scode, site.id)
+
+
 def merge_context_group(excluded_group=None, group_list=None):
     """
     Merge multiple location context groups
@@ -0,0 +1,97 @@
+"""
+Line-delimited JSON store with an offset index, used to keep large search
+result lists on disk so a page can be read without decoding the whole list.
+
+For a base path ``<path>`` and a key ``sites`` two files are written:
+
+- ``<path>.sites.jsonl``: one JSON document per line
+- ``<path>.sites.idx``: ``n + 1`` unsigned 64-bit byte offsets, where item
+  ``i`` spans ``offsets[i]:offsets[i + 1]`` of the data file
+"""
+import json
+import os
+import struct
+from array import array
+
+OFFSET_FORMAT = '<Q'
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+
+def result_data_path(path, key):
+    return '{path}.{key}.jsonl'.format(path=path, key=key)
+
+
+def result_index_path(path, key):
+    return '{path}.{key}.idx'.format(path=path, key=key)
+
+
+def write_results(path, key, items):
+    """
+    Write items as line-delimited JSON together with their offset index.
+    :param path: base path of the search result file
+    :param key: name of the result list, e.g. 'sites'
+    :param items: iterable of json serializable items
+    :return: number of items written
+    """
+    data_path = result_data_path(path, key)
+    index_path = result_index_path(path, key)
+    offsets = array('Q', [0])
+    position = 0
+    with open(data_path + '.tmp', 'wb') as data_file:
+        for item in items:
+            line = json.dumps(item).encode('utf-8') + b'\n'
+            data_file.write(line)
+            position += len(line)
+            offsets.append(position)
+    with open(index_path + '.tmp', 'wb') as index_file:
+        for offset in offsets:
+            index_file.write(struct.pack(OFFSET_FORMAT, offset))
+    # Index goes last so readers never see it ahead of its data
+    os.replace(data_path + '.tmp', data_path)
+    os.replace(index_path + '.tmp', index_path)
+    return len(offsets) - 1
+
+
+def count_results(path, key):
+    """
+    Number of items stored under key, or None when there is no store.
+    """
+    index_path = result_index_path(path, key)
+    if not os.path.exists(index_path):
+        return None
+    return max(os.path.getsize(index_path) // OFFSET_SIZE - 1, 0)
+
+
+def read_results(path, key, offset, limit):
+    """
+    Read a slice of stored items, touching only the bytes of that slice.
+    :param path: base path of the search result file
+    :param key: name of the result list
+    :param offset: index of the first item
+    :param limit: maximum number of items
+    :return: list of items, or None when there is no store
+    """
+    total = count_results(path, key)
+    if total is None:
+        return None
+    offset = max(offset, 0)
+    end = min(offset + limit, total)
+    if offset >= end:
+        return []
+    with open(result_index_path(path, key), 'rb') as index_file:
+        index_file.seek(offset * OFFSET_SIZE)
+        raw_offsets = index_file.read((end - offset + 1) * OFFSET_SIZE)
+    offsets = [
+        value[0] for value in struct.iter_unpack(OFFSET_FORMAT, raw_offsets)
+    ]
+    with open(result_data_path(path, key), 'rb') as data_file:
+        data_file.seek(offsets[0])
+        chunk = data_file.read(offsets[-1] - offsets[0])
+    return [json.loads(line) for line in chunk.split(b'\n') if line]
+
+
+def remove_results(path, key):
+    for file_path in (
+            result_data_path(path, key), result_index_path(path, key)):
+        if os.path.exists(file_path):
+            os.remove(file_path)
@@ -0,0 +1,219 @@
+# coding=utf-8
+"""In-memory spatial index of location sites for imports.
+
+Importers resolve the site of every row they read. Instead of one spatial
+query per row, the sites around the imported points are loaded into a grid
+of cells once, nearest-within-tolerance lookups are answered from memory,
+and the sites created during the import are added to the grid so later
+rows reuse them.
+"""
+import math
+from collections import defaultdict, namedtuple
+
+from django.contrib.gis.geos import Polygon
+
+from bims.models.location_site import LocationSite
+
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+# Width of a grid cell in degrees, about 11 km at the equator
+DEFAULT_CELL_SIZE = 0.1
+
+IndexedSite = namedtuple(
+    'IndexedSite', ['id', 'longitude', 'latitude', 'key'])
+
+
+def distance_in_meters(lon1, lat1, lon2, lat2):
+    """Great-circle (haversine) distance between two points."""
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def tolerance_in_degrees(latitude, tolerance_m):
+    """Degrees covering a distance on both axes at a latitude."""
+    if not tolerance_m or tolerance_m <= 0:
+        return 0.0
+    return tolerance_m / (
+        METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+    )
+
+
+def _normalise(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value.strip().lower()
+    return value
+
+
+class SiteResolver(object):
+    """
+    Grid of location site points answering nearest-site lookups.
+
+    Sites are loaded lazily, one query per area not seen yet, or upfront
+    for the bounding box of a batch with :meth:`preload`. When key fields
+    are given, only sites with the same (case-insensitive) values of those
+    fields match a lookup, e.g. the ecosystem type of a CSV row.
+    """
+
+    def __init__(self, queryset=None, key_fields=(),
+                 cell_size=DEFAULT_CELL_SIZE):
+        if queryset is None:
+            queryset = LocationSite.objects.all()
+        self.queryset = queryset.filter(geometry_point__isnull=False)
+        self.key_fields = tuple(key_fields)
+        self.cell_size = cell_size
+        self.cells = defaultdict(dict)
+        self.sites = {}
+        self.loaded_cells = set()
+        self.loaded_bounds = []
+
+    def make_key(self, *values):
+        return tuple(_normalise(value) for value in values)
+
+    def _cell(self, longitude, latitude):
+        return (
+            int(math.floor(longitude / self.cell_size)),
+            int(math.floor(latitude / self.cell_size))
+        )
+
+    def _cells_around(self, longitude, latitude, tolerance_m):
+        degrees = tolerance_in_degrees(latitude, tolerance_m)
+        min_x, min_y = self._cell(longitude - degrees, latitude - degrees)
+        max_x, max_y = self._cell(longitude + degrees, latitude + degrees)
+        return [
+            (x, y)
+            for x in range(min_x, max_x + 1)
+            for y in range(min_y, max_y + 1)
+        ]
+
+    def _is_loaded(self, cell):
+        if cell in self.loaded_cells:
+            return True
+        min_lon = cell[0] * self.cell_size
+        min_lat = cell[1] * self.cell_size
+        return any(
+            bounds[0] <= min_lon and
+            bounds[1] <= min_lat and
+            min_lon + self.cell_size <= bounds[2] and
+            min_lat + self.cell_size <= bounds[3]
+            for bounds in self.loaded_bounds
+        )
+
+    def _load(self, min_lon, min_lat, max_lon, max_lat):
+        bbox = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+        bbox.srid = 4326
+        values = self.queryset.filter(
+            geometry_point__bboxoverlaps=bbox
+        ).values_list('id', 'geometry_point', *self.key_fields)
+        for site_id, point, *key_values in values.iterator():
+            if site_id not in self.sites:
+                self._index(
+                    site_id, point.x, point.y, self.make_key(*key_values))
+
+    def _ensure_loaded(self, cells):
+        missing = [cell for cell in cells if not self._is_loaded(cell)]
+        if not missing:
+            return
+        self._load(
+            min(cell[0] for cell in missing) * self.cell_size,
+            min(cell[1] for cell in missing) * self.cell_size,
+            (max(cell[0] for cell in missing) + 1) * self.cell_size,
+            (max(cell[1] for cell in missing) + 1) * self.cell_size,
+        )
+        self.loaded_cells.update(missing)
+
+    def _index(self, site_id, longitude, latitude, key):
+        site = IndexedSite(site_id, longitude, latitude, key)
+        self.sites[site_id] = site
+        self.cells[self._cell(longitude, latitude)][site_id] = site
+        return site
+
+    def preload(self, points, tolerance_m=0):
+        """
+        Load every site that can match the given points with one query.
+
+        :param points: iterable of (longitude, latitude)
+        :param tolerance_m: largest tolerance the points will be looked up
+            with
+        """
+        points = list(points)
+        if not points:
+            return
+        degrees = max(
+            tolerance_in_degrees(latitude, tolerance_m)
+            for _, latitude in points
+        )
+        # Whole cells, so the loaded area is found again by _is_loaded
+        min_x, min_y = self._cell(
+            min(p[0] for p in points) - degrees,
+            min(p[1] for p in points) - degrees)
+        max_x, max_y = self._cell(
+            max(p[0] for p in points) + degrees,
+            max(p[1] for p in points) + degrees)
+        bounds = (
+            min_x * self.cell_size,
+            min_y * self.cell_size,
+            (max_x + 1) * self.cell_size,
+            (max_y + 1) * self.cell_size,
+        )
+        self._load(*bounds)
+        self.loaded_bounds.append(bounds)
+
+    def candidates(self, longitude, latitude, tolerance_m=0, key=None):
+        """
+        Sites within the tolerance of a point, nearest (then lowest id)
+        first, as (distance in meters, IndexedSite) tuples. Without
+        tolerance only sites at exactly the same location match.
+        """
+        cells = self._cells_around(longitude, latitude, tolerance_m)
+        self._ensure_loaded(cells)
+        if key is not None:
+            key = self.make_key(*key)
+        matches = []
+        for cell in cells:
+            for site in self.cells.get(cell, {}).values():
+                if key is not None and site.key != key:
+                    continue
+                if not tolerance_m or tolerance_m <= 0:
+                    if (
+                            site.longitude == longitude and
+                            site.latitude == latitude
+                    ):
+                        matches.append((0.0, site))
+                    continue
+                distance = distance_in_meters(
+                    longitude, latitude, site.longitude, site.latitude)
+                if distance <= tolerance_m:
+                    matches.append((distance, site))
+        matches.sort(key=lambda match: (match[0], match[1].id))
+        return matches
+
+    def find(self, longitude, latitude, tolerance_m=0, key=None):
+        """Id of the nearest site within the tolerance, or None."""
+        matches = self.candidates(longitude, latitude, tolerance_m, key)
+        return matches[0][1].id if matches else None
+
+    def add(self, site):
+        """Index a site created or moved during the import."""
+        self.discard(site.id)
+        if not site.geometry_point:
+            return
+        return self._index(
+            site.id,
+            site.geometry_point.x,
+            site.geometry_point.y,
+            self.make_key(*[
+                getattr(site, field) for field in self.key_fields])
+        )
+
+    def discard(self, site_id):
+        site = self.sites.pop(site_id, None)
+        if site:
+            self.cells[self._cell(site.longitude, site.latitude)].pop(
+                site_id, None)
@@ -0,0 +1,63 @@
+# coding=utf-8
+"""In-memory resolution of uploaded taxon names.
+
+Uploads look up the taxon of every row by name in the taxa of the module
+group. The taxa of the group are loaded once into dictionaries keyed by
+rank and upper-cased name, and each distinct (name, rank) is resolved in
+memory with the same rules as the database lookup it replaces:
+
+    Q(canonical_name__iexact=name) | Q(legacy_canonical_name__icontains=name)
+
+restricted to the rank, taking an ACCEPTED taxon first and any other
+status (e.g. synonyms) otherwise.
+"""
+from collections import defaultdict
+
+from bims.models.taxonomy import Taxonomy
+
+ACCEPTED_STATUS = 'ACCEPTED'
+
+
+class TaxonNameResolver(object):
+    """Names of the taxa of a module group, resolved to taxonomy ids."""
+
+    def __init__(self, taxon_group):
+        self.taxon_group = taxon_group
+        self.accepted_names = defaultdict(set)
+        self.other_names = defaultdict(set)
+        self.legacy_names = defaultdict(list)
+        self.resolved = {}
+        self._load()
+
+    def _load(self):
+        taxa = Taxonomy.objects.filter(
+            taxongroup=self.taxon_group
+        ).values_list(
+            'id', 'canonical_name', 'legacy_canonical_name', 'rank',
+            'taxonomic_status'
+        ).distinct()
+        for taxonomy_id, canonical_name, legacy_name, rank, status in taxa:
+            accepted = status == ACCEPTED_STATUS
+            if canonical_name:
+                names = self.accepted_names if accepted else self.other_names
+                names[(rank, canonical_name.upper())].add(taxonomy_id)
+            if legacy_name:
+                self.legacy_names[rank].append(
+                    (legacy_name.upper(), taxonomy_id, accepted))
+
+    def resolve(self, name, rank):
+        """
+        Id of the taxon matching a name at a rank, None when not found.
+        Among several matches the lowest id is returned.
+        """
+        key = (rank, (name or '').upper())
+        if key not in self.resolved:
+            accepted = set(self.accepted_names.get(key, ()))
+            others = set(self.other_names.get(key, ()))
+            for legacy_name, taxonomy_id, is_accepted in (
+                    self.legacy_names.get(rank, ())):
+                if key[1] in legacy_name:
+                    (accepted if is_accepted else others).add(taxonomy_id)
+            matches = accepted or others
+            self.resolved[key] = min(matches) if matches else None
+        return self.resolved[key]
@@ -0,0 +1,126 @@
+# coding=utf-8
+"""Bulk maintenance of the rank names stored in Taxonomy.hierarchical_data.
+
+Taxa are loaded in batches together with their ancestors and accepted
+taxa, linked in memory, and their names are written back with
+bulk_update, so refreshing does not save (or query) taxon by taxon.
+"""
+import logging
+
+from django.db.models import Q
+
+from bims.models.taxonomy import Taxonomy
+
+logger = logging.getLogger('bims')
+
+TAXONOMY_TREE_FIELDS = (
+    'id',
+    'parent',
+    'accepted_taxonomy',
+    'rank',
+    'canonical_name',
+    'taxonomic_status',
+    'hierarchical_data',
+)
+
+# Above this number of affected taxa, refreshing is left to a celery task
+INLINE_REFRESH_LIMIT = 500
+
+
+def load_taxonomy_tree(taxonomy_ids):
+    """
+    Load taxa with all their ancestors and accepted taxa (and theirs),
+    with parent and accepted_taxonomy linked in memory.
+    Returns a dictionary of taxa keyed by id.
+    """
+    taxa = {}
+    pending = set(taxonomy_ids)
+    while pending:
+        # Taxa missing from the closure table are loaded without ancestors
+        loaded = list(Taxonomy.objects.filter(
+            Q(descendant_links__descendant_id__in=pending) |
+            Q(id__in=pending)
+        ).only(*TAXONOMY_TREE_FIELDS).distinct())
+        for taxon in loaded:
+            taxa[taxon.id] = taxon
+        pending = set(
+            taxon.accepted_taxonomy_id for taxon in loaded
+            if taxon.accepted_taxonomy_id and
+            taxon.accepted_taxonomy_id not in taxa
+        )
+
+    parent_field = Taxonomy._meta.get_field('parent')
+    accepted_field = Taxonomy._meta.get_field('accepted_taxonomy')
+    for taxon in taxa.values():
+        if taxon.parent_id in taxa:
+            parent_field.set_cached_value(taxon, taxa[taxon.parent_id])
+        if taxon.accepted_taxonomy_id in taxa:
+            accepted_field.set_cached_value(
+                taxon, taxa[taxon.accepted_taxonomy_id])
+    return taxa
+
+
+def refresh_rank_names(taxonomy_ids=None, batch_size=1000):
+    """
+    Recompute the rank names stored on the given taxa, or on every taxon.
+    Returns the number of taxa whose names changed.
+    """
+    taxonomy_ids_qs = Taxonomy.objects.order_by('id').values_list(
+        'id', flat=True)
+    if taxonomy_ids is not None:
+        taxonomy_ids_qs = taxonomy_ids_qs.filter(id__in=taxonomy_ids)
+    all_ids = list(taxonomy_ids_qs)
+
+    updated = 0
+    for start in range(0, len(all_ids), batch_size):
+        batch_ids = all_ids[start:start + batch_size]
+        taxa = load_taxonomy_tree(batch_ids)
+        changed = []
+        for taxonomy_id in batch_ids:
+            taxon = taxa.get(taxonomy_id)
+            if not taxon:
+                continue
+            hierarchical_data = (
+                taxon.hierarchical_data
+                if isinstance(taxon.hierarchical_data, dict) else {}
+            )
+            refreshed = dict(
+                hierarchical_data, **taxon.compute_hierarchical_data())
+            if refreshed != taxon.hierarchical_data:
+                taxon.hierarchical_data = refreshed
+                changed.append(taxon)
+        if changed:
+            Taxonomy.objects.bulk_update(
+                changed, ['hierarchical_data'], batch_size=batch_size)
+            updated += len(changed)
+        logger.info(
+            'Rank names refreshed for %s/%s taxa',
+            min(start + batch_size, len(all_ids)), len(all_ids))
+    return updated
+
+
+def descendant_taxonomy_ids(taxonomy_id):
+    """Ids of the taxa below a taxon, and of the synonyms of all of them."""
+    subtree = Taxonomy.objects.filter(
+        ancestor_links__ancestor_id=taxonomy_id
+    ).values('id')
+    return list(
+        Taxonomy.objects.filter(
+            Q(id__in=subtree) | Q(accepted_taxonomy_id__in=subtree)
+        ).exclude(id=taxonomy_id).values_list('id', flat=True)
+    )
+
+
+def refresh_descendant_rank_names(taxonomy_id):
+    """
+    Refresh the names stored below a taxon after it was renamed or moved,
+    in a celery task when the subtree is large.
+    """
+    taxonomy_ids = descendant_taxonomy_ids(taxonomy_id)
+    if not taxonomy_ids:
+        return
+    if len(taxonomy_ids) > INLINE_REFRESH_LIMIT:
+        from bims.tasks.taxa import refresh_taxonomy_rank_names
+        refresh_taxonomy_rank_names.delay(taxonomy_ids)
+        return
+    refresh_rank_names(taxonomy_ids)
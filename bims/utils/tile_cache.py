@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Cache of map tiles, from the map proxy and the site vector tiles.
+
+Tiles are cached by normalized URL and by the data versions of sites and
+occurrences, so tiles of the site layers are drawn again once the data
+they show changes. The proxy only serves the hosts of
+PROXY_ALLOWED_HOSTS. Tiles drawing a search view are also tagged with the
+view name and dropped with the view.
+"""
+import hashlib
+import re
+import urllib.parse
+
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from bims.conf import PROXY_CACHE_ALIAS, PROXY_CACHE_SECONDS
+from bims.models.data_version import SITE_VERSION_KEY, data_version_hash
+from bims.models.search_view import SEARCH_VIEW_PREFIX
+
+SEARCH_VIEW_NAME = re.compile(re.escape(SEARCH_VIEW_PREFIX) + r'[0-9a-f]+')
+
+
+def tile_cache():
+    return caches[PROXY_CACHE_ALIAS]
+
+
+def normalize_url(url):
+    """
+    URL with a lower case scheme, host and parameter names and sorted
+    parameters, so the same tile requested differently has one key.
+    """
+    parts = urllib.parse.urlsplit(url)
+    parameters = sorted(
+        (key.lower(), value) for key, value in urllib.parse.parse_qsl(
+            parts.query, keep_blank_values=True)
+    )
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urllib.parse.urlencode(parameters),
+        ''
+    ))
+
+
+def tile_cache_key(url):
+    return 'tile:{}'.format(hashlib.sha256('{version}:{url}'.format(
+        version=data_version_hash([SITE_VERSION_KEY], True),
+        url=normalize_url(url)
+    ).encode('utf-8')).hexdigest())
+
+
+def _search_view_tag(view_name):
+    return 'tile-tag:{}'.format(view_name)
+
+
+def get_tile(key):
+    return tile_cache().get(key)
+
+
+def set_tile(key, url, tile):
+    """
+    Cache a tile, tagged with the search views its URL refers to.
+    :param tile: dict of content, content_type and etag
+    """
+    cache = tile_cache()
+    cache.set(key, tile, PROXY_CACHE_SECONDS)
+    for view_name in set(SEARCH_VIEW_NAME.findall(url)):
+        tag = _search_view_tag(view_name)
+        keys = cache.get(tag, set())
+        keys.add(key)
+        cache.set(tag, keys, PROXY_CACHE_SECONDS)
+
+
+def new_tile(content, content_type):
+    """Tile of a response body, with an ETag of the body."""
+    return {
+        'content': content,
+        'content_type': content_type,
+        'etag': '"{}"'.format(hashlib.sha1(content).hexdigest())
+    }
+
+
+def tile_response(request, tile):
+    """Response of a tile, or 304 when the client has it already."""
+    if tile['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            tile['content'],
+            content_type=tile['content_type']
+        )
+    response['ETag'] = tile['etag']
+    # Browsers revalidate with the ETag, so changed tiles show at once
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def invalidate_search_view_tiles(view_name):
+    """Drop the cached tiles drawing a search view."""
+    cache = tile_cache()
+    tag = _search_view_tag(view_name)
+    keys = cache.get(tag, set())
+    cache.delete_many(list(keys) + [tag])
@@ -9,6 +9,10 @@ from django.apps import apps
 from django.views.decorators.http import require_http_methods
 
 from bims.models import SpeciesGroup
+from bims.models.biological_collection_record import (
+    BiologicalCollectionRecord
+)
+from bims.models.data_version import SITE_VERSION_KEY, TAXONOMY_VERSION_KEY
 from bims.models.taxonomy import Taxonomy
 from bims.models.location_site import LocationSite
 from bims.models.data_source import DataSource
@@ -16,54 +20,79 @@ from bims.models.taxon_group import TaxonGroup
 from sass.models.river import River
 from bims.enums import TaxonomicRank
 from sass.enums.chem_unit import ChemUnit
+from bims.utils.autocomplete import (
+    SuggestionBudget,
+    cached_suggestions,
+    distinct_rows,
+    rank_suggestions
+)
 
 MAX_SPATIAL_DATA_VALUES = 100
+MAX_SUGGESTIONS = 50
 
 
 def autocomplete(request):
     # Search from taxon name
     q = request.GET.get('q', '')
     source_collection = request.GET.get('source_collection', [])
-    taxonomy_additional_filters = {}
-    vernacular_additional_filters = {}
-    site_additional_filters = {}
-    river_additional_filters = {}
     site = Site.objects.get_current()
-    taxa = Taxonomy.objects.filter(
-        taxongroup__site=site
-    )
 
     if source_collection:
         source_collection = json.loads(source_collection)
-        taxonomy_additional_filters[
-            'biologicalcollectionrecord__source_collection__in'
-        ] = source_collection
-        vernacular_additional_filters[
-            'taxonomy__biologicalcollectionrecord__source_collection__in'
-        ] = source_collection
-        site_additional_filters[
-            'biological_collection_record__source_collection__in'
-        ] = source_collection
-        river_additional_filters[
-            'locationsite__biological_collection_record__source_collection__in'
-        ] = source_collection
 
     if len(q) < 3:
         return HttpResponse([])
 
+    suggestions = cached_suggestions(
+        'search',
+        q,
+        {'site': site.id, 'source_collection': source_collection},
+        [TAXONOMY_VERSION_KEY, SITE_VERSION_KEY],
+        lambda budget: _search_suggestions(
+            budget, q, site, source_collection)
+    )
+
+    the_data = json.dumps({
+        'results': suggestions
+    })
+    return HttpResponse(the_data, content_type='application/json')
+
+
+def _search_suggestions(budget, q, site, source_collection):
+    validated_records = BiologicalCollectionRecord.objects.filter(
+        validated=True
+    )
+    sites = LocationSite.objects.filter(
+        site_code__icontains=q,
+        site_code__isnull=False
+    )
+    if source_collection:
+        validated_records = validated_records.filter(
+            source_collection__in=source_collection
+        )
+        sites = distinct_rows(sites.filter(
+            biological_collection_record__source_collection__in=(
+                source_collection
+            )
+        ))
+    taxa = Taxonomy.objects.filter(
+        taxongroup__site=site,
+        canonical_name__icontains=q
+    )
+
     # Collection name
-    suggestions = list(
-        taxa.filter(
-            canonical_name__icontains=q,
-            biologicalcollectionrecord__validated=True,
-            **taxonomy_additional_filters
-        ).distinct('id').
-        annotate(
+    suggestions = budget.fetch(
+        rank_suggestions(
+            distinct_rows(taxa.filter(
+                id__in=validated_records.values('taxonomy_id')
+            )),
+            'canonical_name',
+            q
+        ).annotate(
             taxon_id=F('id'),
             suggested_name=F('canonical_name'),
             source=Value('Taxonomic Rank: Taxon', CharField())
-        ).
-        values('taxon_id', 'suggested_name', 'source')[:10]
+        ).values('taxon_id', 'suggested_name', 'source')[:10]
     )
 
     # Taxonomy with rank
@@ -74,25 +103,26 @@ def autocomplete(request):
         TaxonomicRank.FAMILY.name,
         TaxonomicRank.SUPERFAMILY.name,
     ]
-    taxonomy_suggestions = taxa.filter(
-        canonical_name__icontains=q,
-        rank__in=taxonomic_ranks,
-    ).distinct('canonical_name').annotate(
-        taxon_id=F('id'),
-        suggested_name=F('canonical_name'),
-        source=Concat(Value('Taxonomy Rank : '), 'rank')
-    ).values('taxon_id', 'suggested_name', 'source')[:10]
-    suggestions.extend(list(taxonomy_suggestions))
+    suggestions.extend(budget.fetch(
+        rank_suggestions(
+            Taxonomy.objects.filter(pk__in=taxa.filter(
+                rank__in=taxonomic_ranks,
+            ).distinct('canonical_name').values('pk')),
+            'canonical_name',
+            q
+        ).annotate(
+            taxon_id=F('id'),
+            suggested_name=F('canonical_name'),
+            source=Concat(Value('Taxonomy Rank : '), 'rank')
+        ).values('taxon_id', 'suggested_name', 'source')[:10]
+    ))
 
     if len(suggestions) < 10:
-        sites = list(
-            LocationSite.objects.filter(
-                site_code__icontains=q,
-                site_code__isnull=False,
-                **site_additional_filters
-            ).distinct('id').
-            annotate(site_id=F('id'), suggested_name=F('site_code')).
-            values('site_id', 'suggested_name')[:10]
+        sites = budget.fetch(
+            rank_suggestions(sites, 'site_code', q).annotate(
+                site_id=F('id'),
+                suggested_name=F('site_code')
+            ).values('site_id', 'suggested_name')[:10]
         )
         for site in sites:
             site['source'] = 'site code'
@@ -100,18 +130,21 @@ def autocomplete(request):
 
     river_list = []
     if len(suggestions) < 10:
-        original_rivers = list(
-            LocationSite.objects.filter(
-                legacy_river_name__icontains=q,
-                biological_collection_record__validated=True,
-                **site_additional_filters
-            ).distinct('legacy_river_name').annotate(
+        original_rivers = budget.fetch(
+            rank_suggestions(
+                LocationSite.objects.filter(
+                    legacy_river_name__icontains=q,
+                    id__in=validated_records.values('site_id')
+                ).values('legacy_river_name'),
+                'legacy_river_name',
+                q
+            ).annotate(
                 suggested_name=F('legacy_river_name'),
                 source=Value('river name', output_field=CharField())
             ).values(
                 'suggested_name',
                 'source'
-            )[:10]
+            ).distinct()[:10]
         )
         suggestions.extend(original_rivers)
         river_list = [
@@ -119,27 +152,25 @@ def autocomplete(request):
         ]
 
     if len(suggestions) < 10:
-        rivers = list(
-            River.objects.filter(
-                name__icontains=q,
-                locationsite__biological_collection_record__isnull=False,
-                locationsite__biological_collection_record__validated=True,
-                **river_additional_filters
-            ).distinct('id').
-            annotate(river_id=F('id'), suggested_name=F('name')).
-            values('river_id', 'suggested_name')[:10]
+        rivers = budget.fetch(
+            rank_suggestions(
+                distinct_rows(River.objects.filter(
+                    name__icontains=q,
+                    locationsite__id__in=validated_records.values('site_id')
+                )),
+                'name',
+                q
+            ).annotate(
+                river_id=F('id'),
+                suggested_name=F('name')
+            ).values('river_id', 'suggested_name')[:10]
         )
         for river in rivers:
-            if river['suggested_name'].lower() in river_list:
-                rivers.remove(river)
-            else:
+            if river['suggested_name'].lower() not in river_list:
                 river['source'] = 'river name'
-        suggestions.extend(rivers)
+                suggestions.append(river)
 
-    the_data = json.dumps({
-        'results': suggestions
-    })
-    return HttpResponse(the_data, content_type='application/json')
+    return suggestions
 
 
 def user_autocomplete(request):
@@ -182,17 +213,20 @@ def user_autocomplete(request):
 
 def author_autocomplete(request):
     q = request.GET.get('term', '').capitalize()
-    data = []
     if not is_ajax(request) and len(q) < 2:
         data = 'fail'
-    taxa = Taxonomy.objects.filter(
-        author__icontains=q
-    ).distinct('author')
-    if taxa.exists():
-        for taxon in taxa:
-            data.append({
-                'author': taxon.author
-            })
+    else:
+        authors = rank_suggestions(
+            Taxonomy.objects.filter(
+                author__icontains=q
+            ).values('author'),
+            'author',
+            q
+        ).values('author').distinct()[:MAX_SUGGESTIONS]
+        data = [
+            {'author': taxon['author']}
+            for taxon in SuggestionBudget().fetch(authors)
+        ]
     data = json.dumps(data)
     return HttpResponse(data, 'application/json')
 
@@ -205,9 +239,13 @@ def is_ajax(request):
 @login_required
 def species_group_autocomplete(request):
     q = request.GET.get('term', '').capitalize()
-    species_groups = SpeciesGroup.objects.filter(
-        name__icontains=q
-    )
+    species_groups = SuggestionBudget().fetch(rank_suggestions(
+        SpeciesGroup.objects.filter(
+            name__icontains=q
+        ),
+        'name',
+        q
+    )[:MAX_SUGGESTIONS])
     data = []
     for species_group in species_groups:
         data.append({
@@ -281,15 +319,22 @@ def species_autocomplete(request):
                   taxon_group_species)
             ).exclude(
                 id__in=exclude_list
-            ).distinct('canonical_name')
+            )
         else:
             taxa_list = taxa_list.filter(
                 **optional_query
             ).exclude(
                 id__in=exclude_list
-            ).distinct('canonical_name')
+            )
+        taxa_list = rank_suggestions(
+            Taxonomy.objects.filter(
+                pk__in=taxa_list.distinct('canonical_name').values('pk')
+            ),
+            'canonical_name',
+            q
+        )[:MAX_SUGGESTIONS]
         results = []
-        for r in taxa_list:
+        for r in SuggestionBudget().fetch(taxa_list):
             results.append({
                 'id': r.id,
                 'species': r.canonical_name,
@@ -304,10 +349,13 @@ def site_autocomplete(request):
     q = request.GET.get('q', '').capitalize()
     data = {}
     if len(q) > 2:
-        search_qs = LocationSite.objects.filter(
-            name__icontains=q)
+        search_qs = rank_suggestions(
+            LocationSite.objects.filter(name__icontains=q),
+            'name',
+            q
+        )[:MAX_SUGGESTIONS]
         results = []
-        for r in search_qs:
+        for r in SuggestionBudget().fetch(search_qs):
             results.append({
                 'value': r.id,
                 'text': r.name,
@@ -17,6 +17,7 @@ from bims.models.location_site import (
     location_site_post_save_handler
 )
 from bims.models.location_type import LocationType
+from bims.models.occurrence_rollup import refresh_occurrence_rollups
 from bims.utils.get_key import get_key
 from bims.permissions.api_permission import AllowedTaxon
 from bims.serializers.reference_serializer import ReferenceSerializer
@@ -152,6 +153,9 @@ class BioRecordsUpdateView(LoginRequiredMixin, UpdateView):
                     BiologicalCollectionRecord.objects.filter(
                         site__in=dupe_sites
                     ).update(site=location_site)
+                    # Bulk updates skip the post_save rebuild of the rollups
+                    refresh_occurrence_rollups(
+                        *dupe_sites.values_list('id', flat=True))
                     dupe_sites.exclude(id=location_site.id).delete()
 
             self.object.site = location_site
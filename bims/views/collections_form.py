@@ -4,7 +4,6 @@ import time
 from datetime import datetime
 
 from django.contrib.sites.models import Site
-from django_tenants.utils import get_tenant
 from preferences import preferences
 
 from bims.models.source_reference import SourceReference
@@ -40,6 +39,7 @@ from bims.models import (
     SamplingEffortMeasure
 )
 from bims.enums.taxonomic_rank import TaxonomicRank
+from bims.models.occurrence_rollup import refresh_occurrence_rollups
 from bims.views.mixin.session_form.mixin import SessionFormMixin
 from bims.models.algae_data import AlgaeData
 from bims.models.record_type import RecordType
@@ -47,7 +47,6 @@ from bims.serializers.abundance_type import AbundanceTypeSerializer
 from bims.serializers.sampling_effort_measure import (
     SamplingEffortMeasureSerializer
 )
-from bims.utils.search_process import clear_finished_search_in_background
 
 logger = logging.getLogger('bims')
 
@@ -354,6 +353,8 @@ def add_survey_occurrences(self, post_data, site_images=None) -> Survey:
     ).update(
         end_embargo_date=end_embargo_date
     )
+    # Bulk updates skip the post_save rebuild of the rollups
+    refresh_occurrence_rollups(self.location_site.id)
 
     return self.survey
 
@@ -629,8 +630,6 @@ class CollectionFormView(TemplateView, SessionFormMixin):
 
         self.extra_post(request.POST)
 
-        clear_finished_search_in_background(get_tenant(request))
-
         return HttpResponseRedirect(redirect_url)
 
 
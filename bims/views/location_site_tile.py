@@ -0,0 +1,145 @@
+# coding=utf-8
+"""Mapbox vector tiles of location sites.
+
+Tiles of every site, or of the sites of a search view, drawn by PostGIS.
+Below SITE_TILE_CLUSTER_MAX_ZOOM the sites of each grid cell are merged
+into one point with the number of sites, so tiles of large areas stay
+small. Tiles are cached with the map proxy tiles.
+"""
+from django.db import connection
+from django.http import Http404
+from django.views.decorators.http import require_GET
+
+from bims.conf import SITE_TILE_CLUSTER_CELLS, SITE_TILE_CLUSTER_MAX_ZOOM
+from bims.models.location_site import LocationSite
+from bims.models.search_view import is_search_view
+from bims.utils.tile_cache import (
+    get_tile,
+    new_tile,
+    set_tile,
+    tile_cache_key,
+    tile_response
+)
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+MVT_LAYER = 'sites'
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+MAX_ZOOM = 22
+
+# Width of the web mercator world in metres
+WORLD_WIDTH = 40075016.68557849
+
+TILE_ENVELOPE = 'ST_TileEnvelope(%(z)s, %(x)s, %(y)s)'
+
+# Sites in the tile and its buffer, found with the geometry_point index
+SOURCE_FILTER = (
+    'source.geometry_point && ST_Transform('
+    'ST_TileEnvelope(%(z)s, %(x)s, %(y)s, margin => %(margin)s), 4326)'
+)
+
+SITES_SQL = """
+    SELECT
+        ST_AsMVTGeom(
+            ST_Transform(source.geometry_point, 3857),
+            {envelope}, %(extent)s, %(buffer)s, true
+        ) AS geom,
+        source.site_id,
+        source.name,
+        source.ecosystem_type,
+        1 AS count
+    FROM ({source}) source
+    WHERE {filter}
+"""
+
+CLUSTERS_SQL = """
+    SELECT
+        ST_AsMVTGeom(
+            ST_Centroid(ST_Collect(site.geom)),
+            {envelope}, %(extent)s, %(buffer)s, true
+        ) AS geom,
+        MIN(site.site_id) AS site_id,
+        COUNT(*) AS count
+    FROM (
+        SELECT
+            source.site_id,
+            ST_Transform(source.geometry_point, 3857) AS geom
+        FROM ({source}) source
+        WHERE {filter}
+    ) site
+    GROUP BY ST_SnapToGrid(
+        site.geom, %(origin)s, %(origin)s, %(cell)s, %(cell)s)
+"""
+
+TILE_SQL = """
+    SELECT ST_AsMVT(tile, %(layer)s, %(extent)s, 'geom')
+    FROM ({features}) tile
+    WHERE tile.geom IS NOT NULL
+"""
+
+
+def site_tile(z, x, y, view_name=''):
+    """
+    Vector tile of the sites.
+    :param view_name: name of a search view, every site when empty
+    :return: tile bytes
+    """
+    quote = connection.ops.quote_name
+    if view_name:
+        source = (
+            'SELECT site_id, geometry_point, name, ecosystem_type '
+            'FROM {view}'.format(view=quote(view_name))
+        )
+    else:
+        source = (
+            'SELECT id AS site_id, geometry_point, name, ecosystem_type '
+            'FROM {table}'.format(
+                table=quote(LocationSite._meta.db_table))
+        )
+    features = SITES_SQL if z >= SITE_TILE_CLUSTER_MAX_ZOOM else CLUSTERS_SQL
+    sql = TILE_SQL.format(features=features.format(
+        envelope=TILE_ENVELOPE,
+        source=source,
+        filter=SOURCE_FILTER
+    ))
+    # Sites snap to the centre of their grid cell. Cells divide the tiles
+    # evenly, so the sites of a cluster are all on the same tile.
+    cell = WORLD_WIDTH / 2 ** z / SITE_TILE_CLUSTER_CELLS
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'z': z,
+            'x': x,
+            'y': y,
+            'layer': MVT_LAYER,
+            'extent': MVT_EXTENT,
+            'buffer': MVT_BUFFER,
+            'margin': MVT_BUFFER / MVT_EXTENT,
+            'cell': cell,
+            'origin': cell / 2,
+        })
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+@require_GET
+def location_site_tile(request, z, x, y):
+    """
+    Vector tile of the location sites, of the search view given with the
+    view parameter (the sites_raw_query of a search) when there is one.
+    """
+    z, x, y = int(z), int(x), int(y)
+    if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        raise Http404('Tile out of range')
+    view_name = request.GET.get('view', '')
+    if view_name and not is_search_view(view_name):
+        raise Http404('Search view not found')
+
+    url = request.path
+    if view_name:
+        url += '?view=' + view_name
+    cache_key = tile_cache_key(url)
+    tile = get_tile(cache_key)
+    if not tile:
+        tile = new_tile(site_tile(z, x, y, view_name), MVT_CONTENT_TYPE)
+        set_tile(cache_key, url, tile)
+    return tile_response(request, tile)
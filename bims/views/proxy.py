@@ -1,8 +1,77 @@
 import sys
 import urllib.parse
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    StreamingHttpResponse
+)
+from django.http.request import validate_host
 from django.views.decorators.csrf import requires_csrf_token
 import requests
+from requests.adapters import HTTPAdapter
+
+from bims.conf import PROXY_CACHE_MAX_SIZE, PROXY_POOL_SIZE, PROXY_TIMEOUT
+from bims.utils.tile_cache import (
+    get_tile,
+    new_tile,
+    set_tile,
+    tile_cache_key,
+    tile_response
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# Request headers passed upstream for responses that are not cached
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+# Response headers passed back for responses that are not cached
+FORWARDED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Expires')
+
+# Shared by the requests of a worker, so upstream connections are reused
+session = requests.Session()
+for prefix in ('http://', 'https://'):
+    session.mount(prefix, HTTPAdapter(
+        pool_connections=PROXY_POOL_SIZE,
+        pool_maxsize=PROXY_POOL_SIZE
+    ))
+
+
+def is_allowed_host(url):
+    """
+    Whether a URL is on a host of PROXY_ALLOWED_HOSTS, where '.example.com'
+    matches example.com and its subdomains and '*' matches every host.
+    """
+    host = urllib.parse.urlsplit(url).hostname
+    return bool(host) and validate_host(
+        host, getattr(settings, 'PROXY_ALLOWED_HOSTS', ()))
+
+
+def _read_limited(response, limit):
+    """
+    Read a response body until it is complete or larger than limit.
+    :return: (list of chunks read, iterator of the rest of the body or
+        None when it is complete)
+    """
+    chunks = []
+    size = 0
+    iterator = response.iter_content(CHUNK_SIZE)
+    for chunk in iterator:
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return chunks, iterator
+    return chunks, None
+
+
+def _stream(response, chunks=(), iterator=None):
+    try:
+        for chunk in chunks:
+            yield chunk
+        for chunk in iterator or response.iter_content(CHUNK_SIZE):
+            yield chunk
+    finally:
+        response.close()
 
 
 @requires_csrf_token
@@ -25,21 +94,51 @@ def proxy_request(request, path):
         new_path = path.split(':/')
         path = '://'.join(new_path)
 
+    if not is_allowed_host(path):
+        return HttpResponseForbidden('Host not allowed')
+
     access_token = request.session.get('access_token', None)
 
     headers = {}
     if access_token is not None:
         headers['Access-Token'] = access_token
 
+    # Responses to a user token may differ per user, never cache them
+    cached = access_token is None
+    if cached:
+        cache_key = tile_cache_key(path)
+        tile = get_tile(cache_key)
+        if tile:
+            return tile_response(request, tile)
+    else:
+        for header in CONDITIONAL_HEADERS:
+            if header in request.headers:
+                headers[header] = request.headers[header]
+
     try:
-        response = requests.get(path, headers=headers, timeout=5)
+        response = session.get(
+            path, headers=headers, timeout=PROXY_TIMEOUT, stream=True)
     except requests.exceptions.Timeout:
-        return HttpResponse("The request timed out.")
+        return HttpResponse("The request timed out.", status=504)
     except requests.exceptions.RequestException as e:
-        return HttpResponse(f"An error occurred: {e}")
+        return HttpResponse(f"An error occurred: {e}", status=502)
+
+    content_type = response.headers.get('content-type')
+    chunks, iterator = (), None
+    if cached and response.status_code == 200:
+        chunks, iterator = _read_limited(response, PROXY_CACHE_MAX_SIZE)
+        if iterator is None:
+            response.close()
+            tile = new_tile(b''.join(chunks), content_type)
+            set_tile(cache_key, path, tile)
+            return tile_response(request, tile)
 
-    return HttpResponse(
-        response.content,
+    proxy_response = StreamingHttpResponse(
+        _stream(response, chunks, iterator),
         status=response.status_code,
-        content_type=response.headers['content-type']
+        content_type=content_type
     )
+    for header in FORWARDED_HEADERS:
+        if header in response.headers:
+            proxy_response[header] = response.headers[header]
+    return proxy_response
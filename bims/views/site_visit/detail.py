@@ -15,7 +15,6 @@ from django.views.generic.detail import DetailView
 
 from django_tenants.utils import get_tenant, get_tenant_model, schema_context
 
-from bims.utils.search_process import clear_finished_search_process
 from bims.views.site_visit.base import SiteVisitBaseView
 from bims.models.survey import Survey
 from bims.models.basemap_layer import BaseMapLayer
@@ -85,8 +84,6 @@ class SiteVisitDeleteView(UserPassesTestMixin, View):
                         id=location_site.id
                     ).delete()
 
-            clear_finished_search_process()
-
     @method_decorator(login_required)
     def post(self, request, *args, **kwargs):
         site_visit = get_object_or_404(
@@ -18,6 +18,7 @@ from bims.models.biological_collection_record import (
 from bims.views.mixin.session_form.mixin import SessionFormMixin
 from bims.models.site_image import SiteImage, COLLECTION_RECORD_KEY
 from bims.views.site_visit.base import SiteVisitBaseView
+from bims.models.occurrence_rollup import refresh_occurrence_rollups
 from bims.models.algae_data import AlgaeData
 from bims.models.chem import Chem
 from bims.models.chemical_record import ChemicalRecord
@@ -215,6 +216,9 @@ class SiteVisitUpdateView(
                 end_embargo_date=end_embargo_date,
                 source_reference=source_reference
             )
+            # Bulk updates skip the post_save rebuild of the rollups
+            refresh_occurrence_rollups(
+                *self.collection_records.values_list('site_id', flat=True))
 
             # Remove deleted collection records
             self.remove_collection_records(
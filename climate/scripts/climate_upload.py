@@ -6,6 +6,7 @@ from django.contrib.gis.geos import Point
 from bims.scripts.data_upload import DataCSVUpload
 from bims.models.location_site import LocationSite, generate_site_code
 from bims.models.location_type import LocationType
+from bims.utils.site_resolver import SiteResolver
 from climate.models import Climate
 
 logger = logging.getLogger('bims')
@@ -18,6 +19,9 @@ class ClimateCSVUpload(DataCSVUpload):
 
     def __init__(self, upload_session):
         self.upload_session = upload_session
+        # Stations repeat on every daily row, their sites are kept in memory
+        self.site_resolver = SiteResolver(key_fields=('name',))
+        self.location_sites = {}
 
     @staticmethod
     def row_value(row, key):
@@ -150,14 +154,15 @@ class ClimateCSVUpload(DataCSVUpload):
         """Get or create location site for the station."""
         try:
             # Try to find existing site by name and coordinates
-            location_site = LocationSite.objects.filter(
-                name__iexact=station_name,
-                latitude=latitude,
-                longitude=longitude
-            ).first()
-
-            if location_site:
-                return location_site
+            site_id = self.site_resolver.find(
+                longitude, latitude, key=(station_name,)
+            )
+            if site_id:
+                if site_id not in self.location_sites:
+                    self.location_sites[site_id] = LocationSite.objects.get(
+                        id=site_id
+                    )
+                return self.location_sites[site_id]
 
             # Get or create location type for weather stations
             location_type, _ = LocationType.objects.get_or_create(
@@ -185,6 +190,8 @@ class ClimateCSVUpload(DataCSVUpload):
             )
             location_site.site_code = site_code
             location_site.save()
+            self.site_resolver.add(location_site)
+            self.location_sites[location_site.id] = location_site
 
             logger.info(f"Created new location site: {station_name} with site code: {site_code}")
             return location_site
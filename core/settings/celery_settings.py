@@ -85,4 +85,12 @@ CELERY_BEAT_SCHEDULE = {
             'queue': 'update'
         }
     },
+    'evict_search_views': {
+        'task': 'bims.tasks.evict_search_views',
+        'schedule': 3600,
+        'options': {
+            'retry': False,
+            'queue': 'update'
+        }
+    },
 }
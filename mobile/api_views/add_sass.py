@@ -26,6 +26,8 @@ from sass.models.sass_taxon import SassTaxon
 
 from sass.models.site_visit import SiteVisit
 
+from sass.models.site_visit_score import update_site_visit_scores
+
 from bims.models.location_site import LocationSite
 from django.core.files.base import ContentFile
 from rest_framework.views import APIView
@@ -235,6 +237,8 @@ class AddSASS(APIView):
                     site_visit_taxon.collector_user = site_visit.collector
                     site_visit_taxon.save()
 
+        update_site_visit_scores([site_visit.id])
+
         return Response({
             'survey_id': survey.id,
             'id': site_visit.id,
@@ -0,0 +1,47 @@
+# coding=utf-8
+"""Calculate the stored SASS scores of site visits."""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from bims.utils.logger import log
+from sass.models import SiteVisit
+from sass.models.site_visit_score import update_site_visit_scores
+
+
+class Command(BaseCommand):
+    """Calculate the SASS score, number of taxa and ASPT of the site visits
+    of every tenant, or of the tenant given with --tenant. Needed once to
+    fill the scores of existing site visits, and after changes to SASS taxa
+    made outside the SASS forms and commands.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            dest='tenant',
+            default=None,
+            help='Tenant schema name to calculate.'
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Only calculate site visits without a stored score.'
+        )
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name='public')
+        if options.get('tenant'):
+            tenants = tenants.filter(schema_name=options.get('tenant'))
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                site_visit_ids = None
+                if options.get('only_missing'):
+                    site_visit_ids = SiteVisit.objects.filter(
+                        score__isnull=True
+                    ).values_list('id', flat=True)
+                total = update_site_visit_scores(site_visit_ids)
+                log('{schema}: {total} site visit scores'.format(
+                    schema=tenant.schema_name,
+                    total=total
+                ))
@@ -7,6 +7,7 @@ from sass.models import (
     SiteVisitTaxon,
     SassTaxon
 )
+from sass.models.site_visit_score import update_site_visit_scores
 
 
 class Command(BaseCommand):
@@ -14,9 +15,11 @@ class Command(BaseCommand):
     - Find all sass records which has rating scale
     - Get the duplicates ( same site visit + same sass taxon )
     - Keep sass record with biggest rating scale, remove others
+    - Recalculate the scores of the site visits
     """
 
     def handle(self, *args, **options):
+        updated_site_visits = set()
         sass_taxa = SassTaxon.objects.filter(
             rating_scale__isnull=False
         ).distinct('taxon')
@@ -40,3 +43,6 @@ class Command(BaseCommand):
                     sass_taxon__rating_scale=biggest_rating)
                 if to_be_removed:
                     to_be_removed.delete()
+                    updated_site_visits.add(duplicate['site_visit'])
+
+        update_site_visit_scores(updated_site_visits)
@@ -7,11 +7,13 @@ from sass.models import (
     SiteVisitBiotopeTaxon,
     SiteVisitTaxon
 )
+from sass.models.site_visit_score import update_site_visit_scores
 
 
 class Command(BaseCommand):
 
     def handle(self, *args, **options):
+        updated_site_visits = set()
         sass_taxon_4 = SassTaxon.objects.filter(
             taxon_sass_4__isnull=False
         )
@@ -31,6 +33,8 @@ class Command(BaseCommand):
                 site_visit_taxon = SiteVisitTaxon.objects.filter(
                     sass_taxon=taxon_5
                 )
+                updated_site_visits.update(
+                    site_visit_taxon.values_list('site_visit', flat=True))
                 site_visit_taxon.update(
                     sass_taxon=sass_taxon
                 )
@@ -46,3 +50,5 @@ class Command(BaseCommand):
                 sass_taxon.taxon_sass_5 = taxon_5.taxon_sass_5
                 sass_taxon.save()
                 taxon_5.delete()
+
+        update_site_visit_scores(updated_site_visits)
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from bims.utils.gbif import search_taxon_identifier
 from sass.models.sass_taxon import SassTaxon
+from sass.models.site_visit_score import update_site_visit_scores
+from sass.models.site_visit_taxon import SiteVisitTaxon
 
 
 class Command(BaseCommand):
@@ -41,6 +43,7 @@ class Command(BaseCommand):
 
         taxon_data = False
         taxon_dict = {}
+        scored_taxa = []
 
         for index, row in df1.iterrows():
             if taxon_data:
@@ -79,5 +82,13 @@ class Command(BaseCommand):
                     if not math.isnan(taxon_score):
                         sass_taxon.sass_5_score = int(taxon_score)
                         sass_taxon.save()
+                        scored_taxa.append(sass_taxon.id)
                     display_order += 1
                     print('Added new taxon : %s' % taxonomy.scientific_name)
+
+        # Scores of site visits with the updated taxa
+        update_site_visit_scores(
+            SiteVisitTaxon.objects.filter(
+                sass_taxon__in=scored_taxa
+            ).values_list('site_visit', flat=True).distinct()
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0522_occurrencerollup'),
+        ('sass', '0064_remove_river_source_site'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteVisitScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sass_score', models.IntegerField(default=0)),
+                ('taxa_count', models.IntegerField(default=0)),
+                ('aspt', models.FloatField(default=0.0)),
+                ('calculated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('site_visit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score', to='sass.sitevisit')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SiteVisitBiotopeScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sass_score', models.IntegerField(default=0)),
+                ('taxa_count', models.IntegerField(default=0)),
+                ('aspt', models.FloatField(default=0.0)),
+                ('biotope', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bims.biotope')),
+                ('site_visit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='biotope_scores', to='sass.sitevisit')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('site_visit', 'biotope'), name='site_visit_biotope_score_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:58
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bims', '0524_autocomplete_trigram_indexes'),
+        ('sass', '0065_sitevisitscore'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='river',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='river_name_trgm'),
+        ),
+    ]
@@ -10,3 +10,4 @@ from sass.models.site_visit_taxon import *  # noqa
 from sass.models.sass_ecological_category import *  # noqa
 from sass.models.sass_ecological_condition import *  # noqa
 from sass.models.site_visit_ecological_condition import *  # noqa
+from sass.models.site_visit_score import *  # noqa
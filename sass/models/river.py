@@ -2,6 +2,8 @@
 """River model definition.
 """
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from bims.models import AbstractValidation
 
 
@@ -17,5 +19,14 @@ class River(AbstractValidation):
     def data_name(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # icontains lookups of the autocomplete views
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='river_name_trgm'
+            ),
+        ]
+
     def __unicode__(self):
         return self.name
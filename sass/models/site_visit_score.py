@@ -0,0 +1,203 @@
+# coding=utf-8
+"""Site visit score model definition.
+
+SASS score, number of taxa and ASPT of a site visit, in total and per
+biotope, calculated from its taxa and stored so dashboards and exports read
+them instead of summing the taxa of every visit on each request.
+
+Scores are recalculated when a SASS form is submitted (web or mobile) and
+by the commands that change SASS taxa in bulk. Visits without a stored
+score are calculated when first read; the calculate_site_visit_scores
+command recalculates everything.
+"""
+from django.contrib.gis.db import models
+from django.db import transaction
+from django.db.models import Case, Count, Q, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from sass.models.site_visit import SiteVisit
+from sass.models.site_visit_biotope_taxon import SiteVisitBiotopeTaxon
+from sass.models.site_visit_taxon import SiteVisitTaxon
+
+# Site visits calculated per statement
+SCORE_BATCH_SIZE = 500
+
+
+class SiteVisitScore(models.Model):
+    """SASS score of a site visit."""
+
+    site_visit = models.OneToOneField(
+        'sass.SiteVisit',
+        on_delete=models.CASCADE,
+        related_name='score'
+    )
+
+    sass_score = models.IntegerField(
+        default=0
+    )
+
+    taxa_count = models.IntegerField(
+        default=0
+    )
+
+    aspt = models.FloatField(
+        default=0.0
+    )
+
+    calculated_at = models.DateTimeField(
+        default=timezone.now
+    )
+
+    def __str__(self):
+        return '{site_visit} - {score}'.format(
+            site_visit=self.site_visit_id,
+            score=self.sass_score
+        )
+
+
+class SiteVisitBiotopeScore(models.Model):
+    """SASS score of the taxa found in one biotope of a site visit."""
+
+    site_visit = models.ForeignKey(
+        'sass.SiteVisit',
+        on_delete=models.CASCADE,
+        related_name='biotope_scores'
+    )
+
+    biotope = models.ForeignKey(
+        'bims.Biotope',
+        on_delete=models.CASCADE
+    )
+
+    sass_score = models.IntegerField(
+        default=0
+    )
+
+    taxa_count = models.IntegerField(
+        default=0
+    )
+
+    aspt = models.FloatField(
+        default=0.0
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['site_visit', 'biotope'],
+                name='site_visit_biotope_score_unique'
+            )
+        ]
+
+    def __str__(self):
+        return '{site_visit} - {biotope} - {score}'.format(
+            site_visit=self.site_visit_id,
+            biotope=self.biotope_id,
+            score=self.sass_score
+        )
+
+
+def taxon_score():
+    """
+    Score of a taxon record of a site visit, from the SASS version of the
+    visit. Taxa without an abundance do not score.
+    """
+    return Case(
+        When(
+            condition=Q(site_visit__sass_version=4,
+                        sass_taxon__score__isnull=False,
+                        taxon_abundance__isnull=False),
+            then='sass_taxon__score'),
+        When(
+            condition=Q(site_visit__sass_version=5,
+                        sass_taxon__sass_5_score__isnull=False,
+                        taxon_abundance__isnull=False),
+            then='sass_taxon__sass_5_score'),
+        default=0
+    )
+
+
+def _aspt(sass_score, taxa_count):
+    return sass_score / taxa_count if taxa_count else 0.0
+
+
+def update_site_visit_scores(site_visit_ids=None):
+    """
+    Recalculate the stored scores of site visits from their taxa.
+    :param site_visit_ids: site visit ids, every site visit when None
+    :return: number of site visits calculated
+    """
+    if site_visit_ids is None:
+        site_visit_ids = SiteVisit.objects.values_list('id', flat=True)
+    else:
+        site_visit_ids = SiteVisit.objects.filter(
+            id__in=set(site_visit_ids)
+        ).values_list('id', flat=True)
+    site_visit_ids = list(site_visit_ids.order_by('id'))
+
+    for start in range(0, len(site_visit_ids), SCORE_BATCH_SIZE):
+        batch = site_visit_ids[start:start + SCORE_BATCH_SIZE]
+        totals = {
+            total['site_visit_id']: total
+            for total in SiteVisitTaxon.objects.filter(
+                site_visit_id__in=batch
+            ).values('site_visit_id').annotate(
+                taxa_count=Count('sass_taxon'),
+                sass_score=Coalesce(Sum(taxon_score()), 0)
+            ).order_by()
+        }
+        biotope_totals = SiteVisitBiotopeTaxon.objects.filter(
+            site_visit_id__in=batch,
+            biotope__isnull=False
+        ).values('site_visit_id', 'biotope_id').annotate(
+            taxa_count=Count('sass_taxon'),
+            sass_score=Coalesce(Sum(taxon_score()), 0)
+        ).order_by()
+
+        calculated_at = timezone.now()
+        scores = []
+        for site_visit_id in batch:
+            total = totals.get(
+                site_visit_id, {'sass_score': 0, 'taxa_count': 0})
+            scores.append(SiteVisitScore(
+                site_visit_id=site_visit_id,
+                sass_score=total['sass_score'],
+                taxa_count=total['taxa_count'],
+                aspt=_aspt(total['sass_score'], total['taxa_count']),
+                calculated_at=calculated_at
+            ))
+        biotope_scores = [
+            SiteVisitBiotopeScore(
+                site_visit_id=total['site_visit_id'],
+                biotope_id=total['biotope_id'],
+                sass_score=total['sass_score'],
+                taxa_count=total['taxa_count'],
+                aspt=_aspt(total['sass_score'], total['taxa_count'])
+            ) for total in biotope_totals
+        ]
+
+        with transaction.atomic():
+            SiteVisitScore.objects.filter(
+                site_visit_id__in=batch).delete()
+            SiteVisitBiotopeScore.objects.filter(
+                site_visit_id__in=batch).delete()
+            SiteVisitScore.objects.bulk_create(scores)
+            SiteVisitBiotopeScore.objects.bulk_create(biotope_scores)
+    return len(site_visit_ids)
+
+
+def site_visit_scores(site_visit_ids):
+    """
+    Stored scores of site visits, calculating the ones not stored yet.
+    :param site_visit_ids: site visit ids or a queryset of them
+    :return: SiteVisitScore queryset
+    """
+    missing = SiteVisit.objects.filter(
+        id__in=site_visit_ids,
+        score__isnull=True
+    ).values_list('id', flat=True)
+    missing = list(missing)
+    if missing:
+        update_site_visit_scores(missing)
+    return SiteVisitScore.objects.filter(site_visit_id__in=site_visit_ids)
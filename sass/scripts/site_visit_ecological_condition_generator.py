@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
-from django.db.models import F, Count, Sum, Case, When, Q, FloatField
-from django.db.models.functions import Cast, Coalesce
+from django.db.models import Q
 from preferences import preferences
 from cloud_native_gis.models import Layer
 
@@ -9,9 +8,12 @@ from bims.utils.site_code import get_feature_data
 from sass.models import (
     SiteVisitEcologicalCondition,
     SassEcologicalCondition,
-    SiteVisitTaxon,
     SassEcologicalCategory
 )
+from sass.models.site_visit_score import (
+    SiteVisitScore,
+    update_site_visit_scores
+)
 from bims.models import LocationContext, LocationContextGroup
 from bims.utils.logger import log
 
@@ -21,41 +23,24 @@ def generate_site_visit_ecological_condition(site_visits):
     Generate site visit ecological condition from list of site visit
     :param site_visits: list of site visit query object
     """
+    site_visits = list(site_visits)
+    site_visit_ids = [site_visit.id for site_visit in site_visits]
+    update_site_visit_scores(site_visit_ids)
+    scores = {
+        score.site_visit_id: score for score in
+        SiteVisitScore.objects.filter(site_visit_id__in=site_visit_ids)
+    }
     for site_visit in site_visits:
         log('Generate ecological condition for site visit : {}'.format(
             site_visit.id
         ))
 
-        site_visit_taxa = SiteVisitTaxon.objects.filter(
-            site_visit=site_visit,
-        )
-
-        summary = site_visit_taxa.annotate(
-            sass_id=F('site_visit__id')).values('sass_id').annotate(
-            count=Count('sass_taxon'),
-            sass_score=Coalesce(Sum(Case(
-                When(
-                    condition=Q(site_visit__sass_version=4,
-                                sass_taxon__score__isnull=False,
-                                taxon_abundance__isnull=False),
-                    then='sass_taxon__score'),
-                When(
-                    condition=Q(site_visit__sass_version=5,
-                                sass_taxon__sass_5_score__isnull=False,
-                                taxon_abundance__isnull=False),
-                    then='sass_taxon__sass_5_score'),
-                default=0),
-            ), 0),
-        ).annotate(
-            aspt=Cast(F('sass_score'), FloatField()) / Cast(F('count'),
-                                                            FloatField()),
-        ).values('sass_score', 'aspt', 'count')
-
-        if not summary:
+        score = scores.get(site_visit.id)
+        if not score or not score.taxa_count:
             continue
 
-        aspt_score = summary[0]['aspt']
-        sass_score = summary[0]['sass_score']
+        aspt_score = score.aspt
+        sass_score = score.sass_score
 
         site_visit_ecological, created = (
             SiteVisitEcologicalCondition.objects.get_or_create(
@@ -3,13 +3,14 @@ import csv
 import logging
 from celery import shared_task
 from django.db.models import (
-    Case, When, F, Count, Sum, FloatField, Q, Value, CharField, Subquery, OuterRef
+    Case, When, F, Max, Value, CharField, Subquery, OuterRef
 )
-from django.db.models.functions import Cast, Concat, Coalesce
+from django.db.models.functions import Concat, Coalesce
 from sass.models.site_visit import SiteVisit
 
 from bims.api_views.search import CollectionSearch
 from sass.models import SiteVisitTaxon, SassTaxon, SiteVisitEcologicalCondition
+from sass.models.site_visit_score import site_visit_scores
 from geonode.people.models import Profile
 from bims.models.location_context import LocationContext
 from bims.tasks.email_csv import send_csv_via_email
@@ -133,21 +134,15 @@ def download_sass_summary_data_task(
             site_visit_taxa = SiteVisitTaxon.objects.filter(
                 id__in=collection_ids
             )
+            # Calculate the scores not stored yet
+            site_visit_scores(site_visit_taxa.values('site_visit_id'))
             summary = (
                 site_visit_taxa
                 .values('site_visit')
                 .annotate(
-                    count=Count('sass_taxon', distinct=True),
-                    sass_score=Sum(
-                        Case(
-                            When(
-                                Q(site_visit__sass_version=5, sass_taxon__sass_5_score__isnull=False),
-                                then=F('sass_taxon__sass_5_score')
-                            ),
-                            default=F('sass_taxon__score'),
-                            output_field=FloatField(),
-                        )
-                    ),
+                    count=Max('site_visit__score__taxa_count'),
+                    sass_score=Max('site_visit__score__sass_score'),
+                    aspt=Max('site_visit__score__aspt'),
                     sampling_date=F('site_visit__site_visit_date'),
                     full_name=Concat(
                         'survey__owner__first_name',
@@ -181,9 +176,6 @@ def download_sass_summary_data_task(
                         .values('source_reference')[:1]
                     ),
                 )
-                .annotate(
-                    aspt=Cast(F('sass_score'), FloatField()) / Cast(F('count'), FloatField()),
-                )
                 .order_by('sampling_date')
             )
             context['location_contexts'] = LocationContext.objects.filter(
@@ -290,35 +282,29 @@ def download_sass_taxon_data_task(
                     [sass_taxon.taxon_sass_4 if
                      sass_taxon.taxon_sass_4 else sass_taxon.taxon_sass_5])
 
+            scores = {
+                score.site_visit_id: score for score in
+                site_visit_scores(sass_site_visits.values('id'))
+            }
             for sass_site_visit in sass_site_visits:
                 sampling_dates.append(
                     sass_site_visit.site_visit_date
                 )
-                _number_of_taxa = 0
-                _sass_score = 0
-                for index in range(len(taxon_data)):
-                    sass_taxon = sass_taxa[index]
-                    site_visit_taxa = SiteVisitTaxon.objects.filter(
+                abundances = dict(
+                    SiteVisitTaxon.objects.filter(
                         site_visit=sass_site_visit,
-                        sass_taxon=sass_taxon
-                    )
-                    if site_visit_taxa.count() > 0:
-                        taxon_abundance = (
-                          site_visit_taxa.first().taxon_abundance.abc
-                        )
-                        _number_of_taxa += 1
-                        _sass_score += sass_taxon.sass_5_score
-                    else:
-                        taxon_abundance = ''
-                    taxon_data[index].append(taxon_abundance)
-
-                number_of_taxa.append(_number_of_taxa)
-                sass_score.append(_sass_score)
-                try:
-                    aspt_score = round(_sass_score/_number_of_taxa, 2)
-                except:  # noqa
-                    aspt_score = 0
-                aspt.append(aspt_score)
+                        sass_taxon__in=sass_taxa
+                    ).values_list('sass_taxon', 'taxon_abundance__abc')
+                )
+                for index in range(len(taxon_data)):
+                    taxon_abundance = abundances.get(sass_taxa[index].id)
+                    taxon_data[index].append(
+                        taxon_abundance if taxon_abundance else '')
+
+                score = scores.get(sass_site_visit.id)
+                number_of_taxa.append(score.taxa_count if score else 0)
+                sass_score.append(score.sass_score if score else 0)
+                aspt.append(round(score.aspt, 2) if score else 0)
 
             site_codes = [
                 'Site Code',
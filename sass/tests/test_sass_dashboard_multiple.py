@@ -0,0 +1,76 @@
+# coding=utf-8
+"""Tests for the chart data of the SASS multiple sites dashboard."""
+import datetime
+from unittest import mock
+
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.models import LocationSite
+from bims.tests.model_factories import LocationSiteF
+from sass.models import SiteVisitTaxon
+from sass.models.site_visit_score import update_site_visit_scores
+from sass.tests.model_factories import (
+    SassTaxonF,
+    SiteVisitF,
+    SiteVisitTaxonF
+)
+from sass.views.sass_dashboard_multiple import (
+    SassDashboardMultipleSitesApiView
+)
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestSassDashboardMultipleSites(FastTenantTestCase):
+
+    def setUp(self):
+        self.site = LocationSiteF.create(site_code='SITE-1')
+        self.other_site = LocationSiteF.create(site_code='SITE-2')
+
+    def create_site_visit(self, site, date, scores):
+        site_visit = SiteVisitF.create(
+            location_site=site,
+            site_visit_date=date
+        )
+        for score in scores:
+            SiteVisitTaxonF.create(
+                site=site,
+                site_visit=site_visit,
+                sass_taxon=SassTaxonF.create(sass_5_score=score, score=None)
+            )
+        update_site_visit_scores([site_visit.id])
+        return site_visit
+
+    def test_sass_score_chart_data(self, mock_iucn):
+        older_visit = self.create_site_visit(
+            self.site, datetime.date(2020, 1, 1), [5, 3])
+        # The latest visit has no score, so the older one is charted
+        self.create_site_visit(
+            self.site, datetime.date(2021, 1, 1), [None])
+        other_visit = self.create_site_visit(
+            self.other_site, datetime.date(2020, 6, 1), [4])
+
+        view = SassDashboardMultipleSitesApiView()
+        view.location_sites = LocationSite.objects.filter(
+            id__in=[self.site.id, self.other_site.id]
+        ).order_by('site_code')
+        view.site_visit_taxa = SiteVisitTaxon.objects.filter(
+            site__in=view.location_sites
+        )
+        chart_data = view.get_sass_score_chart_data()
+
+        self.assertEqual(
+            chart_data['sass_ids'], [older_visit.id, other_visit.id])
+        self.assertEqual(chart_data['sass_score'], [8, 4])
+        self.assertEqual(chart_data['taxa_count'], [2, 1])
+        self.assertEqual(chart_data['aspt_score'], [4.0, 4.0])
+        self.assertEqual(
+            chart_data['date'], ['2020-01-01', '2020-06-01'])
+        self.assertEqual(chart_data['number_assessments'], [2, 1])
+        self.assertEqual(
+            chart_data['taxa_number_average'][0],
+            {'avg': 1.5, 'min': 1, 'max': 2}
+        )
+        self.assertEqual(
+            chart_data['sass_score_average'][0],
+            {'avg': 4.0, 'min': 0, 'max': 8}
+        )
@@ -0,0 +1,74 @@
+# coding=utf-8
+"""Tests for the stored SASS scores of site visits."""
+from unittest import mock
+
+from django_tenants.test.cases import FastTenantTestCase
+
+from bims.tests.model_factories import BiotopeF
+from sass.models.site_visit_score import (
+    SiteVisitBiotopeScore,
+    SiteVisitScore,
+    site_visit_scores,
+    update_site_visit_scores
+)
+from sass.tests.model_factories import (
+    SassTaxonF,
+    SiteVisitBiotopeTaxonF,
+    SiteVisitF,
+    SiteVisitTaxonF
+)
+
+
+@mock.patch('bims.models.taxonomy.get_iucn_status', return_value=(None, None, None))
+class TestSiteVisitScore(FastTenantTestCase):
+
+    def setUp(self):
+        self.site_visit = SiteVisitF.create(sass_version=5)
+        self.biotope = BiotopeF.create()
+
+    def create_taxa(self):
+        sass_taxa = [
+            SassTaxonF.create(sass_5_score=score) for score in (5, 8, 2)
+        ]
+        site_visit_taxa = [
+            SiteVisitTaxonF.create(
+                site=self.site_visit.location_site,
+                site_visit=self.site_visit,
+                sass_taxon=sass_taxon
+            ) for sass_taxon in sass_taxa
+        ]
+        for sass_taxon in sass_taxa[:2]:
+            SiteVisitBiotopeTaxonF.create(
+                site_visit=self.site_visit,
+                sass_taxon=sass_taxon,
+                taxon=sass_taxon.taxon,
+                biotope=self.biotope
+            )
+        return site_visit_taxa
+
+    def test_update_site_visit_scores(self, mock_iucn):
+        site_visit_taxa = self.create_taxa()
+        self.assertEqual(update_site_visit_scores([self.site_visit.id]), 1)
+        score = SiteVisitScore.objects.get(site_visit=self.site_visit)
+        self.assertEqual(score.sass_score, 15)
+        self.assertEqual(score.taxa_count, 3)
+        self.assertEqual(score.aspt, 5.0)
+        biotope_score = SiteVisitBiotopeScore.objects.get(
+            site_visit=self.site_visit, biotope=self.biotope)
+        self.assertEqual(biotope_score.sass_score, 13)
+        self.assertEqual(biotope_score.taxa_count, 2)
+        self.assertEqual(biotope_score.aspt, 6.5)
+
+        # Taxa without an abundance do not score
+        site_visit_taxa[2].taxon_abundance = None
+        site_visit_taxa[2].save()
+        update_site_visit_scores([self.site_visit.id])
+        score = SiteVisitScore.objects.get(site_visit=self.site_visit)
+        self.assertEqual(score.sass_score, 13)
+        self.assertEqual(score.taxa_count, 3)
+
+    def test_site_visit_scores_calculates_missing(self, mock_iucn):
+        self.create_taxa()
+        SiteVisitScore.objects.all().delete()
+        scores = site_visit_scores([self.site_visit.id])
+        self.assertEqual(scores.get().sass_score, 15)
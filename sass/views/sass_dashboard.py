@@ -5,10 +5,10 @@ from django.views.generic import TemplateView
 from django.shortcuts import get_object_or_404
 from django.http import Http404
 from django.db.models import (
-    Case, When, F, Count, Sum, FloatField,
+    Case, When, F, Sum,
     IntegerField, Q
 )
-from django.db.models.functions import Cast, Coalesce
+from django.db.models.functions import Coalesce
 
 from bims.models import BaseMapLayer
 from bims.models.chemical_record import ChemicalRecord
@@ -27,6 +27,7 @@ from sass.models import (
     SassEcologicalCondition,
     SassEcologicalCategory
 )
+from sass.models.site_visit_score import site_visit_scores
 from sass.enums.chem_unit import ChemUnit
 from bims.utils.location_site import overview_site_detail
 
@@ -53,40 +54,20 @@ class SassDashboardView(TemplateView):
 
     def get_sass_score_chart_data(self):
         data = {}
-        summary = self.site_visit_taxa.annotate(
-            date=F('site_visit__site_visit_date'),
-        ).values('date').annotate(
-            count=Count('sass_taxon'),
-            sass_score=Coalesce(Sum(Case(
-                When(
-                    condition=Q(site_visit__sass_version=5,
-                                sass_taxon__sass_5_score__isnull=False,
-                                taxon_abundance__isnull=False),
-                    then='sass_taxon__sass_5_score'),
-                When(
-                    condition=Q(site_visit__sass_version=4,
-                                sass_taxon__score__isnull=False,
-                                taxon_abundance__isnull=False),
-                    then='sass_taxon__score'),
-                default=0),
-            ), 0),
-            sass_id=F('site_visit__id')
+        summary = list(site_visit_scores(
+            self.site_visit_taxa.values('site_visit_id')
         ).annotate(
-            aspt=Cast(F('sass_score'), FloatField()) / Cast(F('count'),
-                                                            FloatField()),
-        ).order_by('date')
+            date=F('site_visit__site_visit_date')
+        ).order_by('date').values(
+            'date', 'taxa_count', 'sass_score', 'aspt', 'site_visit_id'
+        ))
 
         data['date_labels'] = (
-            [dt.strftime('%Y-%m-%d')
-             for dt in summary.values_list('date', flat=True)])
-        data['taxa_numbers'] = list(
-            summary.values_list('count', flat=True))
-        data['sass_scores'] = list(
-            summary.values_list('sass_score', flat=True))
-        data['aspt_list'] = list(
-            summary.values_list('aspt', flat=True))
-        data['sass_ids'] = list(
-            summary.values_list('sass_id', flat=True))
+            [row['date'].strftime('%Y-%m-%d') for row in summary])
+        data['taxa_numbers'] = [row['taxa_count'] for row in summary]
+        data['sass_scores'] = [row['sass_score'] for row in summary]
+        data['aspt_list'] = [row['aspt'] for row in summary]
+        data['sass_ids'] = [row['site_visit_id'] for row in summary]
         return data
 
     def get_sass_taxon_table_data(self):
@@ -3,15 +3,16 @@ from collections import OrderedDict
 from preferences import preferences
 from django.views.generic import TemplateView
 from django.db.models import (
-    Case, When, F, Count, Sum, FloatField, Avg, Min, Max, Q
+    Case, When, F, Q
 )
-from django.db.models.functions import Cast
 from django.core.paginator import Paginator
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from bims.api_views.search import CollectionSearch
 from bims.models import LocationSite, LocationContext, BaseMapLayer
-from bims.utils.geomorphological_zone import get_geomorphological_zone_class
+from bims.utils.geomorphological_zone import (
+    get_geomorphological_zone_classes
+)
 from bims.utils.logger import log
 from bims.utils.site_code import get_feature_data
 from sass.models import (
@@ -21,6 +22,7 @@ from sass.models import (
     SassEcologicalCategory,
     SassEcologicalCondition
 )
+from sass.models.site_visit_score import site_visit_scores
 from bims.enums.taxonomic_group_category import TaxonomicGroupCategory
 
 
@@ -46,6 +48,16 @@ class SassDashboardMultipleSitesApiView(APIView):
     site_visit_taxa = SiteVisitTaxon.objects.none()
     location_sites = LocationSite.objects.none()
 
+    @staticmethod
+    def _average(values):
+        if not values:
+            return {'avg': None, 'min': None, 'max': None}
+        return {
+            'avg': sum(values) / len(values),
+            'min': min(values),
+            'max': max(values),
+        }
+
     @timing
     def get_sass_score_chart_data(self):
         chart_data = {
@@ -61,114 +73,69 @@ class SassDashboardMultipleSitesApiView(APIView):
             'sass_score_average': [],
             'number_assessments': [],
         }
+        site_ids = [site.id for site in self.location_sites]
+
+        # Site visits of every site, latest first
+        site_visits = {}
+        for site_visit in SiteVisit.objects.filter(
+            location_site__in=site_ids
+        ).values(
+            'id', 'location_site_id', 'site_visit_date'
+        ).order_by('location_site_id', '-site_visit_date', '-id'):
+            site_visits.setdefault(
+                site_visit['location_site_id'], []).append(site_visit)
+
+        # Stored scores of the site visits with taxa in the search
+        scores = {
+            score.site_visit_id: score for score in site_visit_scores(
+                self.site_visit_taxa.values('site_visit_id')
+            )
+        }
+
         site_codes = []
         for data in self.location_sites:
 
-            # Get the latest data
-            site_visit = SiteVisit.objects.filter(
-                location_site=data,
-            ).order_by('-site_visit_date')
+            site_visit = site_visits.get(data.id)
             if not site_visit:
                 continue
 
             # Average
-            averages = self.site_visit_taxa.filter(
-                site=data
-            ).annotate(
-                sass_id=F('site_visit__id'),
-            ).values('sass_id').annotate(
-                count=Count('sass_taxon'),
-                sass_score=Sum(Case(
-                    When(
-                        condition=Q(site_visit__sass_version=5,
-                                    sass_taxon__sass_5_score__isnull=False),
-                        then='sass_taxon__sass_5_score'),
-                    default='sass_taxon__score'
-                ))
-            ).annotate(
-                aspt=Cast(
-                    F('sass_score'), FloatField()) / Cast(
-                    F('count'), FloatField()),
-            ).aggregate(
-                taxa_number_average=Avg('count'),
-                sass_score_average=Avg('sass_score'),
-                aspt_average=Avg('aspt'),
-                taxa_number_min=Min('count'),
-                sass_score_min=Min('sass_score'),
-                aspt_min=Min('aspt'),
-                taxa_number_max=Max('count'),
-                sass_score_max=Max('sass_score'),
-                aspt_max=Max('aspt')
-            )
-            chart_data['taxa_number_average'].append({
-                'avg': averages['taxa_number_average'],
-                'min': averages['taxa_number_min'],
-                'max': averages['taxa_number_max'],
-            })
-            chart_data['sass_score_average'].append({
-                'avg': averages['sass_score_average'],
-                'min': averages['sass_score_min'],
-                'max': averages['sass_score_max'],
-            })
-            chart_data['aspt_average'].append({
-                'avg': averages['aspt_average'],
-                'min': averages['aspt_min'],
-                'max': averages['aspt_max'],
-            })
+            site_scores = [
+                scores[visit['id']] for visit in site_visit
+                if visit['id'] in scores
+            ]
+            chart_data['taxa_number_average'].append(self._average(
+                [score.taxa_count for score in site_scores]))
+            chart_data['sass_score_average'].append(self._average(
+                [score.sass_score for score in site_scores]))
+            chart_data['aspt_average'].append(self._average(
+                [score.aspt for score in site_scores if score.taxa_count]))
 
-            site_visit_index = 0
-            latest_site_visit = site_visit[site_visit_index]
             if data.site_code in site_codes:
                 continue
-            sass_score_isnull = True
-            site_visit_taxon = None
-            site_visit_data = None
-            while sass_score_isnull:
-                site_visit_taxon = self.site_visit_taxa.filter(
-                    site_visit=latest_site_visit
-                )
-                site_visit_data = site_visit_taxon.aggregate(
-                    sass_score=Sum(Case(
-                        When(
-                            condition=Q(
-                                site_visit__sass_version=5,
-                                sass_taxon__sass_5_score__isnull=False),
-                            then='sass_taxon__sass_5_score'),
-                        default='sass_taxon__score'
-                    ))
-                )
-                if site_visit_data['sass_score']:
-                    sass_score_isnull = False
-                else:
-                    site_visit_index += 1
-                    if site_visit_index >= site_visit.count():
-                        sass_score_isnull = False
-                    latest_site_visit = site_visit[site_visit_index]
-
-            if not site_visit_data or not site_visit_taxon:
+
+            # Latest site visit with a score, else the oldest one
+            latest_site_visit = site_visit[-1]
+            for visit in site_visit:
+                if visit['id'] in scores and scores[visit['id']].sass_score:
+                    latest_site_visit = visit
+                    break
+            score = scores.get(latest_site_visit['id'])
+            if not score:
                 continue
 
             site_codes.append(data.site_code)
             chart_data['site_code'].append(data.site_code)
-            chart_data['sass_ids'].append(latest_site_visit.id)
+            chart_data['sass_ids'].append(latest_site_visit['id'])
             chart_data['site_id'].append(data.id)
-            sass_score = 0
-            taxa_count = site_visit_taxon.distinct('sass_taxon').count()
-            aspt = 0.0
-            if site_visit_data:
-                sass_score = site_visit_data['sass_score']
-                try:
-                    aspt = round(sass_score / taxa_count, 2)
-                except TypeError:
-                    pass
-            chart_data['taxa_count'].append(taxa_count)
-            chart_data['sass_score'].append(sass_score)
-            chart_data['aspt_score'].append(aspt)
+            chart_data['taxa_count'].append(score.taxa_count)
+            chart_data['sass_score'].append(score.sass_score)
+            chart_data['aspt_score'].append(round(score.aspt, 2))
             chart_data['date'].append(
-                latest_site_visit.site_visit_date.strftime('%Y-%m-%d')
+                latest_site_visit['site_visit_date'].strftime('%Y-%m-%d')
             )
             chart_data['number_assessments'].append(
-                site_visit.count()
+                len(site_visit)
             )
         return chart_data
 
@@ -328,15 +295,15 @@ class SassDashboardMultipleSitesApiView(APIView):
         all_chart_data = []
         max_charts = 4
 
-        eco_geo_data = LocationContext.objects.filter(
-                site__in=list(self.location_sites)
-        ).distinct('site__id', 'value', 'fetch_time')
+        eco_regions = LocationContext.objects.filter(
+            site__in=[site.id for site in self.location_sites]
+        ).site_values_from_key(
+            layer_name='SA Ecoregion Level 1',
+        )
+        geo_classes = get_geomorphological_zone_classes(self.location_sites)
         unique_eco_geo = {}
         for site in self.location_sites:
-            eco_region = eco_geo_data.filter(
-                site=site).value_from_key(
-                layer_name='SA Ecoregion Level 1',
-            )
+            eco_region = eco_regions.get(site.id, '-')
             if eco_region == '-':
                 layer_name = 'SA Ecoregion Level 1'
                 eco_region = get_feature_data(
@@ -347,7 +314,7 @@ class SassDashboardMultipleSitesApiView(APIView):
                     tolerance=preferences.GeocontextSetting.tolerance,
                     location_site=site
                 )
-            geo_class = get_geomorphological_zone_class(site)
+            geo_class = geo_classes[site.id]
             if (eco_region, geo_class) not in unique_eco_geo:
                 unique_eco_geo[(eco_region, geo_class)] = [site.id]
             else:
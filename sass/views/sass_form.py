@@ -4,7 +4,6 @@ import uuid
 from datetime import datetime as libdatetime
 
 from django.utils.safestring import mark_safe
-from django_tenants.utils import get_tenant
 from preferences import preferences
 
 from bims.models.biological_collection_record import BiologicalCollectionRecord
@@ -51,10 +50,8 @@ from sass.models import (
     Rate,
     SassBiotopeFraction
 )
+from sass.models.site_visit_score import update_site_visit_scores
 from bims.views.mixin.session_form.mixin import SessionFormMixin
-from bims.utils.search_process import (
-    clear_finished_search_process, clear_finished_search_in_background
-)
 
 from bims.enums import TaxonomicGroupCategory
 from bims.models.notification import get_recipients_for_notification, SASS_CREATED
@@ -443,6 +440,7 @@ class SassFormView(UserPassesTestMixin, TemplateView, SessionFormMixin):
             self.request.POST,
             date,
             survey)
+        update_site_visit_scores([site_visit.id])
 
         # upload site image
         for img_file in self.request.FILES.getlist('site-images'):
@@ -509,8 +507,6 @@ class SassFormView(UserPassesTestMixin, TemplateView, SessionFormMixin):
                 next=next_url
             )
 
-        clear_finished_search_in_background(get_tenant(request))
-
         if not survey_created:
             link = f'<a href="/sass/view/{site_visit.id}/" target="_blank">View details</a>'
             messages.success(
@@ -868,6 +864,4 @@ class SassDeleteView(UserPassesTestMixin, View):
             site_visit.location_site.id
         )
 
-        clear_finished_search_in_background(get_tenant(request))
-
         return HttpResponseRedirect(redirect_url)